@@ -0,0 +1,295 @@
+"""
+Asyncio video API client.
+
+Mirrors :mod:`app.api.video_api_client` on top of ``aiohttp`` so hundreds of
+notifications can be in flight on a single event loop. Requires the optional
+``aiohttp`` dependency (``pip install .[async]``).
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from app.api.circuit_breaker import (
+    CircuitBreaker,
+    get_circuit_breaker,
+    is_failure_status,
+)
+from app.api.latency import async_hedged, record_latency, request_timeout
+from app.api.load_balancer import get_load_balancer
+from app.api.rate_limiter import get_rate_limiter
+from app.api.video_api_client import (
+    _auth_headers,
+    _task_status_payload,
+    _video_record_payload,
+    _worker_status_payload,
+)
+from app.auth.async_cognito_auth import async_get_m2m_token
+from app.config import config
+from app.metrics import track_api_call
+
+logger = logging.getLogger(__name__)
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """
+    Return the pooled aiohttp session bound to the running event loop.
+
+    Returns:
+        aiohttp.ClientSession: Session shared by all async API calls on this loop
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # A pool of ASYNC_HTTP_LIMIT connections per API instance
+        instances = len(config.video_api_base_urls)
+        # aiohttp caches DNS answers itself; DNS_CACHE_TTL only overrides its TTL
+        dns_cache = {"ttl_dns_cache": config.DNS_CACHE_TTL} if config.DNS_CACHE_TTL > 0 else {}
+        connector = aiohttp.TCPConnector(
+            limit=config.ASYNC_HTTP_LIMIT * instances,
+            limit_per_host=config.ASYNC_HTTP_LIMIT if instances > 1 else 0,
+            keepalive_timeout=config.ASYNC_HTTP_KEEPALIVE_SECONDS,
+            **dns_cache,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.API_TIMEOUT_SECONDS),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the session bound to the running event loop, if any."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def _breaker_call(breaker: Optional[CircuitBreaker], method: str, *args: Any) -> Any:
+    """Call ``method`` of the circuit breaker, in a thread if it talks to Redis."""
+    if breaker is None:
+        return None
+    if breaker.blocking_io:
+        return await asyncio.to_thread(getattr(breaker, method), *args)
+    return getattr(breaker, method)(*args)
+
+
+async def _request_json(
+    endpoint: str,
+    method: str,
+    path: str,
+    payload: Dict[str, Any],
+    headers: Dict[str, str],
+    rate_limit_wait: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Send a JSON request to a video API instance, record its latency and return the decoded JSON body.
+
+    Raises:
+        RateLimitExceededError: If no rate limit token is available in time
+        CircuitOpenError: If the circuit breaker rejects the call
+    """
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        await limiter.async_acquire(endpoint, max_wait=rate_limit_wait)
+
+    breaker = get_circuit_breaker()
+    probe = await _breaker_call(breaker, "before_call")
+    try:
+        session = get_async_session()
+        timeout = aiohttp.ClientTimeout(total=request_timeout(endpoint))
+        balancer = get_load_balancer()
+        instance = balancer.acquire() if balancer is not None else None
+        base_url = instance.base_url if instance is not None else config.video_api_base_urls[0]
+        answered_after: Optional[float] = None
+        failed = False
+        started = time.perf_counter()
+        try:
+            with track_api_call(endpoint) as call:
+                async with session.request(
+                    method, f"{base_url}{path}", json=payload, headers=headers, timeout=timeout
+                ) as response:
+                    answered_after = time.perf_counter() - started
+                    record_latency(endpoint, answered_after)
+                    call.status_code = response.status
+                    failed = is_failure_status(response.status)
+                    await _breaker_call(breaker, "record_failure" if failed else "record_success")
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            failed = True
+            record_latency(endpoint, time.perf_counter() - started)
+            await _breaker_call(breaker, "record_failure")
+            raise
+        except aiohttp.ClientConnectionError:
+            failed = True
+            await _breaker_call(breaker, "record_failure")
+            raise
+        finally:
+            if balancer is not None:
+                balancer.release(instance, answered_after, failed)
+    finally:
+        # Also when the call is cancelled (e.g. the losing request of a hedge)
+        await _breaker_call(breaker, "release", probe)
+
+
+async def async_call_video_task_status_api(
+    task_id: str,
+    status: Optional[str] = None,
+    render_status: Optional[str] = None,
+    progress: Optional[float] = None,
+    message: Optional[str] = None,
+    video_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Async version of :func:`app.api.video_api_client.call_video_task_status_api`.
+
+    Returns:
+        bool: True if API call succeeded, False otherwise
+    """
+    m2m_token = await async_get_m2m_token(get_async_session())
+    if not m2m_token:
+        logger.warning("Failed to obtain M2M token, skipping API call")
+        return False
+
+    try:
+        path = f"/api/video-tasks/{task_id}/status"
+        payload = _task_status_payload(
+            status=status,
+            render_status=render_status,
+            progress=progress,
+            message=message,
+            video_id=video_id,
+            extra=extra,
+        )
+
+        logger.info(f"Calling video task status API: {path} with payload: {payload}")
+
+        headers = _auth_headers(m2m_token)
+        # Idempotent: a slow PUT may be hedged; the hedge never waits for a rate limit token
+        result = await async_hedged(
+            "task_status",
+            lambda: _request_json("task_status", "PUT", path, payload, headers),
+            lambda: _request_json("task_status", "PUT", path, payload, headers, rate_limit_wait=0),
+        )
+        if result.get("success"):
+            logger.info(f"Successfully updated task status via API for task_id: {task_id}")
+            return True
+        else:
+            logger.error(f"API returned success=False: {result.get('error')}")
+            return False
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Failed to call video task status API: {e!s}", exc_info=True)
+        return False
+
+
+async def async_create_video_record(
+    task_id: str,
+    oss_url: str,
+    video_name: Optional[str] = None,
+    resolution: Optional[str] = None,
+    framerate: Optional[str] = None,
+    duration: Optional[float] = None,
+    file_size: Optional[int] = None,
+    thumbnail_url: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Async version of :func:`app.api.video_api_client.create_video_record`.
+
+    Returns:
+        bool: True if API call succeeded, False otherwise
+    """
+    m2m_token = await async_get_m2m_token(get_async_session())
+    if not m2m_token:
+        logger.warning("Failed to obtain M2M token, skipping API call")
+        return False
+
+    try:
+        path = "/api/videos/create"
+        payload = _video_record_payload(
+            task_id=task_id,
+            oss_url=oss_url,
+            video_name=video_name,
+            resolution=resolution,
+            framerate=framerate,
+            duration=duration,
+            file_size=file_size,
+            thumbnail_url=thumbnail_url,
+            extra=extra,
+        )
+
+        logger.info(f"Creating video record via API: {path}")
+
+        result = await _request_json("video_create", "POST", path, payload, _auth_headers(m2m_token))
+        if result.get("success"):
+            logger.info(f"Successfully created video record via API for task_id: {task_id}")
+            return True
+        else:
+            logger.error(f"API returned success=False: {result.get('error')}")
+            return False
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Failed to call video creation API: {e!s}", exc_info=True)
+        return False
+
+
+async def async_report_worker_status(
+    worker_name: str,
+    hostname: Optional[str],
+    is_available: bool = True,
+    task_id: Optional[str] = None,
+    error_message: Optional[str] = None,
+    traceback: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Async version of :func:`app.api.video_api_client.report_worker_status`."""
+
+    m2m_token = await async_get_m2m_token(get_async_session())
+    if not m2m_token:
+        logger.warning("Failed to obtain M2M token, skipping worker status report")
+        return False
+
+    try:
+        path = "/api/worker-status"
+        payload = _worker_status_payload(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
+
+        logger.info("Reporting worker status via API: %s", payload)
+
+        result = await _request_json("worker_status", "POST", path, payload, _auth_headers(m2m_token))
+        if result.get("success"):
+            logger.info(
+                "Successfully reported worker status for %s (available=%s)",
+                worker_name,
+                is_available,
+            )
+            return True
+        else:
+            logger.error(
+                "Worker status API returned success=False: %s",
+                result.get("error"),
+            )
+            return False
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Failed to report worker status: {e!s}", exc_info=True)
+        return False
@@ -0,0 +1,369 @@
+"""
+Circuit breaker around the video API.
+
+When the video API degrades, every call would otherwise hold a worker slot
+until its timeout. After ``CIRCUIT_BREAKER_FAILURE_THRESHOLD`` consecutive
+failures (connection errors, timeouts, 5xx and 429 responses) the circuit
+opens and calls fail immediately with :class:`CircuitOpenError`, which
+tasks turn into a deferred retry. After ``CIRCUIT_BREAKER_RESET_SECONDS``
+the circuit becomes half-open: a few probe calls are let through and the
+circuit closes again once ``CIRCUIT_BREAKER_HALF_OPEN_SUCCESSES`` of them
+have succeeded; any failed probe reopens it. Callers pass the probe token
+returned by :meth:`CircuitBreaker.before_call` to
+:meth:`CircuitBreaker.release` whatever the outcome of the call (including
+cancellation), so a probe slot is never leaked.
+
+The state lives in the worker process by default; with
+``CIRCUIT_BREAKER_STORE=redis`` all workers share one circuit.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from app.api.errors import RetryLaterError
+from app.config import config
+from app.metrics import record_circuit_event
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RetryLaterError):
+    """Raised instead of calling the video API while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open, retry in {retry_after:.1f}s", retry_after)
+        self.name = name
+
+    def __reduce__(self):
+        return self.__class__, (self.name, self.retry_after)
+
+
+class CircuitBreaker:
+    """Circuit breaker whose state is kept in the current process."""
+
+    # Whether admitting and recording calls does network I/O (async callers run it in a thread)
+    blocking_io = False
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 2,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._successes = 0
+        # Bumped on every half-open period, so late releases of older probes are ignored
+        self._generation = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self) -> Optional[Any]:
+        """
+        Admit a call or reject it.
+
+        Returns:
+            A probe token if the call took a half-open probe slot, else None;
+            pass it to :meth:`release` once the call is over
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all
+                probe slots taken
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return None
+            if self._state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self._reject(remaining)
+                self._transition(HALF_OPEN)
+                self._probes = 0
+                self._successes = 0
+                self._generation += 1
+            if self._probes >= self.half_open_max_calls:
+                self._reject(self.reset_timeout / 2)
+            self._probes += 1
+            return self._generation
+
+    def release(self, probe: Optional[Any]) -> None:
+        """Free the probe slot taken by :meth:`before_call`, whatever the call's outcome."""
+        if probe is None:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN and probe == self._generation:
+                self._probes = max(0, self._probes - 1)
+
+    def record_success(self) -> None:
+        """Record a call that reached the API and got a healthy answer."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._transition(CLOSED)
+                    self._failures = 0
+            else:
+                self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call (connection error, timeout, 5xx or 429)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+            elif self._state == CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open()
+
+    def _open(self) -> None:
+        self._transition(OPEN)
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        self._successes = 0
+
+    def _transition(self, state: str) -> None:
+        if state != self._state:
+            logger.warning(f"Circuit {self.name} {self._state} -> {state}")
+            self._state = state
+            record_circuit_event(state)
+
+    def _reject(self, retry_after: float) -> None:
+        record_circuit_event("rejected")
+        raise CircuitOpenError(self.name, retry_after)
+
+
+class RedisCircuitBreaker(CircuitBreaker):
+    """
+    Circuit breaker shared by every worker connected to the same Redis.
+
+    Transitions run as Lua scripts so concurrent workers agree on the state.
+    While the circuit is closed and this process has seen no failure, the
+    state is cached for ``sync_interval`` seconds so healthy calls do not pay
+    a Redis round trip each.
+    """
+
+    blocking_io = True
+
+    # KEYS[1]=state hash; ARGV: now, reset_timeout, half_open_max_calls
+    # Returns {admitted (0/1), retry_after, state, probe token ("" if no probe slot)}
+    _ADMIT_SCRIPT = """
+    local state = redis.call("hget", KEYS[1], "state") or "closed"
+    local now = tonumber(ARGV[1])
+    if state == "closed" then
+        return {1, "0", state, ""}
+    end
+    if state == "open" then
+        local opened_at = tonumber(redis.call("hget", KEYS[1], "opened_at") or "0")
+        local remaining = opened_at + tonumber(ARGV[2]) - now
+        if remaining > 0 then
+            return {0, tostring(remaining), state, ""}
+        end
+        redis.call("hset", KEYS[1], "state", "half_open", "probes", 0, "successes", 0,
+                   "half_open_since", ARGV[1])
+        state = "half_open"
+    end
+    local probes = redis.call("hincrby", KEYS[1], "probes", 1)
+    if probes > tonumber(ARGV[3]) then
+        redis.call("hincrby", KEYS[1], "probes", -1)
+        return {0, tostring(tonumber(ARGV[2]) / 2), state, ""}
+    end
+    return {1, "0", state, redis.call("hget", KEYS[1], "half_open_since")}
+    """
+
+    # KEYS[1]=state hash; ARGV: probe token (start of the half-open period it was taken in)
+    _RELEASE_SCRIPT = """
+    if redis.call("hget", KEYS[1], "state") == "half_open"
+            and redis.call("hget", KEYS[1], "half_open_since") == ARGV[1]
+            and tonumber(redis.call("hget", KEYS[1], "probes") or "0") > 0 then
+        redis.call("hincrby", KEYS[1], "probes", -1)
+    end
+    return 0
+    """
+
+    # KEYS[1]=state hash; ARGV: success (0/1), now, failure_threshold, success_threshold, key ttl
+    # Returns the resulting state
+    _RECORD_SCRIPT = """
+    local state = redis.call("hget", KEYS[1], "state") or "closed"
+    if ARGV[1] == "1" then
+        if state == "half_open" then
+            if redis.call("hincrby", KEYS[1], "successes", 1) >= tonumber(ARGV[4]) then
+                redis.call("del", KEYS[1])
+                return "closed"
+            end
+        elseif state == "closed" then
+            redis.call("hset", KEYS[1], "failures", 0)
+        end
+    elseif state == "half_open" or (state == "closed"
+            and redis.call("hincrby", KEYS[1], "failures", 1) >= tonumber(ARGV[3])) then
+        redis.call("hset", KEYS[1], "state", "open", "opened_at", ARGV[2], "failures", 0,
+                   "probes", 0, "successes", 0)
+        state = "open"
+    end
+    redis.call("expire", KEYS[1], ARGV[5])
+    return state
+    """
+
+    def __init__(self, name: str, url: str, key: str, sync_interval: float = 1.0, **kwargs):
+        import redis
+
+        super().__init__(name, **kwargs)
+        self._client = redis.Redis.from_url(url)
+        self._key = key
+        self._sync_interval = sync_interval
+        self._synced_at = 0.0
+        self._dirty = False
+        self._redis_error = redis.RedisError
+        self._admit = self._client.register_script(self._ADMIT_SCRIPT)
+        self._record = self._client.register_script(self._RECORD_SCRIPT)
+        self._release = self._client.register_script(self._RELEASE_SCRIPT)
+
+    def before_call(self) -> Optional[Any]:
+        with self._lock:
+            if self._state == CLOSED and time.monotonic() - self._synced_at < self._sync_interval:
+                return None
+        try:
+            admitted, retry_after, state, probe = self._admit(
+                keys=[self._key],
+                args=[repr(time.time()), self.reset_timeout, self.half_open_max_calls],
+            )
+        except self._redis_error as e:
+            # Never block API calls on the breaker's own storage
+            logger.warning(f"Circuit {self.name} state unavailable, admitting call: {e!s}")
+            return None
+        self._sync(state)
+        if not int(admitted):
+            self._reject(float(retry_after))
+        return probe or None
+
+    def release(self, probe: Optional[Any]) -> None:
+        if probe is None:
+            return
+        try:
+            self._release(keys=[self._key], args=[probe])
+        except self._redis_error as e:
+            # The slot is freed when the half-open period ends
+            logger.warning(f"Circuit {self.name} failed to release probe slot: {e!s}")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == CLOSED and not self._dirty:
+                return
+        self._record_outcome(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._dirty = True
+        self._record_outcome(False)
+
+    def _record_outcome(self, success: bool) -> None:
+        try:
+            state = self._record(
+                keys=[self._key],
+                args=[
+                    "1" if success else "0",
+                    time.time(),
+                    self.failure_threshold,
+                    self.success_threshold,
+                    max(60, int(self.reset_timeout * 10)),
+                ],
+            )
+        except self._redis_error as e:
+            logger.warning(f"Circuit {self.name} failed to record call outcome: {e!s}")
+            return
+        self._sync(state)
+        if success:
+            with self._lock:
+                self._dirty = False
+
+    def _sync(self, state) -> None:
+        state = state.decode() if isinstance(state, bytes) else state
+        with self._lock:
+            self._transition(state)
+            self._synced_at = time.monotonic()
+
+
+def create_circuit_breaker() -> Optional[CircuitBreaker]:
+    """
+    Build the video API circuit breaker from configuration.
+
+    Returns:
+        CircuitBreaker, or None if CIRCUIT_BREAKER_ENABLED is false
+    """
+    if not config.CIRCUIT_BREAKER_ENABLED:
+        return None
+
+    name = "video_api"
+    options = {
+        "failure_threshold": config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        "reset_timeout": config.CIRCUIT_BREAKER_RESET_SECONDS,
+        "half_open_max_calls": config.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        "success_threshold": config.CIRCUIT_BREAKER_HALF_OPEN_SUCCESSES,
+    }
+
+    backend = config.CIRCUIT_BREAKER_STORE.lower()
+    if backend == "redis":
+        url = config.CIRCUIT_BREAKER_STORE_URL or config.CELERY_BROKER_URL
+        if url:
+            key = f"{config.APP_NAME}:circuit:{name}:{','.join(config.video_api_base_urls)}"
+            return RedisCircuitBreaker(name, url, key, **options)
+        logger.error("CIRCUIT_BREAKER_STORE=redis requires CIRCUIT_BREAKER_STORE_URL or CELERY_BROKER_URL")
+    elif backend not in ("", "memory"):
+        logger.error(f"Unknown CIRCUIT_BREAKER_STORE backend: {config.CIRCUIT_BREAKER_STORE}")
+
+    return CircuitBreaker(name, **options)
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_pid: Optional[int] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Return this process' video API circuit breaker (None if disabled)."""
+    global _breaker, _breaker_pid
+
+    pid = os.getpid()
+    if _breaker_pid == pid:
+        return _breaker
+    with _breaker_lock:
+        if _breaker_pid != pid:
+            _breaker = create_circuit_breaker()
+            _breaker_pid = pid
+        return _breaker
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Whether a response status means the API itself is unhealthy."""
+    return status_code >= 500 or status_code == 429
+
+
+def _reset_after_fork() -> None:
+    global _breaker, _breaker_pid, _breaker_lock
+
+    _breaker = None
+    _breaker_pid = None
+    _breaker_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
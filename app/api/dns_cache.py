@@ -0,0 +1,109 @@
+"""
+Per-process DNS cache with a TTL.
+
+Every new connection to the video API or Cognito starts with a
+``getaddrinfo`` lookup, which can take as long as the request itself.
+:func:`install_dns_cache` wraps ``socket.getaddrinfo`` so answers for those
+hosts are kept for ``DNS_CACHE_TTL`` seconds; ``requests`` resolves through
+it. Lookups of any other host (the broker, Redis, ...) go straight to the
+resolver, failed lookups are not cached and expired answers are dropped.
+
+The cache is opt-in (``DNS_CACHE_TTL`` defaults to 0) and only installed by
+the warm-up (see :mod:`app.warmup`). Children forked after installation
+inherit it, so hosts resolved by the warm-up of the parent are not looked
+up again.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class DnsCache:
+    """
+    Answers of a ``getaddrinfo`` function for ``hosts``, kept for ``ttl`` seconds.
+
+    Other hosts are resolved on every lookup.
+    """
+
+    def __init__(self, ttl: float, resolve: Callable[..., List[Any]], hosts: Iterable[str] = ()):
+        self.ttl = ttl
+        self.resolve = resolve
+        self.hosts: Set[str] = set(hosts)
+        self._lock = threading.Lock()
+        # lookup arguments -> (expires_at, answer)
+        self._entries: Dict[Tuple[Any, ...], Tuple[float, List[Any]]] = {}
+
+    def getaddrinfo(self, host: Any, port: Any, family: int = 0, type: int = 0, proto: int = 0,
+                    flags: int = 0) -> List[Any]:
+        if host not in self.hosts:
+            return self.resolve(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return list(entry[1])
+        answer = self.resolve(host, port, family, type, proto, flags)
+        with self._lock:
+            for expired in [lookup for lookup, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[expired]
+            self._entries[key] = (now + self.ttl, answer)
+        return list(answer)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def reset_lock(self) -> None:
+        self._lock = threading.Lock()
+
+
+_cache: Optional[DnsCache] = None
+
+
+def install_dns_cache(hosts: Iterable[str], ttl: Optional[float] = None) -> Optional[DnsCache]:
+    """
+    Route this process' ``socket.getaddrinfo`` through the cache (once) and
+    cache the answers for ``hosts``.
+
+    Returns:
+        The installed DnsCache, or None if the TTL is 0
+    """
+    global _cache
+
+    ttl = config.DNS_CACHE_TTL if ttl is None else ttl
+    if ttl <= 0:
+        return None
+    if _cache is None:
+        _cache = DnsCache(ttl, socket.getaddrinfo)
+        socket.getaddrinfo = _cache.getaddrinfo
+        logger.debug(f"Caching DNS lookups for {ttl:.0f}s")
+    _cache.hosts.update(hosts)
+    return _cache
+
+
+def uninstall_dns_cache() -> None:
+    """Restore the original ``socket.getaddrinfo``."""
+    global _cache
+
+    if _cache is not None:
+        socket.getaddrinfo = _cache.resolve
+        _cache = None
+
+
+def _reset_after_fork() -> None:
+    # Keep the inherited answers, but not a lock some parent thread may hold
+    if _cache is not None:
+        _cache.reset_lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,16 @@
+"""
+Errors raised by the video API clients.
+"""
+
+
+class RetryLaterError(Exception):
+    """
+    The call was not made because the API must not be called right now.
+
+    Callers should defer the work (e.g. retry the task) for at least
+    ``retry_after`` seconds rather than treat it as a failure.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,111 @@
+"""
+Per-process pooled HTTP session for outbound API calls.
+
+Each worker process owns a single ``requests.Session`` with a keep-alive
+connection pool, so repeated calls to the video API reuse TCP/TLS
+connections instead of handshaking on every notification. The session is
+never shared across ``fork()``: children drop the inherited instance and
+build their own on first use (or eagerly from ``worker_process_init``).
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a sized keep-alive pool for http and https (one per API instance)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=config.HTTP_POOL_MAXSIZE,
+        pool_block=config.HTTP_POOL_BLOCK,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if len(config.video_api_base_urls) > 1:
+        # Every API instance gets a pool of its own, so a stalled one cannot hold the others' connections
+        for base_url in config.video_api_base_urls:
+            session.mount(f"{base_url}/", HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                pool_block=config.HTTP_POOL_BLOCK,
+            ))
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the pooled session for the current process.
+
+    The session is created lazily and rebuilt if the current PID differs
+    from the one that created it, so a forked child never writes to a
+    socket owned by its parent.
+
+    Returns:
+        requests.Session: Session shared by all API calls in this process
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+            logger.debug(
+                "Created HTTP session for pid %s (pool_maxsize=%s)",
+                pid,
+                config.HTTP_POOL_MAXSIZE,
+            )
+        return _session
+
+
+def init_session() -> requests.Session:
+    """
+    Eagerly (re)create the session for the current process.
+
+    Intended to be called from Celery's ``worker_process_init`` signal
+    after the prefork child has been forked.
+    """
+    close_session()
+    return get_session()
+
+
+def close_session() -> None:
+    """Close the current process' session and release pooled connections."""
+    global _session, _session_pid
+
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def _reset_after_fork() -> None:
+    """Forget the parent's session and lock in a freshly forked child."""
+    global _session, _session_pid, _lock
+
+    _session = None
+    _session_pid = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,222 @@
+"""
+Latency-aware timeouts and hedged requests for the video API.
+
+The duration of the last ``API_LATENCY_WINDOW`` calls to each endpoint is
+kept per process. Once an endpoint has ``API_LATENCY_MIN_SAMPLES`` of them,
+its requests time out after ``API_TIMEOUT_MULTIPLIER`` times the
+``API_TIMEOUT_PERCENTILE`` latency (between ``API_TIMEOUT_MIN_SECONDS`` and
+``API_TIMEOUT_SECONDS``) instead of waiting the full fixed timeout on a
+stalled backend instance. Timed-out calls are kept with the duration they
+waited, so when the whole API slows down the percentile, and with it the
+timeout, follows within a few calls.
+
+Idempotent calls (the task status PUT) can be hedged with
+``API_HEDGE_ENABLED``: if the request is still unanswered after the
+endpoint's ``API_HEDGE_PERCENTILE`` latency, the same request is sent again
+and whichever answers first is used. Hedges are paid from a budget refilled
+by ``API_HEDGE_BUDGET_PERCENT`` of a token per hedgeable call (holding at
+most ``API_HEDGE_BUDGET_BURST``), so a slow API never sees more than that
+share of extra load.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from app.config import config
+from app.metrics import record_hedge
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent call durations per endpoint, safe to update from several threads."""
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, endpoint: str, percent: float) -> Optional[float]:
+        """
+        Latency under which ``percent`` % of the recent calls to ``endpoint`` finished.
+
+        Returns:
+            Seconds, or None until the endpoint has enough samples
+        """
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        rank = math.ceil(percent / 100.0 * len(ordered))
+        return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+class HedgeBudget:
+    """Tokens for hedged requests, earned as a fraction of the hedgeable calls."""
+
+    def __init__(self, percent: float, burst: int):
+        self.ratio = max(0.0, percent) / 100.0
+        self.burst = max(1, burst)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+_tracker = LatencyTracker(config.API_LATENCY_WINDOW, config.API_LATENCY_MIN_SAMPLES)
+_budget = HedgeBudget(config.API_HEDGE_BUDGET_PERCENT, config.API_HEDGE_BUDGET_BURST)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def record_latency(endpoint: str, seconds: float) -> None:
+    """Record the duration of a call to ``endpoint`` that was answered or timed out."""
+    _tracker.record(endpoint, seconds)
+
+
+def request_timeout(endpoint: str) -> float:
+    """Timeout in seconds for the next request to ``endpoint``."""
+    ceiling = config.API_TIMEOUT_SECONDS
+    if not config.API_ADAPTIVE_TIMEOUT_ENABLED:
+        return ceiling
+    latency = _tracker.percentile(endpoint, config.API_TIMEOUT_PERCENTILE)
+    if latency is None:
+        return ceiling
+    return max(config.API_TIMEOUT_MIN_SECONDS, min(ceiling, latency * config.API_TIMEOUT_MULTIPLIER))
+
+
+def hedge_delay(endpoint: str) -> Optional[float]:
+    """Seconds after which a request to ``endpoint`` is hedged (None = not hedged)."""
+    if not config.API_HEDGE_ENABLED:
+        return None
+    return _tracker.percentile(endpoint, config.API_HEDGE_PERCENTILE)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is not None and _executor_pid == pid:
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            # Room for a request and its hedge on every pooled connection
+            _executor = ThreadPoolExecutor(
+                max_workers=2 * max(1, config.HTTP_POOL_MAXSIZE), thread_name_prefix="api-hedge"
+            )
+            _executor_pid = pid
+        return _executor
+
+
+def hedged(endpoint: str, attempt: Callable[[], T], hedge: Optional[Callable[[], T]] = None) -> T:
+    """
+    Run ``attempt``, sending ``hedge`` (default: ``attempt`` again) if it is slow.
+
+    Only for idempotent requests. The first attempt to return wins; an
+    exception is only raised once both have failed (the first attempt's).
+    The losing request is left to finish in the background.
+    """
+    delay = hedge_delay(endpoint)
+    if delay is None:
+        return attempt()
+    _budget.record_request()
+
+    executor = _get_executor()
+    primary = executor.submit(attempt)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeoutError:
+        pass
+    if not _budget.try_spend():
+        record_hedge(endpoint, "denied")
+        return primary.result()
+
+    record_hedge(endpoint, "sent")
+    second = executor.submit(hedge or attempt)
+    pending = {primary, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    record_hedge(endpoint, "won")
+                return future.result()
+    return primary.result()
+
+
+async def async_hedged(
+    endpoint: str,
+    attempt: Callable[[], Awaitable[T]],
+    hedge: Optional[Callable[[], Awaitable[T]]] = None,
+) -> T:
+    """Coroutine version of :func:`hedged`; the losing request is cancelled."""
+    delay = hedge_delay(endpoint)
+    if delay is None:
+        return await attempt()
+    _budget.record_request()
+
+    primary = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    if not _budget.try_spend():
+        record_hedge(endpoint, "denied")
+        return await primary
+
+    record_hedge(endpoint, "sent")
+    second = asyncio.ensure_future((hedge or attempt)())
+    pending = {primary, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        record_hedge(endpoint, "won")
+                    return future.result()
+        return primary.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _reset_after_fork() -> None:
+    global _tracker, _budget, _executor, _executor_pid, _executor_lock
+
+    _tracker = LatencyTracker(config.API_LATENCY_WINDOW, config.API_LATENCY_MIN_SAMPLES)
+    _budget = HedgeBudget(config.API_HEDGE_BUDGET_PERCENT, config.API_HEDGE_BUDGET_BURST)
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
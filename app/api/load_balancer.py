@@ -0,0 +1,242 @@
+"""
+Client-side load balancing across several video API instances.
+
+With ``VIDEO_API_BASE_URLS`` listing more than one instance (or region),
+every call picks its instance here instead of going through a separate
+load balancer:
+
+- ``least_outstanding``: the instance with the fewest requests in flight
+  from this process
+- ``ewma``: the lowest moving average of response time multiplied by the
+  requests in flight (an instance that has not answered yet counts as fast,
+  so it gets tried)
+
+Ties are broken at random. An instance that fails ``VIDEO_API_EJECT_FAILURES``
+calls in a row (connection errors, timeouts, 5xx and 429 responses) is
+ejected, and so is one failing its health check (``GET
+VIDEO_API_HEALTH_PATH``, probed every ``VIDEO_API_HEALTH_INTERVAL`` seconds
+in a background thread). Ejected instances get no calls until a health check
+passes again. If every instance is ejected, calls are spread over all of
+them rather than refused; the circuit breaker decides whether the API as a
+whole is down.
+
+Each instance gets its own keep-alive pool in the HTTP session (see
+:mod:`app.api.http_session`).
+"""
+
+import logging
+import os
+import random
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import requests
+
+from app.api.http_session import get_session
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least_outstanding", "ewma")
+
+# Weight of the newest response time in an instance's moving average
+_EWMA_ALPHA = 0.3
+
+
+class ApiInstance:
+    """One video API base URL and what this process knows about it."""
+
+    __slots__ = ("base_url", "consecutive_failures", "ejected", "latency", "outstanding")
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected = False
+
+    def score(self, strategy: str) -> float:
+        if strategy == "ewma":
+            return (self.latency or 0.0) * (self.outstanding + 1)
+        return float(self.outstanding)
+
+
+class LoadBalancer:
+    """Pick video API instances for calls and track their health."""
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        strategy: str = "least_outstanding",
+        eject_failures: int = 3,
+        health_path: str = "/health",
+        health_interval: float = 5.0,
+    ):
+        if strategy not in STRATEGIES:
+            logger.error(f"Unknown VIDEO_API_BALANCER strategy: {strategy}, using least_outstanding")
+            strategy = "least_outstanding"
+        self.instances = [ApiInstance(url) for url in base_urls]
+        self.base_urls = tuple(base_urls)
+        self.strategy = strategy
+        self.eject_failures = max(1, eject_failures)
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def available(self) -> List[ApiInstance]:
+        """Instances currently taking calls."""
+        return [instance for instance in self.instances if not instance.ejected]
+
+    def acquire(self) -> ApiInstance:
+        """Pick the instance for a call and count it as in flight; pair with :meth:`release`."""
+        with self._lock:
+            candidates = self.available() or self.instances
+            if len(candidates) == 1:
+                chosen = candidates[0]
+            else:
+                best = min(instance.score(self.strategy) for instance in candidates)
+                chosen = random.choice(
+                    [instance for instance in candidates if instance.score(self.strategy) == best]
+                )
+            chosen.outstanding += 1
+            return chosen
+
+    def release(self, instance: ApiInstance, latency: Optional[float], failed: bool) -> None:
+        """
+        Record the outcome of a call made with :meth:`acquire`.
+
+        Args:
+            instance: The instance that was called
+            latency: Seconds until it answered (None if it did not answer)
+            failed: Whether the instance itself failed the call
+        """
+        with self._lock:
+            instance.outstanding = max(0, instance.outstanding - 1)
+            if latency is not None and not failed:
+                if instance.latency is None:
+                    instance.latency = latency
+                else:
+                    instance.latency += _EWMA_ALPHA * (latency - instance.latency)
+            if not failed:
+                instance.consecutive_failures = 0
+                return
+            instance.consecutive_failures += 1
+            if instance.consecutive_failures >= self.eject_failures:
+                self._eject(instance, f"{instance.consecutive_failures} failed calls in a row")
+
+    def _eject(self, instance: ApiInstance, reason: str) -> None:
+        if not instance.ejected:
+            instance.ejected = True
+            logger.warning(f"Ejected video API instance {instance.base_url}: {reason}")
+
+    def _readmit(self, instance: ApiInstance) -> None:
+        if instance.ejected:
+            instance.ejected = False
+            instance.consecutive_failures = 0
+            # Its old response times say nothing about the recovered instance
+            instance.latency = None
+            logger.info(f"Re-admitted video API instance {instance.base_url}")
+
+    def probe(self, instance: ApiInstance) -> bool:
+        """Whether ``instance`` passes its health check."""
+        try:
+            response = get_session().get(
+                f"{instance.base_url}{self.health_path}", timeout=max(1.0, self.health_interval)
+            )
+        except requests.exceptions.RequestException:
+            return False
+        return response.status_code < 400
+
+    def check_health(self) -> None:
+        """Probe every instance once, ejecting failing ones and re-admitting recovered ones."""
+        for instance in self.instances:
+            if not self.health_path:
+                # Nothing to probe: give ejected instances another chance every interval
+                with self._lock:
+                    self._readmit(instance)
+                continue
+            healthy = self.probe(instance)
+            with self._lock:
+                if healthy:
+                    self._readmit(instance)
+                else:
+                    self._eject(instance, "health check failed")
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.warning(f"Video API health check failed: {e!s}")
+
+    def start(self) -> None:
+        """Start the health checks in a daemon thread."""
+        if self._thread is not None or self.health_interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="video-api-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.health_interval + 5)
+            self._thread = None
+
+
+def create_load_balancer(base_urls: Sequence[str]) -> Optional[LoadBalancer]:
+    """
+    Build the load balancer from configuration.
+
+    Returns:
+        LoadBalancer, or None with a single API instance
+    """
+    if len(base_urls) < 2:
+        return None
+    return LoadBalancer(
+        base_urls,
+        strategy=config.VIDEO_API_BALANCER.lower(),
+        eject_failures=config.VIDEO_API_EJECT_FAILURES,
+        health_path=config.VIDEO_API_HEALTH_PATH,
+        health_interval=config.VIDEO_API_HEALTH_INTERVAL,
+    )
+
+
+_balancer: Optional[LoadBalancer] = None
+_balancer_urls: Optional[Tuple[str, ...]] = None
+_balancer_pid: Optional[int] = None
+_balancer_lock = threading.Lock()
+
+
+def get_load_balancer() -> Optional[LoadBalancer]:
+    """Return this process' load balancer (None with a single API instance), rebuilt when the URLs change."""
+    global _balancer, _balancer_urls, _balancer_pid
+
+    pid = os.getpid()
+    base_urls = tuple(config.video_api_base_urls)
+    if _balancer_pid == pid and _balancer_urls == base_urls:
+        return _balancer
+    with _balancer_lock:
+        if _balancer_pid != pid or _balancer_urls != base_urls:
+            if _balancer is not None and _balancer_pid == pid:
+                _balancer.stop()
+            _balancer = create_load_balancer(base_urls)
+            if _balancer is not None:
+                _balancer.start()
+            _balancer_urls = base_urls
+            _balancer_pid = pid
+        return _balancer
+
+
+def _reset_after_fork() -> None:
+    global _balancer, _balancer_urls, _balancer_pid, _balancer_lock
+
+    _balancer = None
+    _balancer_urls = None
+    _balancer_pid = None
+    _balancer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
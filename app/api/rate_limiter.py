@@ -0,0 +1,241 @@
+"""
+Token-bucket rate limiting of outbound video API calls.
+
+The backend behind ``VIDEO_API_BASE_URL(S)`` has a QPS ceiling. Each logical
+endpoint (task status, video create, worker status) gets its own bucket
+refilled at ``RATE_LIMIT_<ENDPOINT>_QPS`` tokens per second, holding up to
+``RATE_LIMIT_BURST_SECONDS`` worth of tokens. A call takes one token; when
+the bucket is empty the caller waits for the next token, up to
+``RATE_LIMIT_MAX_WAIT_SECONDS``, and otherwise raises
+:class:`RateLimitExceededError` so the task can be deferred.
+
+With ``RATE_LIMIT_STORE=redis`` the buckets are shared by every worker, so
+the limits apply to the whole fleet; the default ``memory`` store limits
+each worker process separately.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.api.errors import RetryLaterError
+from app.config import config
+from app.metrics import record_rate_limit_wait
+
+logger = logging.getLogger(__name__)
+
+# Client endpoint label -> rate limit bucket
+ENDPOINT_BUCKETS = {
+    "task_status": "task_status",
+    "task_status_bulk": "task_status",
+    "video_create": "video_create",
+    "worker_status": "worker_status",
+}
+
+
+class RateLimitExceededError(RetryLaterError):
+    """Raised when no token becomes available within the allowed wait."""
+
+    def __init__(self, bucket: str, retry_after: float):
+        super().__init__(f"Rate limit for {bucket} exceeded, retry in {retry_after:.1f}s", retry_after)
+        self.bucket = bucket
+
+    def __reduce__(self):
+        return self.__class__, (self.bucket, self.retry_after)
+
+
+class RateLimiter:
+    """Token buckets kept in the current process."""
+
+    # Whether taking a token does network I/O (run off the event loop by async_acquire)
+    blocking_io = False
+
+    def __init__(self, rates: Dict[str, float], burst_seconds: float = 1.0):
+        self.rates = {bucket: rate for bucket, rate in rates.items() if rate > 0}
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        # bucket -> (tokens, updated_at)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def capacity(self, bucket: str) -> float:
+        return max(1.0, self.rates[bucket] * self.burst_seconds)
+
+    def try_acquire(self, bucket: str) -> float:
+        """
+        Take a token from ``bucket`` if one is available.
+
+        Returns:
+            float: 0 if a token was taken, else seconds until the next token
+        """
+        rate = self.rates.get(bucket)
+        if rate is None:
+            return 0.0
+        capacity = self.capacity(bucket)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(bucket, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                self._buckets[bucket] = (tokens - 1, now)
+                return 0.0
+            self._buckets[bucket] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def acquire(self, endpoint: str, max_wait: Optional[float] = None) -> None:
+        """
+        Block until a token for ``endpoint`` is available.
+
+        Raises:
+            RateLimitExceededError: If the wait would exceed ``max_wait``
+        """
+        bucket = ENDPOINT_BUCKETS.get(endpoint, endpoint)
+        deadline = time.monotonic() + (config.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait)
+        started = None
+        while True:
+            wait = self._try_acquire_safely(bucket)
+            if wait <= 0:
+                if started is not None:
+                    record_rate_limit_wait(bucket, time.monotonic() - started)
+                return
+            if time.monotonic() + wait > deadline:
+                record_rate_limit_wait(bucket, None)
+                raise RateLimitExceededError(bucket, wait)
+            started = started or time.monotonic()
+            time.sleep(wait)
+
+    async def async_acquire(self, endpoint: str, max_wait: Optional[float] = None) -> None:
+        """Coroutine version of :meth:`acquire` that sleeps on the event loop and talks to Redis in a thread."""
+        bucket = ENDPOINT_BUCKETS.get(endpoint, endpoint)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (config.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait)
+        started = None
+        while True:
+            if self.blocking_io:
+                wait = await asyncio.to_thread(self._try_acquire_safely, bucket)
+            else:
+                wait = self._try_acquire_safely(bucket)
+            if wait <= 0:
+                if started is not None:
+                    record_rate_limit_wait(bucket, loop.time() - started)
+                return
+            if loop.time() + wait > deadline:
+                record_rate_limit_wait(bucket, None)
+                raise RateLimitExceededError(bucket, wait)
+            started = started or loop.time()
+            await asyncio.sleep(wait)
+
+    def _try_acquire_safely(self, bucket: str) -> float:
+        return self.try_acquire(bucket)
+
+
+class RedisRateLimiter(RateLimiter):
+    """Token buckets shared by every worker connected to the same Redis."""
+
+    blocking_io = True
+
+    # KEYS[1]=bucket hash; ARGV: rate, capacity. Returns the wait in seconds ("0" = token taken)
+    _ACQUIRE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local clock = redis.call("time")
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call("hmget", KEYS[1], "tokens", "updated_at")
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call("hset", KEYS[1], "tokens", tostring(tokens), "updated_at", tostring(now))
+    redis.call("pexpire", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str, prefix: str, rates: Dict[str, float], burst_seconds: float = 1.0):
+        import redis
+
+        super().__init__(rates, burst_seconds)
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._redis_error = redis.RedisError
+        self._acquire = self._client.register_script(self._ACQUIRE_SCRIPT)
+
+    def try_acquire(self, bucket: str) -> float:
+        rate = self.rates.get(bucket)
+        if rate is None:
+            return 0.0
+        wait = self._acquire(keys=[f"{self._prefix}:{bucket}"], args=[rate, self.capacity(bucket)])
+        return float(wait)
+
+    def _try_acquire_safely(self, bucket: str) -> float:
+        try:
+            return self.try_acquire(bucket)
+        except self._redis_error as e:
+            # Fall back to this process' share rather than blocking all calls
+            logger.warning(f"Rate limit store unavailable, using local bucket for {bucket}: {e!s}")
+            return super().try_acquire(bucket)
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Build the rate limiter from configuration.
+
+    Returns:
+        RateLimiter, or None if no endpoint has a limit
+    """
+    rates = {
+        "task_status": config.RATE_LIMIT_TASK_STATUS_QPS,
+        "video_create": config.RATE_LIMIT_VIDEO_CREATE_QPS,
+        "worker_status": config.RATE_LIMIT_WORKER_STATUS_QPS,
+    }
+    if not any(rate > 0 for rate in rates.values()):
+        return None
+
+    backend = config.RATE_LIMIT_STORE.lower()
+    if backend == "redis":
+        url = config.RATE_LIMIT_STORE_URL or config.CELERY_BROKER_URL
+        if url:
+            prefix = f"{config.APP_NAME}:rate_limit:{','.join(config.video_api_base_urls)}"
+            return RedisRateLimiter(url, prefix, rates, config.RATE_LIMIT_BURST_SECONDS)
+        logger.error("RATE_LIMIT_STORE=redis requires RATE_LIMIT_STORE_URL or CELERY_BROKER_URL")
+    elif backend not in ("", "memory"):
+        logger.error(f"Unknown RATE_LIMIT_STORE backend: {config.RATE_LIMIT_STORE}")
+
+    return RateLimiter(rates, config.RATE_LIMIT_BURST_SECONDS)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_pid: Optional[int] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return this process' video API rate limiter (None if no limits are set)."""
+    global _limiter, _limiter_pid
+
+    pid = os.getpid()
+    if _limiter_pid == pid:
+        return _limiter
+    with _limiter_lock:
+        if _limiter_pid != pid:
+            _limiter = create_rate_limiter()
+            _limiter_pid = pid
+        return _limiter
+
+
+def _reset_after_fork() -> None:
+    global _limiter, _limiter_pid, _limiter_lock
+
+    _limiter = None
+    _limiter_pid = None
+    _limiter_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
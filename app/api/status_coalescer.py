@@ -0,0 +1,305 @@
+"""
+Worker-side coalescing of render status updates.
+
+Render nodes emit a stream of progress updates for the same task. Instead of
+one ``PUT /api/video-tasks/{task_id}/status`` per message, non-terminal
+updates are buffered for a short window and only the latest state per
+task_id is flushed, through the bulk status endpoint when the server
+supports it.
+
+Terminal updates (COMPLETED / FAILED) always win: they are never buffered,
+they discard any pending progress for their task, and later non-terminal
+updates for the same task are dropped.
+
+Updates the API does not accept, or that find the circuit open, are
+spooled to the outbox like direct sends when it is enabled. Otherwise they
+are put back for the next flush, unless a newer update for the task arrived
+meanwhile, and dropped after ``_MAX_SEND_ATTEMPTS`` failed flushes.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.api.circuit_breaker import CircuitOpenError
+from app.api.errors import RetryLaterError
+from app.api.video_api_client import (
+    BulkStatusUnsupportedError,
+    _task_status_payload,
+    call_video_task_status_api,
+    call_video_task_status_bulk_api,
+)
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_RENDER_STATUSES = frozenset({"COMPLETED", "FAILED"})
+
+# How long / how many terminal task_ids are remembered to drop stale progress
+_TERMINAL_MEMORY_SECONDS = 600
+_TERMINAL_MEMORY_SIZE = 10000
+
+# Failed flushes after which a task's pending update is dropped
+_MAX_SEND_ATTEMPTS = 5
+
+
+class StatusCoalescer:
+    """
+    Buffer status updates per task_id and flush the survivors periodically.
+
+    Thread-safe; a background thread flushes every ``window_seconds`` or as
+    soon as ``max_batch`` distinct tasks are pending.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        max_batch: int = 100,
+        bulk_enabled: bool = False,
+    ):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._bulk_supported = bulk_enabled
+        self._pending: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._terminal: OrderedDict[str, float] = OrderedDict()
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, task_id: str, update: Dict[str, Any]) -> bool:
+        """
+        Offer a status update to the coalescer.
+
+        Args:
+            task_id: Task identifier
+            update: Keyword arguments for :func:`call_video_task_status_api`
+
+        Returns:
+            bool: True if the coalescer took ownership of the update (buffered
+            or dropped as stale), False if the caller must send it directly
+        """
+        is_terminal = update.get("render_status") in TERMINAL_RENDER_STATUSES
+        now = time.monotonic()
+
+        with self._lock:
+            self._prune_terminal(now)
+
+            if is_terminal:
+                self._pending.pop(task_id, None)
+                self._failures.pop(task_id, None)
+                self._terminal[task_id] = now
+                self._terminal.move_to_end(task_id)
+                return False
+
+            if task_id in self._terminal:
+                logger.info(f"Dropping status update for task_id: {task_id} received after terminal state")
+                return True
+
+            self._pending[task_id] = update
+            self._pending.move_to_end(task_id)
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Send all pending updates now.
+
+        Returns:
+            int: Number of task updates flushed
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, OrderedDict()
+
+        updates = [
+            {"task_id": task_id, **update} for task_id, update in pending.items()
+        ]
+        self._send(updates)
+        return len(updates)
+
+    def _send(self, updates: List[Dict[str, Any]]) -> None:
+        remaining = updates
+        while remaining and self._bulk_supported:
+            chunk = remaining[: self.max_batch]
+            bulk_payload = [
+                {"task_id": update["task_id"], **_task_status_payload(**_status_fields(update))}
+                for update in chunk
+            ]
+            try:
+                sent = call_video_task_status_bulk_api(bulk_payload)
+            except BulkStatusUnsupportedError as e:
+                logger.warning(f"Bulk status endpoint unavailable ({e!s}), falling back to per-task updates")
+                self._bulk_supported = False
+                break
+            except RetryLaterError as e:
+                self._deferred(remaining, e)
+                return
+            if sent:
+                self._sent(chunk)
+            else:
+                logger.warning(f"Bulk status update of {len(chunk)} tasks failed")
+                self._undelivered(chunk, "Bulk status call failed")
+            remaining = remaining[self.max_batch:]
+
+        for index, update in enumerate(remaining):
+            try:
+                sent = call_video_task_status_api(task_id=update["task_id"], **_status_fields(update))
+            except RetryLaterError as e:
+                self._deferred(remaining[index:], e)
+                return
+            if sent:
+                self._sent([update])
+            else:
+                self._undelivered([update], "API call failed")
+
+    def _sent(self, updates: List[Dict[str, Any]]) -> None:
+        # app.tasks imports this module: import on first use
+        from app.tasks.outbox import status_delivered
+
+        with self._lock:
+            for update in updates:
+                self._failures.pop(update["task_id"], None)
+        for update in updates:
+            status_delivered(update["task_id"], update)
+
+    def _deferred(self, updates: List[Dict[str, Any]], error: RetryLaterError) -> None:
+        if isinstance(error, CircuitOpenError):
+            self._undelivered(updates, str(error), failed=False)
+            return
+        logger.warning(f"Deferring {len(updates)} coalesced status updates: {error!s}")
+        self._requeue(updates)
+
+    def _undelivered(self, updates: List[Dict[str, Any]], error: str, failed: bool = True) -> None:
+        """Spool updates that were not delivered to the outbox, or keep them for the next flush."""
+        from app.tasks.outbox import STATUS, spool
+
+        unspooled = [update for update in updates if not spool(STATUS, update["task_id"], _status_fields(update), error)]
+        if unspooled:
+            logger.warning(f"{len(unspooled)} coalesced status updates not delivered, retrying at the next flush: {error}")
+            self._requeue(unspooled, failed=failed)
+
+    def _requeue(self, updates: List[Dict[str, Any]], failed: bool = False) -> None:
+        """
+        Put unsent updates back unless newer or terminal ones arrived meanwhile.
+
+        ``failed`` updates (the API did not accept them, as opposed to a
+        deferred call) count towards ``_MAX_SEND_ATTEMPTS``.
+        """
+        with self._lock:
+            for update in updates:
+                task_id = update["task_id"]
+                if task_id in self._pending or task_id in self._terminal:
+                    continue
+                if failed:
+                    self._failures[task_id] = self._failures.get(task_id, 0) + 1
+                    if self._failures[task_id] >= _MAX_SEND_ATTEMPTS:
+                        del self._failures[task_id]
+                        logger.error(
+                            f"Dropping coalesced status update for task_id: {task_id} "
+                            f"after {_MAX_SEND_ATTEMPTS} failed attempts"
+                        )
+                        continue
+                self._pending[task_id] = _status_fields(update)
+
+    def _prune_terminal(self, now: float) -> None:
+        while self._terminal:
+            _task_id, seen_at = next(iter(self._terminal.items()))
+            if now - seen_at < _TERMINAL_MEMORY_SECONDS and len(self._terminal) <= _TERMINAL_MEMORY_SIZE:
+                break
+            self._terminal.popitem(last=False)
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="status-coalescer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and send whatever is still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.window_seconds + 30)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.window_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush coalesced status updates: {e!s}", exc_info=True)
+
+
+def _status_fields(update: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in update.items() if key != "task_id"}
+
+
+_coalescer: Optional[StatusCoalescer] = None
+_coalescer_pid: Optional[int] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_status_coalescer() -> Optional[StatusCoalescer]:
+    """
+    Return this process' coalescer, starting it on first use.
+
+    Returns:
+        StatusCoalescer, or None if STATUS_COALESCE_WINDOW_MS is 0 (disabled)
+    """
+    global _coalescer, _coalescer_pid
+
+    if config.STATUS_COALESCE_WINDOW_MS <= 0:
+        return None
+
+    pid = os.getpid()
+    if _coalescer is not None and _coalescer_pid == pid:
+        return _coalescer
+
+    with _coalescer_lock:
+        if _coalescer is None or _coalescer_pid != pid:
+            _coalescer = StatusCoalescer(
+                window_seconds=config.STATUS_COALESCE_WINDOW_MS / 1000.0,
+                max_batch=config.STATUS_COALESCE_MAX_BATCH,
+                bulk_enabled=config.VIDEO_API_BULK_STATUS_ENABLED,
+            )
+            _coalescer.start()
+            _coalescer_pid = pid
+        return _coalescer
+
+
+def shutdown_status_coalescer() -> None:
+    """Flush and stop this process' coalescer, if one was started."""
+    global _coalescer, _coalescer_pid
+
+    with _coalescer_lock:
+        coalescer = _coalescer if _coalescer_pid == os.getpid() else None
+        _coalescer = None
+        _coalescer_pid = None
+
+    if coalescer is not None:
+        coalescer.stop()
+
+
+def _reset_after_fork() -> None:
+    global _coalescer, _coalescer_pid, _coalescer_lock
+
+    _coalescer = None
+    _coalescer_pid = None
+    _coalescer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -3,16 +3,196 @@ Video API client for calling video management endpoints.
 """
 
 import logging
-import os
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional
 
 import requests
 
+from app.api.circuit_breaker import (
+    CircuitBreaker,
+    get_circuit_breaker,
+    is_failure_status,
+)
+from app.api.http_session import get_session
+from app.api.latency import hedged, record_latency, request_timeout
+from app.api.load_balancer import get_load_balancer
+from app.api.rate_limiter import get_rate_limiter
 from app.auth import get_m2m_token
 from app.config import config
+from app.metrics import track_api_call
 
 logger = logging.getLogger(__name__)
 
+# Status codes meaning the server has no bulk status endpoint
+_BULK_UNSUPPORTED_STATUS_CODES = {404, 405, 501}
+
+
+class BulkStatusUnsupportedError(Exception):
+    """Raised when the video API does not expose the bulk status endpoint."""
+
+
+def _send(
+    endpoint: str, method: str, path: str, rate_limit_wait: Optional[float] = None, **kwargs: Any
+) -> requests.Response:
+    """
+    Issue a request to a video API instance and record its latency.
+
+    The instance is picked by :func:`app.api.load_balancer.get_load_balancer`.
+    Requests time out after :func:`app.api.latency.request_timeout` for the
+    endpoint unless ``timeout`` is given.
+
+    Args:
+        endpoint: Logical endpoint name used as the metrics label
+        method: HTTP method name ("put", "post", ...)
+        path: Request path below the API base URL
+        rate_limit_wait: Longest wait for a rate limit token (default RATE_LIMIT_MAX_WAIT_SECONDS)
+        **kwargs: Passed through to ``requests.Session.request``
+
+    Returns:
+        requests.Response: The raw response
+
+    Raises:
+        RateLimitExceededError: If no rate limit token is available in time
+        CircuitOpenError: If the circuit breaker rejects the call
+    """
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        limiter.acquire(endpoint, max_wait=rate_limit_wait)
+
+    breaker = get_circuit_breaker()
+    probe = breaker.before_call() if breaker is not None else None
+    try:
+        response = _send_to_instance(endpoint, method, path, breaker, **kwargs)
+    finally:
+        if breaker is not None:
+            breaker.release(probe)
+
+    if breaker is not None:
+        if is_failure_status(response.status_code):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    return response
+
+
+def _send_to_instance(
+    endpoint: str, method: str, path: str, breaker: Optional[CircuitBreaker], **kwargs: Any
+) -> requests.Response:
+    """Send the request of :func:`_send` to the instance picked by the load balancer."""
+    kwargs.setdefault("timeout", request_timeout(endpoint))
+    balancer = get_load_balancer()
+    instance = balancer.acquire() if balancer is not None else None
+    base_url = instance.base_url if instance is not None else config.video_api_base_urls[0]
+    answered_after: Optional[float] = None
+    failed = False
+    started = time.perf_counter()
+    try:
+        with track_api_call(endpoint) as call:
+            response = getattr(get_session(), method)(f"{base_url}{path}", **kwargs)
+            call.status_code = response.status_code
+        answered_after = time.perf_counter() - started
+        record_latency(endpoint, answered_after)
+        failed = balancer is not None and is_failure_status(response.status_code)
+    except requests.exceptions.RequestException as e:
+        failed = True
+        if isinstance(e, requests.exceptions.Timeout):
+            record_latency(endpoint, time.perf_counter() - started)
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    finally:
+        if balancer is not None:
+            balancer.release(instance, answered_after, failed)
+    return response
+
+
+def _auth_headers(m2m_token: str) -> Dict[str, str]:
+    """Build JSON request headers carrying the M2M bearer token."""
+    return {
+        "Authorization": f"Bearer {m2m_token}",
+        "Content-Type": "application/json"
+    }
+
+
+def _task_status_payload(
+    status: Optional[str] = None,
+    render_status: Optional[str] = None,
+    progress: Optional[float] = None,
+    message: Optional[str] = None,
+    video_id: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the task status payload, omitting fields that are not set."""
+    payload = {}
+    if status is not None:
+        payload["status"] = status
+    if render_status is not None:
+        payload["render_status"] = render_status
+    if progress is not None:
+        payload["progress"] = progress
+    if message is not None:
+        payload["message"] = message
+    if video_id is not None:
+        payload["video_id"] = video_id
+    if extra is not None:
+        payload["extra"] = extra
+    return payload
+
+
+def _video_record_payload(
+    task_id: str,
+    oss_url: str,
+    video_name: Optional[str] = None,
+    resolution: Optional[str] = None,
+    framerate: Optional[str] = None,
+    duration: Optional[float] = None,
+    file_size: Optional[int] = None,
+    thumbnail_url: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the video creation payload, omitting optional fields that are not set."""
+    payload = {
+        "task_id": task_id,
+        "oss_url": oss_url
+    }
+
+    if video_name is not None:
+        payload["video_name"] = video_name
+    if resolution is not None:
+        payload["resolution"] = resolution
+    if framerate is not None:
+        payload["framerate"] = framerate
+    if duration is not None:
+        payload["duration"] = duration
+    if file_size is not None:
+        payload["file_size"] = file_size
+    if thumbnail_url is not None:
+        payload["thumbnail_url"] = thumbnail_url
+    if extra is not None:
+        payload["extra"] = extra
+    return payload
+
+
+def _worker_status_payload(
+    worker_name: str,
+    hostname: Optional[str],
+    is_available: bool = True,
+    task_id: Optional[str] = None,
+    error_message: Optional[str] = None,
+    traceback: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build the worker status payload."""
+    return {
+        "worker_name": worker_name,
+        "hostname": hostname,
+        "is_available": is_available,
+        "task_id": task_id,
+        "error_message": error_message,
+        "traceback": traceback,
+        "extra": extra or {}
+    }
+
 
 def call_video_task_status_api(
     task_id: str,
@@ -36,6 +216,9 @@ def call_video_task_status_api(
 
     Returns:
         bool: True if API call succeeded, False otherwise
+
+    Raises:
+        RetryLaterError: If the call was rate limited or the circuit is open
     """
     # Get M2M token
     m2m_token = get_m2m_token()
@@ -44,29 +227,25 @@ def call_video_task_status_api(
         return False
 
     try:
-        url = f"{config.VIDEO_API_BASE_URL}/api/video-tasks/{task_id}/status"
-        headers = {
-            "Authorization": f"Bearer {m2m_token}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {}
-        if status is not None:
-            payload["status"] = status
-        if render_status is not None:
-            payload["render_status"] = render_status
-        if progress is not None:
-            payload["progress"] = progress
-        if message is not None:
-            payload["message"] = message
-        if video_id is not None:
-            payload["video_id"] = video_id
-        if extra is not None:
-            payload["extra"] = extra
-
-        logger.info(f"Calling video task status API: {url} with payload: {payload}")
-
-        response = requests.put(url, json=payload, headers=headers, timeout=30)
+        path = f"/api/video-tasks/{task_id}/status"
+        headers = _auth_headers(m2m_token)
+        payload = _task_status_payload(
+            status=status,
+            render_status=render_status,
+            progress=progress,
+            message=message,
+            video_id=video_id,
+            extra=extra,
+        )
+
+        logger.info(f"Calling video task status API: {path} with payload: {payload}")
+
+        # Idempotent: a slow PUT may be hedged; the hedge never waits for a rate limit token
+        response = hedged(
+            "task_status",
+            lambda: _send("task_status", "put", path, json=payload, headers=headers),
+            lambda: _send("task_status", "put", path, rate_limit_wait=0, json=payload, headers=headers),
+        )
         response.raise_for_status()
 
         result = response.json()
@@ -82,6 +261,53 @@ def call_video_task_status_api(
         return False
 
 
+def call_video_task_status_bulk_api(updates: List[Dict[str, Any]]) -> bool:
+    """
+    Update the status of several tasks with one bulk API call.
+
+    Args:
+        updates: Status payloads, each with a ``task_id`` plus the fields
+            accepted by :func:`call_video_task_status_api`
+
+    Returns:
+        bool: True if API call succeeded, False otherwise
+
+    Raises:
+        BulkStatusUnsupportedError: If the server has no bulk status endpoint
+        RetryLaterError: If the call was rate limited or the circuit is open
+    """
+    m2m_token = get_m2m_token()
+    if not m2m_token:
+        logger.warning("Failed to obtain M2M token, skipping API call")
+        return False
+
+    try:
+        path = "/api/video-tasks/status/bulk"
+        headers = _auth_headers(m2m_token)
+        payload = {"updates": updates}
+
+        logger.info(f"Calling bulk video task status API: {path} with {len(updates)} updates")
+
+        response = _send("task_status_bulk", "put", path, json=payload, headers=headers)
+        if response.status_code in _BULK_UNSUPPORTED_STATUS_CODES:
+            raise BulkStatusUnsupportedError(
+                f"Bulk status endpoint returned HTTP {response.status_code}"
+            )
+        response.raise_for_status()
+
+        result = response.json()
+        if result.get("success"):
+            logger.info(f"Successfully updated {len(updates)} task statuses via bulk API")
+            return True
+        else:
+            logger.error(f"Bulk API returned success=False: {result.get('error')}")
+            return False
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to call bulk video task status API: {e!s}", exc_info=True)
+        return False
+
+
 def create_video_record(
     task_id: str,
     oss_url: str,
@@ -109,6 +335,9 @@ def create_video_record(
 
     Returns:
         bool: True if API call succeeded, False otherwise
+
+    Raises:
+        RetryLaterError: If the call was rate limited or the circuit is open
     """
     # Get M2M token
     m2m_token = get_m2m_token()
@@ -117,37 +346,25 @@ def create_video_record(
         return False
 
     try:
-        url = f"{config.VIDEO_API_BASE_URL}/api/videos/create"
-        headers = {
-            "Authorization": f"Bearer {m2m_token}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "task_id": task_id,
-            "oss_url": oss_url
-        }
-
-        if video_name is not None:
-            payload["video_name"] = video_name
-        if resolution is not None:
-            payload["resolution"] = resolution
-        if framerate is not None:
-            payload["framerate"] = framerate
-        if duration is not None:
-            payload["duration"] = duration
-        if file_size is not None:
-            payload["file_size"] = file_size
-        if thumbnail_url is not None:
-            payload["thumbnail_url"] = thumbnail_url
-        if extra is not None:
-            payload["extra"] = extra
-
-        logger.info(f"Creating video record via API: {url}")
+        path = "/api/videos/create"
+        headers = _auth_headers(m2m_token)
+        payload = _video_record_payload(
+            task_id=task_id,
+            oss_url=oss_url,
+            video_name=video_name,
+            resolution=resolution,
+            framerate=framerate,
+            duration=duration,
+            file_size=file_size,
+            thumbnail_url=thumbnail_url,
+            extra=extra,
+        )
+
+        logger.info(f"Creating video record via API: {path}")
 
         logger.info(f"Payload: {payload}")
 
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = _send("video_create", "post", path, json=payload, headers=headers)
         response.raise_for_status()
 
         result = response.json()
@@ -180,24 +397,20 @@ def report_worker_status(
         return False
 
     try:
-        url = f"{config.VIDEO_API_BASE_URL}/api/worker-status"
-        headers = {
-            "Authorization": f"Bearer {m2m_token}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "worker_name": worker_name,
-            "hostname": hostname,
-            "is_available": is_available,
-            "task_id": task_id,
-            "error_message": error_message,
-            "traceback": traceback,
-            "extra": extra or {}
-        }
+        path = "/api/worker-status"
+        headers = _auth_headers(m2m_token)
+        payload = _worker_status_payload(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
 
         logger.info("Reporting worker status via API: %s", payload)
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = _send("worker_status", "post", path, json=payload, headers=headers)
         response.raise_for_status()
 
         result = response.json()
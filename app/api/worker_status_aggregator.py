@@ -0,0 +1,361 @@
+"""
+Worker-side aggregation of worker status reports.
+
+Render nodes emit a worker event for every start, failure and recovery. In
+a crash loop that is a ``POST /api/worker-status`` with a full traceback
+several times a second. Instead, events are merged per ``worker_name`` and
+sent as one report every ``WORKER_STATUS_AGGREGATE_SECONDS``:
+
+- the latest availability, hostname and task_id, and the merged ``extra``
+- errors deduplicated by traceback fingerprint, each with its count and
+  the task_ids it hit; a traceback is sent in full only the first time its
+  fingerprint is reported within an hour
+
+An availability transition (a worker not seen before, or one going down or
+coming back up) is reported right away, at most once per worker and
+interval: a worker flapping between states is reported with the next
+regular flush.
+
+Aggregation is per process: each worker process (every prefork child, the
+async worker) merges only the events it consumes itself, so with N
+processes a worker can be reported up to N times per interval. Route
+``update_worker_status`` to a single-process worker to get exactly one
+report per worker and interval.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.api.errors import RetryLaterError
+from app.api.video_api_client import report_worker_status
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# How long / how many reported tracebacks are remembered to send them only once
+_FINGERPRINT_MEMORY_SECONDS = 3600
+_FINGERPRINT_MEMORY_SIZE = 1000
+
+# How many workers' availability and last report time are remembered
+_WORKER_MEMORY_SIZE = 10000
+
+# Most distinct errors (and task_ids per error) sent in one report
+_MAX_ERRORS = 10
+_MAX_ERROR_TASK_IDS = 10
+
+_ADDRESS = re.compile(r"0x[0-9a-fA-F]+")
+_NUMBER = re.compile(r"\d+")
+
+
+def fingerprint(error_message: Optional[str], traceback: Optional[str]) -> str:
+    """
+    Identify an error independently of where and when it happened.
+
+    The traceback's frames (file and function, without line numbers) and
+    exception type are hashed; without a traceback, the message with its
+    numbers removed.
+    """
+    if traceback:
+        lines = [line.strip() for line in traceback.strip().splitlines() if line.strip()]
+        frames = [_NUMBER.sub("", line) for line in lines if line.startswith("File ")]
+        exception_type = lines[-1].split(":", 1)[0] if lines else ""
+        key = "\n".join([*frames, exception_type])
+    else:
+        key = _NUMBER.sub("#", _ADDRESS.sub("0x", error_message or ""))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class _PendingReport:
+    """Worker events merged since the last report for one worker."""
+
+    __slots__ = ("errors", "events", "extra", "first_seen", "hostname", "is_available", "last_error", "task_id")
+
+    def __init__(self, now: float):
+        self.events = 0
+        self.first_seen = now
+        self.hostname: Optional[str] = None
+        self.is_available = True
+        self.task_id: Optional[str] = None
+        self.extra: Dict[str, Any] = {}
+        # fingerprint -> error summary, in order of first occurrence
+        self.errors: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.last_error: Optional[str] = None
+
+
+class WorkerStatusAggregator:
+    """
+    Merge worker events per worker and report them periodically.
+
+    Thread-safe and never blocks on the API: a background thread sends the
+    reports every ``interval_seconds``, and right away for availability
+    transitions.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._pending: OrderedDict[str, _PendingReport] = OrderedDict()
+        self._urgent: set = set()
+        # worker_name -> last availability seen / monotonic time of the last report sent
+        self._available: OrderedDict[str, bool] = OrderedDict()
+        self._last_sent: OrderedDict[str, float] = OrderedDict()
+        # fingerprint -> monotonic time its traceback was last sent
+        self._sent_tracebacks: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        worker_name: str,
+        hostname: Optional[str] = None,
+        is_available: bool = True,
+        task_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        traceback: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Merge a worker event into the worker's next report.
+
+        Returns:
+            bool: True if the event is an availability transition that will
+            be reported right away
+        """
+        now = time.monotonic()
+        with self._lock:
+            report = self._pending.get(worker_name)
+            if report is None:
+                report = self._pending[worker_name] = _PendingReport(now)
+            report.events += 1
+            report.is_available = is_available
+            report.hostname = hostname or report.hostname
+            report.task_id = task_id or report.task_id
+            if extra:
+                report.extra.update(extra)
+            if error_message or traceback:
+                self._add_error(report, error_message, traceback, task_id, now)
+
+            previous = self._available.get(worker_name)
+            _remember(self._available, worker_name, is_available, _WORKER_MEMORY_SIZE)
+            last_sent = self._last_sent.get(worker_name)
+            urgent = previous != is_available and (
+                last_sent is None or now - last_sent >= self.interval_seconds
+            )
+            if urgent:
+                self._urgent.add(worker_name)
+                self._wakeup.set()
+        return urgent
+
+    def _add_error(
+        self,
+        report: _PendingReport,
+        error_message: Optional[str],
+        traceback: Optional[str],
+        task_id: Optional[str],
+        now: float,
+    ) -> None:
+        key = fingerprint(error_message, traceback)
+        error = report.errors.get(key)
+        if error is None:
+            error = report.errors[key] = {
+                "fingerprint": key,
+                "error_message": error_message,
+                "traceback": traceback,
+                "count": 0,
+                "task_ids": [],
+                "first_seen": now,
+            }
+        error["count"] += 1
+        error["error_message"] = error_message or error["error_message"]
+        error["traceback"] = error["traceback"] or traceback
+        if task_id and task_id not in error["task_ids"] and len(error["task_ids"]) < _MAX_ERROR_TASK_IDS:
+            error["task_ids"].append(task_id)
+        report.last_error = key
+
+    def flush(self, urgent_only: bool = False) -> int:
+        """
+        Send the pending reports now.
+
+        Args:
+            urgent_only: Only send the reports of workers with an availability transition
+
+        Returns:
+            int: Number of worker reports sent
+        """
+        now = time.monotonic()
+        with self._lock:
+            names = list(self._urgent if urgent_only else self._pending)
+            self._urgent.clear()
+            reports = [(name, self._pending.pop(name)) for name in names if name in self._pending]
+            if not reports:
+                return 0
+            self._prune_tracebacks(now)
+            payloads = [self._payload(name, report, now) for name, report in reports]
+            # Tracebacks sent in full are remembered from here on; put back if the report fails
+            fingerprints = [
+                [error["fingerprint"] for error in payload["extra"]["report"]["errors"] if error.pop("new", False)]
+                for payload in payloads
+            ]
+            for name, _ in reports:
+                _remember(self._last_sent, name, now, _WORKER_MEMORY_SIZE)
+
+        sent = 0
+        for payload, new_tracebacks in zip(payloads, fingerprints):
+            if self._send(payload):
+                sent += 1
+            elif new_tracebacks:
+                with self._lock:
+                    for key in new_tracebacks:
+                        self._sent_tracebacks.pop(key, None)
+        return sent
+
+    def _payload(self, worker_name: str, report: _PendingReport, now: float) -> Dict[str, Any]:
+        """Build the compact report of ``worker_name`` (called with the lock held)."""
+        errors = []
+        for key, error in list(report.errors.items())[-_MAX_ERRORS:]:
+            error = dict(error)
+            error["first_seen_seconds_ago"] = round(now - error.pop("first_seen"), 1)
+            if key in self._sent_tracebacks:
+                # The API already has this traceback; the fingerprint refers to it
+                error["traceback"] = None
+            elif error["traceback"]:
+                self._sent_tracebacks[key] = now
+                error["new"] = True
+            errors.append(error)
+
+        # The latest error goes in the top-level fields, its traceback only there
+        last_error = next((error for error in errors if error["fingerprint"] == report.last_error), None)
+        traceback = None
+        if last_error is not None:
+            traceback, last_error["traceback"] = last_error["traceback"], None
+        return {
+            "worker_name": worker_name,
+            "hostname": report.hostname,
+            "is_available": report.is_available,
+            "task_id": report.task_id,
+            "error_message": last_error["error_message"] if last_error else None,
+            "traceback": traceback,
+            "extra": {
+                **report.extra,
+                "report": {
+                    "interval_seconds": round(now - report.first_seen, 1),
+                    "events": report.events,
+                    "errors": errors,
+                },
+            },
+        }
+
+    def _send(self, payload: Dict[str, Any]) -> bool:
+        try:
+            return report_worker_status(**payload)
+        except RetryLaterError as e:
+            # The worker's next events are reported with the next flush
+            logger.warning(f"Skipping worker status report for {payload['worker_name']}: {e!s}")
+            return False
+
+    def _prune_tracebacks(self, now: float) -> None:
+        while self._sent_tracebacks:
+            _key, sent_at = next(iter(self._sent_tracebacks.items()))
+            if now - sent_at < _FINGERPRINT_MEMORY_SECONDS and len(self._sent_tracebacks) <= _FINGERPRINT_MEMORY_SIZE:
+                break
+            self._sent_tracebacks.popitem(last=False)
+
+    def start(self) -> None:
+        """Start the background report thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="worker-status-aggregator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the report thread and send whatever is still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 30)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.interval_seconds
+        while not self._stopped.is_set():
+            self._wakeup.wait(max(0.0, next_flush - time.monotonic()))
+            self._wakeup.clear()
+            try:
+                if time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + self.interval_seconds
+                    self.flush()
+                else:
+                    self.flush(urgent_only=True)
+            except Exception as e:
+                logger.error(f"Failed to send aggregated worker status reports: {e!s}", exc_info=True)
+
+
+def _remember(entries: "OrderedDict[str, Any]", key: str, value: Any, size: int) -> None:
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > size:
+        entries.popitem(last=False)
+
+
+_aggregator: Optional[WorkerStatusAggregator] = None
+_aggregator_pid: Optional[int] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_worker_status_aggregator() -> Optional[WorkerStatusAggregator]:
+    """
+    Return this process' aggregator, starting it on first use.
+
+    Returns:
+        WorkerStatusAggregator, or None if WORKER_STATUS_AGGREGATE_SECONDS is 0 (disabled)
+    """
+    global _aggregator, _aggregator_pid
+
+    if config.WORKER_STATUS_AGGREGATE_SECONDS <= 0:
+        return None
+
+    pid = os.getpid()
+    if _aggregator is not None and _aggregator_pid == pid:
+        return _aggregator
+
+    with _aggregator_lock:
+        if _aggregator is None or _aggregator_pid != pid:
+            _aggregator = WorkerStatusAggregator(config.WORKER_STATUS_AGGREGATE_SECONDS)
+            _aggregator.start()
+            _aggregator_pid = pid
+        return _aggregator
+
+
+def shutdown_worker_status_aggregator() -> None:
+    """Send pending reports and stop this process' aggregator, if one was started."""
+    global _aggregator, _aggregator_pid
+
+    with _aggregator_lock:
+        aggregator = _aggregator if _aggregator_pid == os.getpid() else None
+        _aggregator = None
+        _aggregator_pid = None
+
+    if aggregator is not None:
+        aggregator.stop()
+
+
+def _reset_after_fork() -> None:
+    global _aggregator, _aggregator_pid, _aggregator_lock
+
+    _aggregator = None
+    _aggregator_pid = None
+    _aggregator_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,267 @@
+"""
+Single-process asyncio worker for notification tasks.
+
+Consumes the same Celery queues and message format as the regular worker,
+but executes tasks as coroutines on one event loop, so one process can keep
+hundreds of notifications in flight while it waits on the video API.
+
+Usage:
+    python -m app.async_worker -Q notifications -c 200
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from kombu.common import QoS
+
+from app.api.async_video_api_client import close_async_session
+from app.api.worker_status_aggregator import shutdown_worker_status_aggregator
+from app.celery_app import celery_app
+from app.config import config
+from app.dead_letter import dead_letter, retries_exhausted
+from app.metrics import (
+    observe_queue_wait,
+    observe_task,
+    record_task_retry,
+    start_metrics_server,
+)
+from app.routing import routed_queues
+from app.tasks.async_video_tasks import (
+    ASYNC_TASK_HANDLERS,
+    TaskRequest,
+    TaskRetryError,
+    current_request,
+)
+from app.tasks.outbox import start_outbox_drainer, stop_outbox_drainer
+from app.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class AsyncNotificationWorker:
+    """
+    Consume Celery task messages and run them concurrently on an event loop.
+
+    A consumer thread drains the broker connection and hands each message to
+    the loop; acknowledgements are passed back to the consumer thread, which
+    owns the connection. At most ``concurrency`` coroutines execute at once.
+
+    Messages with an ETA (retries with a countdown) wait on the loop without
+    holding a slot, and like in Celery's consumer each one raises the
+    prefetch limit until it is due, so a burst of retries does not keep
+    fresh messages from being delivered.
+    """
+
+    def __init__(self, queues: Optional[List[str]] = None, concurrency: Optional[int] = None):
+        self.queue_names = queues or routed_queues()
+        self.concurrency = concurrency or config.ASYNC_WORKER_CONCURRENCY
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stopping = threading.Event()
+        self._acks: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._pending: Set[concurrent.futures.Future] = set()
+        self._qos: Optional[QoS] = None
+
+    def run(self) -> None:
+        """Run the worker until SIGINT/SIGTERM."""
+        asyncio.run(self._serve())
+
+    def stop(self) -> None:
+        """Stop consuming; in-flight tasks are allowed to finish."""
+        if not self._stopping.is_set():
+            logger.info("Async worker shutting down, waiting for in-flight tasks")
+            self._stopping.set()
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Not implemented on Windows
+            with contextlib.suppress(NotImplementedError):
+                self._loop.add_signal_handler(sig, self.stop)
+
+        logger.info(
+            "Async worker consuming %s with concurrency %s",
+            ", ".join(self.queue_names),
+            self.concurrency,
+        )
+        # aiohttp opens its connections on first use; hosts and the token are ready before then
+        await asyncio.to_thread(warm_up, False)
+        start_outbox_drainer()
+        try:
+            await self._loop.run_in_executor(None, self._consume)
+        finally:
+            await asyncio.to_thread(stop_outbox_drainer)
+            await asyncio.to_thread(shutdown_worker_status_aggregator)
+            await close_async_session()
+
+    def _consume(self) -> None:
+        """Consumer thread: own the broker connection, dispatch and ack."""
+        with celery_app.connection_for_read() as connection:
+            queues = [celery_app.amqp.queues[name] for name in self.queue_names]
+            consumer = connection.Consumer(
+                queues,
+                callbacks=[self._on_message],
+                accept=celery_app.conf.accept_content,
+            )
+            # Raised by ETA messages while they wait, applied from this thread
+            self._qos = QoS(consumer.qos, self.concurrency * 2)
+            self._qos.update()
+            with consumer:
+                while not self._stopping.is_set():
+                    self._flush_acks()
+                    self._qos.update()
+                    with contextlib.suppress(socket.timeout):
+                        connection.drain_events(timeout=0.2)
+
+            # Let in-flight tasks finish so their messages are acknowledged
+            concurrent.futures.wait(list(self._pending))
+            self._flush_acks()
+
+    def _flush_acks(self) -> None:
+        while True:
+            try:
+                message = self._acks.get_nowait()
+            except queue.Empty:
+                return
+            message.ack()
+
+    def _on_message(self, body: Any, message: Any) -> None:
+        headers = message.headers or {}
+        if isinstance(body, dict):  # Celery message protocol 1
+            name = body.get("task")
+            args, kwargs = body.get("args", ()), body.get("kwargs", {})
+        else:
+            name = headers.get("task")
+            args, kwargs = body[0], body[1]
+
+        if name not in ASYNC_TASK_HANDLERS:
+            logger.error("Async worker received unknown task %s, discarding", name)
+            message.reject(requeue=False)
+            return
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(name, list(args), dict(kwargs), headers), self._loop
+        )
+        self._pending.add(future)
+
+        def _done(f: concurrent.futures.Future) -> None:
+            self._pending.discard(f)
+            self._acks.put(message)
+
+        future.add_done_callback(_done)
+
+    async def _execute(
+        self, name: str, args: List[Any], kwargs: Dict[str, Any], headers: Dict[str, Any]
+    ) -> None:
+        task_id = headers.get("id")
+        retries = headers.get("retries") or 0
+
+        expires = _parse_iso(headers.get("expires"))
+        if expires and expires < datetime.now(timezone.utc):
+            logger.warning("Task %s[%s] expired, discarding", name, task_id)
+            return
+
+        eta = _parse_iso(headers.get("eta"))
+        if eta:
+            delay = (eta - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                self._qos.increment_eventually()
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    self._qos.decrement_eventually()
+
+        async with self._semaphore:
+            published_at = headers.get("published_at")
+            if published_at is not None:
+                ready_at = max(float(published_at), eta.timestamp() if eta else 0.0)
+                observe_queue_wait(name, time.time() - ready_at)
+
+            started = time.perf_counter()
+            state = "SUCCESS"
+            # The handler decides about retries, from the task's limits, like a bound Celery task
+            current_request.set(TaskRequest(task_id, retries))
+            try:
+                await ASYNC_TASK_HANDLERS[name](*args, **kwargs)
+            except TaskRetryError as e:
+                state = "RETRY"
+                record_task_retry(name)
+                logger.warning(
+                    "Task %s[%s] failed (%s), retrying in %.1fs",
+                    name, task_id, e.exc, e.countdown,
+                )
+                await asyncio.to_thread(
+                    celery_app.send_task,
+                    name,
+                    args=args,
+                    kwargs=kwargs,
+                    task_id=task_id,
+                    countdown=e.countdown,
+                    retries=retries + 1,
+                )
+            except Exception as e:
+                state = "FAILURE"
+                logger.error("Task %s[%s] failed permanently: %s", name, task_id, e)
+                if retries_exhausted(name, retries, e):
+                    await asyncio.to_thread(dead_letter, name, task_id, args, kwargs, e, retries)
+            finally:
+                observe_task(name, state, time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the asyncio notification worker")
+    parser.add_argument(
+        "-Q", "--queues",
+        default=",".join(routed_queues()),
+        help="Comma-separated list of queues to consume",
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=config.ASYNC_WORKER_CONCURRENCY,
+        help="Maximum number of tasks executing at once",
+    )
+    parser.add_argument("-l", "--loglevel", default=config.LOG_LEVEL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.loglevel.upper(),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    start_metrics_server()
+    AsyncNotificationWorker(
+        queues=[name.strip() for name in args.queues.split(",") if name.strip()],
+        concurrency=args.concurrency,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,26 @@
 Authentication module for the application.
 """
 
+from app.auth.async_cognito_auth import async_get_m2m_token
 from app.auth.cognito_auth import (
-    get_m2m_token,
     clear_token_cache,
     get_cached_token,
+    get_m2m_token,
+    refresh_m2m_token,
+)
+from app.auth.token_refresher import (
+    get_token_refresh_stats,
+    start_token_refresher,
+    stop_token_refresher,
 )
 
 __all__ = [
-    "get_m2m_token",
+    "async_get_m2m_token",
     "clear_token_cache",
     "get_cached_token",
+    "get_m2m_token",
+    "get_token_refresh_stats",
+    "refresh_m2m_token",
+    "start_token_refresher",
+    "stop_token_refresher",
 ]
@@ -0,0 +1,110 @@
+"""
+Asyncio counterpart of the Cognito M2M token acquisition.
+
+Shares the process-wide token cache with :mod:`app.auth.cognito_auth`, so a
+token fetched on the event loop is visible to synchronous callers and vice
+versa. Requires the optional ``aiohttp`` dependency (``pip install .[async]``).
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+from app.auth.cognito_auth import (
+    _cache_token_response,
+    _get_token_store,
+    _is_configured,
+    _token_cache,
+    _token_request,
+    get_m2m_token,
+)
+from app.metrics import record_token_event
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# One refresh lock per event loop so concurrent coroutines share a single fetch
+_refresh_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _refresh_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _refresh_locks.get(loop)
+    if lock is None:
+        lock = asyncio.Lock()
+        _refresh_locks[loop] = lock
+    return lock
+
+
+async def async_get_m2m_token(
+    session: Optional["aiohttp.ClientSession"] = None,
+) -> Optional[str]:
+    """
+    Get a valid Cognito M2M access token without blocking the event loop.
+
+    Concurrent callers on the same loop wait for a single in-flight request
+    instead of each fetching their own token.
+
+    Args:
+        session: aiohttp session to issue the token request with. A
+            short-lived session is used if omitted.
+
+    Returns:
+        Access token string if successful, None otherwise
+    """
+    cached_token = _token_cache.get_token()
+    if cached_token:
+        logger.debug("Using cached M2M token")
+        record_token_event("hit")
+        return cached_token
+
+    record_token_event("miss")
+    async with _refresh_lock():
+        # Another coroutine may have refreshed while we were waiting
+        cached_token = _token_cache.get_token()
+        if cached_token:
+            return cached_token
+
+        if not _is_configured():
+            return None
+
+        # Shared-store refreshes are coordinated by the (rare, blocking) sync path
+        if _get_token_store() is not None:
+            return await asyncio.to_thread(get_m2m_token)
+
+        import aiohttp
+
+        token_url, headers, payload = _token_request()
+        logger.debug(f"Requesting M2M token from {token_url}")
+
+        owns_session = session is None
+        if owns_session:
+            session = aiohttp.ClientSession()
+        try:
+            async with session.post(
+                token_url,
+                headers=headers,
+                data=payload,
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                response.raise_for_status()
+                token_response = await response.json(content_type=None)
+            token = _cache_token_response(token_response)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Failed to obtain M2M token from Cognito: {e!s}", exc_info=True)
+            token = None
+        except (ValueError, KeyError) as e:
+            logger.error(f"Invalid token response from Cognito: {e!s}", exc_info=True)
+            token = None
+        finally:
+            if owns_session:
+                await session.close()
+
+        record_token_event("refresh" if token else "refresh_failure")
+        return token
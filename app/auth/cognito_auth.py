@@ -1,16 +1,20 @@
 """
 Cognito M2M (Machine-to-Machine) authentication module.
-Handles token acquisition and in-memory caching for M2M authentication flow.
+Handles token acquisition, in-memory caching and optional cross-process
+sharing (see :mod:`app.auth.token_store`) for M2M authentication flow.
 """
 
 import logging
+import os
 import threading
 import time
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 
+from app.auth.token_store import TokenStore, create_token_store
 from app.config import config
+from app.metrics import record_token_event
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,7 @@ class CognitoM2MTokenCache:
     def __init__(self):
         """Initialize the token cache with lock for thread safety."""
         self._token: Optional[str] = None
+        self._issued_at: float = 0
         self._expires_at: float = 0
         self._lock = threading.RLock()
         self._buffer_seconds = 60  # Refresh token 60 seconds before expiration
@@ -38,7 +43,8 @@ class CognitoM2MTokenCache:
         """
         with self._lock:
             self._token = token
-            self._expires_at = time.time() + expires_in
+            self._issued_at = time.time()
+            self._expires_at = self._issued_at + expires_in
             logger.debug(
                 f"Token cached, expires in {expires_in} seconds "
                 f"(at {self._expires_at})"
@@ -56,6 +62,26 @@ class CognitoM2MTokenCache:
                 return self._token
             return None
 
+    def get_expires_at(self) -> float:
+        """Return the expiry of the cached token as epoch seconds (0 if none)."""
+        with self._lock:
+            return self._expires_at if self._token else 0
+
+    def get_refresh_at(self, fraction: float) -> Optional[float]:
+        """
+        Return when the cached token should be proactively renewed.
+
+        Args:
+            fraction: Fraction of the token lifetime after which to renew
+
+        Returns:
+            Epoch seconds, or None if no token is cached
+        """
+        with self._lock:
+            if not self._token:
+                return None
+            return self._issued_at + fraction * (self._expires_at - self._issued_at)
+
     def is_expired(self) -> bool:
         """
         Check if cached token is expired or about to expire.
@@ -70,6 +96,7 @@ class CognitoM2MTokenCache:
         """Clear the cached token."""
         with self._lock:
             self._token = None
+            self._issued_at = 0
             self._expires_at = 0
             logger.debug("Token cache cleared")
 
@@ -77,13 +104,120 @@ class CognitoM2MTokenCache:
 # Global token cache instance
 _token_cache = CognitoM2MTokenCache()
 
+# Serializes refreshes within this process (single-flight)
+_refresh_lock = threading.Lock()
+
+# Optional store shared with other processes/hosts (see COGNITO_TOKEN_STORE)
+_token_store: Optional[TokenStore] = None
+_token_store_initialized = False
+
+
+def _is_configured() -> bool:
+    """Check that the Cognito client credentials are configured."""
+    if not all([config.COGNITO_DOMAIN, config.COGNITO_CLIENT_ID, config.COGNITO_CLIENT_SECRET]):
+        logger.error(
+            "Cognito configuration incomplete: COGNITO_DOMAIN, "
+            "COGNITO_CLIENT_ID, and COGNITO_CLIENT_SECRET are required"
+        )
+        return False
+    return True
+
+
+def _token_request() -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """
+    Build the client-credentials token request.
+
+    Returns:
+        Tuple of (token URL, headers, form payload)
+    """
+    token_url = f"{config.COGNITO_DOMAIN}/oauth2/token"
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded"
+    }
+
+    payload = {
+        "grant_type": "client_credentials",
+        "client_id": config.COGNITO_CLIENT_ID,
+        "client_secret": config.COGNITO_CLIENT_SECRET,
+    }
+
+    if config.COGNITO_SCOPE:
+        payload["scope"] = config.COGNITO_SCOPE
+
+    return token_url, headers, payload
+
+
+def _cache_token_response(token_response: Dict[str, Any]) -> Optional[str]:
+    """
+    Validate a Cognito token response and store it in the cache.
+
+    Returns:
+        Access token string if the response is valid, None otherwise
+    """
+    if "access_token" not in token_response:
+        logger.error(f"Token response missing access_token: {token_response}")
+        return None
+
+    access_token = token_response["access_token"]
+    expires_in = token_response.get("expires_in", 3600)  # Default 1 hour
+
+    # Cache the token
+    _token_cache.set_token(access_token, expires_in)
+
+    store = _get_token_store()
+    if store is not None:
+        try:
+            store.save(access_token, time.time() + expires_in)
+        except Exception as e:
+            logger.warning(f"Failed to share M2M token: {e!s}")
+
+    logger.info(f"Successfully obtained M2M token (expires in {expires_in}s)")
+    return access_token
+
+
+def _get_token_store() -> Optional[TokenStore]:
+    """Return the shared token store configured for this process, if any."""
+    global _token_store, _token_store_initialized
+
+    if not _token_store_initialized:
+        _token_store = create_token_store()
+        _token_store_initialized = True
+    return _token_store
+
+
+def _load_shared_token() -> Optional[str]:
+    """
+    Copy a still-valid token from the shared store into the local cache.
+
+    Returns:
+        Token if the shared store holds one that is not about to expire
+    """
+    store = _get_token_store()
+    if store is None:
+        return None
+
+    try:
+        stored = store.load()
+    except Exception as e:
+        logger.warning(f"Failed to read shared M2M token: {e!s}")
+        return None
+    if not stored:
+        return None
+
+    token, expires_at = stored
+    _token_cache.set_token(token, expires_at - time.time())
+    return _token_cache.get_token()
+
 
 def get_m2m_token() -> Optional[str]:
     """
     Get a valid Cognito M2M access token.
 
     Uses in-memory cache to store tokens. If cached token is valid,
-    it returns the cached token. Otherwise, it requests a new token from Cognito.
+    it returns the cached token. Otherwise it looks in the shared token
+    store (if configured), and only then requests a new token from Cognito.
+    Refreshes are single-flight: one thread per process, and one process
+    per store, fetches while the others wait for its result.
 
     Returns:
         Access token string if successful, None otherwise
@@ -95,31 +229,99 @@ def get_m2m_token() -> Optional[str]:
     cached_token = _token_cache.get_token()
     if cached_token:
         logger.debug("Using cached M2M token")
+        record_token_event("hit")
         return cached_token
 
-    # Validate configuration
-    if not all([config.COGNITO_DOMAIN, config.COGNITO_CLIENT_ID, config.COGNITO_CLIENT_SECRET]):
-        logger.error(
-            "Cognito configuration incomplete: COGNITO_DOMAIN, "
-            "COGNITO_CLIENT_ID, and COGNITO_CLIENT_SECRET are required"
-        )
-        return None
+    cached_token = _load_shared_token()
+    if cached_token:
+        logger.debug("Using shared M2M token")
+        record_token_event("shared_hit")
+        return cached_token
 
-    try:
-        # Request new token from Cognito
-        token_url = f"{config.COGNITO_DOMAIN}/oauth2/token"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
+    record_token_event("miss")
+    with _refresh_lock:
+        # Another thread may have refreshed while we were waiting
+        cached_token = _token_cache.get_token() or _load_shared_token()
+        if cached_token:
+            return cached_token
+
+        # Validate configuration
+        if not _is_configured():
+            return None
+
+        store = _get_token_store()
+        if store is None:
+            return _fetch_token()
+
+        try:
+            with store.refresh_lock(config.COGNITO_TOKEN_LOCK_TIMEOUT) as acquired:
+                shared_token = _load_shared_token()
+                if shared_token:
+                    logger.debug("Using M2M token refreshed by another worker")
+                    return shared_token
+                if not acquired:
+                    logger.warning("Timed out waiting for shared M2M token refresh, fetching directly")
+                return _fetch_token()
+        except Exception as e:
+            # The store failed after we may already have fetched a token
+            cached_token = _token_cache.get_token()
+            if cached_token:
+                return cached_token
+            logger.warning(f"Shared token store unavailable ({e!s}), fetching M2M token directly")
+            return _fetch_token()
+
+
+def refresh_m2m_token() -> Optional[str]:
+    """
+    Renew the token ahead of expiry without invalidating the current one.
 
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": config.COGNITO_CLIENT_ID,
-            "client_secret": config.COGNITO_CLIENT_SECRET,
-        }
+    Callers keep receiving the cached token while the renewal is in flight.
+    If another thread or worker already renewed it (the shared store holds
+    a token that outlives ours), that token is adopted instead of fetching.
+
+    Returns:
+        The renewed access token, or None if the renewal failed
+    """
+    current_expires_at = _token_cache.get_expires_at()
 
-        if config.COGNITO_SCOPE:
-            payload["scope"] = config.COGNITO_SCOPE
+    with _refresh_lock:
+        if _token_cache.get_expires_at() > current_expires_at:
+            return _token_cache.get_token()
+
+        if not _is_configured():
+            return None
+
+        store = _get_token_store()
+        if store is None:
+            return _fetch_token()
+
+        try:
+            with store.refresh_lock(config.COGNITO_TOKEN_LOCK_TIMEOUT):
+                stored = store.load()
+                if stored and stored[1] > current_expires_at:
+                    token, expires_at = stored
+                    _token_cache.set_token(token, expires_at - time.time())
+                    logger.debug("Adopted M2M token renewed by another worker")
+                    return token
+                return _fetch_token()
+        except Exception as e:
+            if _token_cache.get_expires_at() > current_expires_at:
+                return _token_cache.get_token()
+            logger.warning(f"Shared token store unavailable ({e!s}), renewing M2M token directly")
+            return _fetch_token()
+
+
+def _fetch_token() -> Optional[str]:
+    """Request a new token from Cognito and cache it locally and in the shared store."""
+    token = _request_token()
+    record_token_event("refresh" if token else "refresh_failure")
+    return token
+
+
+def _request_token() -> Optional[str]:
+    try:
+        # Request new token from Cognito
+        token_url, headers, payload = _token_request()
 
         logger.debug(f"Requesting M2M token from {token_url}")
 
@@ -131,20 +333,7 @@ def get_m2m_token() -> Optional[str]:
         )
         response.raise_for_status()
 
-        token_response = response.json()
-
-        if "access_token" not in token_response:
-            logger.error(f"Token response missing access_token: {token_response}")
-            return None
-
-        access_token = token_response["access_token"]
-        expires_in = token_response.get("expires_in", 3600)  # Default 1 hour
-
-        # Cache the token
-        _token_cache.set_token(access_token, expires_in)
-
-        logger.info(f"Successfully obtained M2M token (expires in {expires_in}s)")
-        return access_token
+        return _cache_token_response(response.json())
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to obtain M2M token from Cognito: {e!s}", exc_info=True)
@@ -156,11 +345,29 @@ def get_m2m_token() -> Optional[str]:
 
 def clear_token_cache() -> None:
     """
-    Manually clear the token cache.
+    Manually clear the token cache, including the shared token store.
     Useful for force refresh or debugging.
     """
     _token_cache.clear()
 
+    store = _get_token_store()
+    if store is not None:
+        try:
+            store.clear()
+        except Exception as e:
+            logger.warning(f"Failed to clear shared M2M token: {e!s}")
+
+
+def _reset_after_fork() -> None:
+    """Replace a refresh lock that may have been held by another thread at fork time."""
+    global _refresh_lock
+
+    _refresh_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
 
 def get_cached_token() -> Optional[str]:
     """
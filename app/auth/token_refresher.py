@@ -0,0 +1,189 @@
+"""
+Background renewal of the Cognito M2M token.
+
+A daemon thread per worker process renews the token once a configurable
+fraction of its lifetime has elapsed, so tasks always find a valid token in
+the cache and never wait on a Cognito round trip. The old token keeps being
+served while the renewal is in flight; failed renewals are retried with
+exponential backoff until the old token expires.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.auth.cognito_auth import _token_cache, refresh_m2m_token
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRefreshStats:
+    """Thread-safe counters and timings for background token renewals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.last_refresh_duration: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.next_refresh_at: Optional[float] = None
+
+    def record_success(self, duration: float) -> None:
+        with self._lock:
+            self.refresh_count += 1
+            self.consecutive_failures = 0
+            self.last_refresh_duration = duration
+            self.last_success_at = time.time()
+
+    def record_failure(self, duration: float) -> None:
+        with self._lock:
+            self.failure_count += 1
+            self.consecutive_failures += 1
+            self.last_refresh_duration = duration
+            self.last_failure_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the current counters."""
+        with self._lock:
+            return {
+                "refresh_count": self.refresh_count,
+                "failure_count": self.failure_count,
+                "consecutive_failures": self.consecutive_failures,
+                "last_refresh_duration": self.last_refresh_duration,
+                "last_success_at": self.last_success_at,
+                "last_failure_at": self.last_failure_at,
+                "next_refresh_at": self.next_refresh_at,
+            }
+
+
+class TokenRefresher:
+    """
+    Daemon thread that keeps the process' token cache ahead of expiry.
+
+    Args:
+        fraction: Fraction of the token lifetime after which to renew
+        retry_seconds: Initial delay before retrying a failed renewal
+        max_retry_seconds: Upper bound for the retry backoff
+    """
+
+    def __init__(
+        self,
+        fraction: float = 0.8,
+        retry_seconds: float = 5.0,
+        max_retry_seconds: float = 60.0,
+    ):
+        self.fraction = fraction
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.stats = TokenRefreshStats()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the refresher thread (the first renewal happens immediately)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="m2m-token-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refresher thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _next_delay(self) -> float:
+        failures = self.stats.consecutive_failures
+        if failures:
+            return min(self.max_retry_seconds, self.retry_seconds * 2 ** (failures - 1))
+
+        refresh_at = _token_cache.get_refresh_at(self.fraction)
+        if refresh_at is None:
+            return 0
+        return max(0.0, refresh_at - time.time())
+
+    def _run(self) -> None:
+        while True:
+            delay = self._next_delay()
+            self.stats.next_refresh_at = time.time() + delay
+            if self._stopped.wait(delay):
+                return
+
+            started = time.monotonic()
+            try:
+                token = refresh_m2m_token()
+            except Exception as e:
+                logger.error(f"Background M2M token renewal raised: {e!s}", exc_info=True)
+                token = None
+            duration = time.monotonic() - started
+
+            if token:
+                self.stats.record_success(duration)
+                logger.debug(f"Background M2M token renewal took {duration:.3f}s")
+            else:
+                self.stats.record_failure(duration)
+                logger.warning(
+                    "Background M2M token renewal failed "
+                    f"({self.stats.consecutive_failures} in a row), serving cached token"
+                )
+
+
+_refresher: Optional[TokenRefresher] = None
+_refresher_pid: Optional[int] = None
+
+
+def start_token_refresher() -> Optional[TokenRefresher]:
+    """
+    Start this process' background refresher, if enabled and not yet running.
+
+    Returns:
+        The running TokenRefresher, or None if COGNITO_BACKGROUND_REFRESH is off
+    """
+    global _refresher, _refresher_pid
+
+    if not config.COGNITO_BACKGROUND_REFRESH:
+        return None
+    if _refresher is not None and _refresher_pid == os.getpid():
+        return _refresher
+
+    _refresher = TokenRefresher(
+        fraction=config.COGNITO_REFRESH_FRACTION,
+        retry_seconds=config.COGNITO_REFRESH_RETRY_SECONDS,
+    )
+    _refresher_pid = os.getpid()
+    _refresher.start()
+    logger.info(
+        f"Started background M2M token refresher (renew at {config.COGNITO_REFRESH_FRACTION:.0%} of lifetime)"
+    )
+    return _refresher
+
+
+def stop_token_refresher() -> None:
+    """Stop this process' background refresher, if running."""
+    global _refresher, _refresher_pid
+
+    if _refresher is not None and _refresher_pid == os.getpid():
+        _refresher.stop()
+    _refresher = None
+    _refresher_pid = None
+
+
+def get_token_refresh_stats() -> Dict[str, Any]:
+    """
+    Return renewal counters for this process.
+
+    Returns:
+        Dict with refresh/failure counts and timings, plus ``running``
+    """
+    refresher = _refresher if _refresher_pid == os.getpid() else None
+    if refresher is None:
+        return {"running": False}
+    return {"running": True, **refresher.stats.snapshot()}
@@ -0,0 +1,203 @@
+"""
+Shared storage for the Cognito M2M token.
+
+A token store lets every worker process (and host) reuse one token and
+serialize refreshes behind a lock, so a single ``/oauth2/token`` request is
+made per expiry instead of one per process. Two backends are provided:
+
+- ``redis``: shared by the whole fleet (defaults to the Celery broker)
+- ``file``: shared by the processes of one host (POSIX ``flock``)
+"""
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from typing import Iterator, Optional, Tuple
+
+from app.config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# (access_token, expires_at as epoch seconds)
+StoredToken = Tuple[str, float]
+
+
+class TokenStore:
+    """Interface for shared token storage with a refresh lock."""
+
+    def load(self) -> Optional[StoredToken]:
+        """Return the stored token and its expiry, or None."""
+        raise NotImplementedError
+
+    def save(self, token: str, expires_at: float) -> None:
+        """Store a token until ``expires_at``."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove the stored token."""
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def refresh_lock(self, timeout: float) -> Iterator[bool]:
+        """
+        Hold the refresh lock for the duration of the block.
+
+        Yields:
+            bool: True if the lock was acquired, False if ``timeout`` elapsed
+        """
+        raise NotImplementedError
+
+
+class RedisTokenStore(TokenStore):
+    """Token store shared by every worker connected to the same Redis."""
+
+    # Delete the lock only if we still own it
+    _RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, key: str, poll_interval: float = 0.05):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._key = key
+        self._lock_key = f"{key}:lock"
+        self._poll_interval = poll_interval
+
+    def load(self) -> Optional[StoredToken]:
+        raw = self._client.get(self._key)
+        if not raw:
+            return None
+        data = json.loads(raw)
+        return data["access_token"], float(data["expires_at"])
+
+    def save(self, token: str, expires_at: float) -> None:
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        self._client.set(
+            self._key,
+            json.dumps({"access_token": token, "expires_at": expires_at}),
+            px=ttl_ms,
+        )
+
+    def clear(self) -> None:
+        self._client.delete(self._key)
+
+    @contextlib.contextmanager
+    def refresh_lock(self, timeout: float) -> Iterator[bool]:
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        acquired = False
+        while True:
+            # Lock expires on its own if the holder dies mid-refresh
+            if self._client.set(self._lock_key, owner, nx=True, px=int(timeout * 1000)):
+                acquired = True
+                break
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self._poll_interval)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._client.eval(self._RELEASE_SCRIPT, 1, self._lock_key, owner)
+
+
+class FileTokenStore(TokenStore):
+    """Token store shared by the worker processes of one host."""
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self._path = path
+        self._lock_path = f"{path}.lock"
+        self._poll_interval = poll_interval
+
+    def load(self) -> Optional[StoredToken]:
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data["access_token"], float(data["expires_at"])
+
+    def save(self, token: str, expires_at: float) -> None:
+        directory = os.path.dirname(self._path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".m2m-token-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"access_token": token, "expires_at": expires_at}, f)
+            os.chmod(tmp_path, 0o600)
+            # Atomic swap so readers never see a partial file
+            os.replace(tmp_path, self._path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+    def clear(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._path)
+
+    @contextlib.contextmanager
+    def refresh_lock(self, timeout: float) -> Iterator[bool]:
+        if fcntl is None:
+            yield True
+            return
+
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + timeout
+        acquired = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(self._poll_interval)
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def create_token_store() -> Optional[TokenStore]:
+    """
+    Build the token store selected by ``COGNITO_TOKEN_STORE``.
+
+    Returns:
+        TokenStore, or None for the default per-process ("memory") cache
+    """
+    backend = config.COGNITO_TOKEN_STORE.lower()
+    if backend in ("", "memory"):
+        return None
+
+    if backend == "redis":
+        url = config.COGNITO_TOKEN_STORE_URL or config.CELERY_BROKER_URL
+        if not url:
+            logger.error("COGNITO_TOKEN_STORE=redis requires COGNITO_TOKEN_STORE_URL or CELERY_BROKER_URL")
+            return None
+        # Scope the key to the client so different credentials never share a token
+        key = f"{config.APP_NAME}:cognito:m2m_token:{config.COGNITO_CLIENT_ID}:{config.COGNITO_SCOPE}"
+        return RedisTokenStore(url, key)
+
+    if backend == "file":
+        return FileTokenStore(config.COGNITO_TOKEN_FILE_PATH)
+
+    logger.error(f"Unknown COGNITO_TOKEN_STORE backend: {config.COGNITO_TOKEN_STORE}")
+    return None
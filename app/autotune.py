@@ -0,0 +1,197 @@
+"""
+Concurrency autotuner for workers running tasks in their main process (threads/gevent).
+
+Every ``CELERY_AUTOTUNE_INTERVAL`` seconds the tuner sizes the number of
+tasks the worker runs at once from what it observes:
+
+- the backlog: messages waiting in the worker's queues plus the ones it
+  has already reserved
+- the video API latency: moving average over this process's calls
+
+Draining a backlog of ``B`` tasks that each wait ``L`` seconds on the API
+within ``CELERY_AUTOTUNE_DRAIN_SECONDS`` needs ``B * L / drain`` tasks in
+flight (Little's law). The tuner grows to that at once and shrinks by at
+most a quarter per step, between ``CELERY_AUTOTUNE_MIN_CONCURRENCY`` and
+the worker's concurrency. While the API answers slower than
+``CELERY_AUTOTUNE_MAX_LATENCY_MS`` it is saturated and more requests only
+queue up there, so the tuner backs off by a quarter instead.
+
+Concurrency is applied through the consumer's prefetch count: with late
+acknowledgement (enabled by every pool profile) a worker never runs more
+tasks than it holds unacknowledged messages. The pool keeps its threads or
+greenlets; idle ones cost next to nothing. Prefork workers are sized by
+Celery's ``--autoscale`` instead (see :mod:`app.worker_profiles`).
+"""
+
+import contextlib
+import logging
+import math
+import os
+import threading
+from typing import Any, List, Optional
+
+from celery.worker import state as worker_state
+
+from app.config import config
+from app.metrics import recent_api_latency
+from app.routing import queue_depth
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyTuner:
+    """Adjust a worker consumer's effective concurrency from API latency and backlog."""
+
+    def __init__(
+        self,
+        consumer: Any,
+        min_concurrency: Optional[int] = None,
+        interval: Optional[float] = None,
+        drain_seconds: Optional[float] = None,
+        max_latency: Optional[float] = None,
+    ):
+        self.consumer = consumer
+        # The consumer starts with a prefetch count for the full pool
+        self.max_concurrency = max(1, consumer.pool.num_processes)
+        self.min_concurrency = max(1, min(
+            self.max_concurrency,
+            config.CELERY_AUTOTUNE_MIN_CONCURRENCY if min_concurrency is None else min_concurrency,
+        ))
+        self.interval = config.CELERY_AUTOTUNE_INTERVAL if interval is None else interval
+        self.drain_seconds = config.CELERY_AUTOTUNE_DRAIN_SECONDS if drain_seconds is None else drain_seconds
+        self.max_latency = (
+            config.CELERY_AUTOTUNE_MAX_LATENCY_MS / 1000.0 if max_latency is None else max_latency
+        )
+        self.concurrency = self.max_concurrency
+        self._connection = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def target(self, backlog: int, latency: Optional[float]) -> int:
+        """Concurrency for ``backlog`` tasks each waiting ``latency`` seconds on the API."""
+        if latency is None:
+            # No API call yet: nothing to size from
+            return self.concurrency
+        if latency > self.max_latency:
+            target = math.floor(self.concurrency * 0.75)
+        else:
+            target = max(
+                math.ceil(backlog * latency / self.drain_seconds),
+                math.floor(self.concurrency * 0.75),
+            )
+        return max(self.min_concurrency, min(self.max_concurrency, target))
+
+    def apply(self, concurrency: int) -> None:
+        """Set the effective concurrency through the consumer's prefetch count."""
+        change = concurrency - self.concurrency
+        if not change:
+            return
+        qos = self.consumer.qos
+        prefetch = abs(change) * self.consumer.prefetch_multiplier
+        # Picked up by the consumer loop, which owns the channel
+        if change > 0:
+            qos.increment_eventually(prefetch)
+        else:
+            qos.decrement_eventually(prefetch)
+        logger.info(f"Autotuner: concurrency {self.concurrency} -> {concurrency}")
+        self.concurrency = concurrency
+
+    def backlog(self) -> int:
+        """Messages waiting in this worker's queues plus the ones it has reserved."""
+        if self._connection is None:
+            self._connection = self.consumer.app.connection_for_read()
+        return queue_depth(self._connection.default_channel, self._queue_names()) + len(
+            worker_state.reserved_requests
+        )
+
+    def _queue_names(self) -> List[str]:
+        return [queue.name for queue in self.consumer.task_consumer.queues]
+
+    def step(self) -> int:
+        """Measure, then apply the new target; returns the concurrency now in effect."""
+        self.apply(self.target(self.backlog(), recent_api_latency()))
+        return self.concurrency
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.step()
+            except Exception as e:
+                logger.warning(f"Autotuner step failed: {e!s}")
+                self._close_connection()
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            with contextlib.suppress(Exception):
+                self._connection.release()
+            self._connection = None
+
+    def start(self) -> None:
+        """Start tuning in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="concurrency-autotuner", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Concurrency autotuner started ({self.min_concurrency}..{self.max_concurrency}, "
+            f"every {self.interval}s)"
+        )
+
+    def stop(self) -> None:
+        """Stop tuning and release the broker connection."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self._close_connection()
+
+
+_tuner: Optional[ConcurrencyTuner] = None
+_tuner_pid: Optional[int] = None
+_tuner_lock = threading.Lock()
+
+
+def start_autotuner(consumer: Any) -> Optional[ConcurrencyTuner]:
+    """
+    Start the tuner for ``consumer`` if ``CELERY_AUTOTUNE_ENABLED`` (once per process).
+
+    Returns:
+        The running tuner, or None if autotuning is disabled or impossible
+    """
+    global _tuner, _tuner_pid
+
+    if not config.CELERY_AUTOTUNE_ENABLED:
+        return None
+    if not consumer.app.conf.task_acks_late:
+        logger.warning("CELERY_AUTOTUNE_ENABLED needs late acknowledgement (a pool profile and a shared checkpoint store); not tuning")
+        return None
+
+    pid = os.getpid()
+    with _tuner_lock:
+        if _tuner is None or _tuner_pid != pid:
+            _tuner = ConcurrencyTuner(consumer)
+            _tuner_pid = pid
+            _tuner.start()
+        return _tuner
+
+
+def stop_autotuner() -> None:
+    """Stop the tuner of this process, if any."""
+    global _tuner, _tuner_pid
+
+    with _tuner_lock:
+        tuner, _tuner = _tuner, None
+        if tuner is not None and _tuner_pid == os.getpid():
+            tuner.stop()
+        _tuner_pid = None
+
+
+def _reset_after_fork() -> None:
+    global _tuner, _tuner_pid, _tuner_lock
+    _tuner = None
+    _tuner_pid = None
+    _tuner_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
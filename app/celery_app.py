@@ -11,9 +11,51 @@ if __name__ == "__main__":
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
+import logging
+from typing import Any, Dict, Optional
+
 from celery import Celery
 
 from app.config import config
+from app.routing import routed_queues, routing_config
+from app.serialization import serialization_config
+from app.worker_profiles import pool_config
+
+logger = logging.getLogger(__name__)
+
+
+def result_config(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Celery result settings for a result profile (default ``CELERY_RESULT_PROFILE``).
+
+    - ``lean``: notifications are fire-and-forget, so no result, STARTED state
+      or error is written to the result backend. Tasks listed in
+      ``CELERY_RESULT_TASKS`` (someone waits on them) still store their
+      result, which expires after ``CELERY_RESULT_EXPIRES`` seconds.
+    - ``full``: every task stores its result and STARTED state (the
+      previous behaviour), also expiring after ``CELERY_RESULT_EXPIRES``.
+
+    Either way nothing is stored unless a result backend is configured.
+    """
+    profile = (profile or config.CELERY_RESULT_PROFILE).lower()
+    settings: Dict[str, Any] = {"result_expires": config.CELERY_RESULT_EXPIRES}
+    if config.CELERY_RESULT_BACKEND:
+        settings["result_backend"] = config.CELERY_RESULT_BACKEND
+
+    if profile == "full":
+        settings.update({"task_ignore_result": False, "task_track_started": True})
+        return settings
+    if profile != "lean":
+        logger.error(f"Unknown CELERY_RESULT_PROFILE: {profile}, using lean")
+
+    settings.update({
+        "task_ignore_result": True,
+        "task_track_started": False,
+        "task_store_errors_even_if_ignored": False,
+        "task_annotations": {name: {"ignore_result": False} for name in config.CELERY_RESULT_TASKS},
+    })
+    return settings
+
 
 # Create Celery application instance
 celery_app = Celery(
@@ -24,26 +66,37 @@ celery_app = Celery(
 # Configure Celery
 celery_config = {
     "broker_url": config.CELERY_BROKER_URL,
-    "task_serializer": "json",
-    "accept_content": ["json"],
-    "result_serializer": "json",
     "timezone": "UTC",
     "enable_utc": True,
-    "task_track_started": True,
     "task_time_limit": 30 * 60,  # 30 minutes
     "task_soft_time_limit": 25 * 60,  # 25 minutes
     "task_default_queue": config.CELERY_QUEUE_NAME,
 }
 
-# Windows compatibility: Use solo pool by default on Windows
-if sys.platform == "win32":
+# Pool, concurrency, prefetch and acknowledgement (CELERY_POOL_PROFILE)
+celery_config.update(pool_config())
+
+# Windows compatibility: prefork is not supported on Windows, use the solo pool instead
+if sys.platform == "win32" and celery_config.get("worker_pool", "prefork") == "prefork":
     celery_config["worker_pool"] = "solo"
 
+# Serializer, accepted content and compression (CELERY_SERIALIZER, ...)
+celery_config.update(serialization_config())
+
+# Result storage and STARTED tracking (CELERY_RESULT_PROFILE)
+celery_config.update(result_config())
+
+# Separate queues for completions, progress and worker status (CELERY_ROUTING_ENABLED)
+celery_config.update(routing_config())
+
 celery_app.conf.update(celery_config)
 
+# Register worker lifecycle hooks (per-process HTTP pools, etc.)
+import app.worker_signals  # noqa: E402, F401
+
 if __name__ == "__main__":
     # If no arguments are provided, default to starting a worker
     args = sys.argv[1:]
     if not args:
-        args = ["worker", "-l", "info", "-Q", config.CELERY_QUEUE_NAME]
+        args = ["worker", "-l", "info", "-Q", ",".join(routed_queues())]
     celery_app.start(args)
@@ -4,6 +4,8 @@ Loads settings from environment variables.
 """
 
 import os
+import tempfile
+from typing import ClassVar, List
 
 from dotenv import load_dotenv
 
@@ -20,12 +22,180 @@ class Config:
     )
     CELERY_QUEUE_NAME = os.getenv("CELERY_QUEUE_NAME", "notifications")
 
+    # Message Serialization (json | msgpack) and compression of bodies >= threshold bytes (0 = off)
+    CELERY_SERIALIZER = os.getenv("CELERY_SERIALIZER", "json")
+    CELERY_ACCEPT_CONTENT: ClassVar[List[str]] = [name.strip() for name in os.getenv("CELERY_ACCEPT_CONTENT", "json,msgpack").split(",") if name.strip()]
+    CELERY_COMPRESSION_THRESHOLD = int(os.getenv("CELERY_COMPRESSION_THRESHOLD", "0"))
+
+    # Task Results: "full" stores every result, "lean" stores nothing except for CELERY_RESULT_TASKS
+    CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "")
+    CELERY_RESULT_PROFILE = os.getenv("CELERY_RESULT_PROFILE", "full")
+    CELERY_RESULT_TASKS: ClassVar[List[str]] = [name.strip() for name in os.getenv("CELERY_RESULT_TASKS", "").split(",") if name.strip()]
+    CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "600"))
+
+    # Task Routing (separate queues for completions, progress and worker status)
+    CELERY_ROUTING_ENABLED = os.getenv("CELERY_ROUTING_ENABLED", "false").lower() == "true"
+    CELERY_COMPLETION_QUEUE = os.getenv("CELERY_COMPLETION_QUEUE", f"{CELERY_QUEUE_NAME}.completions")
+    CELERY_PROGRESS_QUEUE = os.getenv("CELERY_PROGRESS_QUEUE", f"{CELERY_QUEUE_NAME}.progress")
+    CELERY_WORKER_STATUS_QUEUE = os.getenv("CELERY_WORKER_STATUS_QUEUE", f"{CELERY_QUEUE_NAME}.worker_status")
+    # Relative share of messages taken from each queue while all have a backlog
+    CELERY_COMPLETION_QUEUE_WEIGHT = int(os.getenv("CELERY_COMPLETION_QUEUE_WEIGHT", "8"))
+    CELERY_WORKER_STATUS_QUEUE_WEIGHT = int(os.getenv("CELERY_WORKER_STATUS_QUEUE_WEIGHT", "2"))
+    CELERY_PROGRESS_QUEUE_WEIGHT = int(os.getenv("CELERY_PROGRESS_QUEUE_WEIGHT", "1"))
+
+    # Per-task_id Sharding (0 disables; each shard queue is consumed serially)
+    CELERY_SHARD_COUNT = int(os.getenv("CELERY_SHARD_COUNT", "0"))
+    CELERY_SHARD_QUEUE_PREFIX = os.getenv("CELERY_SHARD_QUEUE_PREFIX", f"{CELERY_QUEUE_NAME}.shard")
+
+    # Worker Pool Profile (opt-in): threads | gevent (I/O-bound, high concurrency) or prefork (CPU-light);
+    # empty keeps Celery's defaults (prefork, acknowledged when the task starts)
+    CELERY_POOL_PROFILE = os.getenv("CELERY_POOL_PROFILE", "")
+    # Override the profile's concurrency / prefetch multiplier (0 = profile default)
+    CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "0"))
+    CELERY_PREFETCH_MULTIPLIER = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "0"))
+
+    # Concurrency Autotuner (threads/gevent pools): sized from API latency and queue backlog
+    CELERY_AUTOTUNE_ENABLED = os.getenv("CELERY_AUTOTUNE_ENABLED", "false").lower() == "true"
+    CELERY_AUTOTUNE_MIN_CONCURRENCY = int(os.getenv("CELERY_AUTOTUNE_MIN_CONCURRENCY", "4"))
+    CELERY_AUTOTUNE_INTERVAL = float(os.getenv("CELERY_AUTOTUNE_INTERVAL", "5"))
+    # Aim to drain the backlog within this many seconds; back off while the API is slower than the limit
+    CELERY_AUTOTUNE_DRAIN_SECONDS = float(os.getenv("CELERY_AUTOTUNE_DRAIN_SECONDS", "10"))
+    CELERY_AUTOTUNE_MAX_LATENCY_MS = float(os.getenv("CELERY_AUTOTUNE_MAX_LATENCY_MS", "1000"))
+
+    # Dead-letter Queue: status updates and completions that exhausted their retries
+    DEAD_LETTER_ENABLED = os.getenv("DEAD_LETTER_ENABLED", "false").lower() == "true"
+    DEAD_LETTER_QUEUE = os.getenv("DEAD_LETTER_QUEUE", f"{CELERY_QUEUE_NAME}.dead_letter")
+    # Replayed calls published per second (0 = unlimited)
+    DEAD_LETTER_REPLAY_RATE = float(os.getenv("DEAD_LETTER_REPLAY_RATE", "10"))
+
+    # Render-node Publisher (app.publisher): batch size, max wait before publishing, and buffer bound
+    PUBLISHER_MAX_BATCH = int(os.getenv("PUBLISHER_MAX_BATCH", "100"))
+    PUBLISHER_FLUSH_INTERVAL_MS = int(os.getenv("PUBLISHER_FLUSH_INTERVAL_MS", "200"))
+    PUBLISHER_MAX_BUFFER = int(os.getenv("PUBLISHER_MAX_BUFFER", "10000"))
+
+    # HTTP Ingest Gateway (app.gateway)
+    GATEWAY_HOST = os.getenv("GATEWAY_HOST", "0.0.0.0")
+    GATEWAY_PORT = int(os.getenv("GATEWAY_PORT", "8080"))
+    GATEWAY_AUTH_TOKEN = os.getenv("GATEWAY_AUTH_TOKEN", "")
+    GATEWAY_MAX_BODY_BYTES = int(os.getenv("GATEWAY_MAX_BODY_BYTES", str(1024 * 1024)))
+    GATEWAY_MAX_BATCH = int(os.getenv("GATEWAY_MAX_BATCH", "500"))
+    GATEWAY_BATCH_INTERVAL_MS = float(os.getenv("GATEWAY_BATCH_INTERVAL_MS", "5"))
+    # Refuse events (503) while this many are waiting to be published, or the queues hold more (0 = unchecked)
+    GATEWAY_MAX_PENDING = int(os.getenv("GATEWAY_MAX_PENDING", "10000"))
+    GATEWAY_MAX_QUEUE_DEPTH = int(os.getenv("GATEWAY_MAX_QUEUE_DEPTH", "100000"))
+    GATEWAY_DEPTH_CHECK_INTERVAL = float(os.getenv("GATEWAY_DEPTH_CHECK_INTERVAL", "1"))
+
     # Application Configuration
     APP_NAME = os.getenv("APP_NAME", "Jianying-Notification")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
     # Video API Configuration
     VIDEO_API_BASE_URL = os.getenv("VIDEO_API_BASE_URL", "http://localhost:9001")
+    # Several API instances or regions to balance across (comma-separated; overrides VIDEO_API_BASE_URL)
+    VIDEO_API_BASE_URLS: ClassVar[List[str]] = [url.strip().rstrip("/") for url in os.getenv("VIDEO_API_BASE_URLS", "").split(",") if url.strip()]
+    # least_outstanding | ewma (latency x requests in flight)
+    VIDEO_API_BALANCER = os.getenv("VIDEO_API_BALANCER", "least_outstanding")
+    # Instances failing this many calls in a row, or their health check, are ejected until it passes again
+    VIDEO_API_EJECT_FAILURES = int(os.getenv("VIDEO_API_EJECT_FAILURES", "3"))
+    VIDEO_API_HEALTH_PATH = os.getenv("VIDEO_API_HEALTH_PATH", "/health")
+    VIDEO_API_HEALTH_INTERVAL = float(os.getenv("VIDEO_API_HEALTH_INTERVAL", "5"))
+
+    # HTTP Connection Pool Configuration (per worker process)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+    HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+
+    # Video API Timeouts: fixed, or adaptive from recent per-endpoint latency percentiles
+    API_TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "30"))
+    API_ADAPTIVE_TIMEOUT_ENABLED = os.getenv("API_ADAPTIVE_TIMEOUT_ENABLED", "false").lower() == "true"
+    # Timeout = percentile x multiplier, between the minimum and API_TIMEOUT_SECONDS
+    API_TIMEOUT_PERCENTILE = float(os.getenv("API_TIMEOUT_PERCENTILE", "99"))
+    API_TIMEOUT_MULTIPLIER = float(os.getenv("API_TIMEOUT_MULTIPLIER", "3"))
+    API_TIMEOUT_MIN_SECONDS = float(os.getenv("API_TIMEOUT_MIN_SECONDS", "1"))
+    # Calls kept per endpoint, and needed before percentiles are used
+    API_LATENCY_WINDOW = int(os.getenv("API_LATENCY_WINDOW", "200"))
+    API_LATENCY_MIN_SAMPLES = int(os.getenv("API_LATENCY_MIN_SAMPLES", "20"))
+
+    # Hedged Status Updates: resend a status PUT still unanswered after this latency percentile
+    API_HEDGE_ENABLED = os.getenv("API_HEDGE_ENABLED", "false").lower() == "true"
+    API_HEDGE_PERCENTILE = float(os.getenv("API_HEDGE_PERCENTILE", "95"))
+    # Hedges allowed as a percentage of status updates (plus a small burst)
+    API_HEDGE_BUDGET_PERCENT = float(os.getenv("API_HEDGE_BUDGET_PERCENT", "5"))
+    API_HEDGE_BUDGET_BURST = int(os.getenv("API_HEDGE_BUDGET_BURST", "10"))
+
+    # Cache DNS lookups of the API and Cognito hosts for this many seconds in each process (0 = disabled)
+    DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "0"))
+
+    # Worker Warm-up at process start: resolve hosts, fetch the M2M token, open pooled connections
+    WORKER_WARMUP_ENABLED = os.getenv("WORKER_WARMUP_ENABLED", "false").lower() == "true"
+    # Connections opened per API instance; give up after the timeout (below Celery's 4s child start limit)
+    WORKER_WARMUP_CONNECTIONS = int(os.getenv("WORKER_WARMUP_CONNECTIONS", "2"))
+    WORKER_WARMUP_TIMEOUT = float(os.getenv("WORKER_WARMUP_TIMEOUT", "3"))
+
+    # Status Update Coalescing (0 disables; terminal updates are never delayed)
+    STATUS_COALESCE_WINDOW_MS = int(os.getenv("STATUS_COALESCE_WINDOW_MS", "0"))
+    STATUS_COALESCE_MAX_BATCH = int(os.getenv("STATUS_COALESCE_MAX_BATCH", "100"))
+    VIDEO_API_BULK_STATUS_ENABLED = os.getenv("VIDEO_API_BULK_STATUS_ENABLED", "false").lower() == "true"
+
+    # Worker Status Aggregation (0 disables; availability transitions are reported right away)
+    WORKER_STATUS_AGGREGATE_SECONDS = float(os.getenv("WORKER_STATUS_AGGREGATE_SECONDS", "0"))
+
+    # Video API Circuit Breaker (state per process, or shared via Redis)
+    CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "false").lower() == "true"
+    CIRCUIT_BREAKER_STORE = os.getenv("CIRCUIT_BREAKER_STORE", "memory")
+    CIRCUIT_BREAKER_STORE_URL = os.getenv("CIRCUIT_BREAKER_STORE_URL", "")
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_RESET_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "1"))
+    CIRCUIT_BREAKER_HALF_OPEN_SUCCESSES = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_SUCCESSES", "2"))
+
+    # Skip duplicate and out-of-order status updates (state per process, or shared via Redis)
+    STATUS_FILTER_ENABLED = os.getenv("STATUS_FILTER_ENABLED", "false").lower() == "true"
+    STATUS_FILTER_STORE = os.getenv("STATUS_FILTER_STORE", "memory")
+    STATUS_FILTER_STORE_URL = os.getenv("STATUS_FILTER_STORE_URL", "")
+    STATUS_FILTER_TTL = int(os.getenv("STATUS_FILTER_TTL", "86400"))
+    STATUS_FILTER_CACHE_SIZE = int(os.getenv("STATUS_FILTER_CACHE_SIZE", "10000"))
+
+    # Durable Outbox: failed API calls are journaled per host and replayed when the API recovers
+    OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "false").lower() == "true"
+    OUTBOX_PATH = os.getenv(
+        "OUTBOX_PATH",
+        os.path.join(tempfile.gettempdir(), "jianying-notification-outbox.sqlite3"),
+    )
+    OUTBOX_DRAIN_INTERVAL = float(os.getenv("OUTBOX_DRAIN_INTERVAL", "5"))
+    OUTBOX_DRAIN_BATCH = int(os.getenv("OUTBOX_DRAIN_BATCH", "100"))
+    OUTBOX_DRAIN_CONCURRENCY = int(os.getenv("OUTBOX_DRAIN_CONCURRENCY", "8"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "100"))
+
+    # Threads per worker process for concurrent task steps (e.g. completion fan-out)
+    PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "16"))
+
+    # Task Step Checkpoints (memory per process, or redis shared fleet-wide) and per-step retry backoff
+    TASK_CHECKPOINT_STORE = os.getenv("TASK_CHECKPOINT_STORE", "memory")
+    TASK_CHECKPOINT_STORE_URL = os.getenv("TASK_CHECKPOINT_STORE_URL", "")
+    TASK_CHECKPOINT_TTL = int(os.getenv("TASK_CHECKPOINT_TTL", "86400"))
+    TASK_RETRY_BACKOFF_BASE = float(os.getenv("TASK_RETRY_BACKOFF_BASE", "5"))
+    TASK_RETRY_BACKOFF_MAX = float(os.getenv("TASK_RETRY_BACKOFF_MAX", "300"))
+    # Extra retries allowed for tasks deferred by the rate limiter or circuit breaker
+    TASK_MAX_DEFERRALS = int(os.getenv("TASK_MAX_DEFERRALS", "20"))
+
+    # Video API Rate Limits (requests/second per endpoint, 0 = unlimited)
+    RATE_LIMIT_TASK_STATUS_QPS = float(os.getenv("RATE_LIMIT_TASK_STATUS_QPS", "0"))
+    RATE_LIMIT_VIDEO_CREATE_QPS = float(os.getenv("RATE_LIMIT_VIDEO_CREATE_QPS", "0"))
+    RATE_LIMIT_WORKER_STATUS_QPS = float(os.getenv("RATE_LIMIT_WORKER_STATUS_QPS", "0"))
+    RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "1"))
+    RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "5"))
+    RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+    RATE_LIMIT_STORE_URL = os.getenv("RATE_LIMIT_STORE_URL", "")
+
+    # Asyncio Worker Configuration (python -m app.async_worker)
+    ASYNC_WORKER_CONCURRENCY = int(os.getenv("ASYNC_WORKER_CONCURRENCY", "200"))
+    ASYNC_HTTP_LIMIT = int(os.getenv("ASYNC_HTTP_LIMIT", "100"))
+    ASYNC_HTTP_KEEPALIVE_SECONDS = float(os.getenv("ASYNC_HTTP_KEEPALIVE_SECONDS", "30"))
+
+    # Prometheus Metrics (set PROMETHEUS_MULTIPROC_DIR for the prefork pool)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9808"))
 
     # Cognito M2M Configuration
     COGNITO_DOMAIN = os.getenv("COGNITO_DOMAIN", "")
@@ -33,5 +203,24 @@ class Config:
     COGNITO_CLIENT_SECRET = os.getenv("COGNITO_CLIENT_SECRET", "")
     COGNITO_SCOPE = os.getenv("COGNITO_SCOPE", "")
 
+    # Shared M2M token store: "memory" (per process), "redis" or "file" (per host)
+    COGNITO_TOKEN_STORE = os.getenv("COGNITO_TOKEN_STORE", "memory")
+    COGNITO_TOKEN_STORE_URL = os.getenv("COGNITO_TOKEN_STORE_URL", "")
+    COGNITO_TOKEN_FILE_PATH = os.getenv(
+        "COGNITO_TOKEN_FILE_PATH",
+        os.path.join(tempfile.gettempdir(), "jianying-notification-m2m-token.json"),
+    )
+    COGNITO_TOKEN_LOCK_TIMEOUT = float(os.getenv("COGNITO_TOKEN_LOCK_TIMEOUT", "35"))
+
+    # Background M2M token renewal (started at worker process init)
+    COGNITO_BACKGROUND_REFRESH = os.getenv("COGNITO_BACKGROUND_REFRESH", "false").lower() == "true"
+    COGNITO_REFRESH_FRACTION = float(os.getenv("COGNITO_REFRESH_FRACTION", "0.8"))
+    COGNITO_REFRESH_RETRY_SECONDS = float(os.getenv("COGNITO_REFRESH_RETRY_SECONDS", "5"))
+
+    @property
+    def video_api_base_urls(self) -> List[str]:
+        """Base URLs of the video API instances (VIDEO_API_BASE_URLS, else VIDEO_API_BASE_URL)."""
+        return self.VIDEO_API_BASE_URLS or [self.VIDEO_API_BASE_URL.rstrip("/")]
+
 
 config = Config()
@@ -0,0 +1,300 @@
+"""
+Dead-letter queue for notification tasks that exhausted their retries.
+
+With ``DEAD_LETTER_ENABLED``, an ``update_video_render_status`` or
+``process_video_render_completion`` call that fails its last retry is
+published to the ``DEAD_LETTER_QUEUE`` broker queue, with its original
+arguments, the error and when it failed, instead of being dropped. No
+worker consumes that queue; it is inspected and replayed from the command
+line:
+
+    python -m app.dead_letter list --task-id 0b6f3c1e-... --since 2h
+    python -m app.dead_letter replay --error "503" --since 2024-06-01T08:00 --rate 20
+    python -m app.dead_letter purge --until 7d
+
+Filters (``--task-id``, ``--task``, ``--since``/``--until``, ``--error``)
+select dead letters; the others are left in the queue. Replayed calls are
+published like new tasks (same routing, retries start from zero) at most
+``--rate`` per second (``DEAD_LETTER_REPLAY_RATE``), and each dead letter
+is removed once its call is published.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from celery.exceptions import MaxRetriesExceededError
+from kombu import Queue
+
+from app.celery_app import celery_app
+from app.config import config
+from app.metrics import record_dead_letter
+from app.routing import COMPLETION_TASK, STATUS_TASK, task_id_argument
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_TASKS = {"status": STATUS_TASK, "completion": COMPLETION_TASK}
+
+_PUBLISH_RETRY_POLICY = {"max_retries": 3, "interval_start": 0.5, "interval_step": 1.0, "interval_max": 3.0}
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_DURATION_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class DeadLetter(NamedTuple):
+    task: str
+    id: Optional[str]  # Celery task id of the failed call
+    args: List[Any]
+    kwargs: Dict[str, Any]
+    error: str
+    error_type: str
+    retries: int
+    failed_at: float
+    hostname: Optional[str]
+
+    @classmethod
+    def from_body(cls, body: Dict[str, Any]) -> "DeadLetter":
+        return cls(
+            task=body.get("task", ""),
+            id=body.get("id"),
+            args=list(body.get("args") or ()),
+            kwargs=dict(body.get("kwargs") or {}),
+            error=body.get("error", ""),
+            error_type=body.get("error_type", ""),
+            retries=body.get("retries") or 0,
+            failed_at=body.get("failed_at") or 0.0,
+            hostname=body.get("hostname"),
+        )
+
+    @property
+    def task_id(self) -> Optional[str]:
+        """Render task_id of the failed call."""
+        return task_id_argument(self.task, self.args, self.kwargs)
+
+
+def dead_letter_queue() -> Queue:
+    return Queue(config.DEAD_LETTER_QUEUE, routing_key=config.DEAD_LETTER_QUEUE, durable=True)
+
+
+def retries_exhausted(task: str, retries: int, error: BaseException) -> bool:
+    """
+    Whether a failed call of ``task`` went through its retries.
+
+    Calls that fail without retrying (a ``TypeError`` from bad arguments, a
+    bug) are not dead-lettered: replaying them would fail the same way.
+    """
+    if isinstance(error, MaxRetriesExceededError):
+        return True
+    max_retries = getattr(celery_app.tasks.get(task), "max_retries", None)
+    return max_retries is not None and retries >= max_retries
+
+
+def dead_letter(task: str, task_id: Optional[str], args: Sequence[Any], kwargs: Dict[str, Any],
+                error: BaseException, retries: int = 0) -> bool:
+    """
+    Publish a call that exhausted its retries to the dead-letter queue.
+
+    Returns:
+        bool: True if the call was dead-lettered
+    """
+    if not config.DEAD_LETTER_ENABLED or task not in DEAD_LETTER_TASKS.values():
+        return False
+    letter = DeadLetter(
+        task=task,
+        id=task_id,
+        args=list(args or ()),
+        kwargs=dict(kwargs or {}),
+        error=str(error),
+        error_type=type(error).__name__,
+        retries=retries,
+        failed_at=time.time(),
+        hostname=socket.gethostname(),
+    )
+    queue = dead_letter_queue()
+    try:
+        with celery_app.producer_or_acquire() as producer:
+            producer.publish(
+                letter._asdict(),
+                exchange="",
+                routing_key=queue.name,
+                declare=[queue],
+                serializer="json",
+                retry=True,
+                retry_policy=_PUBLISH_RETRY_POLICY,
+            )
+    except Exception as e:
+        logger.error(f"Failed to dead-letter {task}[{task_id}] for task_id: {letter.task_id}: {e!s}", exc_info=True)
+        return False
+    record_dead_letter(task)
+    logger.warning(f"Dead-lettered {task}[{task_id}] for task_id: {letter.task_id}: {letter.error}")
+    return True
+
+
+def matches(
+    letter: DeadLetter,
+    task_id: Optional[str] = None,
+    task: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    error: Optional[str] = None,
+) -> bool:
+    """Whether ``letter`` passes every given filter (``task_id`` also matches the Celery task id)."""
+    if task_id is not None and task_id not in (letter.task_id, letter.id):
+        return False
+    if task is not None and letter.task != DEAD_LETTER_TASKS.get(task, task):
+        return False
+    if since is not None and letter.failed_at < since:
+        return False
+    if until is not None and letter.failed_at >= until:
+        return False
+    return error is None or error.lower() in f"{letter.error_type}: {letter.error}".lower()
+
+
+@contextmanager
+def open_dead_letters() -> Iterator[List[Tuple[DeadLetter, Any]]]:
+    """
+    Take every dead letter off the queue, oldest first, without acknowledging it.
+
+    Messages acknowledged inside the block are removed; all others are put
+    back in the queue when the block exits (or by the broker if this process dies).
+    """
+    queue = dead_letter_queue()
+    with celery_app.connection_for_write() as connection:
+        bound = queue(connection.default_channel)
+        bound.declare()
+        messages = []
+        try:
+            while True:
+                message = bound.get(no_ack=False, accept=["json"])
+                if message is None:
+                    break
+                messages.append(message)
+            letters = [(DeadLetter.from_body(message.payload), message) for message in messages]
+            yield sorted(letters, key=lambda item: item[0].failed_at)
+        finally:
+            for message in messages:
+                if not message.acknowledged:
+                    message.requeue()
+
+
+def replay(letters: Iterable[Tuple[DeadLetter, Any]], rate: float = 0.0) -> int:
+    """
+    Publish dead-lettered calls again through the normal routing, at most ``rate`` per second.
+
+    Each dead letter is acknowledged (removed) once its call is published.
+
+    Returns:
+        int: Number of calls replayed
+    """
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_at = time.monotonic()
+    replayed = 0
+    with celery_app.producer_or_acquire() as producer:
+        for letter, message in letters:
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_at = max(next_at, time.monotonic()) + interval
+            celery_app.send_task(letter.task, args=letter.args, kwargs=letter.kwargs, producer=producer)
+            message.ack()
+            replayed += 1
+    return replayed
+
+
+def parse_time(value: str) -> float:
+    """Timestamp of an ISO 8601 time (UTC unless it has an offset) or of a duration ago ("90s", "30m", "2h", "7d")."""
+    duration = _DURATION.match(value.strip())
+    if duration:
+        return time.time() - float(duration.group(1)) * _DURATION_SECONDS[duration.group(2)]
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO 8601 time or a duration like 30m: {value}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_letter(letter: DeadLetter) -> str:
+    failed_at = datetime.fromtimestamp(letter.failed_at, timezone.utc).isoformat(timespec="seconds")
+    name = next((short for short, task in DEAD_LETTER_TASKS.items() if task == letter.task), letter.task)
+    return (
+        f"{failed_at} {name:<10} task_id={letter.task_id} retries={letter.retries} "
+        f"host={letter.hostname} {letter.error_type}: {letter.error}"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Inspect and replay dead-lettered notification tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, description in (
+        ("list", "Print matching dead letters"),
+        ("replay", "Publish matching dead letters again and remove them"),
+        ("purge", "Remove matching dead letters without replaying them"),
+    ):
+        command = commands.add_parser(name, help=description, description=description)
+        command.add_argument("--task-id", help="Render task_id (or Celery task id) of the call")
+        command.add_argument("--task", choices=sorted(DEAD_LETTER_TASKS), help="Only this task")
+        command.add_argument("--since", type=parse_time, help="Failed at or after (ISO 8601 or e.g. 2h ago)")
+        command.add_argument("--until", type=parse_time, help="Failed before (ISO 8601 or e.g. 30m ago)")
+        command.add_argument("--error", help="Case-insensitive substring of the error")
+        command.add_argument("--limit", type=int, help="At most this many dead letters, oldest first")
+        if name == "list":
+            command.add_argument("--json", action="store_true", help="Print JSON lines")
+        if name == "replay":
+            command.add_argument(
+                "--rate", type=float, default=config.DEAD_LETTER_REPLAY_RATE,
+                help="Calls published per second (0 = unlimited)",
+            )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    with open_dead_letters() as letters:
+        selected = [
+            (letter, message) for letter, message in letters
+            if matches(letter, args.task_id, args.task, args.since, args.until, args.error)
+        ][:args.limit]
+
+        if args.command == "list":
+            for letter, _ in selected:
+                print(json.dumps(letter._asdict()) if args.json else format_letter(letter))
+            print(f"{len(selected)} of {len(letters)} dead letters match", file=sys.stderr)
+        elif args.command == "replay":
+            replayed = replay(selected, args.rate)
+            print(f"Replayed {replayed} of {len(letters)} dead letters")
+        else:
+            for _, message in selected:
+                message.ack()
+            print(f"Purged {len(selected)} of {len(letters)} dead letters")
+
+
+if __name__ == "__main__":
+    main()
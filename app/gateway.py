@@ -0,0 +1,406 @@
+"""
+Asyncio HTTP ingest gateway for render clients that cannot publish to the broker.
+
+    POST /v1/status        {"status": "processing", "task_id": "...", "progress": 42.0}
+    POST /v1/completions   {"video_id": "...", "oss_url": "https://...", "task_id": "...", ...}
+    GET  /healthz
+
+Each endpoint takes one event object or a JSON array of them, with the
+arguments of ``update_video_render_status`` / ``process_video_render_completion``.
+Events are validated (400 with the reasons otherwise) and answered with
+202 once their messages are on the broker.
+
+Requests are not published one by one: events arriving within
+``GATEWAY_BATCH_INTERVAL_MS`` (or until ``GATEWAY_MAX_BATCH`` are waiting)
+are coalesced like the render-node publisher does (only the latest progress
+of a task is kept) and written with one pipelined broker transaction
+(:func:`app.publisher.publish_calls`) from a single publishing thread, so
+the event loop only parses and validates.
+
+Backpressure: when the notification queues hold more than
+``GATEWAY_MAX_QUEUE_DEPTH`` messages (checked every
+``GATEWAY_DEPTH_CHECK_INTERVAL`` seconds), or more than
+``GATEWAY_MAX_PENDING`` events are waiting to be published, requests are
+answered with 503 and a ``Retry-After`` header instead of growing the backlog.
+
+Run with ``python -m app.gateway`` (requires ``pip install ".[async]"``).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from aiohttp import web
+
+from app.celery_app import celery_app
+from app.config import config
+from app.publisher import (
+    PendingCall,
+    coalesce,
+    completion_call,
+    publish_calls,
+    status_call,
+)
+from app.routing import queue_depth, routed_queues, shard_queues
+from app.serialization import orjson
+from app.tasks.video_tasks import RENDER_STATUS_MAP
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationError(ValueError):
+    """An event that does not match its task's arguments."""
+
+
+class OverloadedError(Exception):
+    """The gateway or the queues behind it are over capacity."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _check_fields(event: Any, fields: Dict[str, Tuple[tuple, bool]]) -> Dict[str, Any]:
+    """Check ``event`` is an object whose fields have the allowed types; fields -> (types, required)."""
+    if not isinstance(event, dict):
+        raise ValidationError("event must be a JSON object")
+    unknown = sorted(set(event) - set(fields))
+    if unknown:
+        raise ValidationError(f"unknown fields: {', '.join(unknown)}")
+    for name, (types, required) in fields.items():
+        value = event.get(name)
+        if value is None:
+            if required:
+                raise ValidationError(f"{name} is required")
+            continue
+        # bool is an int subclass but never a valid number here
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise ValidationError(f"{name} must be {' or '.join(t.__name__ for t in types)}")
+    return event
+
+
+_STATUS_FIELDS = {
+    "status": ((str,), True),
+    "task_id": ((str,), True),
+    "progress": ((int, float), False),
+    "error_message": ((str,), False),
+    "extra": ((dict,), False),
+}
+
+_COMPLETION_FIELDS = {
+    "video_id": ((str,), True),
+    "oss_url": ((str,), True),
+    "task_id": ((str,), False),
+    "video_name": ((str,), False),
+    "resolution": ((str,), False),
+    "framerate": ((str,), False),
+    "duration": ((int, float), False),
+    "file_size": ((int,), False),
+    "thumbnail_url": ((str,), False),
+    "extra": ((dict,), False),
+}
+
+
+def validate_status(event: Any) -> PendingCall:
+    """Validate a render status event."""
+    event = _check_fields(event, _STATUS_FIELDS)
+    if event["status"].lower() not in RENDER_STATUS_MAP:
+        raise ValidationError(f"status must be one of {', '.join(RENDER_STATUS_MAP)}")
+    if not event["task_id"]:
+        raise ValidationError("task_id must not be empty")
+    progress = event.get("progress")
+    if progress is not None and not (math.isfinite(progress) and 0.0 <= progress <= 100.0):
+        raise ValidationError("progress must be between 0 and 100")
+    return status_call(**event)
+
+
+def validate_completion(event: Any) -> PendingCall:
+    """Validate a render completion event."""
+    event = _check_fields(event, _COMPLETION_FIELDS)
+    if not event["video_id"]:
+        raise ValidationError("video_id must not be empty")
+    if not event["oss_url"].startswith(("https://", "http://")):
+        raise ValidationError("oss_url must be an http(s) URL")
+    for name in ("duration", "file_size"):
+        value = event.get(name)
+        if value is not None and not (math.isfinite(value) and value >= 0):
+            raise ValidationError(f"{name} must not be negative")
+    return completion_call(**event)
+
+
+def _loads(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class IngestBatcher:
+    """
+    Collect validated events from request handlers and publish them in micro-batches.
+
+    Handlers ``await submit(calls)``, which returns once the batch holding
+    the calls is on the broker (or raises what publishing raised).
+    """
+
+    def __init__(
+        self,
+        app=celery_app,
+        max_batch: int = 500,
+        batch_interval: float = 0.005,
+        max_pending: int = 10000,
+        max_queue_depth: int = 0,
+        depth_check_interval: float = 1.0,
+    ):
+        self.app = app
+        self.max_batch = max_batch
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.max_queue_depth = max_queue_depth
+        self.depth_check_interval = depth_check_interval
+        self.queue_depth = 0
+        self.published = 0
+        self.received = 0
+        self._pending: List[PendingCall] = []
+        self._batch_done: Optional[asyncio.Future] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        # One thread owns the broker connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gateway-publish")
+        self._connection = None
+
+    async def start(self) -> None:
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run())]
+        if self.max_queue_depth > 0:
+            self._tasks.append(asyncio.create_task(self._watch_queue_depth()))
+
+    async def stop(self) -> None:
+        """Publish what is still pending and release the broker connection."""
+        self._stopping = True
+        self._ready.set()
+        self._full.set()
+        run, *watchers = self._tasks
+        for task in watchers:
+            task.cancel()
+        await asyncio.gather(run, *watchers, return_exceptions=True)
+        await self._in_executor(self._close_connection)
+        self._executor.shutdown(wait=True)
+
+    @property
+    def pending(self) -> int:
+        """Events waiting to be published."""
+        return len(self._pending)
+
+    def check_capacity(self) -> None:
+        """Raise :class:`OverloadedError` if new events should be refused."""
+        if self._stopping:
+            raise OverloadedError("shutting down", 1)
+        if len(self._pending) >= self.max_pending:
+            raise OverloadedError(f"{len(self._pending)} events waiting to be published", self.batch_interval + 1)
+        if self.max_queue_depth > 0 and self.queue_depth > self.max_queue_depth:
+            raise OverloadedError(f"{self.queue_depth} messages queued", self.depth_check_interval)
+
+    async def submit(self, calls: List[PendingCall]) -> None:
+        """Queue ``calls`` for the next batch and wait until it is published."""
+        self.check_capacity()
+        if self._batch_done is None:
+            self._batch_done = asyncio.get_running_loop().create_future()
+        done = self._batch_done
+        self._pending.extend(calls)
+        self.received += len(calls)
+        self._ready.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        await asyncio.shield(done)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            await self._ready.wait()
+            # Let the batch fill up for one interval, unless it is already full
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self.batch_interval)
+            await self._publish_pending()
+        await self._publish_pending()
+
+    async def _publish_pending(self) -> None:
+        calls, self._pending = self._pending, []
+        done, self._batch_done = self._batch_done, None
+        self._ready.clear()
+        self._full.clear()
+        if not calls:
+            return
+        batch = coalesce(calls)
+        try:
+            await self._in_executor(self._publish, batch)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(batch)} ingested events: {e!s}")
+            done.set_exception(e)
+            # Mark it retrieved even if every waiting client went away
+            done.exception()
+        else:
+            self.published += len(batch)
+            done.set_result(None)
+
+    def _publish(self, batch: List[PendingCall]) -> None:
+        if self._connection is None:
+            self._connection = self.app.connection_for_write()
+        try:
+            publish_calls(self.app, self._connection, batch)
+        except Exception:
+            self._close_connection()
+            raise
+
+    def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            with contextlib.suppress(Exception):
+                connection.close()
+
+    def _queue_names(self) -> List[str]:
+        return routed_queues() + shard_queues()
+
+    def measure_queue_depth(self) -> int:
+        """Messages waiting in the notification queues (runs on the publishing thread)."""
+        if self._connection is None:
+            self._connection = self.app.connection_for_write()
+        return queue_depth(self._connection.default_channel, self._queue_names())
+
+    async def _watch_queue_depth(self) -> None:
+        while True:
+            try:
+                self.queue_depth = await self._in_executor(self.measure_queue_depth)
+            except Exception as e:
+                logger.warning(f"Failed to measure queue depth: {e!s}")
+                await self._in_executor(self._close_connection)
+            await asyncio.sleep(self.depth_check_interval)
+
+    async def _in_executor(self, function: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+
+BATCHER = web.AppKey("batcher", IngestBatcher)
+
+
+def _error(status: int, message: str, **extra: Any) -> web.Response:
+    return web.json_response({"error": message, **extra}, status=status)
+
+
+def _handler(validate: Callable[[Any], PendingCall]):
+    async def handle(request: web.Request) -> web.Response:
+        batcher: IngestBatcher = request.app[BATCHER]
+        try:
+            batcher.check_capacity()
+        except OverloadedError as e:
+            return _overloaded(e)
+        try:
+            payload = _loads(await request.read())
+        except ValueError:
+            return _error(400, "body must be JSON")
+
+        events = payload if isinstance(payload, list) else [payload]
+        if not events:
+            return _error(400, "no events")
+        calls, errors = [], []
+        for index, event in enumerate(events):
+            try:
+                calls.append(validate(event))
+            except ValidationError as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            return _error(400, "invalid events", details=errors)
+
+        try:
+            await batcher.submit(calls)
+        except OverloadedError as e:
+            return _overloaded(e)
+        except Exception:
+            return _error(503, "broker unavailable")
+        return web.json_response({"accepted": len(calls)}, status=202)
+
+    return handle
+
+
+def _overloaded(error: OverloadedError) -> web.Response:
+    return web.json_response(
+        {"error": "overloaded", "reason": str(error)},
+        status=503,
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+    )
+
+
+async def _health(request: web.Request) -> web.Response:
+    batcher: IngestBatcher = request.app[BATCHER]
+    return web.json_response({
+        "pending": batcher.pending,
+        "queue_depth": batcher.queue_depth,
+        "received": batcher.received,
+        "published": batcher.published,
+    })
+
+
+@web.middleware
+async def _authenticate(request: web.Request, handler) -> web.StreamResponse:
+    token = config.GATEWAY_AUTH_TOKEN
+    if token and request.path != "/healthz":
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return _error(401, "unauthorized")
+    return await handler(request)
+
+
+def create_app(batcher: Optional[IngestBatcher] = None) -> web.Application:
+    """Build the gateway application (the batcher starts and stops with it)."""
+    app = web.Application(middlewares=[_authenticate], client_max_size=config.GATEWAY_MAX_BODY_BYTES)
+    app[BATCHER] = batcher or IngestBatcher(
+        max_batch=config.GATEWAY_MAX_BATCH,
+        batch_interval=config.GATEWAY_BATCH_INTERVAL_MS / 1000.0,
+        max_pending=config.GATEWAY_MAX_PENDING,
+        max_queue_depth=config.GATEWAY_MAX_QUEUE_DEPTH,
+        depth_check_interval=config.GATEWAY_DEPTH_CHECK_INTERVAL,
+    )
+
+    async def lifecycle(app: web.Application):
+        await app[BATCHER].start()
+        yield
+        await app[BATCHER].stop()
+
+    app.cleanup_ctx.append(lifecycle)
+    app.add_routes([
+        web.post("/v1/status", _handler(validate_status)),
+        web.post("/v1/completions", _handler(validate_completion)),
+        web.get("/healthz", _health),
+    ])
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the HTTP ingest gateway")
+    parser.add_argument("--host", default=config.GATEWAY_HOST)
+    parser.add_argument("--port", type=int, default=config.GATEWAY_PORT)
+    parser.add_argument("-l", "--loglevel", default=config.LOG_LEVEL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.loglevel.upper(),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    web.run_app(create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
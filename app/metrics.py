@@ -0,0 +1,272 @@
+"""
+Prometheus/OpenMetrics instrumentation.
+
+Metrics are recorded through the helpers in this module and exported from
+each worker host over HTTP (``METRICS_PORT``). With the prefork pool, set
+``PROMETHEUS_MULTIPROC_DIR`` so every child writes to a shared directory
+and the exporter in the main process aggregates them.
+
+Requires the optional ``prometheus_client`` dependency
+(``pip install .[metrics]``); without it every helper is a no-op.
+"""
+
+import contextlib
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from app.config import config
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# API calls are mostly tens of milliseconds; keep resolution up to the 30s timeout
+_API_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_TASK_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+
+if prometheus_client is not None:
+    API_REQUEST_DURATION = Histogram(
+        "video_api_request_duration_seconds",
+        "Latency of video API requests",
+        ["endpoint", "status_code"],
+        buckets=_API_BUCKETS,
+    )
+    TASK_RUNTIME = Histogram(
+        "celery_task_runtime_seconds",
+        "Execution time of Celery tasks",
+        ["task", "state"],
+        buckets=_TASK_BUCKETS,
+    )
+    TASK_QUEUE_WAIT = Histogram(
+        "celery_task_queue_wait_seconds",
+        "Time between publishing (or ETA) and the start of execution",
+        ["task"],
+        buckets=_TASK_BUCKETS,
+    )
+    TASK_RETRIES = Counter(
+        "celery_task_retries_total",
+        "Number of task retries requested",
+        ["task"],
+    )
+    TOKEN_CACHE_EVENTS = Counter(
+        "cognito_token_cache_events_total",
+        "Cognito M2M token cache hits, misses and refreshes",
+        ["event"],
+    )
+    RATE_LIMIT_WAIT = Histogram(
+        "video_api_rate_limit_wait_seconds",
+        "Time calls waited for a rate limit token",
+        ["bucket"],
+        buckets=_API_BUCKETS,
+    )
+    RATE_LIMITED = Counter(
+        "video_api_rate_limited_total",
+        "Calls deferred because no rate limit token became available in time",
+        ["bucket"],
+    )
+    CIRCUIT_EVENTS = Counter(
+        "video_api_circuit_events_total",
+        "Video API circuit breaker transitions and rejected calls",
+        ["event"],
+    )
+    STATUS_UPDATES_SKIPPED = Counter(
+        "video_status_updates_skipped_total",
+        "Status updates not sent because they were duplicates or regressions",
+        ["reason"],
+    )
+    HEDGED_REQUESTS = Counter(
+        "video_api_hedged_requests_total",
+        "Hedged video API requests: sent, won (answered first) or denied by the budget",
+        ["endpoint", "event"],
+    )
+    WORKER_WARMUP_DURATION = Histogram(
+        "worker_warmup_duration_seconds",
+        "Time worker processes spent warming up before their first task, per step",
+        ["step"],
+        buckets=_API_BUCKETS,
+    )
+    TASKS_DEAD_LETTERED = Counter(
+        "video_tasks_dead_lettered_total",
+        "Task calls published to the dead-letter queue after exhausting their retries",
+        ["task"],
+    )
+else:
+    API_REQUEST_DURATION = TASK_RUNTIME = TASK_QUEUE_WAIT = _NoopMetric()
+    TASK_RETRIES = TOKEN_CACHE_EVENTS = CIRCUIT_EVENTS = STATUS_UPDATES_SKIPPED = _NoopMetric()
+    TASKS_DEAD_LETTERED = HEDGED_REQUESTS = WORKER_WARMUP_DURATION = _NoopMetric()
+    RATE_LIMIT_WAIT = RATE_LIMITED = _NoopMetric()
+
+
+class _MovingAverage:
+    """Exponentially weighted moving average, safe to update from several threads."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, sample: float) -> None:
+        with self._lock:
+            if self.value is None:
+                self.value = sample
+            else:
+                self.value += self.alpha * (sample - self.value)
+
+
+# Recent API latency of this process (about the last 20 calls), for the autotuner;
+# kept without prometheus_client too
+_api_latency = _MovingAverage(alpha=0.1)
+
+
+def recent_api_latency() -> Optional[float]:
+    """Moving average of video API request latency in this process, in seconds (None before the first call)."""
+    return _api_latency.value
+
+
+class _ApiCall:
+    status_code: Any = "error"
+
+
+@contextlib.contextmanager
+def track_api_call(endpoint: str) -> Iterator[_ApiCall]:
+    """
+    Time a video API request.
+
+    Set ``status_code`` on the yielded object once a response arrives; calls
+    that raise are recorded with ``status_code="error"``.
+
+    Args:
+        endpoint: Logical endpoint name (e.g. "task_status")
+    """
+    call = _ApiCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        elapsed = time.perf_counter() - started
+        API_REQUEST_DURATION.labels(endpoint=endpoint, status_code=str(call.status_code)).observe(elapsed)
+        _api_latency.update(elapsed)
+
+
+def observe_task(task_name: str, state: str, runtime: float) -> None:
+    """Record the runtime of a finished task execution."""
+    TASK_RUNTIME.labels(task=task_name, state=state).observe(runtime)
+
+
+def observe_queue_wait(task_name: str, wait: float) -> None:
+    """Record how long a task waited in the queue before starting."""
+    TASK_QUEUE_WAIT.labels(task=task_name).observe(max(0.0, wait))
+
+
+def record_task_retry(task_name: str) -> None:
+    """Count a retry of ``task_name``."""
+    TASK_RETRIES.labels(task=task_name).inc()
+
+
+def record_token_event(event: str) -> None:
+    """Count a token cache event: hit, shared_hit, miss, refresh or refresh_failure."""
+    TOKEN_CACHE_EVENTS.labels(event=event).inc()
+
+
+def record_circuit_event(event: str) -> None:
+    """Count a circuit breaker event: open, half_open, closed or rejected."""
+    CIRCUIT_EVENTS.labels(event=event).inc()
+
+
+def record_rate_limit_wait(bucket: str, wait: Optional[float]) -> None:
+    """Record a rate limit wait, or a deferred call if ``wait`` is None."""
+    if wait is None:
+        RATE_LIMITED.labels(bucket=bucket).inc()
+    else:
+        RATE_LIMIT_WAIT.labels(bucket=bucket).observe(wait)
+
+
+def record_hedge(endpoint: str, event: str) -> None:
+    """Count a hedged request event: sent, won or denied."""
+    HEDGED_REQUESTS.labels(endpoint=endpoint, event=event).inc()
+
+
+def observe_warmup(step: str, seconds: float) -> None:
+    """Record how long a warm-up step (dns, token, connections or total) took."""
+    WORKER_WARMUP_DURATION.labels(step=step).observe(seconds)
+
+
+def record_status_skip(reason: str) -> None:
+    """Count a status update skipped by the status filter: duplicate or regression."""
+    STATUS_UPDATES_SKIPPED.labels(reason=reason).inc()
+
+
+def record_dead_letter(task_name: str) -> None:
+    """Count a task call moved to the dead-letter queue."""
+    TASKS_DEAD_LETTERED.labels(task=task_name).inc()
+
+
+def _multiprocess_dir() -> Optional[str]:
+    # prometheus_client still honours the lowercase name of older releases
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")  # noqa: SIM112
+
+
+def start_metrics_server(port: Optional[int] = None) -> bool:
+    """
+    Expose metrics over HTTP from the current (main worker) process.
+
+    In multiprocess mode, stale files from a previous run are removed and
+    the exporter aggregates all processes writing to the shared directory.
+
+    Returns:
+        bool: True if the exporter was started
+    """
+    if not config.METRICS_ENABLED:
+        return False
+    if prometheus_client is None:
+        logger.warning("METRICS_ENABLED is set but prometheus_client is not installed")
+        return False
+
+    port = port or config.METRICS_PORT
+    multiproc_dir = _multiprocess_dir()
+    if multiproc_dir:
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        prometheus_client.start_http_server(port, registry=registry)
+    else:
+        prometheus_client.start_http_server(port)
+
+    logger.info(
+        "Serving Prometheus metrics on port %s (multiprocess=%s)", port, bool(multiproc_dir)
+    )
+    return True
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live-gauge files of an exited worker child (multiprocess mode)."""
+    if prometheus_client is None or not _multiprocess_dir():
+        return
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(pid)
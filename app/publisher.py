@@ -0,0 +1,397 @@
+"""
+Batched publisher for render nodes.
+
+Calling ``update_video_render_status.delay()`` for every status change costs
+one broker round trip per message. A :class:`NotificationPublisher` buffers
+the calls instead and publishes them in batches:
+
+- a progress update replaces a buffered update of the same task with the
+  same status, so only the latest progress of each task is published;
+- a terminal status (completed/failed) or a completion discards the task's
+  buffered progress;
+- the buffer is flushed when it holds ``max_batch`` messages, when the
+  oldest one has waited ``flush_interval`` seconds, and on ``close()`` (or
+  interpreter exit for the process-wide publisher).
+
+On a Redis broker a batch is written with one pipelined ``MULTI``/``LPUSH``
+per queue/``EXEC``, so publishing N messages costs one round trip. Messages
+are still built and routed by Celery (same routing, sharding, serializer,
+compression and headers as ``.delay()``); other brokers publish the batch
+one message at a time over a single connection.
+
+Usage on a render node:
+
+    from app.publisher import get_publisher
+
+    publisher = get_publisher()
+    publisher.update_status("processing", task_id="task_456", progress=42.0)
+    publisher.complete("video_123", "https://oss.example.com/video_123.mp4", task_id="task_456")
+"""
+
+import atexit
+import contextlib
+import itertools
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from kombu.utils.json import dumps
+
+from app.celery_app import celery_app
+from app.config import config
+from app.routing import COMPLETION_TASK, STATUS_TASK, TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class PendingCall:
+    """A notification task call waiting to be published."""
+
+    __slots__ = ("kwargs", "name", "status", "task_id")
+
+    def __init__(self, name: str, kwargs: Dict[str, Any], task_id: Optional[str], status: Optional[str]):
+        self.name = name
+        self.kwargs = kwargs
+        self.task_id = task_id
+        # Status of a coalescable (non-terminal) update, else None
+        self.status = status
+
+
+def status_call(
+    status: str,
+    task_id: Optional[str] = None,
+    progress: Optional[float] = None,
+    error_message: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> PendingCall:
+    """An ``update_video_render_status`` call (same arguments as the task)."""
+    kwargs = {"status": status, "task_id": task_id, "progress": progress,
+              "error_message": error_message, "extra": extra}
+    terminal = status.lower() in TERMINAL_STATUSES
+    return PendingCall(STATUS_TASK, kwargs, task_id, None if terminal or not task_id else status.lower())
+
+
+def completion_call(video_id: str, oss_url: str, task_id: Optional[str] = None, **metadata: Any) -> PendingCall:
+    """A ``process_video_render_completion`` call (same arguments as the task)."""
+    kwargs = {"video_id": video_id, "oss_url": oss_url, "task_id": task_id, **metadata}
+    return PendingCall(COMPLETION_TASK, kwargs, task_id, None)
+
+
+def supersedes(newer: PendingCall, older: PendingCall) -> bool:
+    """Whether ``older`` need not be published once ``newer`` (a later call) is."""
+    return (
+        older.status is not None
+        and older.task_id == newer.task_id
+        and (newer.status is None or newer.status == older.status)
+    )
+
+
+def coalesce(calls: List[PendingCall]) -> List[PendingCall]:
+    """Drop the calls of ``calls`` (in publish order) that a later call supersedes."""
+    survivors: List[PendingCall] = []
+    # task_id -> statuses of later calls (None for terminal updates and completions)
+    later: Dict[str, set] = {}
+    for call in reversed(calls):
+        statuses = later.setdefault(call.task_id, set()) if call.task_id else None
+        if statuses is not None and call.status is not None and (None in statuses or call.status in statuses):
+            continue
+        survivors.append(call)
+        if statuses is not None:
+            statuses.add(call.status)
+    survivors.reverse()
+    return survivors
+
+
+def publish_calls(app, connection, calls: List[PendingCall]) -> None:
+    """
+    Publish ``calls`` as task messages on ``connection``.
+
+    On Redis the messages are written in one pipelined transaction,
+    otherwise one at a time over the same channel. A failed batch is
+    retried by the caller, so the producer does not retry per message, and
+    the kwargs shown in worker logs are a plain ``repr`` rather than
+    Celery's (much slower) ``saferepr``.
+    """
+    channel = connection.default_channel
+    producer = connection.Producer(channel)
+
+    def publish_all() -> None:
+        for call in calls:
+            app.send_task(
+                call.name, kwargs=call.kwargs, producer=producer, retry=False,
+                argsrepr="()", kwargsrepr=repr(call.kwargs),
+            )
+
+    if connection.transport.driver_type == "redis":
+        _publish_pipelined(channel, publish_all)
+    else:
+        publish_all()
+
+
+class NotificationPublisher:
+    """
+    Buffer notification task calls and publish them in batches.
+
+    Thread-safe; a background thread publishes ``flush_interval`` seconds
+    after the first message of a batch was buffered, and callers flush
+    themselves once ``max_batch`` messages are buffered. While the broker is
+    unreachable messages stay buffered; beyond ``max_buffer`` the oldest
+    progress updates are dropped (terminal updates and completions never are).
+    """
+
+    def __init__(
+        self,
+        app=celery_app,
+        max_batch: int = 100,
+        flush_interval: float = 0.2,
+        max_buffer: int = 10000,
+    ):
+        self.app = app
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[PendingCall] = []
+        # task_id -> buffered progress update of that task
+        self._progress: Dict[str, PendingCall] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._connection = None
+        # The last flush failed: leave retries to the background thread
+        self._failing = False
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+        self.coalesced = 0
+
+    def update_status(
+        self,
+        status: str,
+        task_id: Optional[str] = None,
+        progress: Optional[float] = None,
+        error_message: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Buffer an ``update_video_render_status`` call (same arguments as the task)."""
+        self._add(status_call(status, task_id, progress, error_message, extra))
+
+    def complete(self, video_id: str, oss_url: str, task_id: Optional[str] = None, **metadata: Any) -> None:
+        """Buffer a ``process_video_render_completion`` call (same arguments as the task)."""
+        self._add(completion_call(video_id, oss_url, task_id, **metadata))
+
+    def _add(self, pending: PendingCall) -> None:
+        with self._lock:
+            previous = self._progress.get(pending.task_id) if pending.task_id else None
+            if previous is not None and supersedes(pending, previous):
+                # Superseded by a newer progress or a terminal update of the same task
+                self._buffer.remove(previous)
+                del self._progress[pending.task_id]
+                self.coalesced += 1
+            self._buffer.append(pending)
+            if pending.status is not None:
+                self._progress[pending.task_id] = pending
+            size = len(self._buffer)
+
+        self.start()
+        if size >= self.max_batch and not self._failing:
+            try:
+                self.flush()
+            except Exception:
+                # Logged by flush(); the background thread keeps retrying
+                self._wakeup.set()
+        elif size == 1:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Publish everything buffered now.
+
+        Returns:
+            int: Number of messages published
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._progress = {}
+            if not batch:
+                return 0
+            published = 0
+            try:
+                for start in range(0, len(batch), self.max_batch):
+                    chunk = batch[start:start + self.max_batch]
+                    self._publish(chunk)
+                    published += len(chunk)
+            except Exception as e:
+                self._failing = True
+                self._close_connection()
+                unsent = batch[published:]
+                logger.error(f"Failed to publish {len(unsent)} notifications, keeping them buffered: {e!s}")
+                self._restore(unsent)
+                raise
+            finally:
+                self.published += published
+            self._failing = False
+            return published
+
+    def _publish(self, batch: List[PendingCall]) -> None:
+        if self._connection is None:
+            self._connection = self.app.connection_for_write()
+        publish_calls(self.app, self._connection, batch)
+
+    def _restore(self, unsent: List[PendingCall]) -> None:
+        """Put an unpublished batch back in front of anything buffered since."""
+        with self._lock:
+            newer = self._buffer
+            newer_statuses: Dict[str, List[Optional[str]]] = {}
+            for pending in newer:
+                if pending.task_id:
+                    newer_statuses.setdefault(pending.task_id, []).append(pending.status)
+            # Drop progress that a newer progress or terminal update of the task supersedes
+            restored = [
+                pending for pending in unsent
+                if pending.status is None or not any(
+                    status is None or status == pending.status for status in newer_statuses.get(pending.task_id, ())
+                )
+            ]
+            self._buffer = restored + newer
+            for pending in restored:
+                if pending.status is not None:
+                    self._progress.setdefault(pending.task_id, pending)
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                dropped = [pending for pending in self._buffer if pending.status is not None][:overflow]
+                dropped_ids = {id(pending) for pending in dropped}
+                self._buffer = [pending for pending in self._buffer if id(pending) not in dropped_ids]
+                for pending in dropped:
+                    if self._progress.get(pending.task_id) is pending:
+                        del self._progress[pending.task_id]
+                logger.error(f"Notification buffer full, dropped {len(dropped)} progress updates")
+
+    def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            with contextlib.suppress(Exception):
+                connection.close()
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="notification-publisher", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the flush thread and publish whatever is still buffered."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 30)
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            self._close_connection()
+
+    def __enter__(self) -> "NotificationPublisher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            # Sleep until something is buffered, then give the batch time to fill
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopped.wait(self.flush_interval):
+                return
+            try:
+                self.flush()
+            except Exception:
+                # Logged by flush(); retry after another interval
+                self._wakeup.set()
+
+
+def _publish_pipelined(channel, publish_all) -> None:
+    """
+    Run ``publish_all`` on a kombu Redis ``channel``, sending its LPUSHes in one transaction.
+
+    Exchange lookups and queue bindings still go to Redis directly; only the
+    message writes are collected and pipelined (one LPUSH per queue, in
+    publish order, so consumers see the same order as with separate pushes).
+    """
+    puts: List[Tuple[str, str]] = []
+
+    def put(queue: str, message: Dict[str, Any], **kwargs: Any) -> None:
+        priority = channel._get_message_priority(message, reverse=False)
+        puts.append((channel._q_for_pri(queue, priority), dumps(message)))
+
+    channel._put = put
+    try:
+        publish_all()
+    finally:
+        del channel._put
+    if not puts:
+        return
+    with channel.conn_or_acquire() as client, client.pipeline() as pipe:
+        for queue, group in itertools.groupby(puts, key=lambda item: item[0]):
+            pipe.lpush(queue, *[message for _, message in group])
+        pipe.execute()
+
+
+_publisher: Optional[NotificationPublisher] = None
+_publisher_pid: Optional[int] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> NotificationPublisher:
+    """Return this process' publisher, flushed at interpreter exit."""
+    global _publisher, _publisher_pid
+
+    pid = os.getpid()
+    if _publisher is not None and _publisher_pid == pid:
+        return _publisher
+
+    with _publisher_lock:
+        if _publisher is None or _publisher_pid != pid:
+            _publisher = NotificationPublisher(
+                max_batch=config.PUBLISHER_MAX_BATCH,
+                flush_interval=config.PUBLISHER_FLUSH_INTERVAL_MS / 1000.0,
+                max_buffer=config.PUBLISHER_MAX_BUFFER,
+            )
+            _publisher_pid = pid
+        return _publisher
+
+
+def shutdown_publisher() -> None:
+    """Publish what this process' publisher still buffers and close it."""
+    global _publisher, _publisher_pid
+
+    with _publisher_lock:
+        publisher = _publisher if _publisher_pid == os.getpid() else None
+        _publisher = None
+        _publisher_pid = None
+
+    if publisher is not None:
+        try:
+            publisher.close()
+        except Exception as e:
+            logger.error(f"Failed to publish buffered notifications at shutdown: {e!s}")
+
+
+def _reset_after_fork() -> None:
+    global _publisher, _publisher_pid, _publisher_lock
+
+    _publisher = None
+    _publisher_pid = None
+    _publisher_lock = threading.Lock()
+
+
+atexit.register(shutdown_publisher)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,208 @@
+"""
+Task routing to separate queues for terminal events, progress and worker status.
+
+With ``CELERY_ROUTING_ENABLED`` the tasks are published to three queues:
+
+- completions: ``process_video_render_completion`` and terminal
+  (completed/failed) ``update_video_render_status`` calls
+- progress: all other ``update_video_render_status`` calls
+- worker status: ``update_worker_status``
+
+A worker consuming several of them drains them in weighted order
+(``CELERY_*_QUEUE_WEIGHT``), so a flood of progress updates cannot delay
+the completions users are waiting on, while progress is never starved.
+The legacy ``CELERY_QUEUE_NAME`` queue keeps being consumed (with the
+progress weight) for producers that publish there directly.
+
+With ``CELERY_SHARD_COUNT`` > 0, status updates and completions are instead
+sharded by ``task_id`` across that many queues with a consistent hash. Each
+shard queue is consumed by exactly one single-threaded worker
+(``python -m app.worker_profiles shards``), so updates for one task are
+processed in publish order while shards spread the load across nodes.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_TASK = "jianying_notification.process_video_render_completion"
+STATUS_TASK = "jianying_notification.update_video_render_status"
+WORKER_STATUS_TASK = "jianying_notification.update_worker_status"
+
+# Render statuses that end a task and are routed with the completions
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+
+def queue_weights() -> Dict[str, int]:
+    """Queue name -> consumption weight, for every queue used by the routing."""
+    weights = {config.CELERY_QUEUE_NAME: config.CELERY_PROGRESS_QUEUE_WEIGHT}
+    weights.update({
+        config.CELERY_PROGRESS_QUEUE: config.CELERY_PROGRESS_QUEUE_WEIGHT,
+        config.CELERY_WORKER_STATUS_QUEUE: config.CELERY_WORKER_STATUS_QUEUE_WEIGHT,
+        config.CELERY_COMPLETION_QUEUE: config.CELERY_COMPLETION_QUEUE_WEIGHT,
+    })
+    return weights
+
+
+def routed_queues() -> List[str]:
+    """All queues a worker should consume, highest weight first."""
+    if not config.CELERY_ROUTING_ENABLED:
+        return [config.CELERY_QUEUE_NAME]
+    weights = queue_weights()
+    return sorted(weights, key=lambda name: -weights[name])
+
+
+def _status_argument(args: Sequence[Any], kwargs: Dict[str, Any]) -> Optional[str]:
+    status = kwargs.get("status")
+    if status is None and args:
+        status = args[0]
+    return status if isinstance(status, str) else None
+
+
+def jump_consistent_hash(key: int, buckets: int) -> int:
+    """
+    Map ``key`` to one of ``buckets`` (Lamping & Veach jump consistent hash).
+
+    Growing from n to n+1 buckets only moves 1/(n+1) of the keys.
+    """
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(task_id: str, shards: Optional[int] = None) -> int:
+    """Shard index of a render task id."""
+    shards = config.CELERY_SHARD_COUNT if shards is None else shards
+    # Stable across processes, unlike hash()
+    digest = hashlib.blake2b(str(task_id).encode(), digest_size=8).digest()
+    return jump_consistent_hash(int.from_bytes(digest, "big"), shards)
+
+
+def shard_queue(index: int) -> str:
+    """Name of shard queue ``index``."""
+    return f"{config.CELERY_SHARD_QUEUE_PREFIX}.{index}"
+
+
+def shard_queues() -> List[str]:
+    """All shard queue names (empty if sharding is disabled)."""
+    return [shard_queue(index) for index in range(config.CELERY_SHARD_COUNT)]
+
+
+def queue_depth(channel, queues: Sequence[str]) -> int:
+    """Messages waiting in ``queues``, measured with passive declares on ``channel``."""
+    depth = 0
+    for name in queues:
+        try:
+            depth += channel.queue_declare(queue=name, passive=True).message_count
+        except Exception:
+            # Not declared yet (or emptied and removed, on Redis): nothing queued
+            continue
+    return depth
+
+
+def task_id_argument(name: str, args: Sequence[Any], kwargs: Dict[str, Any]) -> Optional[str]:
+    """Render ``task_id`` argument of a status update or completion call."""
+    task_id = kwargs.get("task_id")
+    if task_id is None:
+        # Positional: update_video_render_status(status, task_id, ...),
+        # process_video_render_completion(video_id, oss_url, task_id, ...)
+        position = 1 if name == STATUS_TASK else 2
+        if len(args) > position:
+            task_id = args[position]
+    return task_id
+
+
+def route_task(name: str, args: Sequence[Any], kwargs: Dict[str, Any], options: Dict[str, Any],
+               task: Any = None, **kw: Any) -> Optional[Dict[str, Any]]:
+    """
+    Celery router (``task_routes``) choosing the queue of a notification task.
+
+    Returns:
+        dict with the destination ``queue``, or None to use the default queue
+    """
+    if config.CELERY_SHARD_COUNT > 0 and name in (STATUS_TASK, COMPLETION_TASK):
+        task_id = task_id_argument(name, args or (), kwargs or {})
+        if task_id:
+            return {"queue": shard_queue(shard_for(task_id))}
+
+    if not config.CELERY_ROUTING_ENABLED:
+        return None
+
+    if name == COMPLETION_TASK:
+        return {"queue": config.CELERY_COMPLETION_QUEUE}
+    if name == STATUS_TASK:
+        status = _status_argument(args or (), kwargs or {})
+        if status is not None and status.lower() in TERMINAL_STATUSES:
+            return {"queue": config.CELERY_COMPLETION_QUEUE}
+        return {"queue": config.CELERY_PROGRESS_QUEUE}
+    if name == WORKER_STATUS_TASK:
+        return {"queue": config.CELERY_WORKER_STATUS_QUEUE}
+    return None
+
+
+class WeightedCycle:
+    """
+    Queue order for the Redis transport (``queue_order_strategy``).
+
+    Kombu asks for the queue order before each ``BRPOP`` (which takes from
+    the first non-empty queue) and reports the queue a message came from.
+    Queues are ordered by smooth weighted round robin, so when every queue
+    has a backlog they are consumed in proportion to their weights; an
+    empty queue simply passes its turn to the next one.
+    """
+
+    def __init__(self, it: Optional[List[str]] = None):
+        self.items = it if it is not None else []
+        self._weights = queue_weights()
+        self._current: Dict[str, float] = {}
+
+    def _weight(self, item: str) -> int:
+        return max(1, self._weights.get(item, 1))
+
+    def update(self, it: List[str]) -> None:
+        """Update items from iterable."""
+        self.items[:] = it
+        self._current = {item: self._current.get(item, 0.0) for item in self.items}
+
+    def consume(self, n: int) -> List[str]:
+        """Return the first ``n`` queues, most deserving first."""
+        ordered = sorted(
+            self.items,
+            key=lambda item: (-self._current.get(item, 0.0), -self._weight(item)),
+        )
+        return ordered[:n]
+
+    def rotate(self, last_used: str) -> str:
+        """Account for a message taken from ``last_used``."""
+        if last_used in self._current:
+            total = 0
+            for item in self.items:
+                weight = self._weight(item)
+                self._current[item] = self._current.get(item, 0.0) + weight
+                total += weight
+            self._current[last_used] -= total
+        return last_used
+
+
+def routing_config() -> Dict[str, Any]:
+    """Celery settings enabling routing and/or sharding, or {} if both are disabled."""
+    settings: Dict[str, Any] = {}
+    if config.CELERY_ROUTING_ENABLED or config.CELERY_SHARD_COUNT > 0:
+        settings["task_routes"] = (route_task,)
+
+    if config.CELERY_ROUTING_ENABLED:
+        from kombu import Queue
+
+        # Shard queues are deliberately not declared here: a worker started
+        # without -Q consumes every declared queue, which would break the
+        # one-consumer-per-shard rule. They are created on first use.
+        settings["task_queues"] = [Queue(name, routing_key=name) for name in routed_queues()]
+        settings["broker_transport_options"] = {"queue_order_strategy": "app.routing:WeightedCycle"}
+    return settings
@@ -0,0 +1,194 @@
+"""
+Message serializers and compression for Celery messages.
+
+- ``json`` messages are encoded and decoded with orjson when it is
+  installed. The wire format (``application/json``) does not change, so
+  producers and workers with and without orjson interoperate. Bodies orjson
+  would encode or decode differently (integers beyond 64 bits, NaN) go
+  through kombu's JSON instead.
+- ``msgpack`` (``application/x-msgpack``, requires the msgpack package) is a
+  smaller, faster binary format. Producers switch to it with
+  ``CELERY_SERIALIZER=msgpack``.
+- Threshold compression is opt-in (``CELERY_COMPRESSION_THRESHOLD``, 0 by
+  default). Once enabled, every message is sent with the
+  ``application/x-zlib-threshold`` compression header and a one-byte prefix:
+  bodies of at least the threshold are zlib-compressed, smaller ones are
+  stored after the prefix. The header is set by kombu for every message, so
+  *every* consumer, small messages included, needs this codec: a worker of
+  an older version, or any other kombu client that has not called
+  :func:`register_serializers`, cannot decode any of them.
+
+:func:`register_serializers` replaces kombu's ``json`` codec for the whole
+process (``application/json`` has a single decoder in kombu's registry), so
+other kombu or Celery apps in the same process also encode and decode JSON
+with orjson.
+
+Workers accept every serializer in ``CELERY_ACCEPT_CONTENT`` that is
+installed, plus ``json``. Roll out a new serializer or compression by
+upgrading every consumer first and the producers second, so no consumer
+ever receives a message it cannot decode.
+"""
+
+import importlib.util
+import logging
+import math
+import re
+import zlib
+from typing import Any, Dict, List
+
+from kombu import compression, serialization
+from kombu.utils import json as kombu_json
+
+from app.config import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+SERIALIZERS = ("json", "msgpack")
+
+# kombu compression method (and ``compression`` message header) for threshold compression
+THRESHOLD_COMPRESSION = "application/x-zlib-threshold"
+
+# First byte of a threshold-compressed body
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+# Fast level: JSON compresses well even at 1, and it is the producer's CPU
+_ZLIB_LEVEL = 1
+
+_JSON_ENCODER = kombu_json.JSONEncoder()
+
+# A float's repr has at most 17 digits; longer runs may be integers beyond 64 bits
+_LONG_NUMBER = re.compile(rb"\d{20}")
+
+
+def orjson_dumps(obj: Any) -> bytes:
+    """
+    Encode like kombu's JSON serializer (same type tags), using orjson.
+
+    Bodies orjson cannot encode the way kombu does (integers beyond 64 bits,
+    NaN and infinities, which orjson would write as null) are encoded by
+    kombu's serializer instead.
+    """
+    try:
+        body = orjson.dumps(
+            obj,
+            default=_JSON_ENCODER.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    except TypeError:
+        return kombu_json.dumps(obj).encode()
+    if b"null" in body and _has_non_finite(obj):
+        return kombu_json.dumps(obj).encode()
+    return body
+
+
+def _has_non_finite(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+def orjson_loads(data: Any) -> Any:
+    """Decode a JSON message body, restoring kombu type tags (datetimes, ...) if present."""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    elif isinstance(data, str):
+        data = data.encode()
+    # Type tags, and numbers of 20+ digits orjson would read as floats beyond 64 bits
+    if b'"__type__"' in data or _LONG_NUMBER.search(data):
+        return kombu_json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN and Infinity, as kombu's serializer writes them
+        return kombu_json.loads(data)
+
+
+def compress_above_threshold(body: bytes) -> bytes:
+    """
+    Compress ``body`` if it is at least ``CELERY_COMPRESSION_THRESHOLD`` bytes and gets smaller.
+
+    Smaller bodies are only prefixed, but still need :func:`decompress_threshold`.
+    """
+    if len(body) >= config.CELERY_COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(body, _ZLIB_LEVEL)
+        if len(compressed) < len(body):
+            return _ZLIB + compressed
+    return _RAW + body
+
+
+def decompress_threshold(body: bytes) -> bytes:
+    """Reverse :func:`compress_above_threshold`."""
+    body = bytes(body)
+    if body[:1] == _ZLIB:
+        return zlib.decompress(body[1:])
+    return body[1:]
+
+
+def is_available(serializer: str) -> bool:
+    """Whether ``serializer`` can be used in this process."""
+    if serializer == "json":
+        return True
+    if serializer == "msgpack":
+        return importlib.util.find_spec("msgpack") is not None
+    return False
+
+
+def register_serializers() -> None:
+    """
+    Install the orjson JSON codec and the threshold compression (idempotent).
+
+    Both are registered in kombu's process-wide registries: the orjson codec
+    replaces kombu's ``json`` codec for every kombu user in the process.
+    """
+    if orjson is not None:
+        serialization.register(
+            "json", orjson_dumps, orjson_loads,
+            content_type="application/json", content_encoding="utf-8",
+        )
+    compression.register(
+        compress_above_threshold, decompress_threshold, THRESHOLD_COMPRESSION, aliases=["zlib-threshold"],
+    )
+
+
+def negotiated_accept_content() -> List[str]:
+    """``json`` plus every installed serializer listed in ``CELERY_ACCEPT_CONTENT``."""
+    accept = ["json"]
+    for name in config.CELERY_ACCEPT_CONTENT:
+        if name in accept:
+            continue
+        if name not in SERIALIZERS:
+            logger.error(f"Unsupported serializer in CELERY_ACCEPT_CONTENT: {name}")
+        elif not is_available(name):
+            logger.info(f"Not accepting {name} messages: the {name} package is not installed")
+        else:
+            accept.append(name)
+    return accept
+
+
+def serialization_config() -> Dict[str, Any]:
+    """Celery serializer, accepted content and compression settings."""
+    register_serializers()
+    accept = negotiated_accept_content()
+    serializer = config.CELERY_SERIALIZER.lower()
+    if serializer not in accept:
+        logger.error(f"CELERY_SERIALIZER={serializer} is not installed or not accepted, using json")
+        serializer = "json"
+
+    settings: Dict[str, Any] = {
+        "task_serializer": serializer,
+        "result_serializer": serializer,
+        "accept_content": accept,
+        "result_accept_content": accept,
+    }
+    if config.CELERY_COMPRESSION_THRESHOLD > 0:
+        settings["task_compression"] = THRESHOLD_COMPRESSION
+    return settings
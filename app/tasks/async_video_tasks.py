@@ -0,0 +1,222 @@
+"""
+Coroutine implementations of the notification tasks.
+
+These mirror the Celery tasks in :mod:`app.tasks.video_tasks` and
+:mod:`app.tasks.worker_status` and are executed by the single-process
+asyncio worker (:mod:`app.async_worker`), which runs many of them
+concurrently on one event loop. They share the status filter, coalescer,
+checkpoint and retry logic of the Celery tasks; the worker passes the
+message's id and retries in :data:`current_request`, and a handler raises
+:class:`TaskRetryError` where the Celery task calls ``self.retry()``.
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from app.api.async_video_api_client import (
+    async_call_video_task_status_api,
+    async_create_video_record,
+    async_report_worker_status,
+)
+from app.api.errors import RetryLaterError
+from app.api.worker_status_aggregator import get_worker_status_aggregator
+from app.tasks.completion import CompletionAttempt
+from app.tasks.outbox import STATUS, VIDEO_CREATE, async_call_or_spool
+from app.tasks.pipeline import run_concurrently_async
+from app.tasks.status_filter import get_status_filter
+from app.tasks.video_tasks import (
+    process_video_render_completion,
+    render_status_update,
+    skip_or_coalesce,
+    status_retry,
+    update_video_render_status,
+)
+from app.tasks.worker_status import update_worker_status
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRequest(NamedTuple):
+    """The message being executed, like ``self.request`` in a bound Celery task."""
+
+    id: Optional[str] = None
+    retries: int = 0
+
+
+# Set by the async worker for each task it executes
+current_request: ContextVar[TaskRequest] = ContextVar("current_request")
+
+
+class TaskRetryError(Exception):
+    """Raised by a handler to have the worker publish its task again, like ``self.retry()``."""
+
+    def __init__(self, exc: BaseException, countdown: float):
+        super().__init__(f"Retry in {countdown:.1f}s: {exc!s}")
+        self.exc = exc
+        self.countdown = countdown
+
+
+async def async_send_render_status(
+    task_id: str,
+    status: str,
+    progress: Optional[float] = None,
+    error_message: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Async version of :func:`app.tasks.video_tasks.send_render_status`."""
+    update = render_status_update(status, progress, error_message, extra)
+    if get_status_filter() is not None:
+        # The filter may call Redis: keep it off the event loop
+        handled = await asyncio.to_thread(skip_or_coalesce, task_id, update)
+    else:
+        handled = skip_or_coalesce(task_id, update)
+    if handled:
+        return True
+    return await async_call_or_spool(STATUS, async_call_video_task_status_api, task_id, **update)
+
+
+async def async_update_video_render_status(
+    status: str,
+    task_id: Optional[str] = None,
+    progress: Optional[float] = None,
+    error_message: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> None:
+    """Async version of :func:`app.tasks.video_tasks.update_video_render_status`."""
+    request = current_request.get(TaskRequest())
+    try:
+        logger.info(f"Processing video render status for task_id: {task_id}, status: {status}")
+
+        if error_message:
+            logger.error(f"Error message: {error_message}")
+
+        api_success = False
+        if task_id:
+            api_success = await async_send_render_status(
+                task_id=task_id,
+                status=status,
+                progress=progress,
+                error_message=error_message,
+                extra=extra
+            )
+
+        logger.info(f"Successfully processed video render status for task_id: {task_id} (API call: {api_success})")
+
+    except Exception as e:
+        countdown, max_retries = status_retry(e, request.retries, update_video_render_status.max_retries)
+        if request.retries >= max_retries:
+            raise
+        raise TaskRetryError(e, countdown) from e
+
+
+async def async_process_video_render_completion(
+    video_id: str,
+    oss_url: str,
+    task_id: Optional[str] = None,
+    video_name: Optional[str] = None,
+    resolution: Optional[str] = None,
+    framerate: Optional[str] = None,
+    duration: Optional[float] = None,
+    file_size: Optional[int] = None,
+    thumbnail_url: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Async version of :func:`app.tasks.video_tasks.process_video_render_completion`."""
+    logger.info(f"Processing video render completion for video_id: {video_id}")
+
+    request = current_request.get(TaskRequest())
+    attempt = CompletionAttempt(request.id, request.retries, process_video_render_completion.max_retries, video_id)
+
+    try:
+        if not task_id:
+            logger.info(f"Video render completed successfully for video_id: {video_id} (no task_id, nothing to notify)")
+            return {"success": True, "partial": False, "duration": 0.0, "steps": {}, "skipped": []}
+
+        steps = {
+            "status_update": lambda: async_send_render_status(
+                task_id=task_id,
+                status="completed",
+                progress=100.0
+            ),
+            "create_record": lambda: async_call_or_spool(
+                VIDEO_CREATE,
+                async_create_video_record,
+                task_id,
+                oss_url=oss_url,
+                video_name=video_name,
+                resolution=resolution,
+                framerate=framerate,
+                duration=duration,
+                file_size=file_size,
+                thumbnail_url=thumbnail_url
+            ),
+        }
+        # Checkpoints may live in Redis: keep them off the event loop
+        pending = await asyncio.to_thread(attempt.pending, steps)
+        result = await run_concurrently_async(pending)
+        return await asyncio.to_thread(attempt.finish, result)
+
+    except Exception as e:
+        report_failed = await asyncio.to_thread(attempt.failed, e)
+        if report_failed and task_id:
+            try:
+                await async_send_render_status(task_id=task_id, status="failed", error_message=str(e))
+            except RetryLaterError as defer_error:
+                logger.warning(f"Could not report FAILED status for task_id: {task_id}: {defer_error!s}")
+        if attempt.final_attempt:
+            raise
+        raise TaskRetryError(e, attempt.countdown) from e
+
+
+async def async_update_worker_status(
+    worker_name: str,
+    hostname: Optional[str] = None,
+    is_available: bool = True,
+    task_id: Optional[str] = None,
+    error_message: Optional[str] = None,
+    traceback: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Async version of :func:`app.tasks.worker_status.update_worker_status`."""
+    logger.info(
+        "Received worker status update: %s available=%s", worker_name, is_available
+    )
+    # Merged into the worker's next periodic report
+    aggregator = get_worker_status_aggregator()
+    if aggregator is not None:
+        aggregator.submit(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
+        return {"success": True, "aggregated": True}
+    try:
+        success = await async_report_worker_status(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
+    except RetryLaterError as e:
+        logger.warning("Skipping worker status report for %s: %s", worker_name, e)
+        success = False
+    if not success:
+        logger.warning("Worker status report failed for %s; will retry next worker event", worker_name)
+    return {"success": success}
+
+
+# Celery task name -> coroutine implementation
+ASYNC_TASK_HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    update_video_render_status.name: async_update_video_render_status,
+    process_video_render_completion.name: async_process_video_render_completion,
+    update_worker_status.name: async_update_worker_status,
+}
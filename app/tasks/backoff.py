@@ -0,0 +1,38 @@
+"""
+Retry delays for tasks.
+
+Delays grow exponentially with the number of failed attempts and are
+jittered, so tasks that failed together (e.g. while the video API was down)
+do not all come back at the same moment.
+"""
+
+import random
+from typing import Optional
+
+from app.config import config
+
+
+def retry_countdown(failures: int, not_before: Optional[float] = None) -> float:
+    """
+    Delay before retrying something that has failed ``failures`` times.
+
+    The un-jittered delay doubles from ``TASK_RETRY_BACKOFF_BASE`` up to
+    ``TASK_RETRY_BACKOFF_MAX``; the returned value is drawn uniformly from
+    its upper half ("equal jitter").
+
+    Args:
+        failures: Number of failed attempts so far (1 for the first failure)
+        not_before: Minimum delay, e.g. until an open circuit is probed again
+
+    Returns:
+        float: Seconds to wait
+    """
+    ceiling = min(
+        config.TASK_RETRY_BACKOFF_BASE * (2 ** max(0, failures - 1)),
+        config.TASK_RETRY_BACKOFF_MAX,
+    )
+    delay = random.uniform(ceiling / 2, ceiling)
+    if not_before is not None:
+        # Spread retries over the interval after the earliest useful moment
+        delay = max(delay, not_before + random.uniform(0, ceiling / 2))
+    return delay
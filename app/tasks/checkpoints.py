@@ -0,0 +1,239 @@
+"""
+Step-level checkpoints for multi-step tasks.
+
+When a task made of several API calls is retried, the steps that already
+succeeded should not run again (a second ``create_video_record`` creates a
+duplicate record). Each successful step is recorded under the Celery task
+id, which is kept across ``self.retry()``, and the retry resumes from the
+steps that are still unfinished. Failures are counted per step so the retry
+delay grows with the attempts of the step that is actually failing.
+
+Two backends are provided:
+
+- ``memory`` (default): per worker process (retries picked up by another
+  process or host start from scratch)
+- ``redis``: shared by every worker (defaults to the Celery broker), at the
+  cost of a Redis round trip per step
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Interface for per-task step progress."""
+
+    def completed_steps(self, task_id: str) -> Set[str]:
+        """Return the names of the steps already completed for ``task_id``."""
+        raise NotImplementedError
+
+    def mark_completed(self, task_id: str, step: str) -> None:
+        """Record that ``step`` succeeded for ``task_id``."""
+        raise NotImplementedError
+
+    def record_failure(self, task_id: str, step: str) -> int:
+        """Count a failed attempt of ``step`` and return the total so far."""
+        raise NotImplementedError
+
+    def clear(self, task_id: str) -> None:
+        """Forget all progress for ``task_id``."""
+        raise NotImplementedError
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Checkpoints kept in the current worker process."""
+
+    def __init__(self, ttl: float, max_tasks: int = 10000):
+        self._ttl = ttl
+        self._max_tasks = max_tasks
+        self._lock = threading.Lock()
+        # task_id -> (expires_at, completed steps, failures per step)
+        self._tasks: Dict[str, Tuple[float, Set[str], Dict[str, int]]] = {}
+
+    def _entry(self, task_id: str) -> Tuple[float, Set[str], Dict[str, int]]:
+        now = time.monotonic()
+        entry = self._tasks.get(task_id)
+        if entry is None or entry[0] < now:
+            if len(self._tasks) >= self._max_tasks:
+                self._evict(now)
+            entry = (now + self._ttl, set(), {})
+        else:
+            entry = (now + self._ttl, entry[1], entry[2])
+        self._tasks[task_id] = entry
+        return entry
+
+    def _evict(self, now: float) -> None:
+        for task_id in [t for t, entry in self._tasks.items() if entry[0] < now]:
+            del self._tasks[task_id]
+        # Still full: drop the oldest entries (dicts keep insertion order)
+        while len(self._tasks) >= self._max_tasks:
+            del self._tasks[next(iter(self._tasks))]
+
+    def completed_steps(self, task_id: str) -> Set[str]:
+        with self._lock:
+            entry = self._tasks.get(task_id)
+            if entry is None or entry[0] < time.monotonic():
+                return set()
+            return set(entry[1])
+
+    def mark_completed(self, task_id: str, step: str) -> None:
+        with self._lock:
+            self._entry(task_id)[1].add(step)
+
+    def record_failure(self, task_id: str, step: str) -> int:
+        with self._lock:
+            failures = self._entry(task_id)[2]
+            failures[step] = failures.get(step, 0) + 1
+            return failures[step]
+
+    def clear(self, task_id: str) -> None:
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+
+class RedisCheckpointStore(CheckpointStore):
+    """Checkpoints shared by every worker connected to the same Redis."""
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._ttl = max(1, int(ttl))
+
+    def _key(self, task_id: str) -> str:
+        return f"{self._prefix}:{task_id}"
+
+    def completed_steps(self, task_id: str) -> Set[str]:
+        fields = self._client.hkeys(self._key(task_id))
+        steps = set()
+        for field in fields:
+            field = field.decode() if isinstance(field, bytes) else field
+            if field.startswith("done:"):
+                steps.add(field[len("done:"):])
+        return steps
+
+    def mark_completed(self, task_id: str, step: str) -> None:
+        key = self._key(task_id)
+        pipe = self._client.pipeline()
+        pipe.hset(key, f"done:{step}", int(time.time()))
+        pipe.expire(key, self._ttl)
+        pipe.execute()
+
+    def record_failure(self, task_id: str, step: str) -> int:
+        key = self._key(task_id)
+        pipe = self._client.pipeline()
+        pipe.hincrby(key, f"failures:{step}", 1)
+        pipe.expire(key, self._ttl)
+        failures, _ = pipe.execute()
+        return int(failures)
+
+    def clear(self, task_id: str) -> None:
+        self._client.delete(self._key(task_id))
+
+
+def create_checkpoint_store() -> CheckpointStore:
+    """Build the checkpoint store selected by ``TASK_CHECKPOINT_STORE``."""
+    backend = config.TASK_CHECKPOINT_STORE.lower()
+    ttl = config.TASK_CHECKPOINT_TTL
+
+    if backend == "redis":
+        url = config.TASK_CHECKPOINT_STORE_URL or config.CELERY_BROKER_URL
+        if url:
+            return RedisCheckpointStore(url, f"{config.APP_NAME}:task_checkpoint", ttl)
+        logger.error("TASK_CHECKPOINT_STORE=redis requires TASK_CHECKPOINT_STORE_URL or CELERY_BROKER_URL")
+    elif backend not in ("", "memory"):
+        logger.error(f"Unknown TASK_CHECKPOINT_STORE backend: {config.TASK_CHECKPOINT_STORE}")
+
+    return MemoryCheckpointStore(ttl)
+
+
+_store: Optional[CheckpointStore] = None
+_store_pid: Optional[int] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the checkpoint store of the current process."""
+    global _store, _store_pid
+
+    pid = os.getpid()
+    if _store is not None and _store_pid == pid:
+        return _store
+    with _store_lock:
+        if _store is None or _store_pid != pid:
+            _store = create_checkpoint_store()
+            _store_pid = pid
+        return _store
+
+
+class TaskCheckpoint:
+    """
+    Step progress of one task execution (including its retries).
+
+    Store errors are logged and treated as "no progress recorded", so a
+    checkpoint outage degrades to re-running steps rather than failing tasks.
+    """
+
+    def __init__(self, task_id: Optional[str], store: Optional[CheckpointStore] = None):
+        self.task_id = task_id
+        self._store = store
+
+    @property
+    def store(self) -> CheckpointStore:
+        if self._store is None:
+            self._store = get_checkpoint_store()
+        return self._store
+
+    def completed_steps(self) -> Set[str]:
+        if not self.task_id:
+            return set()
+        try:
+            return self.store.completed_steps(self.task_id)
+        except Exception as e:
+            logger.warning(f"Failed to load checkpoints for task {self.task_id}: {e!s}")
+            return set()
+
+    def mark_completed(self, step: str) -> None:
+        if not self.task_id:
+            return
+        try:
+            self.store.mark_completed(self.task_id, step)
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint step {step} of task {self.task_id}: {e!s}")
+
+    def record_failure(self, step: str) -> int:
+        if not self.task_id:
+            return 1
+        try:
+            return self.store.record_failure(self.task_id, step)
+        except Exception as e:
+            logger.warning(f"Failed to record failure of step {step} for task {self.task_id}: {e!s}")
+            return 1
+
+    def clear(self) -> None:
+        if not self.task_id:
+            return
+        try:
+            self.store.clear(self.task_id)
+        except Exception as e:
+            logger.warning(f"Failed to clear checkpoints for task {self.task_id}: {e!s}")
+
+
+def _reset_after_fork() -> None:
+    global _store, _store_pid, _store_lock
+
+    _store = None
+    _store_pid = None
+    _store_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
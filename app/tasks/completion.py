@@ -0,0 +1,164 @@
+"""
+Bookkeeping of a video render completion, shared by the Celery task and the
+async worker.
+
+A completion runs independent steps concurrently (the COMPLETED status
+update and the video record creation). Both implementations go through a
+:class:`CompletionAttempt`, so they agree on what a retry does:
+
+- steps a previous attempt finished are skipped (checkpointed under the
+  Celery task id, which is kept across retries)
+- failures are counted per step, and the retry delay grows with the
+  attempts of the step that is actually failing
+- deferrals (rate limit, open circuit) are retried beyond the error budget,
+  up to ``TASK_MAX_DEFERRALS`` more attempts
+- FAILED is reported unless the attempt was only deferred, or COMPLETED is
+  already reported (a later step failing does not undo it)
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set, TypeVar
+
+from app.api.errors import RetryLaterError
+from app.config import config
+from app.tasks.backoff import retry_countdown
+from app.tasks.checkpoints import TaskCheckpoint
+from app.tasks.pipeline import PipelineResult
+
+logger = logging.getLogger(__name__)
+
+# Attempts of process_video_render_completion after the first one
+COMPLETION_MAX_RETRIES = 3
+
+Step = TypeVar("Step")
+
+
+class CompletionStepError(Exception):
+    """A completion step raised; carries the step name and original error."""
+
+    def __init__(self, step: str, error: BaseException):
+        super().__init__(f"{step} failed: {error!s}")
+        self.step = step
+        self.error = error
+
+    def __reduce__(self):
+        return self.__class__, (self.step, self.error)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """
+    Minimum retry delay if ``error`` means the call was deferred (rate limit,
+    open circuit) rather than failed, else None.
+    """
+    if isinstance(error, CompletionStepError):
+        error = error.error
+    if isinstance(error, RetryLaterError):
+        return error.retry_after
+    return None
+
+
+class CompletionAttempt:
+    """
+    One attempt of a video render completion.
+
+    Args:
+        request_id: Celery task id (the checkpoint key), if known
+        retries: Retries of the task so far
+        max_retries: Retries allowed for failures (the task's ``max_retries``)
+        video_id: Video being completed, for logging
+    """
+
+    def __init__(self, request_id: Optional[str], retries: int, max_retries: int, video_id: str):
+        self.checkpoint = TaskCheckpoint(request_id)
+        self.retries = retries
+        self.max_retries = max_retries
+        self.video_id = video_id
+        self.completed: Set[str] = set()
+        self.skipped: List[str] = []
+        # Failed attempts so far; steps count their own, deferrals do not count
+        self.failures = retries + 1
+        self.countdown = retry_countdown(self.failures)
+        self.final_attempt = False
+
+    @property
+    def max_attempts(self) -> int:
+        """Retries allowed in total, deferrals included."""
+        return self.max_retries + config.TASK_MAX_DEFERRALS
+
+    def pending(self, steps: Dict[str, Step]) -> Dict[str, Step]:
+        """Return the steps a previous attempt did not finish."""
+        self.completed = self.checkpoint.completed_steps() & steps.keys()
+        self.skipped = sorted(self.completed)
+        if self.skipped:
+            logger.info(
+                f"Resuming video render completion for video_id: {self.video_id}, "
+                f"already done: {', '.join(self.skipped)}"
+            )
+        return {name: step for name, step in steps.items() if name not in self.completed}
+
+    def finish(self, result: PipelineResult) -> Dict[str, Any]:
+        """
+        Checkpoint the steps that succeeded.
+
+        Returns:
+            dict: The task result, with the steps ``skipped`` because a
+            previous attempt completed them
+
+        Raises:
+            CompletionStepError: If a step raised; a real failure is raised in
+            preference to a deferral
+        """
+        for name, outcome in result.outcomes.items():
+            if outcome.success:
+                self.checkpoint.mark_completed(name)
+                self.completed.add(name)
+
+        timings = ", ".join(
+            f"{name}={outcome.duration:.3f}s" for name, outcome in result.outcomes.items()
+        )
+        if result.errors:
+            # Back off according to the attempts of the step(s) that failed
+            self.failures = 0
+            countdowns = []
+            for name, error in result.errors.items():
+                retry_after = _retry_after(error)
+                if retry_after is None:
+                    step_failures = self.checkpoint.record_failure(name)
+                    self.failures = max(self.failures, step_failures)
+                    countdowns.append(retry_countdown(step_failures))
+                else:
+                    countdowns.append(retry_countdown(1, not_before=retry_after))
+            self.countdown = max(countdowns)
+            failed = [(name, error) for name, error in result.errors.items() if _retry_after(error) is None]
+            name, error = (failed or list(result.errors.items()))[0]
+            raise CompletionStepError(name, error)
+        if not result.success:
+            logger.warning(
+                f"Video render completion for video_id: {self.video_id} partially failed: "
+                f"{', '.join(result.failed_steps)} ({timings})"
+            )
+        else:
+            logger.info(f"Video render completed successfully for video_id: {self.video_id} ({timings})")
+        self.checkpoint.clear()
+        return {**result.to_dict(), "skipped": self.skipped}
+
+    def failed(self, error: BaseException) -> bool:
+        """
+        Handle an attempt that raised: log it, and forget the checkpoints if
+        no retry will follow (``final_attempt``).
+
+        Returns:
+            bool: True if the task's FAILED status should be reported; never
+            once COMPLETED was delivered, even on the final attempt
+        """
+        deferred = self.failures == 0
+        self.final_attempt = self.failures > self.max_retries or self.retries >= self.max_attempts
+        if deferred and not self.final_attempt:
+            logger.warning(f"Deferring video render completion for video_id: {self.video_id}: {error!s}")
+        else:
+            logger.error(f"Error processing video render completion: {error!s}", exc_info=error)
+        if self.final_attempt:
+            self.checkpoint.clear()
+        if "status_update" in self.completed:
+            return False
+        return self.final_attempt or not deferred
@@ -0,0 +1,530 @@
+"""
+Durable local outbox for notifications the video API could not take.
+
+When a status update or video record creation fails (the API answered
+with an error, the request failed, or the circuit is open), the call is
+written to an SQLite journal on the worker host instead of being lost
+after the task's last retry. A background drainer replays the journal once
+the API answers again: it probes with the oldest entry, then sends the rest
+of the batch (status updates through the bulk endpoint when available,
+other calls on a bounded thread pool).
+
+The journal runs in WAL mode with ``synchronous=NORMAL``: every append is a
+commit to the write-ahead log, which survives a crash of the worker, and
+fsyncs are batched at checkpoints rather than paid per notification.
+Several processes on one host may share the file; entries are claimed
+with a lease so each is replayed by one drainer at a time.
+
+Only the latest pending status update of a task is kept, and a terminal
+(completed/failed) update is never replaced by a later progress update.
+Once a status update for a task reaches the API by another route (a direct
+send or a coalesced flush), the pending updates it makes obsolete are
+removed, and the drainer skips entries the status filter already knows
+are duplicates or regressions.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from app.api.circuit_breaker import CircuitOpenError
+from app.api.errors import RetryLaterError
+from app.config import config
+from app.tasks.backoff import retry_countdown
+from app.tasks.status_filter import classify, get_status_filter
+
+logger = logging.getLogger(__name__)
+
+STATUS = "task_status"
+VIDEO_CREATE = "video_create"
+
+TERMINAL_RENDER_STATUSES = frozenset({"COMPLETED", "FAILED"})
+
+# Seconds a claimed entry is reserved for the drainer that claimed it
+_CLAIM_LEASE_SECONDS = 120
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    terminal INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at, id);
+CREATE INDEX IF NOT EXISTS outbox_task ON outbox (kind, task_id);
+"""
+
+
+class OutboxEntry(NamedTuple):
+    id: int
+    kind: str
+    task_id: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class Outbox:
+    """SQLite journal of API calls waiting to be replayed."""
+
+    def __init__(self, path: str, max_attempts: int = 100):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def append(self, kind: str, task_id: str, payload: Dict[str, Any], error: Optional[str] = None) -> bool:
+        """
+        Journal an API call.
+
+        Returns:
+            bool: False if a pending terminal status update made it obsolete
+        """
+        terminal = kind == STATUS and payload.get("render_status") in TERMINAL_RENDER_STATUSES
+        now = time.time()
+        with self._transaction() as connection:
+            if kind == STATUS:
+                pending_terminal = connection.execute(
+                    "SELECT 1 FROM outbox WHERE kind = ? AND task_id = ? AND terminal = 1", (kind, task_id)
+                ).fetchone()
+                if pending_terminal and not terminal:
+                    return False
+                # The latest state supersedes pending updates of the same task
+                connection.execute("DELETE FROM outbox WHERE kind = ? AND task_id = ?", (kind, task_id))
+            connection.execute(
+                "INSERT INTO outbox (kind, task_id, terminal, payload, created_at, next_attempt_at, last_error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, task_id, int(terminal), json.dumps(payload), now, now, error),
+            )
+        return True
+
+    def supersede(self, task_id: str, render_status: Optional[str], progress: Optional[float]) -> int:
+        """
+        Remove pending status updates of a task that a delivered update
+        made obsolete: all of them after a terminal update, otherwise those
+        not ahead of it (see :func:`classify`).
+
+        Returns:
+            int: Number of entries removed
+        """
+        # Most delivered updates have nothing pending: look before locking the journal
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, payload FROM outbox WHERE kind = ? AND task_id = ?", (STATUS, task_id)
+            ).fetchall()
+        terminal = render_status in TERMINAL_RENDER_STATUSES
+        obsolete = []
+        for entry_id, payload in rows:
+            update = json.loads(payload)
+            if terminal or classify((render_status, progress), update.get("render_status"), update.get("progress")) is not None:
+                obsolete.append((entry_id,))
+        if obsolete:
+            with self._transaction() as connection:
+                connection.executemany("DELETE FROM outbox WHERE id = ?", obsolete)
+        return len(obsolete)
+
+    def claim(self, limit: int) -> List[OutboxEntry]:
+        """Reserve up to ``limit`` due entries, oldest first."""
+        now = time.time()
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT id, kind, task_id, payload, attempts FROM outbox "
+                "WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + _CLAIM_LEASE_SECONDS, row[0]) for row in rows],
+            )
+        return [OutboxEntry(row[0], row[1], row[2], json.loads(row[3]), row[4]) for row in rows]
+
+    def complete(self, entries: List[OutboxEntry]) -> None:
+        """Remove replayed entries."""
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM outbox WHERE id = ?", [(entry.id,) for entry in entries])
+
+    def release(self, entries: List[OutboxEntry], delay: float, error: Optional[str] = None,
+                count_attempt: bool = True) -> int:
+        """
+        Make entries due again after ``delay`` seconds.
+
+        Entries that reach ``max_attempts`` are dropped.
+
+        Returns:
+            int: Number of entries dropped
+        """
+        dropped = [entry for entry in entries if count_attempt and entry.attempts + 1 >= self.max_attempts]
+        for entry in dropped:
+            logger.error(
+                f"Dropping outbox {entry.kind} for task_id: {entry.task_id} after {entry.attempts + 1} attempts: {error}"
+            )
+        retry_at = time.time() + delay
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM outbox WHERE id = ?", [(entry.id,) for entry in dropped])
+            connection.executemany(
+                "UPDATE outbox SET attempts = attempts + ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                [(int(count_attempt), retry_at, error, entry.id) for entry in entries if entry not in dropped],
+            )
+        return len(dropped)
+
+    def pending(self) -> int:
+        """Number of journaled entries."""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _api_call(kind: str) -> Callable[..., bool]:
+    from app.api.video_api_client import call_video_task_status_api, create_video_record
+
+    return {STATUS: call_video_task_status_api, VIDEO_CREATE: create_video_record}[kind]
+
+
+class OutboxDrainer:
+    """
+    Background thread replaying the outbox.
+
+    Each round claims a batch and sends its oldest entry as a health probe.
+    If the probe fails the whole batch waits (with a growing, jittered
+    delay, or until an open circuit is probed again); otherwise the rest of
+    the batch is sent with at most ``concurrency`` calls in flight.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        interval: float = 5.0,
+        batch_size: int = 100,
+        concurrency: int = 8,
+        bulk_enabled: bool = False,
+    ):
+        self.outbox = outbox
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._bulk_supported = bulk_enabled
+        self._failures = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _send(self, entry: OutboxEntry) -> Tuple[bool, Optional[str], Optional[float]]:
+        """Replay one entry: (success, error, minimum retry delay)."""
+        try:
+            if _api_call(entry.kind)(task_id=entry.task_id, **entry.payload):
+                if entry.kind == STATUS:
+                    status_delivered(entry.task_id, entry.payload)
+                return True, None, None
+            return False, "API call failed", None
+        except RetryLaterError as e:
+            return False, str(e), e.retry_after
+        except Exception as e:
+            logger.error(f"Failed to replay outbox {entry.kind} for task_id: {entry.task_id}: {e!s}", exc_info=True)
+            return False, str(e), None
+
+    def _send_statuses_in_bulk(self, entries: List[OutboxEntry]) -> List[OutboxEntry]:
+        """Send status updates through the bulk endpoint; return those still unsent."""
+        from app.api.video_api_client import (
+            BulkStatusUnsupportedError,
+            _task_status_payload,
+            call_video_task_status_bulk_api,
+        )
+
+        remaining = entries
+        while remaining and self._bulk_supported:
+            chunk, rest = remaining[:config.STATUS_COALESCE_MAX_BATCH], remaining[config.STATUS_COALESCE_MAX_BATCH:]
+            updates = [{"task_id": entry.task_id, **_task_status_payload(**entry.payload)} for entry in chunk]
+            try:
+                sent = call_video_task_status_bulk_api(updates)
+            except BulkStatusUnsupportedError as e:
+                logger.warning(f"Bulk status endpoint unavailable ({e!s}), replaying per task")
+                self._bulk_supported = False
+                break
+            except RetryLaterError:
+                break
+            if not sent:
+                break
+            for entry in chunk:
+                status_delivered(entry.task_id, entry.payload)
+            self.outbox.complete(chunk)
+            remaining = rest
+        return remaining
+
+    def _skip_stale(self, entries: List[OutboxEntry]) -> List[OutboxEntry]:
+        """Complete status updates the status filter says are no longer news; return the rest."""
+        status_filter = get_status_filter()
+        if status_filter is None:
+            return entries
+        stale = [
+            entry for entry in entries
+            if entry.kind == STATUS and status_filter.check(
+                entry.task_id, entry.payload.get("render_status"), entry.payload.get("progress")
+            ) is not None
+        ]
+        if stale:
+            logger.info(f"Dropping {len(stale)} outbox status updates already superseded by sent ones")
+            self.outbox.complete(stale)
+        return [entry for entry in entries if entry not in stale]
+
+    def drain_once(self) -> int:
+        """
+        Replay one batch.
+
+        Returns:
+            int: Number of entries replayed successfully
+        """
+        entries = self._skip_stale(self.outbox.claim(self.batch_size))
+        if not entries:
+            return 0
+
+        probe, rest = entries[0], entries[1:]
+        success, error, retry_after = self._send(probe)
+        if not success:
+            self._failures += 1
+            delay = retry_countdown(self._failures, not_before=retry_after)
+            self.outbox.release([probe], delay, error)
+            # The others were not tried: keep their attempt counts
+            self.outbox.release(rest, delay, count_attempt=False)
+            logger.warning(f"Video API still unavailable, replaying {len(entries)} outbox entries in {delay:.0f}s: {error}")
+            return 0
+        self._failures = 0
+        self.outbox.complete([probe])
+
+        statuses = [entry for entry in rest if entry.kind == STATUS]
+        others = [entry for entry in rest if entry.kind != STATUS]
+        unsent = self._send_statuses_in_bulk(statuses) + others
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="outbox-drain")
+        results = list(self._executor.map(self._send, unsent))
+        self.outbox.complete([entry for entry, result in zip(unsent, results) if result[0]])
+        for entry, (success, error, retry_after) in zip(unsent, results):
+            if not success:
+                self.outbox.release([entry], retry_countdown(entry.attempts + 1, not_before=retry_after), error)
+
+        replayed = len(entries) - sum(1 for result in results if not result[0])
+        logger.info(f"Replayed {replayed} of {len(entries)} outbox entries")
+        return replayed
+
+    def start(self) -> None:
+        """Start the background drain thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the drain thread; unsent entries stay in the journal."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                replayed = self.drain_once()
+            except Exception as e:
+                logger.error(f"Failed to drain the outbox: {e!s}", exc_info=True)
+                replayed = 0
+            if replayed < self.batch_size:
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+
+
+_outbox: Optional[Outbox] = None
+_outbox_pid: Optional[int] = None
+_outbox_lock = threading.Lock()
+_drainer: Optional[OutboxDrainer] = None
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Return this process' outbox (None if ``OUTBOX_ENABLED`` is off)."""
+    global _outbox, _outbox_pid
+
+    if not config.OUTBOX_ENABLED:
+        return None
+    pid = os.getpid()
+    if _outbox is not None and _outbox_pid == pid:
+        return _outbox
+    with _outbox_lock:
+        if _outbox is None or _outbox_pid != pid:
+            _outbox = Outbox(config.OUTBOX_PATH, config.OUTBOX_MAX_ATTEMPTS)
+            _outbox_pid = pid
+        return _outbox
+
+
+def spool(kind: str, task_id: str, payload: Dict[str, Any], error: Optional[str] = None) -> bool:
+    """
+    Journal an API call for later replay.
+
+    Returns:
+        bool: True if the call is now owned by the outbox
+    """
+    outbox = get_outbox()
+    if outbox is None:
+        return False
+    try:
+        if outbox.append(kind, task_id, payload, error):
+            logger.warning(f"Spooled {kind} for task_id: {task_id} to the outbox: {error}")
+        else:
+            logger.info(f"Dropped {kind} for task_id: {task_id}, a terminal update is already spooled")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Failed to spool {kind} for task_id: {task_id}: {e!s}", exc_info=True)
+        return False
+
+
+def status_delivered(task_id: str, update: Dict[str, Any]) -> None:
+    """
+    Bookkeeping once the API accepted a status update, however it was sent
+    (directly, coalesced or replayed): the status filter remembers it, and
+    spooled updates of the task it made obsolete are removed from the
+    outbox so the drainer does not replay them over it.
+    """
+    render_status, progress = update.get("render_status"), update.get("progress")
+    status_filter = get_status_filter()
+    if status_filter is not None:
+        status_filter.record(task_id, render_status, progress)
+    outbox = get_outbox()
+    if outbox is not None:
+        try:
+            outbox.supersede(task_id, render_status, progress)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to remove superseded outbox entries for task_id: {task_id}: {e!s}", exc_info=True)
+
+
+def call_or_spool(kind: str, call: Callable[..., bool], task_id: str, **kwargs: Any) -> bool:
+    """
+    Make an API call, spooling it to the outbox if it fails or the circuit is open.
+
+    Without an outbox a failed call is not retried here; the error (or
+    False) is passed on to the caller.
+
+    Returns:
+        bool: True if the call succeeded or was spooled
+    """
+    outbox = get_outbox()
+    try:
+        sent = call(task_id=task_id, **kwargs)
+    except CircuitOpenError as e:
+        if outbox is None:
+            raise
+        return spool(kind, task_id, kwargs, str(e))
+    if sent:
+        if kind == STATUS:
+            status_delivered(task_id, kwargs)
+        return True
+    return outbox is not None and spool(kind, task_id, kwargs, "API call failed")
+
+
+async def async_call_or_spool(kind: str, call: Callable[..., Awaitable[bool]], task_id: str, **kwargs: Any) -> bool:
+    """Async version of :func:`call_or_spool`; the journal and the status filter are written off the event loop."""
+    outbox = get_outbox()
+    try:
+        sent = await call(task_id=task_id, **kwargs)
+    except CircuitOpenError as e:
+        if outbox is None:
+            raise
+        return await asyncio.to_thread(spool, kind, task_id, kwargs, str(e))
+    if sent:
+        if kind == STATUS:
+            await asyncio.to_thread(status_delivered, task_id, kwargs)
+        return True
+    return outbox is not None and await asyncio.to_thread(spool, kind, task_id, kwargs, "API call failed")
+
+
+def start_outbox_drainer() -> Optional[OutboxDrainer]:
+    """Start replaying this host's outbox from the current process (once)."""
+    global _drainer
+
+    outbox = get_outbox()
+    if outbox is None or _drainer is not None:
+        return _drainer
+    _drainer = OutboxDrainer(
+        outbox,
+        interval=config.OUTBOX_DRAIN_INTERVAL,
+        batch_size=config.OUTBOX_DRAIN_BATCH,
+        concurrency=config.OUTBOX_DRAIN_CONCURRENCY,
+        bulk_enabled=config.VIDEO_API_BULK_STATUS_ENABLED,
+    )
+    _drainer.start()
+    return _drainer
+
+
+def stop_outbox_drainer() -> None:
+    """Stop the drainer started by this process, if any."""
+    global _drainer
+
+    drainer, _drainer = _drainer, None
+    if drainer is not None:
+        drainer.stop()
+
+
+def _reset_after_fork() -> None:
+    global _outbox, _outbox_pid, _outbox_lock, _drainer
+
+    # Connections and threads do not survive a fork; the parent keeps its own
+    _outbox = None
+    _outbox_pid = None
+    _outbox_lock = threading.Lock()
+    _drainer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
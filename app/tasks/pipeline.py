@@ -0,0 +1,181 @@
+"""
+Concurrent execution of independent task steps.
+
+A render completion needs two API calls (status update and video record
+creation) that do not depend on each other. Running them concurrently makes
+a completion cost one API round trip instead of two. Each step is timed and
+its outcome recorded separately so callers can tell full success, partial
+failure and errors apart.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# A step returns True on success, False on a reported failure, or raises
+Step = Callable[[], bool]
+AsyncStep = Callable[[], Awaitable[bool]]
+
+
+class StepOutcome:
+    """Result and timing of one pipeline step."""
+
+    __slots__ = ("duration", "error", "name", "success")
+
+    def __init__(self, name: str, success: bool, duration: float, error: Optional[BaseException] = None):
+        self.name = name
+        self.success = success
+        self.duration = duration
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": self.success,
+            "duration": round(self.duration, 4),
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+
+class PipelineResult:
+    """Aggregated outcome of a set of concurrently executed steps."""
+
+    def __init__(self, outcomes: Dict[str, StepOutcome], duration: float):
+        self.outcomes = outcomes
+        self.duration = duration
+
+    @property
+    def success(self) -> bool:
+        """True only if every step succeeded."""
+        return all(outcome.success for outcome in self.outcomes.values())
+
+    @property
+    def failed_steps(self) -> List[str]:
+        """Names of steps that reported failure or raised."""
+        return [name for name, outcome in self.outcomes.items() if not outcome.success]
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        """Exceptions raised by steps, keyed by step name."""
+        return {
+            name: outcome.error
+            for name, outcome in self.outcomes.items()
+            if outcome.error is not None
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": self.success,
+            "partial": not self.success and len(self.failed_steps) < len(self.outcomes),
+            "duration": round(self.duration, 4),
+            "steps": {name: outcome.to_dict() for name, outcome in self.outcomes.items()},
+        }
+
+
+def _run_step(name: str, step: Step) -> StepOutcome:
+    started = time.perf_counter()
+    try:
+        success = bool(step())
+        error = None
+    except Exception as e:
+        success = False
+        error = e
+    return StepOutcome(name, success, time.perf_counter() - started, error)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is not None and _executor_pid == pid:
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.PIPELINE_MAX_WORKERS,
+                thread_name_prefix="task-pipeline",
+            )
+            _executor_pid = pid
+        return _executor
+
+
+def run_concurrently(steps: Dict[str, Step]) -> PipelineResult:
+    """
+    Run independent steps concurrently and wait for all of them.
+
+    The last step runs on the calling thread; the others are submitted to a
+    per-process thread pool. Exceptions never escape: they are captured in
+    the step's outcome (see :attr:`PipelineResult.errors`).
+
+    Args:
+        steps: Step name -> callable, in submission order
+
+    Returns:
+        PipelineResult: Per-step outcomes and total wall-clock time
+    """
+    started = time.perf_counter()
+    items = list(steps.items())
+    futures: Dict[str, Future] = {}
+
+    if len(items) > 1:
+        executor = _get_executor()
+        for name, step in items[:-1]:
+            futures[name] = executor.submit(_run_step, name, step)
+
+    outcomes: Dict[str, StepOutcome] = {}
+    if items:
+        name, step = items[-1]
+        outcomes[name] = _run_step(name, step)
+    for name, future in futures.items():
+        outcomes[name] = future.result()
+
+    # Preserve submission order for readable results
+    ordered = {name: outcomes[name] for name, _ in items}
+    return PipelineResult(ordered, time.perf_counter() - started)
+
+
+async def _run_async_step(name: str, step: AsyncStep) -> StepOutcome:
+    started = time.perf_counter()
+    try:
+        success = bool(await step())
+        error = None
+    except Exception as e:
+        success = False
+        error = e
+    return StepOutcome(name, success, time.perf_counter() - started, error)
+
+
+async def run_concurrently_async(steps: Dict[str, AsyncStep]) -> PipelineResult:
+    """Coroutine version of :func:`run_concurrently` using ``asyncio.gather``."""
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(_run_async_step(name, step) for name, step in steps.items())
+    )
+    return PipelineResult(
+        {outcome.name: outcome for outcome in outcomes},
+        time.perf_counter() - started,
+    )
+
+
+def _reset_after_fork() -> None:
+    global _executor, _executor_pid, _executor_lock
+
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,262 @@
+"""
+Monotonic filter for render status updates.
+
+Status messages are delivered at least once and may arrive out of order, so
+a task can see the same update twice, or a PROCESSING update after it was
+already reported COMPLETED. The filter remembers the last status/progress
+sent for each task_id and skips, before any HTTP call:
+
+- duplicates: the same status with no new progress
+- regressions: an earlier status (PROCESSING after COMPLETED) or a lower
+  progress for the same status
+
+Statuses are ordered INITIALIZED < PENDING < PROCESSING = RETRY <
+COMPLETED = FAILED; moving between statuses of the same rank (e.g. a render
+retrying, or FAILED corrected to COMPLETED) is always allowed, as are
+statuses the filter does not know.
+
+State lives in an in-process LRU, backed by Redis with
+``STATUS_FILTER_STORE=redis`` so every worker sees what the others sent.
+Because state only ever advances, the LRU can reject an update without
+asking Redis. Store errors are logged and let the update through.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import config
+from app.metrics import record_status_skip
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE = "duplicate"
+REGRESSION = "regression"
+
+RENDER_STATUS_RANK = {
+    "INITIALIZED": 0,
+    "PENDING": 1,
+    "PROCESSING": 2,
+    "RETRY": 2,
+    "COMPLETED": 3,
+    "FAILED": 3,
+}
+
+# (render_status, progress) last sent for a task
+State = Tuple[str, Optional[float]]
+
+
+def classify(last: Optional[State], render_status: str, progress: Optional[float]) -> Optional[str]:
+    """
+    Compare an update with the last state sent for its task.
+
+    Returns:
+        DUPLICATE or REGRESSION if the update should be skipped, else None
+    """
+    if last is None:
+        return None
+    rank = RENDER_STATUS_RANK.get(render_status)
+    last_status, last_progress = last
+    last_rank = RENDER_STATUS_RANK.get(last_status)
+    if rank is None or last_rank is None:
+        return None
+    if rank < last_rank:
+        return REGRESSION
+    if rank > last_rank or render_status != last_status:
+        return None
+    if progress is None:
+        return DUPLICATE
+    if last_progress is None or progress > last_progress:
+        return None
+    return DUPLICATE if progress == last_progress else REGRESSION
+
+
+class MemoryStatusStore:
+    """Last state per task_id in the current process (LRU with expiry)."""
+
+    def __init__(self, ttl: float, max_tasks: int = 10000):
+        self._ttl = ttl
+        self._max_tasks = max_tasks
+        self._lock = threading.Lock()
+        # task_id -> (expires_at, state)
+        self._tasks: OrderedDict[str, Tuple[float, State]] = OrderedDict()
+
+    def get(self, task_id: str) -> Optional[State]:
+        with self._lock:
+            entry = self._tasks.get(task_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._tasks[task_id]
+                return None
+            self._tasks.move_to_end(task_id)
+            return entry[1]
+
+    def advance(self, task_id: str, render_status: str, progress: Optional[float]) -> None:
+        """Store the state unless the one already stored is further along."""
+        with self._lock:
+            entry = self._tasks.get(task_id)
+            now = time.monotonic()
+            last = entry[1] if entry is not None and entry[0] >= now else None
+            if last is not None and classify(last, render_status, progress) is not None:
+                return
+            self._tasks[task_id] = (now + self._ttl, (render_status, progress))
+            self._tasks.move_to_end(task_id)
+            while len(self._tasks) > self._max_tasks:
+                self._tasks.popitem(last=False)
+
+
+class RedisStatusStore:
+    """Last state per task_id shared by every worker connected to the same Redis."""
+
+    # KEYS[1]=task hash; ARGV: render_status, rank ("" = unknown), progress ("" = none), ttl.
+    # Mirrors classify(): the stored state is only replaced by one further along.
+    _ADVANCE_SCRIPT = """
+    local last = redis.call("hmget", KEYS[1], "status", "rank", "progress")
+    local rank = tonumber(ARGV[2])
+    local progress = tonumber(ARGV[3])
+    if last[1] then
+        local last_rank = tonumber(last[2])
+        local last_progress = tonumber(last[3])
+        if rank and last_rank then
+            if rank < last_rank then
+                return 0
+            end
+            if rank == last_rank and ARGV[1] == last[1] then
+                if progress == nil or (last_progress and progress <= last_progress) then
+                    return 0
+                end
+            end
+        end
+    end
+    redis.call("hset", KEYS[1], "status", ARGV[1], "rank", ARGV[2], "progress", ARGV[3])
+    redis.call("expire", KEYS[1], ARGV[4])
+    return 1
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._ttl = max(1, int(ttl))
+        self._advance = self._client.register_script(self._ADVANCE_SCRIPT)
+
+    def _key(self, task_id: str) -> str:
+        return f"{self._prefix}:{task_id}"
+
+    def get(self, task_id: str) -> Optional[State]:
+        status, progress = self._client.hmget(self._key(task_id), "status", "progress")
+        if status is None:
+            return None
+        progress = progress.decode() if isinstance(progress, bytes) else progress
+        return status.decode() if isinstance(status, bytes) else status, float(progress) if progress else None
+
+    def advance(self, task_id: str, render_status: str, progress: Optional[float]) -> None:
+        rank = RENDER_STATUS_RANK.get(render_status)
+        self._advance(
+            keys=[self._key(task_id)],
+            args=[render_status, "" if rank is None else rank, "" if progress is None else progress, self._ttl],
+        )
+
+
+class StatusFilter:
+    """
+    Decide whether a status update still needs to be sent.
+
+    ``check`` before sending, ``record`` once the update was accepted; only
+    recording sent updates means a failed send is not mistaken for a
+    duplicate when the task is retried.
+    """
+
+    def __init__(self, cache: MemoryStatusStore, store: Optional[RedisStatusStore] = None):
+        self._cache = cache
+        self._store = store
+
+    def check(self, task_id: str, render_status: str, progress: Optional[float]) -> Optional[str]:
+        """
+        Returns:
+            DUPLICATE or REGRESSION if the update should be skipped, else None
+        """
+        reason = classify(self._cache.get(task_id), render_status, progress)
+        if reason is None and self._store is not None:
+            try:
+                last = self._store.get(task_id)
+            except Exception as e:
+                logger.warning(f"Status filter store unavailable for task {task_id}: {e!s}")
+                return None
+            if last is not None:
+                self._cache.advance(task_id, *last)
+                reason = classify(last, render_status, progress)
+        if reason is not None:
+            record_status_skip(reason)
+        return reason
+
+    def record(self, task_id: str, render_status: str, progress: Optional[float]) -> None:
+        """Remember an update that was sent (never moves the state backwards)."""
+        if render_status not in RENDER_STATUS_RANK:
+            return
+        self._cache.advance(task_id, render_status, progress)
+        if self._store is not None:
+            try:
+                self._store.advance(task_id, render_status, progress)
+            except Exception as e:
+                logger.warning(f"Failed to record status of task {task_id} in the status filter store: {e!s}")
+
+
+def create_status_filter() -> Optional[StatusFilter]:
+    """
+    Build the status filter from configuration.
+
+    Returns:
+        StatusFilter, or None if ``STATUS_FILTER_ENABLED`` is off
+    """
+    if not config.STATUS_FILTER_ENABLED:
+        return None
+
+    cache = MemoryStatusStore(config.STATUS_FILTER_TTL, config.STATUS_FILTER_CACHE_SIZE)
+    backend = config.STATUS_FILTER_STORE.lower()
+    if backend == "redis":
+        url = config.STATUS_FILTER_STORE_URL or config.CELERY_BROKER_URL
+        if url:
+            store = RedisStatusStore(url, f"{config.APP_NAME}:task_status", config.STATUS_FILTER_TTL)
+            return StatusFilter(cache, store)
+        logger.error("STATUS_FILTER_STORE=redis requires STATUS_FILTER_STORE_URL or CELERY_BROKER_URL")
+    elif backend not in ("", "memory"):
+        logger.error(f"Unknown STATUS_FILTER_STORE backend: {config.STATUS_FILTER_STORE}")
+
+    return StatusFilter(cache)
+
+
+_filter: Optional[StatusFilter] = None
+_filter_pid: Optional[int] = None
+_filter_lock = threading.Lock()
+
+
+def get_status_filter() -> Optional[StatusFilter]:
+    """Return this process' status filter (None if disabled)."""
+    global _filter, _filter_pid
+
+    pid = os.getpid()
+    if _filter_pid == pid:
+        return _filter
+    with _filter_lock:
+        if _filter_pid != pid:
+            _filter = create_status_filter()
+            _filter_pid = pid
+        return _filter
+
+
+def _reset_after_fork() -> None:
+    global _filter, _filter_pid, _filter_lock
+
+    _filter = None
+    _filter_pid = None
+    _filter_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
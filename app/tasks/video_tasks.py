@@ -3,17 +3,128 @@ Celery tasks for video render status updates
 """
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from app.api import call_video_task_status_api, create_video_record
+from app.api.errors import RetryLaterError
+from app.api.status_coalescer import get_status_coalescer
 from app.celery_app import celery_app
 from app.config import config
+from app.tasks.backoff import retry_countdown
+from app.tasks.completion import COMPLETION_MAX_RETRIES, CompletionAttempt, _retry_after
+from app.tasks.outbox import STATUS, VIDEO_CREATE, call_or_spool
+from app.tasks.pipeline import run_concurrently
+from app.tasks.status_filter import get_status_filter
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Map status to render_status enum
+# Valid render_status values: INITIALIZED, PENDING, PROCESSING, COMPLETED, FAILED, RETRY
+RENDER_STATUS_MAP = {
+    "initialized": "INITIALIZED",
+    "pending": "PENDING",
+    "processing": "PROCESSING",
+    "retry": "RETRY",
+    "completed": "COMPLETED",
+    "failed": "FAILED"
+}
 
-@celery_app.task(bind=True, name="jianying_notification.update_video_render_status", queue=config.CELERY_QUEUE_NAME)
+
+def to_render_status(status: str) -> str:
+    """Map a render node status (e.g. "processing") to the API render_status enum."""
+    return RENDER_STATUS_MAP.get(status.lower(), status.upper())
+
+
+def send_render_status(
+    task_id: str,
+    status: str,
+    progress: Optional[float] = None,
+    error_message: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Send a render status update for ``task_id`` to the video task status API.
+
+    Duplicates and updates older than the last one sent for the task are
+    skipped by the status filter, and progress updates may be handed to the
+    status coalescer instead of being sent immediately; both count as success.
+    With the outbox enabled, an update the API does not accept is spooled
+    for replay, which also counts as success. The filter only records an
+    update once the API accepted it (see :func:`app.tasks.outbox.status_delivered`),
+    so a buffered or spooled update that is lost later is not mistaken for
+    a duplicate when the task is retried.
+
+    Returns:
+        bool: True if the update was sent (or deferred, skipped or spooled) successfully
+    """
+    update = render_status_update(status, progress, error_message, extra)
+    if skip_or_coalesce(task_id, update):
+        return True
+    return call_or_spool(STATUS, call_video_task_status_api, task_id, **update)
+
+
+def render_status_update(
+    status: str,
+    progress: Optional[float] = None,
+    error_message: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Keyword arguments of the status API call for a render node status."""
+    return {
+        "status": status,
+        "render_status": to_render_status(status),
+        "progress": progress,
+        "message": error_message,
+        "extra": extra
+    }
+
+
+def skip_or_coalesce(task_id: str, update: Dict[str, Any]) -> bool:
+    """
+    Apply the status filter and the coalescer to a status update.
+
+    Returns:
+        bool: True if the update needs no direct send (skipped as a duplicate
+        or regression, or buffered for a coalesced flush)
+    """
+    progress = update["progress"]
+    status_filter = get_status_filter()
+    if status_filter is not None:
+        reason = status_filter.check(task_id, update["render_status"], progress)
+        if reason is not None:
+            logger.info(f"Skipping {reason} status update for task_id: {task_id} ({update['render_status']}, progress {progress})")
+            return True
+
+    # Progress updates may be coalesced with later ones for the same task;
+    # a terminal update discards the task's pending progress
+    coalescer = get_status_coalescer()
+    if coalescer is not None and coalescer.submit(task_id, update):
+        logger.info(f"Deferred status update for task_id: {task_id} to coalesced flush")
+        return True
+    return False
+
+
+def status_retry(error: BaseException, retries: int, max_retries: int) -> Tuple[float, int]:
+    """
+    Retry policy of a status update that raised.
+
+    Deferrals (rate limit, open circuit) wait at least as long as asked and
+    are allowed ``TASK_MAX_DEFERRALS`` more retries than errors.
+
+    Returns:
+        (countdown, max_retries) for the retry
+    """
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        logger.warning(f"Deferring video render status: {error!s}")
+        return retry_countdown(1, not_before=retry_after), max_retries + config.TASK_MAX_DEFERRALS
+    logger.error(f"Error processing video render status: {error!s}", exc_info=True)
+    # Jittered exponential backoff
+    return retry_countdown(retries + 1), max_retries
+
+
+@celery_app.task(bind=True, name="jianying_notification.update_video_render_status")
 def update_video_render_status(
     self,
     status: str,
@@ -42,39 +153,29 @@ def update_video_render_status(
         if error_message:
             logger.error(f"Error message: {error_message}")
 
-        # Map status to render_status enum
-        # Valid render_status values: INITIALIZED, PENDING, PROCESSING, COMPLETED, FAILED, RETRY
-        render_status_map = {
-            "initialized": "INITIALIZED",
-            "pending": "PENDING",
-            "processing": "PROCESSING",
-            "retry": "RETRY",
-            "completed": "COMPLETED",
-            "failed": "FAILED"
-        }
-        render_status = render_status_map.get(status.lower(), status.upper())
-
         # Call video task status API if task_id is provided
         api_success = False
         if task_id:
-            api_success = call_video_task_status_api(
+            api_success = send_render_status(
                 task_id=task_id,
                 status=status,
-                render_status=render_status,
                 progress=progress,
-                message=error_message,
+                error_message=error_message,
                 extra=extra
             )
 
         logger.info(f"Successfully processed video render status for task_id: {task_id} (API call: {api_success})")
 
     except Exception as e:
-        logger.error(f"Error processing video render status: {e!s}", exc_info=True)
-        # Retry the task with exponential backoff
-        raise self.retry(exc=e, countdown=60, max_retries=3)
+        countdown, max_retries = status_retry(e, self.request.retries, self.max_retries)
+        raise self.retry(exc=e, countdown=countdown, max_retries=max_retries) from e
 
 
-@celery_app.task(bind=True, name="jianying_notification.process_video_render_completion", queue=config.CELERY_QUEUE_NAME)
+@celery_app.task(
+    bind=True,
+    name="jianying_notification.process_video_render_completion",
+    max_retries=COMPLETION_MAX_RETRIES,
+)
 def process_video_render_completion(
     self,
     video_id: str,
@@ -91,10 +192,18 @@ def process_video_render_completion(
     """
     Process video render completion with OSS link.
 
-    This task is triggered when video rendering is completed and 
+    This task is triggered when video rendering is completed and
     an OSS link is available. It updates the task status and creates
     a video record via API.
 
+    The status update and the video record creation are independent and
+    run concurrently. A step that reports failure (API returned
+    success=False) is logged as a partial failure; a step that raises
+    marks the task as failed and retries it. Completed steps are
+    checkpointed under the Celery task id, so a retry only runs the
+    unfinished ones, after a delay that grows with the failing step's
+    attempts.
+
     Args:
         video_id: Unique identifier for the video
         oss_url: OSS link to the rendered video
@@ -108,22 +217,32 @@ def process_video_render_completion(
         extra: Additional metadata
 
     Returns:
-        dict: Result with success status and message
+        dict: Result with overall success, ``partial`` flag, total duration,
+        per-step success/duration/error and the steps ``skipped`` because a
+        previous attempt completed them
     """
     logger.info(f"Processing video render completion for video_id: {video_id}")
 
+    # Progress of this task across retries (self.request.id is kept by self.retry)
+    attempt = CompletionAttempt(self.request.id, self.request.retries, self.max_retries, video_id)
+
     try:
-        # Update status to completed
-        result = update_video_render_status(
-            status="completed",
-            task_id=task_id,
-            progress=100.0
-        )
-
-        # Create video record with OSS link
-        if task_id:
-            create_video_record(
+        if not task_id:
+            logger.info(f"Video render completed successfully for video_id: {video_id} (no task_id, nothing to notify)")
+            return {"success": True, "partial": False, "duration": 0.0, "steps": {}, "skipped": []}
+
+        steps = {
+            # Update status to completed
+            "status_update": lambda: send_render_status(
                 task_id=task_id,
+                status="completed",
+                progress=100.0
+            ),
+            # Create video record with OSS link
+            "create_record": lambda: call_or_spool(
+                VIDEO_CREATE,
+                create_video_record,
+                task_id,
                 oss_url=oss_url,
                 video_name=video_name,
                 resolution=resolution,
@@ -131,18 +250,16 @@ def process_video_render_completion(
                 duration=duration,
                 file_size=file_size,
                 thumbnail_url=thumbnail_url
-            )
-
-        logger.info(f"Video render completed successfully for video_id: {video_id}")
+            ),
+        }
+        return attempt.finish(run_concurrently(attempt.pending(steps)))
 
     except Exception as e:
-        logger.error(f"Error processing video render completion: {e!s}", exc_info=True)
-        # Log failure
-        if task_id:
-            call_video_task_status_api(
-                task_id=task_id,
-                status="failed",
-                render_status="FAILED",
-                message=str(e)
-            )
-        raise self.retry(exc=e, countdown=60, max_retries=3)
+        if attempt.failed(e) and task_id:
+            try:
+                send_render_status(task_id=task_id, status="failed", error_message=str(e))
+            except RetryLaterError as defer_error:
+                logger.warning(f"Could not report FAILED status for task_id: {task_id}: {defer_error!s}")
+        if attempt.final_attempt:
+            raise
+        raise self.retry(exc=e, countdown=attempt.countdown, max_retries=attempt.max_attempts) from e
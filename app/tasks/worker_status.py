@@ -3,9 +3,10 @@
 import logging
 from typing import Any, Dict, Optional
 
+from app.api.errors import RetryLaterError
 from app.api.video_api_client import report_worker_status
+from app.api.worker_status_aggregator import get_worker_status_aggregator
 from app.celery_app import celery_app
-from app.config import config
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,6 @@ logger = logging.getLogger(__name__)
 @celery_app.task(
     bind=True,
     name="jianying_notification.update_worker_status",
-    queue=config.CELERY_QUEUE_NAME,
 )
 def update_worker_status(
     self,
@@ -25,20 +25,43 @@ def update_worker_status(
     traceback: Optional[str] = None,
     extra: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    """Report that a worker has started, failed, or recovered."""
+    """
+    Report that a worker has started, failed, or recovered.
+
+    With WORKER_STATUS_AGGREGATE_SECONDS the event is merged into the
+    worker's next periodic report instead of being sent on its own.
+    """
 
     logger.info(
         "Received worker status update: %s available=%s", worker_name, is_available
     )
-    success = report_worker_status(
-        worker_name=worker_name,
-        hostname=hostname,
-        is_available=is_available,
-        task_id=task_id,
-        error_message=error_message,
-        traceback=traceback,
-        extra=extra,
-    )
+    # Merged into the worker's next periodic report
+    aggregator = get_worker_status_aggregator()
+    if aggregator is not None:
+        aggregator.submit(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
+        return {"success": True, "aggregated": True}
+    try:
+        success = report_worker_status(
+            worker_name=worker_name,
+            hostname=hostname,
+            is_available=is_available,
+            task_id=task_id,
+            error_message=error_message,
+            traceback=traceback,
+            extra=extra,
+        )
+    except RetryLaterError as e:
+        # Fail fast: the next worker event reports the current state anyway
+        logger.warning("Skipping worker status report for %s: %s", worker_name, e)
+        success = False
     if not success:
         logger.warning("Worker status report failed for %s; will retry next worker event", worker_name)
-    return {"success": success}
\ No newline at end of file
+    return {"success": success}
@@ -0,0 +1,147 @@
+"""
+Warm-up of a worker process before it runs its first task.
+
+A freshly started worker (or prefork child) would otherwise pay for DNS
+lookups, TCP/TLS handshakes with the video API and Cognito, and the M2M
+token request inline in its first tasks. With ``WORKER_WARMUP_ENABLED``
+the worker signals (:mod:`app.worker_signals`) run these steps at process
+start instead, concurrently:
+
+- dns: installs the DNS cache for every API instance and the Cognito
+  domain (if ``DNS_CACHE_TTL`` is set) and resolves them
+- token: fetches (or loads the shared) M2M token
+- connections: opens ``WORKER_WARMUP_CONNECTIONS`` pooled keep-alive
+  connections to each API instance with concurrent requests to
+  ``VIDEO_API_HEALTH_PATH``
+
+The prefork parent resolves hosts and fetches the token once; its children
+inherit both and only open their own connections. Warm-up gives up after
+``WORKER_WARMUP_TIMEOUT`` seconds (unfinished steps carry on in the
+background), well within the time Celery allows a child to start. Step
+durations are logged and exported as ``worker_warmup_duration_seconds``.
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.util.connection import allowed_gai_family
+
+from app.api.dns_cache import install_dns_cache
+from app.api.http_session import get_session
+from app.auth import get_m2m_token
+from app.config import config
+from app.metrics import observe_warmup
+
+logger = logging.getLogger(__name__)
+
+
+def _hosts() -> List[Tuple[str, int]]:
+    hosts = []
+    for url in [*config.video_api_base_urls, config.COGNITO_DOMAIN]:
+        parts = urlsplit(url)
+        if parts.hostname:
+            hosts.append((parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)))
+    return hosts
+
+
+def resolve_hosts() -> None:
+    """Install the DNS cache for the API instances and the Cognito domain, and resolve them."""
+    hosts = _hosts()
+    install_dns_cache(host for host, _ in hosts)
+    for host, port in hosts:
+        try:
+            # The lookup urllib3 makes when it connects, so its answer is the one cached
+            socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError as e:
+            logger.warning(f"Warm-up could not resolve {host}: {e!s}")
+
+
+def prefetch_token() -> None:
+    """Fetch the M2M token into the process cache."""
+    if not get_m2m_token():
+        logger.warning("Warm-up could not obtain an M2M token")
+
+
+def open_connections(per_instance: Optional[int] = None) -> None:
+    """Open ``per_instance`` pooled connections to every API instance."""
+    per_instance = config.WORKER_WARMUP_CONNECTIONS if per_instance is None else per_instance
+    per_instance = min(per_instance, config.HTTP_POOL_MAXSIZE)
+    path = config.VIDEO_API_HEALTH_PATH or "/"
+    session = get_session()
+
+    def request(url: str) -> None:
+        try:
+            # Any answer leaves a connection in the pool
+            session.get(url, timeout=config.WORKER_WARMUP_TIMEOUT).close()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Warm-up could not connect to {url}: {e!s}")
+
+    # Requests in flight together each need a connection of their own
+    threads = [
+        threading.Thread(target=request, args=(f"{base_url}{path}",), daemon=True)
+        for base_url in config.video_api_base_urls
+        for _ in range(per_instance)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def warm_up(connections: bool = True) -> Optional[Dict[str, float]]:
+    """
+    Run the warm-up steps concurrently, waiting at most ``WORKER_WARMUP_TIMEOUT``.
+
+    Args:
+        connections: Also open pooled connections (not worth it in a prefork parent)
+
+    Returns:
+        Seconds per finished step plus ``total``, or None if warm-up is disabled
+    """
+    if not config.WORKER_WARMUP_ENABLED:
+        return None
+
+    steps: Dict[str, Callable[[], None]] = {"dns": resolve_hosts, "token": prefetch_token}
+    if connections:
+        steps["connections"] = open_connections
+
+    finished: Dict[str, float] = {}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def run(name: str, step: Callable[[], None]) -> None:
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e!s}")
+        with lock:
+            finished[name] = time.perf_counter() - started
+
+    threads = [
+        threading.Thread(target=run, args=(name, step), name=f"warmup-{name}", daemon=True)
+        for name, step in steps.items()
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = started + config.WORKER_WARMUP_TIMEOUT
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.perf_counter()))
+    with lock:
+        durations = dict(finished)
+    durations["total"] = time.perf_counter() - started
+
+    for name, seconds in durations.items():
+        observe_warmup(name, seconds)
+    unfinished = [name for name in steps if name not in durations]
+    logger.info(
+        f"Warm-up took {durations['total']:.3f}s ("
+        + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in durations.items() if name != "total")
+        + (f"; still running: {', '.join(unfinished)}" if unfinished else "")
+        + ")"
+    )
+    return durations
@@ -0,0 +1,360 @@
+"""
+Worker profiles: which queues a Celery worker consumes.
+
+Profiles make it easy to run dedicated capacity for completions next to
+workers that take everything:
+
+    python -m app.worker_profiles all -- --concurrency 8
+    python -m app.worker_profiles completions -- --concurrency 4
+
+The profile starts ``celery worker`` with its queues (highest weight first)
+and a node name of ``<profile>@<host>``; arguments after ``--`` are passed
+to Celery unchanged. Requires ``CELERY_ROUTING_ENABLED=true``; without it
+every profile consumes ``CELERY_QUEUE_NAME``.
+
+With ``CELERY_SHARD_COUNT`` set, the ``shards`` profile runs one solo
+(single-threaded, prefetch 1) worker per shard queue assigned to this node,
+so each shard is processed strictly in order:
+
+    python -m app.worker_profiles shards --node-index 0 --node-count 3
+
+Shards are spread round-robin over ``--node-count`` nodes; when changing
+the node count, stop the old shard workers before starting the new ones so
+no shard is ever consumed by two workers.
+
+Pool profiles choose how a worker executes tasks (``--pool-profile``,
+default ``CELERY_POOL_PROFILE``); without one the worker keeps Celery's
+defaults (prefork, one process per CPU, messages acknowledged when the
+task starts). Notification tasks spend nearly all of their time waiting
+on the video API, so the ``threads`` profile runs many of them
+concurrently in one process; ``gevent`` runs even more on greenlets
+(requires ``pip install ".[gevent]"``), and ``prefork`` keeps Celery's
+process pool for CPU-light work that must not share a process.
+
+Profiles acknowledge messages after the task ran, so the tasks of a worker
+that dies are redelivered rather than lost, but only with a shared
+checkpoint store (``TASK_CHECKPOINT_STORE=redis``): a redelivered
+completion must find the steps another worker already finished, or it
+creates the video record twice. With per-process checkpoints messages are
+acknowledged early, as without a profile.
+
+    python -m app.worker_profiles all --pool-profile gevent
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.config import config
+from app.routing import queue_weights, shard_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _queue_names() -> Dict[str, str]:
+    return {
+        "completions": config.CELERY_COMPLETION_QUEUE,
+        "progress": config.CELERY_PROGRESS_QUEUE,
+        "worker_status": config.CELERY_WORKER_STATUS_QUEUE,
+        "legacy": config.CELERY_QUEUE_NAME,
+    }
+
+
+class WorkerProfile:
+    """A named set of queues consumed by one worker."""
+
+    def __init__(self, name: str, queue_keys: Sequence[str], description: str):
+        self.name = name
+        self.queue_keys = tuple(queue_keys)
+        self.description = description
+
+    def queues(self) -> List[str]:
+        """Queue names of this profile, highest weight first."""
+        if not config.CELERY_ROUTING_ENABLED:
+            return [config.CELERY_QUEUE_NAME]
+        names = _queue_names()
+        weights = queue_weights()
+        queues = list(dict.fromkeys(names[key] for key in self.queue_keys))
+        return sorted(queues, key=lambda name: -weights.get(name, 1))
+
+    def celery_args(self, extra: Sequence[str] = (), pool_profile: Optional["PoolProfile"] = None) -> List[str]:
+        """Arguments for ``celery -A app.celery_app worker`` running this profile."""
+        pool_profile = pool_profile or get_pool_profile()
+        return [
+            "-A", "app.celery_app", "worker",
+            "-Q", ",".join(self.queues()),
+            "-n", f"{self.name}@%h",
+            *(pool_profile.celery_args() if pool_profile else ()),
+            "--loglevel", config.LOG_LEVEL.lower(),
+            *extra,
+        ]
+
+
+WORKER_PROFILES: Dict[str, WorkerProfile] = {
+    profile.name: profile
+    for profile in (
+        WorkerProfile(
+            "all",
+            ("completions", "worker_status", "progress", "legacy"),
+            "Every queue, consumed in weighted order",
+        ),
+        WorkerProfile(
+            "completions",
+            ("completions",),
+            "Completions and terminal status updates only (reserved capacity)",
+        ),
+        WorkerProfile(
+            "progress",
+            ("progress", "worker_status", "legacy"),
+            "Progress updates, worker status and the legacy queue",
+        ),
+    )
+}
+
+
+def get_worker_profile(name: str) -> WorkerProfile:
+    """
+    Look up a worker profile by name.
+
+    Raises:
+        ValueError: If there is no such profile
+    """
+    try:
+        return WORKER_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown worker profile {name!r}, expected one of: {', '.join(WORKER_PROFILES)}"
+        ) from None
+
+
+def checkpoints_shared() -> bool:
+    """Whether task step checkpoints are seen by every worker (``TASK_CHECKPOINT_STORE=redis``)."""
+    return config.TASK_CHECKPOINT_STORE.lower() == "redis" and bool(
+        config.TASK_CHECKPOINT_STORE_URL or config.CELERY_BROKER_URL
+    )
+
+
+def _gevent_patched() -> bool:
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+class PoolProfile:
+    """How a worker executes tasks: pool, concurrency, prefetch and acknowledgement."""
+
+    def __init__(self, name: str, pool: str, concurrency: int, prefetch_multiplier: int,
+                 acks_late: bool, description: str):
+        self.name = name
+        self.pool = pool
+        # 0 = one per CPU
+        self.concurrency = concurrency
+        self.prefetch_multiplier = prefetch_multiplier
+        # Only applied with a shared checkpoint store, see late_acks()
+        self.acks_late = acks_late
+        self.description = description
+
+    @property
+    def in_process(self) -> bool:
+        """Whether tasks run in the worker's main process (threads or greenlets)."""
+        return self.pool != "prefork"
+
+    def late_acks(self) -> bool:
+        """Whether messages are acknowledged after the task ran (needs shared checkpoints)."""
+        return self.acks_late and checkpoints_shared()
+
+    def worker_concurrency(self) -> int:
+        """Concurrency of this profile, unless overridden by ``CELERY_WORKER_CONCURRENCY``."""
+        return config.CELERY_WORKER_CONCURRENCY or self.concurrency or os.cpu_count() or 2
+
+    def celery_config(self) -> Dict[str, Any]:
+        """
+        Celery settings for workers running this profile.
+
+        Celery only applies the gevent patches for ``-P gevent``, and warns
+        if the setting names it: the gevent profile leaves the pool to the
+        command line, and falls back to threads in a process that was not
+        patched.
+        """
+        settings: Dict[str, Any] = {}
+        if self.pool != "gevent":
+            settings["worker_pool"] = self.pool
+        elif not _gevent_patched():
+            settings["worker_pool"] = "threads"
+        return {
+            **settings,
+            "worker_concurrency": self.worker_concurrency(),
+            "worker_prefetch_multiplier": config.CELERY_PREFETCH_MULTIPLIER or self.prefetch_multiplier,
+            "task_acks_late": self.late_acks(),
+            # A task whose process died (OOM, SIGKILL) is redelivered instead of acknowledged
+            "task_reject_on_worker_lost": self.late_acks(),
+        }
+
+    def celery_args(self) -> List[str]:
+        """
+        Worker command-line arguments for this profile.
+
+        The pool is passed on the command line (not only in the settings) so
+        Celery applies the gevent monkey patches before anything is imported.
+        With ``CELERY_AUTOTUNE_ENABLED`` a prefork worker gets Celery's
+        ``--autoscale``; threads and greenlets are tuned by :mod:`app.autotune`.
+        """
+        args = ["--pool", self.pool]
+        if config.CELERY_AUTOTUNE_ENABLED and not self.in_process:
+            minimum = min(config.CELERY_AUTOTUNE_MIN_CONCURRENCY, self.worker_concurrency())
+            args += ["--autoscale", f"{self.worker_concurrency()},{minimum}"]
+        return args
+
+    def environment(self) -> Dict[str, str]:
+        """Environment for the worker: the profile, and an HTTP pool as large as its concurrency."""
+        environment = {"CELERY_POOL_PROFILE": self.name}
+        if self.in_process and "HTTP_POOL_MAXSIZE" not in os.environ:
+            # Every thread/greenlet shares the process's HTTP session
+            environment["HTTP_POOL_MAXSIZE"] = str(max(config.HTTP_POOL_MAXSIZE, self.worker_concurrency()))
+        return environment
+
+
+POOL_PROFILES: Dict[str, PoolProfile] = {
+    profile.name: profile
+    for profile in (
+        PoolProfile(
+            "threads", "threads", concurrency=64, prefetch_multiplier=1, acks_late=True,
+            description="I/O-bound: many tasks waiting on the API in one process",
+        ),
+        PoolProfile(
+            "gevent", "gevent", concurrency=256, prefetch_multiplier=1, acks_late=True,
+            description="I/O-bound on greenlets: highest concurrency per process (requires gevent)",
+        ),
+        PoolProfile(
+            "prefork", "prefork", concurrency=0, prefetch_multiplier=4, acks_late=True,
+            description="CPU-light: one process per CPU, isolated from each other",
+        ),
+    )
+}
+
+
+def get_pool_profile(name: Optional[str] = None) -> Optional[PoolProfile]:
+    """
+    Look up a pool profile by name (default ``CELERY_POOL_PROFILE``).
+
+    Returns:
+        The profile, or None if no profile is configured (Celery's defaults)
+
+    Raises:
+        ValueError: If there is no such profile
+    """
+    name = (name or config.CELERY_POOL_PROFILE).lower()
+    if not name:
+        return None
+    try:
+        return POOL_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown pool profile {name!r}, expected one of: {', '.join(POOL_PROFILES)}"
+        ) from None
+
+
+def pool_config(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Celery worker settings for a pool profile (default ``CELERY_POOL_PROFILE``).
+
+    Empty without a profile, leaving Celery's defaults in place.
+    """
+    try:
+        profile = get_pool_profile(name)
+    except ValueError as e:
+        logger.error(f"{e}, using Celery's default pool")
+        return {}
+    return profile.celery_config() if profile else {}
+
+
+def shards_for_node(node_index: int, node_count: int) -> List[int]:
+    """Shard indexes consumed by node ``node_index`` of ``node_count``."""
+    if not 0 <= node_index < node_count:
+        raise ValueError(f"node index {node_index} is outside 0..{node_count - 1}")
+    return [shard for shard in range(config.CELERY_SHARD_COUNT) if shard % node_count == node_index]
+
+
+def shard_worker_args(shard: int, extra: Sequence[str] = ()) -> List[str]:
+    """Arguments for ``celery -A app.celery_app worker`` consuming one shard serially."""
+    return [
+        "-A", "app.celery_app", "worker",
+        "-Q", shard_queue(shard),
+        "-n", f"shard{shard}@%h",
+        "--pool", "solo",
+        "--prefetch-multiplier", "1",
+        "--loglevel", config.LOG_LEVEL.lower(),
+        *extra,
+    ]
+
+
+def run_shard_workers(shards: Sequence[int], extra: Sequence[str] = ()) -> int:
+    """
+    Run one serial worker per shard until they exit; SIGINT/SIGTERM are forwarded.
+
+    Returns:
+        int: Highest exit code of the shard workers
+    """
+    processes = [
+        subprocess.Popen(["celery", *shard_worker_args(shard, extra)])
+        for shard in shards
+    ]
+
+    def _forward(signum, frame):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signum)
+
+    signal.signal(signal.SIGINT, _forward)
+    signal.signal(signal.SIGTERM, _forward)
+    return max((process.wait() for process in processes), default=0)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    extra: List[str] = []
+    if "--" in argv:
+        index = argv.index("--")
+        argv, extra = argv[:index], argv[index + 1:]
+
+    parser = argparse.ArgumentParser(description="Run a Celery worker for a worker profile")
+    parser.add_argument("profile", choices=sorted([*WORKER_PROFILES, "shards"]))
+    parser.add_argument(
+        "--pool-profile", choices=sorted(POOL_PROFILES), default=None,
+        help=f"How tasks are executed (default: CELERY_POOL_PROFILE={config.CELERY_POOL_PROFILE or 'none'})",
+    )
+    parser.add_argument("--print", action="store_true", help="Print the celery command instead of running it")
+    parser.add_argument("--node-index", type=int, default=0, help="shards: index of this node")
+    parser.add_argument("--node-count", type=int, default=1, help="shards: number of nodes consuming shards")
+    args = parser.parse_args(argv)
+
+    if args.profile == "shards":
+        if config.CELERY_SHARD_COUNT <= 0:
+            parser.error("the shards profile requires CELERY_SHARD_COUNT > 0")
+        shards = shards_for_node(args.node_index, args.node_count)
+        if args.print:
+            for shard in shards:
+                print(" ".join(["celery", *shard_worker_args(shard, extra)]))
+            return
+        sys.exit(run_shard_workers(shards, extra))
+
+    pool_profile = get_pool_profile(args.pool_profile)
+    command = ["celery", *get_worker_profile(args.profile).celery_args(extra, pool_profile)]
+    environment = pool_profile.environment() if pool_profile else {}
+    if args.print:
+        print(" ".join([*(f"{key}={value}" for key, value in environment.items()), *command]))
+        return
+    os.execvpe(command[0], command, {**os.environ, **environment})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Celery worker lifecycle and task instrumentation hooks.
+
+Per-process resources (HTTP connection pools, background threads) must be
+created after Celery forks its prefork children, never in the parent.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from celery.concurrency import get_implementation
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+
+from app.api.http_session import close_session, init_session
+from app.api.status_coalescer import shutdown_status_coalescer
+from app.api.worker_status_aggregator import shutdown_worker_status_aggregator
+from app.auth.token_refresher import start_token_refresher, stop_token_refresher
+from app.autotune import start_autotuner, stop_autotuner
+from app.metrics import (
+    mark_process_dead,
+    observe_queue_wait,
+    observe_task,
+    record_task_retry,
+    start_metrics_server,
+)
+from app.warmup import warm_up
+
+logger = logging.getLogger(__name__)
+
+# Longest an in-process pool waits before fetching messages into freed prefetch slots
+PREFETCH_POLL_INTERVAL = 0.01
+
+# Celery task id -> perf_counter() at task start, for runtime metrics
+_task_started: Dict[str, float] = {}
+_task_started_lock = threading.Lock()
+
+
+@worker_init.connect
+def on_worker_init(sender=None, **kwargs):
+    """Start the metrics exporter and warm up the main worker process before it consumes."""
+    start_metrics_server()
+    # Prefork children inherit the resolved hosts and the token, but open their own connections
+    warm_up(connections=not _forks_children(sender))
+
+
+def _forks_children(worker) -> bool:
+    pool_cls = getattr(worker, "pool_cls", None)
+    if isinstance(pool_cls, str):
+        pool_cls = get_implementation(pool_cls)
+    return isinstance(pool_cls, type) and issubclass(pool_cls, PreforkPool)
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    """Set up per-process resources in a freshly forked worker child, and warm it up."""
+    init_session()
+    start_token_refresher()
+    warm_up()
+    logger.debug("Worker process initialized HTTP session and token refresher")
+
+
+@worker_ready.connect
+def on_worker_ready(sender=None, **kwargs):
+    """Start the outbox drainer, and background services (token refresher, autotuner) for in-process pools."""
+    from app.tasks.outbox import start_outbox_drainer
+
+    # One drainer per worker, in the main process
+    start_outbox_drainer()
+    # Prefork children get theirs from worker_process_init
+    if isinstance(getattr(sender, "pool", None), PreforkPool):
+        return
+    start_token_refresher()
+    if sender is not None:
+        _poll_prefetch_window(sender)
+        start_autotuner(sender)
+
+
+def _poll_prefetch_window(consumer) -> None:
+    """
+    Let the consumer loop notice freed prefetch slots promptly.
+
+    Threads and greenlets acknowledge messages outside the consumer's event
+    loop, which is not woken by it: with a full prefetch window it would
+    only fetch more messages at its next timer, up to seconds later. A short
+    no-op timer bounds that delay.
+    """
+    hub = getattr(consumer, "hub", None)
+    if hub is not None:
+        hub.call_repeatedly(PREFETCH_POLL_INTERVAL, _noop)
+
+
+def _noop() -> None:
+    pass
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(pid=None, **kwargs):
+    """Release per-process resources before a worker child exits."""
+    stop_token_refresher()
+    shutdown_status_coalescer()
+    shutdown_worker_status_aggregator()
+    close_session()
+    mark_process_dead(pid or os.getpid())
+
+
+@worker_shutdown.connect
+def on_worker_shutdown(**kwargs):
+    """Flush buffered work for pools that run tasks in the main process (solo/threads)."""
+    from app.tasks.outbox import stop_outbox_drainer
+
+    stop_outbox_drainer()
+    stop_autotuner()
+    stop_token_refresher()
+    shutdown_status_coalescer()
+    shutdown_worker_status_aggregator()
+
+
+@before_task_publish.connect
+def on_before_task_publish(headers=None, **kwargs):
+    """Stamp outgoing messages with their publish time (kept across retries)."""
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+def _parse_eta(eta: Optional[str]) -> Optional[float]:
+    if not eta:
+        return None
+    parsed = eta if isinstance(eta, datetime) else datetime.fromisoformat(eta)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@task_prerun.connect
+def on_task_prerun(task_id=None, task=None, **kwargs):
+    """Record queue wait (since publish or ETA) and the task start time."""
+    with _task_started_lock:
+        _task_started[task_id] = time.perf_counter()
+
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None:
+        return
+    try:
+        ready_at = max(float(published_at), _parse_eta(task.request.eta) or 0.0)
+    except (TypeError, ValueError):
+        return
+    observe_queue_wait(task.name, time.time() - ready_at)
+
+
+@task_postrun.connect
+def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    """Record the task runtime labelled with its final state."""
+    with _task_started_lock:
+        started = _task_started.pop(task_id, None)
+    if started is not None:
+        observe_task(task.name, state or "UNKNOWN", time.perf_counter() - started)
+
+
+@task_retry.connect
+def on_task_retry(sender=None, **kwargs):
+    """Count task retries."""
+    if sender is not None:
+        record_task_retry(sender.name)
+
+
+@task_failure.connect
+def on_task_failure(sender=None, task_id=None, exception=None, args=None, kwargs=None, **kw):
+    """Dead-letter status updates and completions that failed their last retry."""
+    from app.dead_letter import dead_letter, retries_exhausted
+
+    if sender is None:
+        return
+    request = sender.request
+    # The request of this call, unless the signal comes from outside its execution
+    retries = (request.retries or 0) if request.id == task_id else 0
+    if retries_exhausted(sender.name, retries, exception):
+        dead_letter(sender.name, task_id, args, kwargs, exception, retries)
@@ -0,0 +1,3 @@
+"""
+Load-testing and micro-benchmark harness for jianying-notification.
+"""
@@ -0,0 +1,119 @@
+"""
+HTTP ingest gateway throughput.
+
+Starts the gateway in-process (one event loop, one core) and posts render
+status events to it from ``--connections`` concurrent keep-alive clients,
+then reports requests/sec, latency percentiles and how many broker messages
+the events were coalesced into.
+
+Usage:
+    python -m benchmarks.gateway                                      # in-memory broker
+    python -m benchmarks.gateway --broker redis://localhost:6379/15 --requests 50000 --connections 256
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+import aiohttp
+from aiohttp import web
+
+from app.celery_app import celery_app
+from app.gateway import IngestBatcher, create_app
+from benchmarks.load_test import percentile
+
+
+async def _client(session: aiohttp.ClientSession, url: str, events: List[Dict[str, Any]],
+                  latencies: List[float], statuses: Dict[int, int]) -> None:
+    for event in events:
+        started = time.perf_counter()
+        async with session.post(url, json=event) as response:
+            await response.read()
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    celery_app.conf.broker_url = args.broker
+    batcher = IngestBatcher(max_batch=args.max_batch, batch_interval=args.batch_interval_ms / 1000.0)
+    runner = web.AppRunner(create_app(batcher), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/status"
+
+    events = [
+        {"status": "processing", "task_id": f"bench-{index % args.render_tasks}", "progress": float(index % 100)}
+        for index in range(args.requests)
+    ]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                _client(session, url, events[offset::args.connections], latencies, statuses)
+                for offset in range(args.connections)
+            ])
+            elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+
+    return {
+        "broker": args.broker,
+        "requests": args.requests,
+        "connections": args.connections,
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 2) for name, q in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+        "statuses": statuses,
+        "messages_published": batcher.published,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    latency = report["latency_ms"]
+    return "\n".join([
+        f"{report['requests']} requests over {report['connections']} connections ({report['broker']})",
+        f"throughput: {report['requests_per_second']} requests/sec",
+        f"latency:    p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms",
+        f"statuses:   {report['statuses']}",
+        f"published:  {report['messages_published']} messages",
+    ])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Measure HTTP ingest gateway throughput")
+    parser.add_argument("--broker", default="memory://", help="Broker URL")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=128, help="Concurrent client connections")
+    parser.add_argument("--render-tasks", type=int, default=1000, help="Distinct task_ids in the events")
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--batch-interval-ms", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Status updates balanced across several video API instances.
+
+Starts three stub API instances, one healthy, one slow and one that refuses
+connections, lists them in ``VIDEO_API_BASE_URLS`` and sends task status
+updates with the synchronous client from a pool of threads, once per
+balancing strategy. Reports call latency percentiles, failed calls, how
+many calls each instance answered and which instances were ejected.
+
+Usage:
+    python -m benchmarks.load_balancing --calls 2000 --slow-ms 300
+    python -m benchmarks.load_balancing --strategies ewma -c 32 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.api.load_balancer import STRATEGIES, get_load_balancer
+from app.api.video_api_client import call_video_task_status_api
+from app.config import config
+from benchmarks.load_test import percentile
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+
+def run_strategy(strategy: str, instances: Dict[str, StubApiServer], args: argparse.Namespace) -> Dict[str, Any]:
+    """Send ``args.calls`` status updates balanced with ``strategy``."""
+    durations: List[float] = []
+    failures = 0
+
+    def update(index: int) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        ok = call_video_task_status_api(f"bench-{index % 500}", render_status="PROCESSING", progress=50.0)
+        durations.append(time.perf_counter() - started)
+        if not ok:
+            failures += 1
+
+    for stub in instances.values():
+        stub.reset_counts()
+    names = {stub.url: name for name, stub in instances.items()}
+    with patch.multiple(config, VIDEO_API_BALANCER=strategy, VIDEO_API_BASE_URLS=list(names)):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(update, range(args.calls)))
+        elapsed = time.perf_counter() - started
+        ejected = [names[instance.base_url] for instance in get_load_balancer().instances if instance.ejected]
+    # Drop this strategy's balancer (and its health checks) before the next one
+    get_load_balancer()
+
+    return {
+        "strategy": strategy,
+        "calls": args.calls,
+        "failures": failures,
+        "calls_per_second": round(args.calls / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {
+            name: round(value * 1000, 1) if value is not None else None
+            for name, value in (
+                ("p50", percentile(durations, 50)),
+                ("p95", percentile(durations, 95)),
+                ("p99", percentile(durations, 99)),
+                ("max", max(durations) if durations else None),
+            )
+        },
+        "answered": {name: stub.counts.get("task_status", 0) for name, stub in instances.items()},
+        "ejected": ejected,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    token = StubApiServer().start()
+    instances = {
+        "healthy": StubApiServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start(),
+        "slow": StubApiServer(latency_ms=args.latency_ms + args.slow_ms, jitter_ms=args.jitter_ms).start(),
+        # Bound, then closed: its port refuses connections
+        "down": StubApiServer(),
+    }
+    instances["down"].stop()
+    try:
+        with patch.multiple(
+            config,
+            COGNITO_DOMAIN=token.url,
+            COGNITO_CLIENT_ID="bench-client",
+            COGNITO_CLIENT_SECRET="bench-secret",
+            VIDEO_API_HEALTH_INTERVAL=args.health_interval,
+            HTTP_POOL_MAXSIZE=max(config.HTTP_POOL_MAXSIZE, args.concurrency),
+        ):
+            results = [run_strategy(strategy, instances, args) for strategy in args.strategies.split(",")]
+    finally:
+        for stub in (token, instances["healthy"], instances["slow"]):
+            stub.stop()
+    return {
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "slow_ms": args.slow_ms,
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['calls']} status updates, {report['concurrency']} threads, instances: healthy "
+        f"({report['latency_ms']}ms), slow (+{report['slow_ms']}ms), down",
+        f"{'strategy':<18} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'failed':>7}  answered by instance",
+    ]
+    for result in report["results"]:
+        latency_ms = result["latency_ms"]
+        answered = ", ".join(f"{name} {count}" for name, count in result["answered"].items())
+        lines.append(
+            f"{result['strategy']:<18} {latency_ms['p50']:>7} {latency_ms['p95']:>7} {latency_ms['p99']:>7} "
+            f"{result['failures']:>7}  {answered} (ejected: {', '.join(result['ejected']) or 'none'})"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Balance status updates across healthy, slow and dead API instances")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="Comma-separated balancing strategies")
+    parser.add_argument("--calls", type=int, default=2000, help="Status updates per strategy")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Calling threads")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency of the healthy instance")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Stub API latency jitter")
+    parser.add_argument("--slow-ms", type=float, default=300.0, help="Extra latency of the slow instance")
+    parser.add_argument("--health-interval", type=float, default=1.0, help="Seconds between health checks")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    # Calls to the dead instance are expected to fail until it is ejected
+    logging.basicConfig(level=logging.CRITICAL)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
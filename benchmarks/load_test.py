@@ -0,0 +1,268 @@
+"""
+End-to-end load test for the notification workers.
+
+Starts a stub video API / Cognito server, runs an in-process Celery worker
+against the configured broker (in-memory by default, or a real Redis), and
+publishes ``update_video_render_status`` / ``process_video_render_completion``
+messages at a target rate. Reports throughput, end-to-end latency
+percentiles (publish -> task finished) and API calls per task.
+
+Usage:
+    python -m benchmarks.load_test --rate 500 --render-tasks 200 --updates-per-task 9
+    python -m benchmarks.load_test --broker redis://localhost:6379/15 --pool threads -c 64
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from celery.contrib.testing.worker import start_worker
+from celery.signals import before_task_publish, task_postrun, task_retry
+
+from app.celery_app import celery_app
+from app.config import config
+from app.tasks import process_video_render_completion, update_video_render_status
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100.0 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class TaskTimer:
+    """Record publish and finish times of benchmark tasks via Celery signals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.published: Dict[str, float] = {}
+        self.latencies: List[float] = []
+        self.finished_at: List[float] = []
+        self.failures = 0
+        self.retries = 0
+        self.done = threading.Event()
+        self.expected = 0
+
+    def connect(self) -> None:
+        before_task_publish.connect(self._on_publish, weak=False)
+        task_postrun.connect(self._on_postrun, weak=False)
+        task_retry.connect(self._on_retry, weak=False)
+
+    def disconnect(self) -> None:
+        before_task_publish.disconnect(self._on_publish)
+        task_postrun.disconnect(self._on_postrun)
+        task_retry.disconnect(self._on_retry)
+
+    def _on_publish(self, headers=None, **kwargs):
+        task_id = (headers or {}).get("id")
+        if task_id and not (headers or {}).get("retries"):
+            with self._lock:
+                self.published[task_id] = time.perf_counter()
+
+    def _on_retry(self, **kwargs):
+        with self._lock:
+            self.retries += 1
+
+    def _on_postrun(self, task_id=None, state=None, **kwargs):
+        if state == "RETRY":
+            return
+        now = time.perf_counter()
+        with self._lock:
+            started = self.published.get(task_id)
+            if started is None:
+                return
+            self.latencies.append(now - started)
+            self.finished_at.append(now)
+            if state != "SUCCESS":
+                self.failures += 1
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+
+
+def build_messages(render_tasks: int, updates_per_task: int) -> List[tuple]:
+    """
+    Build the message stream: progress waves across all render tasks, then completions.
+
+    Returns:
+        List of (task, kwargs) tuples in publish order
+    """
+    messages = []
+    for step in range(updates_per_task):
+        progress = round((step + 1) * 100.0 / (updates_per_task + 1), 1)
+        for index in range(render_tasks):
+            messages.append((
+                update_video_render_status,
+                {"status": "processing", "task_id": f"bench-{index}", "progress": progress},
+            ))
+    for index in range(render_tasks):
+        messages.append((
+            process_video_render_completion,
+            {
+                "video_id": f"video-{index}",
+                "oss_url": f"https://oss.example.com/bench-{index}.mp4",
+                "task_id": f"bench-{index}",
+                "duration": 12.5,
+            },
+        ))
+    return messages
+
+
+def use_broker(url: str) -> None:
+    """Point the app at ``url``, tuning the in-memory transport for an in-process worker."""
+    celery_app.conf.broker_url = url
+    if url.startswith("memory://"):
+        # The in-memory transport polls once per second by default
+        celery_app.conf.broker_transport_options = {"polling_interval": 0.005}
+        # Its blocking consumer loop only sends acks between 2s polls, so a
+        # prefetch window as small as the pool's stalls the worker; on Redis
+        # acks go out immediately and the pool profile's window is kept
+        celery_app.conf.worker_prefetch_multiplier = max(4, celery_app.conf.worker_prefetch_multiplier)
+
+
+def publish_at_rate(messages: List[tuple], rate: float) -> float:
+    """Publish messages paced at ``rate`` per second (0 = as fast as possible)."""
+    started = time.perf_counter()
+    for index, (task, kwargs) in enumerate(messages):
+        if rate > 0:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        task.apply_async(kwargs=kwargs)
+    return time.perf_counter() - started
+
+
+def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one load test and return the report as a dict."""
+    messages = build_messages(args.render_tasks, args.updates_per_task)
+    timer = TaskTimer()
+    timer.expected = len(messages)
+
+    with StubApiServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        bulk_supported=not args.no_bulk,
+    ) as stub, patch.multiple(
+        config,
+        VIDEO_API_BASE_URL=stub.url,
+        COGNITO_DOMAIN=stub.url,
+        COGNITO_CLIENT_ID="bench-client",
+        COGNITO_CLIENT_SECRET="bench-secret",
+        # Threads share one pool per process; size it to the worker concurrency
+        HTTP_POOL_MAXSIZE=max(config.HTTP_POOL_MAXSIZE, args.concurrency),
+    ):
+        use_broker(args.broker)
+        timer.connect()
+        try:
+            with start_worker(
+                celery_app,
+                pool=args.pool,
+                concurrency=args.concurrency,
+                perform_ping_check=False,
+                loglevel=args.loglevel,
+                shutdown_timeout=args.timeout,
+            ):
+                stub.reset_counts()
+                started = time.perf_counter()
+                publish_seconds = publish_at_rate(messages, args.rate)
+                completed = timer.done.wait(args.timeout)
+                finished = max(timer.finished_at) if timer.finished_at else time.perf_counter()
+        finally:
+            timer.disconnect()
+
+        api_calls = {name: count for name, count in stub.counts.items() if name != "token"}
+
+    total_api_calls = sum(api_calls.values())
+    elapsed = finished - started
+    processed = len(timer.latencies)
+    return {
+        "messages": len(messages),
+        "processed": processed,
+        "completed": completed,
+        "failures": timer.failures,
+        "retries": timer.retries,
+        "publish_seconds": round(publish_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "tasks_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (
+                ("p50", percentile(timer.latencies, 50)),
+                ("p95", percentile(timer.latencies, 95)),
+                ("p99", percentile(timer.latencies, 99)),
+                ("max", max(timer.latencies) if timer.latencies else None),
+            )
+        },
+        "api_calls": api_calls,
+        "api_calls_per_task": round(total_api_calls / processed, 3) if processed else None,
+        "token_requests": stub.counts.get("token", 0),
+        "api_errors": dict(stub.errors),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    latency = report["latency_ms"]
+    lines = [
+        f"messages:            {report['messages']} (processed {report['processed']}, "
+        f"failures {report['failures']}, retries {report['retries']})",
+        f"elapsed:             {report['elapsed_seconds']}s (publish {report['publish_seconds']}s)",
+        f"throughput:          {report['tasks_per_second']} tasks/s",
+        f"latency p50/p95/p99: {latency['p50']} / {latency['p95']} / {latency['p99']} ms "
+        f"(max {latency['max']} ms)",
+        f"API calls per task:  {report['api_calls_per_task']} {report['api_calls']}",
+        f"token requests:      {report['token_requests']}",
+    ]
+    if report["api_errors"]:
+        lines.append(f"API errors:          {report['api_errors']}")
+    if not report["completed"]:
+        lines.append("WARNING: timed out before every message was processed")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load-test the notification workers")
+    parser.add_argument("--broker", default="memory://", help="Celery broker URL")
+    parser.add_argument("--pool", default="threads", help="Worker pool (threads, solo, ...)")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="Target publish rate in messages/s (0 = unthrottled)")
+    parser.add_argument("--render-tasks", type=int, default=100, help="Distinct render task_ids")
+    parser.add_argument("--updates-per-task", type=int, default=9, help="Progress updates per render task")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub API latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Stub API latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls failing with 500")
+    parser.add_argument("--no-bulk", action="store_true", help="Stub API has no bulk status endpoint")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for completion")
+    parser.add_argument("--loglevel", default="WARNING")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.loglevel.upper())
+    logging.getLogger("app").setLevel(args.loglevel.upper())
+
+    report = run_load_test(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Render-node publishing cost: one ``apply_async`` per event vs the batched publisher.
+
+Emits the event stream of a render node (progress waves over its running
+render tasks, then their completions) at ``--rate`` events per second,
+once per mode, and reports how many messages reached the broker, the time
+the render node spends per event, and, on a Redis broker, the number of
+commands sent to Redis (a pipelined batch is one write).
+
+Usage:
+    python -m benchmarks.publisher                                    # in-memory broker
+    python -m benchmarks.publisher --broker redis://localhost:6379/15 --render-tasks 16 --rate 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.celery_app import celery_app
+from app.publisher import NotificationPublisher
+from app.routing import COMPLETION_TASK
+from benchmarks.load_test import build_messages
+
+MODES = ("apply_async", "batched")
+
+
+class RedisWriteCounter:
+    """Count packed commands (pipelines count once) written to any Redis connection."""
+
+    def __init__(self):
+        self.writes = 0
+        self._patch = None
+
+    def __enter__(self) -> "RedisWriteCounter":
+        try:
+            from redis.connection import Connection
+        except ImportError:
+            return self
+        original = Connection.send_packed_command
+
+        def counting(connection, *args, **kwargs):
+            self.writes += 1
+            return original(connection, *args, **kwargs)
+
+        self._patch = patch.object(Connection, "send_packed_command", counting)
+        self._patch.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._patch is not None:
+            self._patch.stop()
+
+
+def _paced(messages: List[tuple], rate: float):
+    """Yield messages paced at ``rate`` per second (0 = as fast as possible)."""
+    started = time.perf_counter()
+    for index, message in enumerate(messages):
+        if rate > 0:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield message
+
+
+def run_mode(mode: str, messages: List[tuple], args: argparse.Namespace) -> Dict[str, Any]:
+    """Publish ``messages`` in one mode; caller time excludes the pacing sleeps."""
+    with RedisWriteCounter() as counter, patch.object(
+        celery_app.amqp, "send_task_message", wraps=celery_app.amqp.send_task_message,
+    ) as send:
+        started = time.perf_counter()
+        caller_seconds = 0.0
+        publisher = NotificationPublisher(max_batch=args.max_batch, flush_interval=args.flush_interval_ms / 1000.0)
+        for task, kwargs in _paced(messages, args.rate):
+            call_started = time.perf_counter()
+            if mode == "apply_async":
+                task.apply_async(kwargs=kwargs)
+            elif task.name == COMPLETION_TASK:
+                publisher.complete(**kwargs)
+            else:
+                publisher.update_status(**kwargs)
+            caller_seconds += time.perf_counter() - call_started
+        publisher.close()
+        total_seconds = time.perf_counter() - started
+        published = send.call_count
+
+    return {
+        "events": len(messages),
+        "messages_published": published,
+        "redis_writes": counter.writes,
+        "caller_us_per_event": round(caller_seconds / len(messages) * 1e6, 2),
+        "total_seconds": round(total_seconds, 3),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    celery_app.conf.broker_url = args.broker
+    messages = build_messages(args.render_tasks, args.updates_per_task)
+    results = {mode: run_mode(mode, messages, args) for mode in MODES}
+    with celery_app.connection_for_write() as connection:
+        for queue in celery_app.amqp.queues.values():
+            queue(connection.default_channel).purge()
+    return {"broker": args.broker, "results": results}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'mode':<12} {'events':>7} {'published':>10} {'redis writes':>13} {'us/event':>9} {'total s':>8}"]
+    for mode, result in report["results"].items():
+        lines.append(
+            f"{mode:<12} {result['events']:>7} {result['messages_published']:>10} {result['redis_writes']:>13} "
+            f"{result['caller_us_per_event']:>9} {result['total_seconds']:>8}"
+        )
+    lines.append(f"(broker {report['broker']}; redis writes are 0 on non-Redis brokers)")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare per-event and batched publishing on the render side")
+    parser.add_argument("--broker", default="memory://", help="Broker URL")
+    parser.add_argument("--render-tasks", type=int, default=4, help="Render tasks running on the node")
+    parser.add_argument("--updates-per-task", type=int, default=200, help="Progress updates per render task")
+    parser.add_argument("--rate", type=float, default=400.0, help="Events per second (0 = as fast as possible)")
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--flush-interval-ms", type=float, default=200.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
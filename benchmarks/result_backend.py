@@ -0,0 +1,197 @@
+"""
+Result backend round trips per task for the lean and full result profiles.
+
+Runs the load test message stream (progress waves, then completions)
+through an in-process worker once per ``CELERY_RESULT_PROFILE``, each in a
+fresh interpreter because Celery resolves ``ignore_result`` when tasks are
+registered, and counts the key-value operations the result backend
+performs. On the Redis backend every operation is one round trip (a result
+write is a read of the current state plus a pipelined SETEX+PUBLISH).
+
+Usage:
+    python -m benchmarks.result_backend
+    python -m benchmarks.result_backend --backend redis://localhost:6379/15 --render-tasks 200
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+PROFILES = ("full", "lean")
+
+# Key-value backend operations, each one round trip on Redis
+_BACKEND_OPERATIONS = ("get", "mget", "set", "delete", "incr", "expire")
+
+
+class BackendCallCounter:
+    """Count result backend operations (and stored states) of every backend instance."""
+
+    def __init__(self, backend_class: type):
+        self._backend_class = backend_class
+        self._lock = threading.Lock()
+        self.operations: Counter = Counter()
+        self.states: Counter = Counter()
+        self._patches: List[Any] = []
+
+    def _counting(self, counter: Counter, label, method):
+        def wrapper(backend, *args, **kwargs):
+            with self._lock:
+                counter[label(args, kwargs)] += 1
+            return method(backend, *args, **kwargs)
+        return wrapper
+
+    def __enter__(self) -> "BackendCallCounter":
+        for name in _BACKEND_OPERATIONS:
+            method = getattr(self._backend_class, name, None)
+            if method is not None:
+                wrapper = self._counting(self.operations, lambda args, kwargs, name=name: name, method)
+                self._patches.append(patch.object(self._backend_class, name, wrapper))
+        state_of = lambda args, kwargs: kwargs.get("state", args[2] if len(args) > 2 else "?")  # noqa: E731
+        store = self._counting(self.states, state_of, self._backend_class.store_result)
+        self._patches.append(patch.object(self._backend_class, "store_result", store))
+        for active in self._patches:
+            active.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for active in reversed(self._patches):
+            active.stop()
+
+
+def run_profile(args: argparse.Namespace) -> Dict[str, Any]:
+    """Process the message stream with the current result profile and count backend operations."""
+    from celery.contrib.testing.worker import start_worker
+
+    from app.celery_app import celery_app
+    from app.config import config
+    from benchmarks.load_test import (
+        TaskTimer,
+        build_messages,
+        publish_at_rate,
+        use_broker,
+    )
+    from benchmarks.stub_servers import StubApiServer
+
+    messages = build_messages(args.render_tasks, args.updates_per_task)
+    timer = TaskTimer()
+    timer.expected = len(messages)
+
+    use_broker("memory://")
+
+    with StubApiServer(latency_ms=args.latency_ms, jitter_ms=0) as stub, patch.multiple(
+        config,
+        VIDEO_API_BASE_URL=stub.url,
+        COGNITO_DOMAIN=stub.url,
+        COGNITO_CLIENT_ID="bench-client",
+        COGNITO_CLIENT_SECRET="bench-secret",
+    ), BackendCallCounter(type(celery_app.backend)) as counter:
+        timer.connect()
+        try:
+            with start_worker(
+                celery_app,
+                pool="threads",
+                concurrency=args.concurrency,
+                perform_ping_check=False,
+                loglevel="WARNING",
+                shutdown_timeout=args.timeout,
+            ):
+                publish_at_rate(messages, 0)
+                completed = timer.done.wait(args.timeout)
+        finally:
+            timer.disconnect()
+
+    operations = sum(counter.operations.values())
+    return {
+        "profile": config.CELERY_RESULT_PROFILE,
+        "backend": celery_app.conf.result_backend,
+        "tasks": len(timer.latencies),
+        "completed": completed,
+        "round_trips": operations,
+        "round_trips_per_task": round(operations / len(messages), 3),
+        "operations": dict(counter.operations),
+        "stored_states": dict(counter.states),
+    }
+
+
+def run_comparison(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every profile in a child interpreter and compare them."""
+    reports = {}
+    for profile in PROFILES:
+        env = dict(
+            os.environ,
+            CELERY_RESULT_PROFILE=profile,
+            CELERY_RESULT_BACKEND=args.backend,
+            CELERY_RESULT_TASKS=",".join(args.result_tasks),
+        )
+        command = [
+            sys.executable, "-m", "benchmarks.result_backend", "--child",
+            "--render-tasks", str(args.render_tasks),
+            "--updates-per-task", str(args.updates_per_task),
+            "--latency-ms", str(args.latency_ms),
+            "-c", str(args.concurrency),
+            "--timeout", str(args.timeout),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        reports[profile] = json.loads(output)
+
+    full, lean = reports["full"]["round_trips_per_task"], reports["lean"]["round_trips_per_task"]
+    return {"profiles": reports, "round_trips_saved_per_task": round(full - lean, 3)}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = []
+    for profile, result in report["profiles"].items():
+        lines.append(
+            f"{profile:<5} {result['round_trips_per_task']:>6} round trips/task "
+            f"({result['round_trips']} for {result['tasks']} tasks) "
+            f"operations={result['operations']} stored={result['stored_states']}"
+        )
+        if not result["completed"]:
+            lines.append(f"WARNING: {profile} timed out before every message was processed")
+    lines.append(f"saved: {report['round_trips_saved_per_task']} result backend round trips per task")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare result backend round trips of the result profiles")
+    parser.add_argument("--backend", default="cache+memory://", help="Result backend URL")
+    parser.add_argument(
+        "--result-tasks", nargs="*", default=[],
+        help="Task names that keep their result in the lean profile (CELERY_RESULT_TASKS)",
+    )
+    parser.add_argument("--render-tasks", type=int, default=50, help="Distinct render task_ids")
+    parser.add_argument("--updates-per-task", type=int, default=9, help="Progress updates per render task")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Stub API latency")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for completion")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+    report = run_comparison(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
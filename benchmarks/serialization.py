@@ -0,0 +1,164 @@
+"""
+Serialization micro-benchmark for notification message bodies.
+
+Encodes and decodes representative Celery message bodies (a progress update
+with a small ``extra`` and a completion with a large render-node ``extra``)
+with every available codec, with and without threshold compression, and
+reports body size, size on a Redis broker (bodies are base64-encoded there)
+and encode/decode CPU time per message.
+
+Usage:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --iterations 20000 --threshold 2048 --json
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from kombu.utils import json as kombu_json
+
+from app.config import config
+from app.serialization import (
+    compress_above_threshold,
+    decompress_threshold,
+    is_available,
+    orjson,
+    orjson_dumps,
+    orjson_loads,
+)
+
+# Celery protocol 2 body: (args, kwargs, embed)
+_EMBED = {"callbacks": None, "errbacks": None, "chain": None, "chord": None}
+
+
+def build_bodies() -> Dict[str, Any]:
+    """Representative message bodies by name."""
+    progress = ((), {
+        "status": "processing",
+        "task_id": "0b6f3c1e-5d7a-4c1b-9a51-2f1e0c9d8a77",
+        "progress": 42.5,
+        "error_message": None,
+        "extra": {"node": "render-07", "stage": "encode", "fps": 59.94, "eta_seconds": 38},
+    }, _EMBED)
+    completion = ((), {
+        "video_id": "video-1842",
+        "oss_url": "https://bucket.oss-cn-hangzhou.aliyuncs.com/renders/2024/06/01/video-1842.mp4",
+        "task_id": "0b6f3c1e-5d7a-4c1b-9a51-2f1e0c9d8a77",
+        "video_name": "Product launch teaser (vertical)",
+        "resolution": "1080x1920",
+        "framerate": "30",
+        "duration": 58.4,
+        "file_size": 48211337,
+        "thumbnail_url": "https://bucket.oss-cn-hangzhou.aliyuncs.com/renders/2024/06/01/video-1842.jpg",
+        "extra": {
+            "node": "render-07",
+            "draft_version": "5.9.0",
+            "tracks": [
+                {
+                    "type": "video" if index % 3 else "text",
+                    "segment_id": f"seg-{index:04d}",
+                    "material_id": f"mat-{index * 7:06d}",
+                    "start_us": index * 1_250_000,
+                    "duration_us": 1_250_000,
+                    "effects": ["fade_in", "color_grade"] if index % 2 else [],
+                    "volume": 1.0,
+                }
+                for index in range(60)
+            ],
+            "timings": {"download": 3.21, "compose": 41.7, "encode": 96.4, "upload": 7.9},
+        },
+    }, _EMBED)
+    return {"progress": progress, "completion": completion}
+
+
+def build_codecs() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    """Available codecs: name -> (dumps, loads)."""
+    codecs = {"json": (lambda body: kombu_json.dumps(body).encode(), kombu_json.loads)}
+    if orjson is not None:
+        codecs["json+orjson"] = (orjson_dumps, orjson_loads)
+    if is_available("msgpack"):
+        import msgpack
+
+        codecs["msgpack"] = (
+            lambda body: msgpack.packb(body, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+    return codecs
+
+
+def measure(dumps: Callable, loads: Callable, body: Any, iterations: int, compressed: bool) -> Dict[str, Any]:
+    """Size and per-message encode/decode time of one codec on one body."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        data = dumps(body)
+        if compressed:
+            data = compress_above_threshold(data)
+    encode = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        loads(decompress_threshold(data) if compressed else data)
+    decode = (time.perf_counter() - started) / iterations
+
+    return {
+        "bytes": len(data),
+        "broker_bytes": len(base64.b64encode(data)),
+        "encode_us": round(encode * 1e6, 2),
+        "decode_us": round(decode * 1e6, 2),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    bodies = build_bodies()
+    results: Dict[str, Dict[str, Any]] = {}
+    with patch.object(config, "CELERY_COMPRESSION_THRESHOLD", args.threshold):
+        for codec, (dumps, loads) in build_codecs().items():
+            for compressed in (False, True):
+                name = f"{codec}+zlib" if compressed else codec
+                results[name] = {
+                    body_name: measure(dumps, loads, body, args.iterations, compressed)
+                    for body_name, body in bodies.items()
+                }
+    return {"iterations": args.iterations, "threshold": args.threshold, "results": results}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'codec':<18} {'message':<11} {'bytes':>7} {'broker':>7} {'encode us':>10} {'decode us':>10}"]
+    for codec, by_body in report["results"].items():
+        for body_name, result in by_body.items():
+            lines.append(
+                f"{codec:<18} {body_name:<11} {result['bytes']:>7} {result['broker_bytes']:>7} "
+                f"{result['encode_us']:>10} {result['decode_us']:>10}"
+            )
+    lines.append(f"(zlib applies to bodies >= {report['threshold']} bytes; broker = base64 size on Redis)")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark message serialization and compression")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--threshold", type=int, default=1024, help="Compression threshold in bytes")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
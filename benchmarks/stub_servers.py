@@ -0,0 +1,173 @@
+"""
+Local stand-ins for the video API and Cognito used by the benchmarks.
+
+A single threaded HTTP server implements every endpoint the workers call,
+with configurable latency and error injection, and counts requests per
+endpoint so the harness can report API calls per task.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+# (method, path pattern) -> endpoint name
+ROUTES = [
+    ("POST", re.compile(r"^/oauth2/token$"), "token"),
+    ("PUT", re.compile(r"^/api/video-tasks/status/bulk$"), "task_status_bulk"),
+    ("PUT", re.compile(r"^/api/video-tasks/[^/]+/status$"), "task_status"),
+    ("POST", re.compile(r"^/api/videos/create$"), "video_create"),
+    ("POST", re.compile(r"^/api/worker-status$"), "worker_status"),
+    ("GET", re.compile(r"^/health$"), "health"),
+]
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # Workers with hundreds of threads/greenlets connect at once; the default
+    # listen backlog of 5 would reset their connections
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out (or hedged) hang up before slow answers are written
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubApiServer:
+    """
+    Threaded HTTP server emulating Cognito and the video API.
+
+    Args:
+        latency_ms: Mean added latency per request
+        jitter_ms: Uniform +/- jitter around ``latency_ms``
+        error_rate: Fraction of requests answered with HTTP 500
+        slow_rate: Fraction of requests delayed by ``slow_ms`` more (a stalled backend instance)
+        slow_ms: Added latency of the slow requests
+        bulk_supported: Whether the bulk status endpoint exists
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 0.0,
+        bulk_supported: bool = True,
+        token_expires_in: int = 3600,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.bulk_supported = bulk_supported
+        self.token_expires_in = token_expires_in
+        self.counts: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.bytes_received: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = _StubHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubApiServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stub-api", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.errors.clear()
+            self.bytes_received.clear()
+
+    def _record(self, endpoint: str, failed: bool, size: int = 0) -> None:
+        with self._lock:
+            self.counts[endpoint] += 1
+            self.bytes_received[endpoint] += size
+            if failed:
+                self.errors[endpoint] += 1
+
+    def _respond(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        endpoint = None
+        for route_method, pattern, name in ROUTES:
+            if route_method == method and pattern.match(path):
+                endpoint = name
+                break
+        if endpoint is None or (endpoint == "task_status_bulk" and not self.bulk_supported):
+            self._record(endpoint or "unknown", failed=True)
+            return 404, {"success": False, "error": "not found"}
+
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if endpoint != "token" and random.random() < self.slow_rate:
+            delay += self.slow_ms
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if endpoint != "token" and random.random() < self.error_rate:
+            self._record(endpoint, failed=True)
+            return 500, {"success": False, "error": "injected failure"}
+
+        self._record(endpoint, failed=False, size=len(body))
+        if endpoint == "token":
+            return 200, {
+                "access_token": f"stub-token-{time.time():.0f}",
+                "expires_in": self.token_expires_in,
+                "token_type": "Bearer",
+            }
+        return 200, {"success": True}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = stub._respond(self.command, self.path.split("?")[0], body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            # Method names BaseHTTPRequestHandler dispatches to
+            do_GET = do_POST = do_PUT = _handle  # noqa: N815
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
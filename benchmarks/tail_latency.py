@@ -0,0 +1,165 @@
+"""
+Tail latency of status updates against a backend with stalled requests.
+
+Sends task status updates with the synchronous client from a pool of
+threads (like a threads worker) to a stub video API where a fraction of
+requests hangs for much longer than the rest, the way a request routed to
+a slow backend instance does. Each mode runs the same calls:
+
+- ``fixed``: the fixed ``API_TIMEOUT_SECONDS`` timeout
+- ``adaptive``: timeouts from the recent per-endpoint latency percentile
+- ``hedged``: adaptive timeouts plus hedged status PUTs
+
+and reports call latency percentiles, failed calls and the extra requests
+sent by hedging.
+
+Usage:
+    python -m benchmarks.tail_latency --calls 2000 --slow-rate 0.03 --slow-ms 1000
+    python -m benchmarks.tail_latency --modes fixed,hedged --hedge-budget 2
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.api import latency
+from app.api.latency import HedgeBudget, LatencyTracker
+from app.api.video_api_client import call_video_task_status_api
+from app.config import config
+from benchmarks.load_test import percentile
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+MODES = {
+    "fixed": {"API_ADAPTIVE_TIMEOUT_ENABLED": False, "API_HEDGE_ENABLED": False},
+    "adaptive": {"API_ADAPTIVE_TIMEOUT_ENABLED": True, "API_HEDGE_ENABLED": False},
+    "hedged": {"API_ADAPTIVE_TIMEOUT_ENABLED": True, "API_HEDGE_ENABLED": True},
+}
+
+
+def run_mode(mode: str, stub: StubApiServer, args: argparse.Namespace) -> Dict[str, Any]:
+    """Send ``args.calls`` status updates with the settings of ``mode``."""
+    durations: List[float] = []
+    failures = 0
+
+    def update(index: int) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        ok = call_video_task_status_api(f"bench-{index % 500}", render_status="PROCESSING", progress=50.0)
+        durations.append(time.perf_counter() - started)
+        if not ok:
+            failures += 1
+
+    stub.reset_counts()
+    # Every mode starts without latency history or hedge tokens
+    with patch.multiple(config, **MODES[mode]), \
+            patch.object(latency, "_tracker", LatencyTracker(config.API_LATENCY_WINDOW, config.API_LATENCY_MIN_SAMPLES)), \
+            patch.object(latency, "_budget", HedgeBudget(args.hedge_budget, config.API_HEDGE_BUDGET_BURST)):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(update, range(args.calls)))
+        elapsed = time.perf_counter() - started
+    # Hedges that lost are still finishing on the stub
+    time.sleep(args.slow_ms / 1000.0)
+
+    sent = stub.counts.get("task_status", 0)
+    return {
+        "mode": mode,
+        "calls": args.calls,
+        "failures": failures,
+        "calls_per_second": round(args.calls / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {
+            name: round(value * 1000, 1) if value is not None else None
+            for name, value in (
+                ("p50", percentile(durations, 50)),
+                ("p95", percentile(durations, 95)),
+                ("p99", percentile(durations, 99)),
+                ("max", max(durations) if durations else None),
+            )
+        },
+        "requests_sent": sent,
+        "extra_requests_percent": round(100.0 * (sent - args.calls) / args.calls, 2),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with StubApiServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+    ) as stub, patch.multiple(
+        config,
+        VIDEO_API_BASE_URL=stub.url,
+        COGNITO_DOMAIN=stub.url,
+        COGNITO_CLIENT_ID="bench-client",
+        COGNITO_CLIENT_SECRET="bench-secret",
+        # Room for every caller and its hedge
+        HTTP_POOL_MAXSIZE=max(config.HTTP_POOL_MAXSIZE, 2 * args.concurrency),
+    ):
+        results = [run_mode(mode, stub, args) for mode in args.modes.split(",")]
+    return {
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "slow_rate": args.slow_rate,
+        "slow_ms": args.slow_ms,
+        "hedge_budget_percent": args.hedge_budget,
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['calls']} status updates, {report['concurrency']} threads, stub latency "
+        f"{report['latency_ms']}ms, {report['slow_rate']:.1%} of requests +{report['slow_ms']}ms, "
+        f"hedge budget {report['hedge_budget_percent']}%",
+        f"{'mode':<9} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>8} {'failed':>7} {'extra req':>10}",
+    ]
+    for result in report["results"]:
+        latency_ms = result["latency_ms"]
+        lines.append(
+            f"{result['mode']:<9} {latency_ms['p50']:>7} {latency_ms['p95']:>7} {latency_ms['p99']:>7} "
+            f"{latency_ms['max']:>8} {result['failures']:>7} {result['extra_requests_percent']:>9}%"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare status update tail latency with and without hedging")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes: fixed, adaptive, hedged")
+    parser.add_argument("--calls", type=int, default=2000, help="Status updates per mode")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Calling threads")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub API latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Stub API latency jitter")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Fraction of requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=1000.0, help="Added latency of stalled requests")
+    parser.add_argument("--hedge-budget", type=float, default=config.API_HEDGE_BUDGET_PERCENT,
+                        help="Hedges allowed, in percent of status updates")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    # Timed-out calls are expected here, and counted as failures
+    logging.basicConfig(level=logging.CRITICAL)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Latency of the first status updates of a fresh worker process, cold and warm.
+
+Emulates a worker process that just started: no pooled connections, no
+M2M token and no DNS answers, with lookups taking ``--dns-ms`` (the stub
+itself runs on localhost). Each round then sends ``--concurrency`` status
+updates at once, like the first tasks of a threads worker, and a second
+batch at steady state. Modes:
+
+- ``cold``: the first updates resolve, connect and fetch the token inline
+- ``warm``: :func:`app.warmup.warm_up` runs first
+
+Reports the first and steady-state call latencies and the warm-up time.
+
+Usage:
+    python -m benchmarks.warmup --rounds 20 --dns-ms 30 --latency-ms 20
+    python -m benchmarks.warmup -c 8 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.api.dns_cache import uninstall_dns_cache
+from app.api.http_session import close_session
+from app.api.video_api_client import call_video_task_status_api
+from app.auth import clear_token_cache
+from app.config import config
+from app.warmup import warm_up
+from benchmarks.load_test import percentile
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cold", "warm")
+
+
+def _batch(concurrency: int) -> List[float]:
+    """Send ``concurrency`` status updates at once and return their durations."""
+
+    def update(index: int) -> float:
+        started = time.perf_counter()
+        call_video_task_status_api(f"bench-{index}", render_status="PROCESSING", progress=10.0)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(update, range(concurrency)))
+
+
+def _summary(durations: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        name: round(value * 1000, 1) if value is not None else None
+        for name, value in (
+            ("p50", percentile(durations, 50)),
+            ("p95", percentile(durations, 95)),
+            ("max", max(durations) if durations else None),
+        )
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Start ``args.rounds`` fresh processes' worth of state in ``mode``."""
+    first: List[float] = []
+    steady: List[float] = []
+    warmups: List[float] = []
+    for _ in range(args.rounds):
+        # A new process: no connections, no token, no DNS answers
+        close_session()
+        clear_token_cache()
+        uninstall_dns_cache()
+        if mode == "warm":
+            warmups.append(warm_up()["total"])
+        first.extend(_batch(args.concurrency))
+        steady.extend(_batch(args.concurrency))
+    uninstall_dns_cache()
+
+    return {
+        "mode": mode,
+        "first_call_ms": _summary(first),
+        "steady_call_ms": _summary(steady),
+        "warmup_ms": _summary(warmups) if warmups else None,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    resolve = socket.getaddrinfo
+
+    def slow_resolve(*lookup):
+        time.sleep(args.dns_ms / 1000.0)
+        return resolve(*lookup)
+
+    with StubApiServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as stub:
+        # By name, so every new connection starts with a lookup
+        url = stub.url.replace("127.0.0.1", "localhost")
+        with patch("socket.getaddrinfo", slow_resolve), patch.multiple(
+            config,
+            VIDEO_API_BASE_URL=url,
+            VIDEO_API_BASE_URLS=[],
+            COGNITO_DOMAIN=url,
+            COGNITO_CLIENT_ID="bench-client",
+            COGNITO_CLIENT_SECRET="bench-secret",
+            WORKER_WARMUP_ENABLED=True,
+            DNS_CACHE_TTL=max(config.DNS_CACHE_TTL, 60.0),
+            WORKER_WARMUP_CONNECTIONS=args.concurrency,
+            HTTP_POOL_MAXSIZE=max(config.HTTP_POOL_MAXSIZE, args.concurrency),
+        ):
+            results = [run_mode(mode, args) for mode in args.modes.split(",")]
+    close_session()
+    return {
+        "rounds": args.rounds,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "dns_ms": args.dns_ms,
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['rounds']} fresh processes, {report['concurrency']} concurrent first updates, stub latency "
+        f"{report['latency_ms']}ms, DNS lookups {report['dns_ms']}ms",
+        f"{'mode':<6} {'first p50':>10} {'first max':>10} {'steady p50':>11} {'warm-up p50':>12}",
+    ]
+    for result in report["results"]:
+        warmup_ms = result["warmup_ms"]["p50"] if result["warmup_ms"] else "-"
+        lines.append(
+            f"{result['mode']:<6} {result['first_call_ms']['p50']:>10} {result['first_call_ms']['max']:>10} "
+            f"{result['steady_call_ms']['p50']:>11} {warmup_ms:>12}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare the first status updates of cold and warmed-up workers")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes: cold, warm")
+    parser.add_argument("--rounds", type=int, default=20, help="Fresh worker processes emulated per mode")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Status updates sent at once")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub API latency")
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="Stub API latency jitter")
+    parser.add_argument("--dns-ms", type=float, default=30.0, help="Time each DNS lookup takes")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Worker pool profiles: drain throughput per GB of worker memory.
+
+For each pool profile, publishes a backlog of render notifications, then
+starts a real worker for it (``python -m app.worker_profiles all
+--pool-profile <name>``, the way it is deployed) against a stub video API,
+and measures how fast the backlog is drained and how much memory the
+worker's processes use. Memory is the peak PSS of the worker and its
+children (pages shared between prefork children are split between them,
+not counted once per process), sampled while it runs.
+
+Needs a broker shared between processes (Redis); the in-memory transport
+only works inside one process.
+
+Usage:
+    python -m benchmarks.worker_pools --broker redis://localhost:6379/15
+    python -m benchmarks.worker_pools --broker redis://localhost:6379/15 --profiles threads,prefork --latency-ms 100
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.celery_app import celery_app
+from app.routing import routed_queues
+from app.worker_profiles import POOL_PROFILES, get_pool_profile
+from benchmarks.load_test import build_messages, publish_at_rate
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; the parent PID follows its closing parenthesis
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append(int(entry))
+    return children
+
+
+def _pss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            for line in smaps:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_pss_mb(pid: int) -> float:
+    """PSS of process ``pid`` and all of its descendants, in MB (Linux only)."""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _pss_kb(current)
+        pending.extend(_children(current))
+    return total / 1024.0
+
+
+def _purge() -> None:
+    with celery_app.connection_for_write() as connection:
+        for name in routed_queues():
+            try:
+                connection.default_channel.queue_purge(name)
+            except Exception:
+                continue
+
+
+def _stop(worker: subprocess.Popen) -> None:
+    if worker.poll() is None:
+        # Cold shutdown: the backlog is drained, nothing is left to finish
+        worker.send_signal(signal.SIGQUIT)
+        try:
+            worker.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+
+
+def run_profile(name: str, stub: StubApiServer, messages: List[tuple], expected_calls: int,
+                args: argparse.Namespace) -> Dict[str, Any]:
+    """Drain a published backlog with a worker running pool profile ``name``."""
+    profile = get_pool_profile(name)
+    _purge()
+    publish_at_rate(messages, 0)
+    stub.reset_counts()
+
+    env = dict(
+        os.environ,
+        CELERY_BROKER_URL=args.broker,
+        VIDEO_API_BASE_URL=stub.url,
+        COGNITO_DOMAIN=stub.url,
+        COGNITO_CLIENT_ID="bench-client",
+        COGNITO_CLIENT_SECRET="bench-secret",
+        CELERY_AUTOTUNE_ENABLED="true" if args.autotune else "false",
+        METRICS_ENABLED="false",
+        LOG_LEVEL="WARNING",
+    )
+    if args.concurrency:
+        env["CELERY_WORKER_CONCURRENCY"] = str(args.concurrency)
+    command = [sys.executable, "-m", "app.worker_profiles", "all", "--pool-profile", name]
+    with tempfile.TemporaryFile() as log:
+        worker = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=log)
+
+        started = finished = None
+        idle_mb = peak_mb = 0.0
+        deadline = time.monotonic() + args.timeout
+        try:
+            while time.monotonic() < deadline and worker.poll() is None:
+                calls = sum(count for endpoint, count in stub.counts.items() if endpoint != "token")
+                memory = tree_pss_mb(worker.pid)
+                peak_mb = max(peak_mb, memory)
+                if started is None:
+                    idle_mb = memory
+                    if calls:
+                        started = time.perf_counter()
+                if calls >= expected_calls:
+                    finished = time.perf_counter()
+                    break
+                time.sleep(args.sample_interval)
+        finally:
+            _stop(worker)
+            log.seek(0)
+            error = log.read().decode(errors="replace").strip().splitlines()
+
+    if worker.returncode not in (0, None) and started is None:
+        return {"profile": name, "error": error[-1] if error else f"worker exited with {worker.returncode}"}
+
+    elapsed = (finished or time.perf_counter()) - (started or time.perf_counter())
+    tasks_per_second = len(messages) / elapsed if finished and elapsed > 0 else None
+    return {
+        "profile": name,
+        "pool": profile.pool,
+        "concurrency": args.concurrency or profile.worker_concurrency(),
+        "completed": finished is not None,
+        "tasks_per_second": round(tasks_per_second, 1) if tasks_per_second else None,
+        "idle_memory_mb": round(idle_mb, 1),
+        "peak_memory_mb": round(peak_mb, 1),
+        "tasks_per_second_per_gb": round(tasks_per_second / (peak_mb / 1024.0), 1)
+        if tasks_per_second and peak_mb else None,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    celery_app.conf.broker_url = args.broker
+    messages = build_messages(args.render_tasks, args.updates_per_task)
+    # One status call per status update, a status call and a video record per completion
+    expected_calls = len(messages) + args.render_tasks
+    with StubApiServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as stub:
+        results = [
+            run_profile(name, stub, messages, expected_calls, args)
+            for name in args.profiles.split(",")
+        ]
+    return {
+        "broker": args.broker,
+        "messages": len(messages),
+        "latency_ms": args.latency_ms,
+        "autotune": args.autotune,
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['messages']} messages, stub API latency {report['latency_ms']}ms, "
+        f"autotune {'on' if report['autotune'] else 'off'} ({report['broker']})",
+        f"{'profile':<9} {'concurrency':>11} {'tasks/s':>8} {'idle MB':>8} {'peak MB':>8} {'tasks/s per GB':>15}",
+    ]
+    for result in report["results"]:
+        if "error" in result:
+            lines.append(f"{result['profile']:<9} failed: {result['error']}")
+            continue
+        lines.append(
+            f"{result['profile']:<9} {result['concurrency']:>11} {result['tasks_per_second'] or '-':>8} "
+            f"{result['idle_memory_mb']:>8} {result['peak_memory_mb']:>8} {result['tasks_per_second_per_gb'] or '-':>15}"
+        )
+        if not result["completed"]:
+            lines.append(f"WARNING: {result['profile']} timed out before the backlog was drained")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare worker pool profiles by throughput per GB of memory")
+    parser.add_argument("--broker", default="redis://localhost:6379/15", help="Broker URL shared with the workers")
+    parser.add_argument("--profiles", default=",".join(POOL_PROFILES), help="Comma-separated pool profiles")
+    parser.add_argument("-c", "--concurrency", type=int, default=0, help="Override the profiles' concurrency")
+    parser.add_argument("--autotune", action="store_true", help="Run the workers with CELERY_AUTOTUNE_ENABLED")
+    parser.add_argument("--render-tasks", type=int, default=200, help="Distinct render task_ids")
+    parser.add_argument("--updates-per-task", type=int, default=9, help="Progress updates per render task")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub API latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Stub API latency jitter")
+    parser.add_argument("--sample-interval", type=float, default=0.1, help="Seconds between memory samples")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for each profile")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
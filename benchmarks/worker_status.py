@@ -0,0 +1,164 @@
+"""
+Worker status reporting during a crash loop, per event and aggregated.
+
+Emulates ``--workers`` render nodes in a crash loop: each one alternately
+reports a failure with a full traceback and a restart, ``--events`` times
+over ``--duration`` seconds, through the ``update_worker_status`` task
+against a stub video API. Modes:
+
+- ``direct``: one ``POST /api/worker-status`` per event
+- ``aggregated``: events merged per worker and reported every
+  ``--interval`` seconds (``WORKER_STATUS_AGGREGATE_SECONDS``)
+
+Reports the API calls and bytes sent and how long reporting kept the
+emitting threads busy.
+
+Usage:
+    python -m benchmarks.worker_status --workers 20 --events 50 --duration 10
+    python -m benchmarks.worker_status --modes aggregated --interval 5 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to sys.path to allow running this script directly
+if __name__ == "__main__":
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+from app.api.worker_status_aggregator import shutdown_worker_status_aggregator
+from app.config import config
+from app.tasks.worker_status import update_worker_status
+from benchmarks.stub_servers import StubApiServer
+
+logger = logging.getLogger(__name__)
+
+MODES = {
+    "direct": 0,
+    "aggregated": None,  # --interval
+}
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/srv/render/node.py", line {line}, in render_loop
+    self.render(job)
+  File "/srv/render/node.py", line 211, in render
+    frames = self.encoder.encode(job.timeline)
+  File "/srv/render/encoder.py", line 88, in encode
+    raise RuntimeError(f"encoder crashed at {{hex(id(self))}}")
+RuntimeError: encoder crashed at 0x7f{address:08x}
+"""
+
+
+def crash_loop(worker: int, args: argparse.Namespace, busy: List[float]) -> None:
+    """Report ``args.events`` alternating failures and restarts for one render node."""
+    pause = args.duration / args.events
+    for index in range(args.events):
+        started = time.perf_counter()
+        if index % 2:
+            update_worker_status(f"render-{worker}", hostname=f"host-{worker}", is_available=True)
+        else:
+            update_worker_status(
+                f"render-{worker}",
+                hostname=f"host-{worker}",
+                is_available=False,
+                task_id=f"task-{worker}-{index}",
+                error_message="encoder crashed",
+                traceback=TRACEBACK.format(line=100 + index % 7, address=worker * 1000 + index),
+            )
+        busy.append(time.perf_counter() - started)
+        time.sleep(pause)
+
+
+def run_mode(mode: str, stub: StubApiServer, args: argparse.Namespace) -> Dict[str, Any]:
+    interval = args.interval if MODES[mode] is None else MODES[mode]
+    busy: List[float] = []
+    stub.reset_counts()
+    with patch.object(config, "WORKER_STATUS_AGGREGATE_SECONDS", interval):
+        threads = [
+            threading.Thread(target=crash_loop, args=(worker, args, busy), daemon=True)
+            for worker in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Send what is still pending, as at worker shutdown
+        shutdown_worker_status_aggregator()
+        elapsed = time.perf_counter() - started
+
+    calls = stub.counts.get("worker_status", 0)
+    return {
+        "mode": mode,
+        "events": args.workers * args.events,
+        "api_calls": calls,
+        "api_calls_per_second": round(calls / elapsed, 1) if elapsed > 0 else None,
+        "kilobytes_sent": round(stub.bytes_received.get("worker_status", 0) / 1024, 1),
+        "reporting_busy_seconds": round(sum(busy), 2),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with StubApiServer(latency_ms=args.latency_ms) as stub, patch.multiple(
+        config,
+        VIDEO_API_BASE_URL=stub.url,
+        VIDEO_API_BASE_URLS=[],
+        COGNITO_DOMAIN=stub.url,
+        COGNITO_CLIENT_ID="bench-client",
+        COGNITO_CLIENT_SECRET="bench-secret",
+        HTTP_POOL_MAXSIZE=max(config.HTTP_POOL_MAXSIZE, args.workers),
+    ):
+        results = [run_mode(mode, stub, args) for mode in args.modes.split(",")]
+    return {
+        "workers": args.workers,
+        "events_per_worker": args.events,
+        "duration_seconds": args.duration,
+        "interval_seconds": args.interval,
+        "results": results,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['workers']} render nodes in a crash loop, {report['events_per_worker']} events each over "
+        f"{report['duration_seconds']}s, aggregation interval {report['interval_seconds']}s",
+        f"{'mode':<11} {'events':>7} {'API calls':>10} {'calls/s':>8} {'KB sent':>8} {'busy s':>7}",
+    ]
+    for result in report["results"]:
+        lines.append(
+            f"{result['mode']:<11} {result['events']:>7} {result['api_calls']:>10} "
+            f"{result['api_calls_per_second']:>8} {result['kilobytes_sent']:>8} {result['reporting_busy_seconds']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare per-event and aggregated worker status reporting")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes: direct, aggregated")
+    parser.add_argument("--workers", type=int, default=20, help="Render nodes in a crash loop")
+    parser.add_argument("--events", type=int, default=50, help="Worker events per render node")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds over which each node sends its events")
+    parser.add_argument("--interval", type=float, default=2.0, help="Aggregation interval in seconds")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Stub API latency")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    # Every event is logged at INFO level
+    logging.basicConfig(level=logging.WARNING)
+    report = run_benchmark(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 @echo off
 echo Starting Jianying Notification Celery Worker...
-celery -A app.celery_app worker --loglevel=info -Q notifications
+python -m app.worker_profiles all
 pause
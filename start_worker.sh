@@ -1,3 +1,3 @@
 #!/bin/bash
 echo "Starting Jianying Notification Celery Worker..."
-celery -A app.celery_app worker --loglevel=info -Q notifications
+python -m app.worker_profiles all
@@ -0,0 +1,18 @@
+"""
+Shared test fixtures.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_circuit_breaker(monkeypatch):
+    """Keep the per-process circuit breaker from leaking state between tests."""
+    monkeypatch.setattr("app.api.video_api_client.get_circuit_breaker", lambda: None)
+
+
+@pytest.fixture(autouse=True)
+def memory_checkpoints(monkeypatch):
+    """Keep task step checkpoints in a fresh per-test store instead of Redis."""
+    monkeypatch.setattr("app.config.config.TASK_CHECKPOINT_STORE", "memory")
+    monkeypatch.setattr("app.tasks.checkpoints._store", None)
@@ -14,12 +14,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.api.video_api_client import call_video_task_status_api, create_video_record
-from app.auth import get_m2m_token, get_cached_token, clear_token_cache
+from app.auth import clear_token_cache, get_cached_token, get_m2m_token
 
 # Setup logging
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
@@ -0,0 +1,187 @@
+"""
+Tests for the asyncio video API client against a local aiohttp server.
+Run with: pytest tests/test_async_video_api_client.py -v
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from app.api import async_video_api_client  # noqa: E402
+from app.api.circuit_breaker import CircuitBreaker  # noqa: E402
+from app.api.rate_limiter import RateLimiter  # noqa: E402
+from app.auth import cognito_auth  # noqa: E402
+
+
+def run_against_server(routes, coro_factory):
+    """Start a local server with ``routes`` and run the coroutine against it."""
+
+    async def runner():
+        app = web.Application()
+        app.add_routes(routes)
+        server = TestServer(app)
+        await server.start_server()
+        base_url = str(server.make_url("")).rstrip("/")
+        try:
+            with patch.object(async_video_api_client.config, "VIDEO_API_BASE_URL", base_url), \
+                    patch.object(cognito_auth.config, "COGNITO_DOMAIN", base_url), \
+                    patch.object(cognito_auth.config, "COGNITO_CLIENT_ID", "client"), \
+                    patch.object(cognito_auth.config, "COGNITO_CLIENT_SECRET", "secret"):
+                return await coro_factory()
+        finally:
+            await async_video_api_client.close_async_session()
+            await server.close()
+
+    return asyncio.run(runner())
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cognito_auth.clear_token_cache()
+    yield
+    cognito_auth.clear_token_cache()
+
+
+class TestAsyncVideoApiClient:
+    """Test cases for the async API functions"""
+
+    def test_status_update_success(self):
+        """Test status update sends payload with a bearer token"""
+        received = {}
+
+        async def token(request):
+            return web.json_response({"access_token": "async-token", "expires_in": 3600})
+
+        async def status(request):
+            received["auth"] = request.headers["Authorization"]
+            received["payload"] = await request.json()
+            return web.json_response({"success": True})
+
+        routes = [
+            web.post("/oauth2/token", token),
+            web.put("/api/video-tasks/{task_id}/status", status),
+        ]
+        result = run_against_server(
+            routes,
+            lambda: async_video_api_client.async_call_video_task_status_api(
+                task_id="task-123", status="processing", render_status="PROCESSING", progress=50.0
+            ),
+        )
+
+        assert result is True
+        assert received["auth"] == "Bearer async-token"
+        assert received["payload"] == {
+            "status": "processing",
+            "render_status": "PROCESSING",
+            "progress": 50.0,
+        }
+
+    def test_concurrent_calls_share_one_token_fetch(self):
+        """Test concurrent coroutines perform a single Cognito request"""
+        token_calls = []
+
+        async def token(request):
+            token_calls.append(1)
+            await asyncio.sleep(0.05)
+            return web.json_response({"access_token": "async-token", "expires_in": 3600})
+
+        async def create(request):
+            return web.json_response({"success": True})
+
+        async def many():
+            return await asyncio.gather(*[
+                async_video_api_client.async_create_video_record(
+                    task_id=f"task-{i}", oss_url="https://example.com/video.mp4"
+                )
+                for i in range(20)
+            ])
+
+        routes = [
+            web.post("/oauth2/token", token),
+            web.post("/api/videos/create", create),
+        ]
+        results = run_against_server(routes, many)
+
+        assert all(results)
+        assert len(token_calls) == 1
+
+    def test_server_error_returns_false(self):
+        """Test HTTP errors are reported as False"""
+
+        async def token(request):
+            return web.json_response({"access_token": "async-token", "expires_in": 3600})
+
+        async def worker_status(request):
+            return web.Response(status=503)
+
+        routes = [
+            web.post("/oauth2/token", token),
+            web.post("/api/worker-status", worker_status),
+        ]
+        result = run_against_server(
+            routes,
+            lambda: async_video_api_client.async_report_worker_status(
+                worker_name="worker-1", hostname="host-1"
+            ),
+        )
+
+        assert result is False
+
+    def test_redis_backed_breaker_and_limiter_run_off_the_loop(self):
+        """Test breaker and rate limiter calls that do Redis I/O never run on the event loop thread"""
+        calls = []
+
+        class RecordingBreaker(CircuitBreaker):
+            blocking_io = True
+
+            def before_call(self):
+                calls.append(("before_call", threading.get_ident()))
+                return super().before_call()
+
+            def record_success(self):
+                calls.append(("record_success", threading.get_ident()))
+                super().record_success()
+
+            def release(self, probe):
+                calls.append(("release", threading.get_ident()))
+                super().release(probe)
+
+        class RecordingLimiter(RateLimiter):
+            blocking_io = True
+
+            def try_acquire(self, bucket):
+                calls.append(("try_acquire", threading.get_ident()))
+                return super().try_acquire(bucket)
+
+        async def token(request):
+            return web.json_response({"access_token": "async-token", "expires_in": 3600})
+
+        async def status(request):
+            return web.json_response({"success": True})
+
+        async def update():
+            loop_thread.append(threading.get_ident())
+            return await async_video_api_client.async_call_video_task_status_api(task_id="task-123", progress=5.0)
+
+        loop_thread = []
+        routes = [
+            web.post("/oauth2/token", token),
+            web.put("/api/video-tasks/{task_id}/status", status),
+        ]
+        with patch.object(async_video_api_client, "get_circuit_breaker", return_value=RecordingBreaker("test")), \
+                patch.object(async_video_api_client, "get_rate_limiter",
+                             return_value=RecordingLimiter({"task_status": 100})):
+            assert run_against_server(routes, update) is True
+
+        assert [name for name, _ in calls] == ["try_acquire", "before_call", "record_success", "release"]
+        assert all(thread != loop_thread[0] for _, thread in calls)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
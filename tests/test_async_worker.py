@@ -0,0 +1,73 @@
+"""
+Tests for the asyncio notification worker.
+Run with: pytest tests/test_async_worker.py -v
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.async_worker import AsyncNotificationWorker
+from app.celery_app import celery_app
+from app.routing import STATUS_TASK
+
+
+@pytest.fixture
+def memory_broker(monkeypatch):
+    """Consume a fresh queue on the in-memory transport."""
+    monkeypatch.setattr(celery_app.conf, "broker_url", "memory://")
+    monkeypatch.setattr(celery_app, "_pool", None)
+    monkeypatch.setattr(celery_app.amqp, "_producer_pool", None)
+    return f"async_worker.{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def handled():
+    """Replace the status task handler with one recording the task_ids it runs."""
+    task_ids = []
+
+    async def handler(status, task_id=None, **kwargs):
+        task_ids.append(task_id)
+
+    with patch.dict("app.async_worker.ASYNC_TASK_HANDLERS", {STATUS_TASK: handler}), \
+            patch("app.async_worker.warm_up"), \
+            patch("app.async_worker.start_outbox_drainer"), \
+            patch("app.async_worker.stop_outbox_drainer"), \
+            patch("app.async_worker.shutdown_worker_status_aggregator"), \
+            patch.object(asyncio.SelectorEventLoop, "add_signal_handler"):
+        yield task_ids
+
+
+class TestAsyncNotificationWorker:
+    """Test cases for AsyncNotificationWorker"""
+
+    def test_eta_messages_do_not_block_fresh_ones(self, memory_broker, handled):
+        """Test more retries waiting for their ETA than the prefetch limit still let new messages through"""
+        worker = AsyncNotificationWorker(queues=[memory_broker], concurrency=1)
+        for index in range(4):
+            celery_app.send_task(
+                STATUS_TASK, kwargs={"status": "processing", "task_id": f"retry-{index}"},
+                queue=memory_broker, countdown=1.5,
+            )
+        celery_app.send_task(STATUS_TASK, kwargs={"status": "processing", "task_id": "fresh"}, queue=memory_broker)
+
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 1.0
+            while "fresh" not in handled and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert handled == ["fresh"]
+        finally:
+            worker.stop()
+            thread.join(timeout=10)
+
+        assert sorted(handled) == ["fresh", "retry-0", "retry-1", "retry-2", "retry-3"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
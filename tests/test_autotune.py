@@ -0,0 +1,94 @@
+"""
+Tests for the concurrency autotuner.
+Run with: pytest tests/test_autotune.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.autotune import ConcurrencyTuner, start_autotuner
+
+
+def make_consumer(pool_size=64, prefetch_multiplier=1):
+    consumer = MagicMock()
+    consumer.pool.num_processes = pool_size
+    consumer.prefetch_multiplier = prefetch_multiplier
+    return consumer
+
+
+def make_tuner(consumer=None, **kwargs):
+    options = {"min_concurrency": 4, "interval": 60, "drain_seconds": 10, "max_latency": 1.0}
+    options.update(kwargs)
+    return ConcurrencyTuner(consumer or make_consumer(), **options)
+
+
+class TestConcurrencyTuner:
+    """Test cases for sizing and applying concurrency"""
+
+    def test_sized_to_drain_the_backlog(self):
+        """Test concurrency follows backlog x latency / drain time within the bounds"""
+        tuner = make_tuner()
+        tuner.concurrency = 8
+
+        assert tuner.target(backlog=1000, latency=0.2) == 20
+        assert tuner.target(backlog=100000, latency=0.2) == 64
+        assert tuner.target(backlog=1000, latency=None) == 8
+
+    def test_shrinks_gradually(self):
+        """Test an empty backlog lowers concurrency by a quarter per step, down to the minimum"""
+        tuner = make_tuner()
+        tuner.concurrency = 40
+        assert tuner.target(backlog=0, latency=0.05) == 30
+
+        tuner.concurrency = 5
+        assert tuner.target(backlog=0, latency=0.05) == 4
+
+    def test_backs_off_while_the_api_is_slow(self):
+        """Test a saturated API lowers concurrency even with a backlog"""
+        tuner = make_tuner()
+        tuner.concurrency = 64
+
+        assert tuner.target(backlog=100000, latency=2.5) == 48
+
+    def test_applied_through_the_prefetch_count(self):
+        """Test concurrency changes move the consumer's prefetch count"""
+        consumer = make_consumer(prefetch_multiplier=2)
+        tuner = make_tuner(consumer)
+
+        tuner.apply(16)
+        consumer.qos.decrement_eventually.assert_called_once_with(96)
+        tuner.apply(20)
+        consumer.qos.increment_eventually.assert_called_once_with(8)
+        assert tuner.concurrency == 20
+
+    def test_step_measures_queues_and_reserved_tasks(self):
+        """Test a step sizes from the broker backlog and the API latency"""
+        tuner = make_tuner()
+        tuner.concurrency = 4
+
+        with patch("app.autotune.queue_depth", return_value=300), \
+                patch("app.autotune.recent_api_latency", return_value=0.1):
+            assert tuner.step() == 4
+            with patch("app.autotune.worker_state.reserved_requests", [object()] * 500):
+                assert tuner.step() == 8
+
+
+class TestStartAutotuner:
+    """Test cases for enabling the tuner"""
+
+    def test_disabled_by_default(self):
+        """Test nothing is started unless enabled"""
+        assert start_autotuner(make_consumer()) is None
+
+    @patch("app.config.config.CELERY_AUTOTUNE_ENABLED", True)
+    def test_requires_late_acknowledgement(self):
+        """Test the prefetch count cannot limit concurrency with early acks"""
+        consumer = make_consumer()
+        consumer.app.conf.task_acks_late = False
+
+        assert start_autotuner(consumer) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
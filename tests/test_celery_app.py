@@ -0,0 +1,80 @@
+"""
+Tests for the Celery result profiles.
+Run with: pytest tests/test_celery_app.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.celery_app import result_config
+from app.worker_profiles import pool_config
+
+
+class TestResultConfig:
+    """Test cases for result storage settings"""
+
+    @patch("app.config.config.CELERY_RESULT_TASKS", ["jianying_notification.process_video_render_completion"])
+    def test_lean_ignores_results_except_awaited_tasks(self):
+        """Test lean stores no results or STARTED states except for listed tasks"""
+        settings = result_config("lean")
+
+        assert settings["task_ignore_result"] is True
+        assert settings["task_track_started"] is False
+        assert settings["task_annotations"] == {
+            "jianying_notification.process_video_render_completion": {"ignore_result": False}
+        }
+        assert settings["result_expires"] == 600
+
+    def test_full_keeps_previous_behaviour(self):
+        """Test full stores every result and tracks STARTED"""
+        settings = result_config("full")
+
+        assert settings["task_ignore_result"] is False
+        assert settings["task_track_started"] is True
+
+
+class TestPoolConfig:
+    """Test cases for pool profile settings"""
+
+    def test_no_profile_keeps_celery_defaults(self):
+        """Test profiles are opt-in: without one prefork and early acknowledgement stay"""
+        with patch("app.config.config.CELERY_POOL_PROFILE", ""):
+            assert pool_config() == {}
+
+    @patch("app.config.config.TASK_CHECKPOINT_STORE", "redis")
+    @patch("app.config.config.CELERY_BROKER_URL", "redis://localhost:6379/0")
+    def test_threads_profile(self):
+        """Test the I/O profile runs many threads, one message each, acknowledged late"""
+        settings = pool_config("threads")
+
+        assert settings == {
+            "worker_pool": "threads",
+            "worker_concurrency": 64,
+            "worker_prefetch_multiplier": 1,
+            "task_acks_late": True,
+            "task_reject_on_worker_lost": True,
+        }
+
+    @patch("app.config.config.CELERY_WORKER_CONCURRENCY", 8)
+    @patch("app.config.config.CELERY_PREFETCH_MULTIPLIER", 2)
+    def test_overrides(self):
+        """Test concurrency and prefetch can be overridden per deployment"""
+        settings = pool_config("gevent")
+
+        assert (settings["worker_concurrency"], settings["worker_prefetch_multiplier"]) == (8, 2)
+
+    @patch("app.config.config.TASK_CHECKPOINT_STORE", "memory")
+    def test_early_acks_without_shared_checkpoints(self):
+        """Test redelivery is not enabled while checkpoints are per process"""
+        settings = pool_config("threads")
+
+        assert (settings["task_acks_late"], settings["task_reject_on_worker_lost"]) == (False, False)
+
+    def test_unknown_profile_falls_back_to_celery_defaults(self):
+        """Test a typo does not stop the worker from starting"""
+        assert pool_config("forking") == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,187 @@
+"""
+Tests for the video API circuit breaker.
+Run with: pytest tests/test_circuit_breaker.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.api.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from app.api.video_api_client import call_video_task_status_api
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("app.api.circuit_breaker.time.monotonic", fake):
+        yield fake
+
+
+def make_breaker(**kwargs):
+    options = {"failure_threshold": 3, "reset_timeout": 10.0, "half_open_max_calls": 1, "success_threshold": 2}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+class TestCircuitBreaker:
+    """Test cases for circuit state transitions"""
+
+    def test_opens_after_consecutive_failures(self, clock):
+        """Test the circuit opens at the threshold and rejects calls"""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.retry_after == pytest.approx(10.0)
+
+    def test_success_resets_failure_count(self, clock):
+        """Test only consecutive failures count"""
+        breaker = make_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CLOSED
+
+    def test_half_open_limits_probes_and_closes_gradually(self, clock):
+        """Test recovery needs several successful probes, one at a time"""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 10
+
+        probe = breaker.before_call()  # First probe admitted
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # Probe slot taken
+
+        breaker.record_success()
+        breaker.release(probe)
+        assert breaker.state == HALF_OPEN
+        probe = breaker.before_call()
+        breaker.record_success()
+        breaker.release(probe)
+        assert breaker.state == CLOSED
+
+    def test_probe_slot_released_without_outcome(self, clock):
+        """Test a probe that neither succeeded nor failed (e.g. cancelled) frees its slot"""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 10
+
+        breaker.release(breaker.before_call())
+
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+
+    def test_release_from_earlier_half_open_period_ignored(self, clock):
+        """Test a late release does not free a slot of a later half-open period"""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 10
+        stale = breaker.before_call()
+        breaker.record_failure()  # Reopens
+        clock.now += 10
+        breaker.before_call()
+
+        breaker.release(stale)
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_failed_probe_reopens(self, clock):
+        """Test a failure while half-open reopens the circuit for a full period"""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 10
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.retry_after == pytest.approx(10.0)
+
+
+class TestClientIntegration:
+    """Test the circuit breaker is applied to video API calls"""
+
+    @patch("app.api.video_api_client.get_m2m_token", return_value="test-m2m-token")
+    @patch("app.api.video_api_client.get_session")
+    @patch("app.api.video_api_client.get_circuit_breaker")
+    def test_open_circuit_fails_fast(self, mock_get_breaker, mock_get_session, _):
+        """Test no request is made and the caller sees CircuitOpenError"""
+        breaker = make_breaker(failure_threshold=1)
+        breaker.record_failure()
+        mock_get_breaker.return_value = breaker
+
+        with pytest.raises(CircuitOpenError):
+            call_video_task_status_api(task_id="task-123", progress=10.0)
+        mock_get_session.return_value.put.assert_not_called()
+
+    @patch("app.api.video_api_client.get_m2m_token", return_value="test-m2m-token")
+    @patch("app.api.video_api_client.get_session")
+    @patch("app.api.video_api_client.get_circuit_breaker")
+    def test_errors_and_5xx_count_as_failures(self, mock_get_breaker, mock_get_session, _):
+        """Test connection errors and 5xx responses trip the breaker, 4xx do not"""
+        breaker = make_breaker(failure_threshold=2)
+        mock_get_breaker.return_value = breaker
+        mock_put = mock_get_session.return_value.put
+
+        mock_put.return_value = MagicMock(status_code=400)
+        mock_put.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("400")
+        call_video_task_status_api(task_id="task-123", progress=10.0)
+        assert breaker.state == CLOSED
+
+        mock_put.side_effect = requests.exceptions.ConnectionError("down")
+        assert call_video_task_status_api(task_id="task-123", progress=10.0) is False
+        mock_put.side_effect = None
+        mock_put.return_value = MagicMock(status_code=503)
+        mock_put.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503")
+        assert call_video_task_status_api(task_id="task-123", progress=10.0) is False
+
+        assert breaker.state == OPEN
+
+    @patch("app.api.video_api_client.get_m2m_token", return_value="test-m2m-token")
+    @patch("app.api.video_api_client.get_session")
+    @patch("app.api.video_api_client.get_circuit_breaker")
+    def test_unexpected_error_releases_probe(self, mock_get_breaker, mock_get_session, _, clock):
+        """Test a probe call failing with a non-HTTP error does not keep its slot"""
+        breaker = make_breaker(failure_threshold=1)
+        breaker.record_failure()
+        clock.now += 10
+        mock_get_breaker.return_value = breaker
+        mock_get_session.return_value.put.side_effect = ValueError("bad payload")
+
+        with pytest.raises(ValueError):
+            call_video_task_status_api(task_id="task-123", progress=10.0)
+
+        assert breaker.state == HALF_OPEN
+        breaker.before_call()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
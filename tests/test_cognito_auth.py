@@ -0,0 +1,177 @@
+"""
+Tests for Cognito M2M token caching, sharing and single-flight refresh.
+Run with: pytest tests/test_cognito_auth.py -v
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.auth import cognito_auth
+from app.auth.token_refresher import TokenRefresher
+from app.auth.token_store import FileTokenStore
+
+
+@pytest.fixture(autouse=True)
+def cognito_config():
+    with patch.object(cognito_auth.config, "COGNITO_DOMAIN", "https://cognito.example.com"), \
+            patch.object(cognito_auth.config, "COGNITO_CLIENT_ID", "client"), \
+            patch.object(cognito_auth.config, "COGNITO_CLIENT_SECRET", "secret"):
+        cognito_auth._token_cache.clear()
+        yield
+        cognito_auth._token_cache.clear()
+        cognito_auth._token_store = None
+        cognito_auth._token_store_initialized = False
+
+
+def use_store(store):
+    cognito_auth._token_store = store
+    cognito_auth._token_store_initialized = True
+
+
+def token_response(token="token-1", delay=0.0):
+    def post(*args, **kwargs):
+        time.sleep(delay)
+        response = MagicMock()
+        response.json.return_value = {"access_token": token, "expires_in": 3600}
+        return response
+    return post
+
+
+class TestGetM2MToken:
+    """Test cases for get_m2m_token"""
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_concurrent_callers_share_one_fetch(self, mock_post):
+        """Test threads that miss the cache wait for a single refresh"""
+        mock_post.side_effect = token_response(delay=0.1)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(cognito_auth.get_m2m_token()))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["token-1"] * 10
+        mock_post.assert_called_once()
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_token_is_reused_from_shared_store(self, mock_post, tmp_path):
+        """Test a second process picks up the token another one fetched"""
+        use_store(FileTokenStore(str(tmp_path / "token.json")))
+        mock_post.side_effect = token_response("shared-token")
+
+        assert cognito_auth.get_m2m_token() == "shared-token"
+
+        # Simulate another worker process with an empty local cache
+        cognito_auth._token_cache.clear()
+        assert cognito_auth.get_m2m_token() == "shared-token"
+        mock_post.assert_called_once()
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_expired_shared_token_is_refreshed(self, mock_post, tmp_path):
+        """Test tokens inside the refresh buffer are not reused"""
+        store = FileTokenStore(str(tmp_path / "token.json"))
+        store.save("stale-token", time.time() + 10)
+        use_store(store)
+        mock_post.side_effect = token_response("fresh-token")
+
+        assert cognito_auth.get_m2m_token() == "fresh-token"
+        assert store.load()[0] == "fresh-token"
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_clear_token_cache_clears_shared_store(self, mock_post, tmp_path):
+        """Test force refresh also drops the shared token"""
+        store = FileTokenStore(str(tmp_path / "token.json"))
+        use_store(store)
+        mock_post.side_effect = token_response()
+        cognito_auth.get_m2m_token()
+
+        cognito_auth.clear_token_cache()
+
+        assert store.load() is None
+        assert cognito_auth.get_cached_token() is None
+
+
+class TestTokenRefresh:
+    """Test cases for proactive background renewal"""
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_old_token_served_while_renewal_in_flight(self, mock_post):
+        """Test callers are not blocked by an ongoing renewal"""
+        cognito_auth._token_cache.set_token("old-token", 3600)
+        mock_post.side_effect = token_response("new-token", delay=0.3)
+
+        renewal = threading.Thread(target=cognito_auth.refresh_m2m_token)
+        renewal.start()
+        time.sleep(0.05)
+        started = time.monotonic()
+        assert cognito_auth.get_m2m_token() == "old-token"
+        assert time.monotonic() - started < 0.1
+        renewal.join()
+
+        assert cognito_auth.get_m2m_token() == "new-token"
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_refresher_renews_at_fraction_of_lifetime(self, mock_post):
+        """Test the refresher renews before expiry and records stats"""
+        cognito_auth._token_cache.set_token("old-token", 0.4)
+        mock_post.side_effect = token_response("new-token")
+        refresher = TokenRefresher(fraction=0.5)
+
+        refresher.start()
+        time.sleep(0.5)
+        refresher.stop()
+
+        mock_post.assert_called_once()
+        assert cognito_auth._token_cache._token == "new-token"
+        stats = refresher.stats.snapshot()
+        assert stats["refresh_count"] == 1
+        assert stats["failure_count"] == 0
+
+    @patch("app.auth.cognito_auth.requests.post")
+    def test_refresher_counts_failures(self, mock_post):
+        """Test failed renewals are counted and retried"""
+        mock_post.side_effect = cognito_auth.requests.exceptions.ConnectionError("down")
+        refresher = TokenRefresher(retry_seconds=0.05)
+
+        refresher.start()
+        time.sleep(0.2)
+        refresher.stop()
+
+        stats = refresher.stats.snapshot()
+        assert stats["failure_count"] >= 2
+        assert stats["refresh_count"] == 0
+
+
+class TestFileTokenStore:
+    """Test cases for the host-local file token store"""
+
+    def test_refresh_lock_times_out_while_held(self, tmp_path):
+        """Test a second holder gives up after the timeout"""
+        store = FileTokenStore(str(tmp_path / "token.json"))
+        other = FileTokenStore(str(tmp_path / "token.json"))
+
+        acquired = []
+
+        def try_lock():
+            with other.refresh_lock(timeout=0.1) as got:
+                acquired.append(got)
+
+        with store.refresh_lock(timeout=1) as first:
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+
+        assert first is True
+        assert acquired == [False]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,176 @@
+"""
+Tests for the dead-letter queue and its replay tooling.
+Run with: pytest tests/test_dead_letter.py -v
+"""
+
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import MaxRetriesExceededError
+
+from app.celery_app import celery_app
+from app.dead_letter import (
+    DeadLetter,
+    dead_letter,
+    main,
+    matches,
+    open_dead_letters,
+    parse_time,
+    replay,
+    retries_exhausted,
+)
+from app.routing import COMPLETION_TASK, STATUS_TASK, WORKER_STATUS_TASK
+from app.tasks.video_tasks import (
+    process_video_render_completion,
+    update_video_render_status,
+)
+
+
+@pytest.fixture
+def memory_broker(monkeypatch):
+    """Dead-letter to a fresh queue on the in-memory transport."""
+    monkeypatch.setattr(celery_app.conf, "broker_url", "memory://")
+    monkeypatch.setattr(celery_app, "_pool", None)
+    monkeypatch.setattr(celery_app.amqp, "_producer_pool", None)
+    monkeypatch.setattr("app.config.config.DEAD_LETTER_ENABLED", True)
+    monkeypatch.setattr("app.config.config.DEAD_LETTER_QUEUE", f"dead_letter.{uuid.uuid4().hex}")
+
+
+def letter(task=STATUS_TASK, task_id="task-1", error="HTTP 503", failed_at=None):
+    return DeadLetter(
+        task=task, id="celery-1", args=[], kwargs={"status": "completed", "task_id": task_id},
+        error=error, error_type="HTTPError", retries=3, failed_at=failed_at or time.time(), hostname="node-1",
+    )
+
+
+class TestMatches:
+    """Test cases for dead letter filters"""
+
+    def test_filters(self):
+        """Test each filter selects on its own field"""
+        now = time.time()
+        failed = letter(failed_at=now - 3600)
+
+        assert matches(failed)
+        assert matches(failed, task_id="task-1") and matches(failed, task_id="celery-1")
+        assert not matches(failed, task_id="task-2")
+        assert matches(failed, task="status") and not matches(failed, task="completion")
+        assert matches(failed, since=now - 7200, until=now - 1800)
+        assert not matches(failed, since=now - 1800)
+        assert matches(failed, error="httperror: http 5") and not matches(failed, error="timeout")
+
+    def test_positional_task_id(self):
+        """Test the render task_id is found in positional arguments too"""
+        completion = letter(task=COMPLETION_TASK)._replace(args=["video-1", "https://oss/v.mp4", "task-9"], kwargs={})
+
+        assert completion.task_id == "task-9"
+
+    def test_parse_time(self):
+        """Test durations are relative to now and ISO times default to UTC"""
+        assert abs(parse_time("2h") - (time.time() - 7200)) < 5
+        assert parse_time("2024-06-01T00:00:00") == parse_time("2024-06-01T00:00:00+00:00")
+
+
+class TestDeadLetterQueue:
+    """Test cases for dead-lettering and replaying through the broker"""
+
+    def test_only_notification_tasks_are_dead_lettered(self, memory_broker):
+        """Test exhausted status updates are kept with their arguments and error"""
+        assert dead_letter(STATUS_TASK, "celery-1", ["failed"], {"task_id": "task-1"}, ConnectionError("down"), 3)
+        assert not dead_letter(WORKER_STATUS_TASK, "celery-2", [], {}, ConnectionError("down"))
+
+        with open_dead_letters() as letters:
+            assert [(item.task_id, item.args, item.error_type, item.error) for item, _ in letters] == [
+                ("task-1", ["failed"], "ConnectionError", "down"),
+            ]
+
+    def test_disabled(self, memory_broker, monkeypatch):
+        """Test nothing is published unless DEAD_LETTER_ENABLED is set"""
+        monkeypatch.setattr("app.config.config.DEAD_LETTER_ENABLED", False)
+
+        assert not dead_letter(STATUS_TASK, "celery-1", [], {"task_id": "task-1"}, ConnectionError("down"))
+
+    def test_unselected_letters_stay_in_the_queue(self, memory_broker):
+        """Test inspecting the queue does not consume it"""
+        dead_letter(STATUS_TASK, "celery-1", [], {"task_id": "task-1"}, ConnectionError("down"))
+
+        with open_dead_letters() as letters:
+            assert len(letters) == 1
+        with open_dead_letters() as letters:
+            assert len(letters) == 1
+
+    @patch.object(celery_app, "send_task")
+    def test_replay_publishes_and_removes_matching_letters(self, mock_send_task, memory_broker):
+        """Test replayed calls go through the normal path and leave the queue"""
+        for task_id in ("task-1", "task-2"):
+            dead_letter(STATUS_TASK, f"celery-{task_id}", [], {"task_id": task_id}, ConnectionError("down"))
+
+        with open_dead_letters() as letters:
+            assert replay([item for item in letters if item[0].task_id == "task-2"], rate=0) == 1
+
+        mock_send_task.assert_called_once()
+        assert mock_send_task.call_args.args == (STATUS_TASK,)
+        assert mock_send_task.call_args.kwargs["kwargs"] == {"task_id": "task-2"}
+        with open_dead_letters() as letters:
+            assert [item.task_id for item, _ in letters] == ["task-1"]
+
+    def test_replay_is_rate_limited(self, memory_broker):
+        """Test replay spaces out the published calls"""
+        for task_id in ("task-1", "task-2", "task-3"):
+            dead_letter(STATUS_TASK, "celery-1", [], {"task_id": task_id}, ConnectionError("down"))
+
+        with patch.object(celery_app, "send_task"), open_dead_letters() as letters:
+            started = time.monotonic()
+            replay(letters, rate=20)
+            assert time.monotonic() - started >= 0.09
+
+    def test_purge_command(self, memory_broker, capsys):
+        """Test purge removes only the selected dead letters"""
+        dead_letter(STATUS_TASK, "celery-1", [], {"task_id": "task-1"}, ConnectionError("down"))
+        dead_letter(COMPLETION_TASK, "celery-2", [], {"task_id": "task-2"}, TimeoutError("slow"))
+
+        main(["purge", "--task", "completion"])
+
+        assert "Purged 1 of 2" in capsys.readouterr().out
+        with open_dead_letters() as letters:
+            assert [item.task for item, _ in letters] == [STATUS_TASK]
+
+
+class TestTaskFailure:
+    """Test cases for dead-lettering from the task_failure signal"""
+
+    def test_retries_exhausted(self):
+        """Test only calls at their task's max_retries, or past it, count as exhausted"""
+        assert not retries_exhausted(COMPLETION_TASK, 0, RuntimeError("boom"))
+        assert retries_exhausted(COMPLETION_TASK, process_video_render_completion.max_retries, RuntimeError("boom"))
+        assert retries_exhausted(STATUS_TASK, 0, MaxRetriesExceededError())
+
+    def test_failure_without_retries_not_dead_lettered(self, memory_broker):
+        """Test a call failing outside the retry path (bad arguments) is not dead-lettered"""
+        result = update_video_render_status.apply(kwargs={"status": "processing", "unknown": 1})
+
+        assert result.state == "FAILURE"
+        assert isinstance(result.result, TypeError)
+        with open_dead_letters() as letters:
+            assert letters == []
+
+    @patch("app.tasks.video_tasks.get_status_coalescer", return_value=None)
+    @patch("app.tasks.video_tasks.create_video_record", side_effect=RuntimeError("boom"))
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_last_retry_dead_lettered(self, mock_status, mock_create, _, memory_broker):
+        """Test a completion failing its last retry is dead-lettered with its retries"""
+        result = process_video_render_completion.apply(
+            kwargs={"video_id": "v1", "oss_url": "https://oss/v1.mp4", "task_id": "task-123"}
+        )
+
+        assert result.state == "FAILURE"
+        with open_dead_letters() as letters:
+            assert [(item.task_id, item.retries) for item, _ in letters] == [
+                ("task-123", process_video_render_completion.max_retries),
+            ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+Tests for the HTTP ingest gateway.
+Run with: pytest tests/test_gateway.py -v
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("aiohttp")
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.gateway import (
+    IngestBatcher,
+    ValidationError,
+    create_app,
+    validate_completion,
+    validate_status,
+)
+from app.routing import COMPLETION_TASK, STATUS_TASK
+
+
+def run_gateway(scenario, batcher=None, published=None, publish_error=None):
+    """Run ``scenario(client)`` against the gateway; published batches are appended to ``published``."""
+
+    def publish(app, connection, calls):
+        if publish_error is not None:
+            raise publish_error
+        published.append([(call.name, call.kwargs) for call in calls])
+
+    async def runner():
+        batcher_ = batcher or IngestBatcher(batch_interval=0.02)
+        client = TestClient(TestServer(create_app(batcher_)))
+        await client.start_server()
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+
+    with patch("app.gateway.publish_calls", side_effect=publish), \
+            patch.object(IngestBatcher, "_close_connection"):
+        return asyncio.run(runner())
+
+
+class TestValidation:
+    """Test cases for event validation"""
+
+    def test_valid_events(self):
+        """Test events become calls of the matching task"""
+        assert validate_status({"status": "processing", "task_id": "task-1", "progress": 50}).name == STATUS_TASK
+        call = validate_completion({"video_id": "video-1", "oss_url": "https://oss/v.mp4", "file_size": 10})
+        assert call.name == COMPLETION_TASK and call.kwargs["file_size"] == 10
+
+    @pytest.mark.parametrize("event, reason", [
+        ({"task_id": "task-1"}, "status is required"),
+        ({"status": "exploded", "task_id": "task-1"}, "status must be one of"),
+        ({"status": "processing", "task_id": "task-1", "progress": 150}, "between 0 and 100"),
+        ({"status": "processing", "task_id": "task-1", "progress": True}, "progress must be"),
+        ({"status": "processing", "task_id": "task-1", "priority": 1}, "unknown fields: priority"),
+        (["processing"], "JSON object"),
+    ])
+    def test_invalid_status_events(self, event, reason):
+        """Test malformed status events are rejected with a reason"""
+        with pytest.raises(ValidationError, match=reason):
+            validate_status(event)
+
+    def test_invalid_completion(self):
+        """Test completions need an http(s) OSS link"""
+        with pytest.raises(ValidationError, match="oss_url"):
+            validate_completion({"video_id": "video-1", "oss_url": "file:///tmp/v.mp4"})
+
+
+class TestGateway:
+    """Test cases for the HTTP endpoints"""
+
+    def test_concurrent_requests_share_one_batch(self):
+        """Test requests are answered after one pipelined publish of their coalesced events"""
+        published = []
+
+        async def scenario(client):
+            responses = await asyncio.gather(*[
+                client.post("/v1/status", json={"status": "processing", "task_id": "task-1", "progress": progress})
+                for progress in (10.0, 20.0)
+            ], client.post("/v1/completions", json=[
+                {"video_id": "video-2", "oss_url": "https://oss/v2.mp4", "task_id": "task-2"},
+            ]))
+            return [(response.status, await response.json()) for response in responses]
+
+        results = run_gateway(scenario, published=published)
+
+        assert results == [(202, {"accepted": 1}), (202, {"accepted": 1}), (202, {"accepted": 1})]
+        assert len(published) == 1
+        assert [name for name, _ in published[0]] == [STATUS_TASK, COMPLETION_TASK]
+        assert published[0][0][1]["progress"] == 20.0
+
+    def test_invalid_events_are_rejected(self):
+        """Test nothing from a request with an invalid event is published"""
+        published = []
+
+        async def scenario(client):
+            response = await client.post("/v1/status", json=[
+                {"status": "processing", "task_id": "task-1"}, {"status": "processing"},
+            ])
+            return response.status, await response.json()
+
+        status, body = run_gateway(scenario, published=published)
+
+        assert status == 400
+        assert body["details"] == [{"index": 1, "error": "task_id is required"}]
+        assert published == []
+
+    def test_backpressure_on_queue_depth(self):
+        """Test events are refused with Retry-After while the queues are backed up"""
+        batcher = IngestBatcher(max_queue_depth=100, depth_check_interval=60)
+
+        async def scenario(client):
+            batcher.queue_depth = 500
+            response = await client.post("/v1/status", json={"status": "processing", "task_id": "task-1"})
+            return response.status, response.headers.get("Retry-After")
+
+        with patch.object(IngestBatcher, "measure_queue_depth", return_value=500):
+            assert run_gateway(scenario, batcher=batcher, published=[]) == (503, "60")
+
+    def test_broker_failure(self):
+        """Test a failed publish is reported so the client retries"""
+        async def scenario(client):
+            response = await client.post("/v1/status", json={"status": "completed", "task_id": "task-1"})
+            return response.status
+
+        assert run_gateway(scenario, published=[], publish_error=ConnectionError("down")) == 503
+
+    def test_auth_token(self):
+        """Test a configured token is required on the ingest endpoints"""
+        async def scenario(client):
+            event = {"status": "pending", "task_id": "task-1"}
+            denied = await client.post("/v1/status", json=event)
+            allowed = await client.post("/v1/status", json=event, headers={"Authorization": "Bearer secret"})
+            health = await client.get("/healthz")
+            return denied.status, allowed.status, health.status
+
+        with patch("app.gateway.config.GATEWAY_AUTH_TOKEN", "secret"):
+            assert run_gateway(scenario, published=[]) == (401, 202, 200)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
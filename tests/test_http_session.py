@@ -0,0 +1,46 @@
+"""
+Tests for the per-process pooled HTTP session.
+Run with: pytest tests/test_http_session.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.api import http_session
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    http_session.close_session()
+    yield
+    http_session.close_session()
+
+
+class TestHttpSession:
+    """Test cases for get_session / init_session"""
+
+    def test_session_is_reused_within_process(self):
+        """Test repeated calls return the same pooled session"""
+        assert http_session.get_session() is http_session.get_session()
+
+    def test_session_rebuilt_after_pid_change(self):
+        """Test a forked child never reuses the parent's session"""
+        parent_session = http_session.get_session()
+
+        with patch("app.api.http_session.os.getpid", return_value=-1):
+            child_session = http_session.get_session()
+
+        assert child_session is not parent_session
+
+    def test_adapter_uses_configured_pool_size(self):
+        """Test the mounted adapter honours HTTP_POOL_MAXSIZE"""
+        with patch.object(http_session.config, "HTTP_POOL_MAXSIZE", 32):
+            session = http_session.init_session()
+
+        adapter = session.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == 32
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
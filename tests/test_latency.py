@@ -0,0 +1,174 @@
+"""
+Tests for adaptive timeouts and hedged requests.
+Run with: pytest tests/test_latency.py -v
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.api import latency
+from app.api.latency import (
+    HedgeBudget,
+    LatencyTracker,
+    async_hedged,
+    hedged,
+    request_timeout,
+)
+from app.api.video_api_client import _send
+
+
+@pytest.fixture
+def tracker():
+    fresh = LatencyTracker(window=100, min_samples=10)
+    with patch("app.api.latency._tracker", fresh), patch("app.config.config.API_ADAPTIVE_TIMEOUT_ENABLED", True):
+        yield fresh
+
+
+@pytest.fixture
+def hedging(tracker):
+    """Hedge task_status calls after 20ms, each call earning one hedge."""
+    budget = HedgeBudget(percent=100, burst=1)
+    for _ in range(10):
+        tracker.record("task_status", 0.02)
+    with patch("app.config.config.API_HEDGE_ENABLED", True), patch("app.api.latency._budget", budget):
+        yield budget
+
+
+class TestLatencyTracker:
+    """Test cases for the per-endpoint latency window"""
+
+    def test_percentiles_need_enough_samples(self, tracker):
+        """Test percentiles are only reported once the window has min_samples"""
+        for millis in range(1, 10):
+            tracker.record("task_status", millis / 1000.0)
+        assert tracker.percentile("task_status", 99) is None
+
+        tracker.record("task_status", 0.5)
+        assert tracker.percentile("task_status", 50) == pytest.approx(0.005)
+        assert tracker.percentile("task_status", 95) == pytest.approx(0.5)
+        assert tracker.percentile("video_create", 95) is None
+
+    def test_timeout_follows_the_percentile(self, tracker):
+        """Test the timeout is a multiple of the p99, within the configured bounds"""
+        assert request_timeout("task_status") == 30
+
+        for _ in range(10):
+            tracker.record("task_status", 0.6)
+        assert request_timeout("task_status") == pytest.approx(1.8)
+
+        for _ in range(100):
+            tracker.record("task_status", 0.01)
+        assert request_timeout("task_status") == 1.0
+
+        with patch("app.config.config.API_ADAPTIVE_TIMEOUT_ENABLED", False):
+            assert request_timeout("task_status") == 30
+
+
+class TestHedgeBudget:
+    """Test cases for capping hedges to a share of requests"""
+
+    def test_earned_per_request_and_capped(self):
+        """Test a 10% budget allows one hedge per ten requests, up to the burst"""
+        budget = HedgeBudget(percent=10, burst=2)
+        assert not budget.try_spend()
+
+        for _ in range(100):
+            budget.record_request()
+        assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+
+
+class TestHedged:
+    """Test cases for hedging slow idempotent requests"""
+
+    def test_not_hedged_by_default(self, tracker):
+        """Test calls run directly unless hedging is enabled"""
+        for _ in range(10):
+            tracker.record("task_status", 0.001)
+        caller = threading.current_thread()
+
+        assert hedged("task_status", lambda: threading.current_thread() is caller) is True
+
+    def test_fast_answer_is_not_hedged(self, hedging):
+        """Test no second request is sent when the first answers in time"""
+        calls = []
+
+        assert hedged("task_status", lambda: calls.append(1) or "first") == "first"
+        assert calls == [1]
+
+    def test_slow_request_is_hedged(self, hedging):
+        """Test the hedge answer is used while the first request hangs"""
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return "first"
+
+        try:
+            assert hedged("task_status", slow, lambda: "hedge") == "hedge"
+        finally:
+            release.set()
+
+    def test_hedges_limited_by_the_budget(self, hedging):
+        """Test slow requests wait for their own answer once the budget is spent"""
+        hedging.ratio = 0
+
+        def slow():
+            threading.Event().wait(0.05)
+            return "first"
+
+        assert hedged("task_status", slow, lambda: "hedge") == "first"
+
+    def test_first_failure_waits_for_the_hedge(self, hedging):
+        """Test a failing first request does not hide a successful hedge"""
+        def failing():
+            threading.Event().wait(0.05)
+            raise ConnectionError("reset")
+
+        def hedge():
+            threading.Event().wait(0.1)
+            return "hedge"
+
+        assert hedged("task_status", failing, hedge) == "hedge"
+
+    def test_async_loser_is_cancelled(self, hedging):
+        """Test the async hedge wins and the hanging request is cancelled"""
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "first"
+
+        async def hedge():
+            return "hedge"
+
+        async def run():
+            result = await async_hedged("task_status", slow, hedge)
+            await asyncio.sleep(0)
+            return result
+
+        assert asyncio.run(run()) == "hedge"
+        assert cancelled == [True]
+
+
+@patch("app.api.video_api_client.get_session")
+def test_requests_use_the_adaptive_timeout(mock_get_session, tracker):
+    """Test API calls pass the endpoint's current timeout to requests"""
+    for _ in range(10):
+        tracker.record("video_create", 2.0)
+    mock_get_session.return_value.post.return_value.status_code = 200
+
+    _send("video_create", "post", "/api/videos/create", json={})
+
+    assert mock_get_session.return_value.post.call_args[1]["timeout"] == pytest.approx(6.0)
+    assert latency._tracker.percentile("video_create", 50) == 2.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,124 @@
+"""
+Tests for balancing calls across video API instances.
+Run with: pytest tests/test_load_balancer.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.api.load_balancer import LoadBalancer, get_load_balancer
+from app.api.video_api_client import _send
+
+URLS = ("http://api-a", "http://api-b", "http://api-c")
+
+
+def make_balancer(strategy="least_outstanding", **kwargs):
+    return LoadBalancer(URLS, strategy=strategy, eject_failures=2, health_interval=0, **kwargs)
+
+
+class TestLoadBalancer:
+    """Test cases for picking and ejecting instances"""
+
+    def test_least_outstanding_spreads_calls(self):
+        """Test concurrent calls go to the instances with the fewest in flight"""
+        balancer = make_balancer()
+
+        chosen = [balancer.acquire() for _ in range(3)]
+        assert {instance.base_url for instance in chosen} == set(URLS)
+
+        balancer.release(chosen[1], 0.01, failed=False)
+        assert balancer.acquire() is chosen[1]
+
+    def test_ewma_prefers_the_fast_instance(self):
+        """Test response times steer calls away from a slow instance"""
+        balancer = make_balancer("ewma")
+        a, b, c = balancer.instances
+        for instance, latency in ((a, 0.02), (b, 0.5), (c, 0.03)):
+            balancer.release(instance, latency, failed=False)
+
+        assert balancer.acquire() is a
+        # With a call in flight, a's score (0.02 x 2) exceeds c's
+        assert balancer.acquire() is c
+
+    def test_ejected_after_consecutive_failures(self):
+        """Test an instance failing calls in a row stops getting calls"""
+        balancer = make_balancer()
+        a = balancer.instances[0]
+
+        balancer.release(a, None, failed=True)
+        balancer.release(a, 0.01, failed=False)
+        balancer.release(a, None, failed=True)
+        assert not a.ejected
+
+        balancer.release(a, None, failed=True)
+        assert a.ejected
+        assert a not in [balancer.acquire() for _ in range(10)]
+
+    def test_all_ejected_fails_open(self):
+        """Test calls still go out when every instance is ejected"""
+        balancer = make_balancer()
+        for instance in balancer.instances:
+            instance.ejected = True
+
+        assert balancer.acquire() in balancer.instances
+
+    def test_health_checks_eject_and_readmit(self):
+        """Test failing probes eject instances and passing ones re-admit them"""
+        balancer = make_balancer()
+        a, b, c = balancer.instances
+        c.ejected = True
+        c.latency = 9.0
+
+        with patch.object(balancer, "probe", side_effect=lambda instance: instance is not a):
+            balancer.check_health()
+
+        assert (a.ejected, b.ejected, c.ejected) == (True, False, False)
+        assert c.latency is None
+
+
+class TestGetLoadBalancer:
+    """Test cases for building the balancer from configuration"""
+
+    def test_single_instance_needs_no_balancer(self):
+        """Test one base URL is called directly"""
+        assert get_load_balancer() is None
+
+    @patch("app.config.config.VIDEO_API_HEALTH_INTERVAL", 0)
+    def test_built_for_several_urls(self):
+        """Test VIDEO_API_BASE_URLS gets a balancer, rebuilt when the list changes"""
+        with patch("app.config.config.VIDEO_API_BASE_URLS", list(URLS)):
+            balancer = get_load_balancer()
+            assert balancer.base_urls == URLS
+            assert get_load_balancer() is balancer
+        with patch("app.config.config.VIDEO_API_BASE_URLS", list(URLS[:2])):
+            assert get_load_balancer().base_urls == URLS[:2]
+        assert get_load_balancer() is None
+
+
+@patch("app.config.config.VIDEO_API_HEALTH_INTERVAL", 0)
+@patch("app.config.config.VIDEO_API_EJECT_FAILURES", 2)
+@patch("app.config.config.VIDEO_API_BASE_URLS", list(URLS[:2]))
+@patch("app.api.video_api_client.get_session")
+def test_calls_fail_over_from_a_dead_instance(mock_get_session):
+    """Test a refusing instance is ejected and the calls go to the other one"""
+    def post(url, **kwargs):
+        if url.startswith("http://api-a/"):
+            raise requests.exceptions.ConnectionError("refused")
+        return MagicMock(status_code=200)
+
+    mock_get_session.return_value.post.side_effect = post
+    failures = 0
+    for _ in range(50):
+        try:
+            _send("video_create", "post", "/api/videos/create", json={})
+        except requests.exceptions.ConnectionError:
+            failures += 1
+
+    assert failures == 2
+    assert get_load_balancer().instances[0].ejected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
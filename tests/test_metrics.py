@@ -0,0 +1,53 @@
+"""
+Tests for Prometheus instrumentation of API calls.
+Run with: pytest tests/test_metrics.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+from prometheus_client import REGISTRY
+
+from app.api.video_api_client import call_video_task_status_api
+from app.metrics import track_api_call
+
+
+def api_call_count(endpoint, status_code):
+    value = REGISTRY.get_sample_value(
+        "video_api_request_duration_seconds_count",
+        {"endpoint": endpoint, "status_code": status_code},
+    )
+    return value or 0.0
+
+
+class TestApiCallMetrics:
+    """Test cases for video API latency histograms"""
+
+    @patch("app.api.video_api_client.get_m2m_token")
+    @patch("app.api.video_api_client.get_session")
+    def test_status_call_is_observed_with_status_code(self, mock_get_session, mock_get_token):
+        """Test a successful call is recorded under its endpoint and status"""
+        mock_get_token.return_value = "test-m2m-token"
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"success": True}
+        mock_get_session.return_value.put.return_value = mock_response
+        before = api_call_count("task_status", "200")
+
+        call_video_task_status_api(task_id="task-123", progress=10.0)
+
+        assert api_call_count("task_status", "200") == before + 1
+
+    def test_exceptions_are_recorded_as_error(self):
+        """Test a raising call is labelled status_code=error"""
+        before = api_call_count("metrics_test", "error")
+
+        with pytest.raises(ConnectionError), track_api_call("metrics_test"):
+            raise ConnectionError("down")
+
+        assert api_call_count("metrics_test", "error") == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,227 @@
+"""
+Tests for the durable notification outbox.
+Run with: pytest tests/test_outbox.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.api.circuit_breaker import CircuitOpenError
+from app.api.status_coalescer import StatusCoalescer
+from app.tasks import outbox as outbox_module
+from app.tasks.outbox import STATUS, VIDEO_CREATE, Outbox, OutboxDrainer, call_or_spool
+from app.tasks.status_filter import MemoryStatusStore, StatusFilter
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite3"), max_attempts=3)
+    yield outbox
+    outbox.close()
+
+
+@pytest.fixture
+def enabled_outbox(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.config.config.OUTBOX_ENABLED", True)
+    monkeypatch.setattr("app.config.config.OUTBOX_PATH", str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(outbox_module, "_outbox", None)
+    monkeypatch.setattr(outbox_module, "_outbox_pid", None)
+    yield outbox_module.get_outbox()
+    outbox_module.get_outbox().close()
+
+
+def status(render_status, progress):
+    return {"status": render_status.lower(), "render_status": render_status, "progress": progress}
+
+
+class TestOutbox:
+    """Test cases for the journal"""
+
+    def test_latest_status_supersedes_pending_ones(self, outbox):
+        """Test only the newest status of a task is replayed"""
+        outbox.append(STATUS, "task-1", status("PROCESSING", 10.0))
+        outbox.append(STATUS, "task-1", status("PROCESSING", 50.0))
+        outbox.append(VIDEO_CREATE, "task-1", {"oss_url": "https://oss/video.mp4"})
+
+        entries = outbox.claim(10)
+
+        assert [(entry.kind, entry.payload.get("progress")) for entry in entries] == [
+            (STATUS, 50.0), (VIDEO_CREATE, None),
+        ]
+
+    def test_terminal_status_is_not_replaced_by_progress(self, outbox):
+        """Test a late progress update cannot overwrite a spooled completion"""
+        assert outbox.append(STATUS, "task-1", status("COMPLETED", 100.0))
+        assert not outbox.append(STATUS, "task-1", status("PROCESSING", 90.0))
+
+        assert [entry.payload["render_status"] for entry in outbox.claim(10)] == ["COMPLETED"]
+
+    def test_claimed_entries_are_leased(self, outbox):
+        """Test an entry is handed to one drainer until it is released"""
+        outbox.append(STATUS, "task-1", status("PROCESSING", 10.0))
+
+        entries = outbox.claim(10)
+        assert outbox.claim(10) == []
+
+        outbox.release(entries, delay=0)
+        assert [entry.attempts for entry in outbox.claim(10)] == [1]
+
+    def test_entries_are_dropped_after_max_attempts(self, outbox):
+        """Test an entry that keeps failing does not stay in the journal forever"""
+        outbox.append(STATUS, "task-1", status("PROCESSING", 10.0))
+
+        dropped = 0
+        for _ in range(3):
+            dropped += outbox.release(outbox.claim(10), delay=0, error="500")
+
+        assert dropped == 1
+        assert outbox.pending() == 0
+
+    def test_delivered_status_supersedes_older_pending_ones(self, outbox):
+        """Test a delivered update removes pending updates it made obsolete, but not newer ones"""
+        outbox.append(STATUS, "task-1", status("PROCESSING", 50.0))
+
+        assert outbox.supersede("task-1", "PROCESSING", 30.0) == 0
+        assert outbox.supersede("task-1", "PROCESSING", 60.0) == 1
+        assert outbox.pending() == 0
+
+    def test_delivered_terminal_status_supersedes_every_pending_one(self, outbox):
+        """Test a delivered completion also removes a spooled failure of the task"""
+        outbox.append(STATUS, "task-1", status("FAILED", None))
+        outbox.append(VIDEO_CREATE, "task-1", {"oss_url": "https://oss/video.mp4"})
+
+        assert outbox.supersede("task-1", "COMPLETED", 100.0) == 1
+        assert [entry.kind for entry in outbox.claim(10)] == [VIDEO_CREATE]
+
+    def test_journal_survives_reopening(self, outbox):
+        """Test spooled entries are still there after a restart"""
+        outbox.append(VIDEO_CREATE, "task-1", {"oss_url": "https://oss/video.mp4"})
+        outbox.close()
+
+        reopened = Outbox(outbox.path)
+        assert reopened.pending() == 1
+        reopened.close()
+
+
+class TestOutboxDrainer:
+    """Test cases for replaying the journal"""
+
+    def test_failed_probe_keeps_the_batch(self, outbox):
+        """Test only the probe is sent while the API is down, and nothing is lost"""
+        for task_id in ("task-1", "task-2", "task-3"):
+            outbox.append(STATUS, task_id, status("COMPLETED", 100.0))
+        api = MagicMock(return_value=False)
+
+        with patch("app.tasks.outbox._api_call", return_value=api):
+            assert OutboxDrainer(outbox).drain_once() == 0
+
+        assert api.call_count == 1
+        assert outbox.pending() == 3
+
+    def test_batch_is_replayed_when_the_api_recovers(self, outbox):
+        """Test every entry is sent once the probe succeeds"""
+        for task_id in ("task-1", "task-2", "task-3"):
+            outbox.append(STATUS, task_id, status("COMPLETED", 100.0))
+        outbox.append(VIDEO_CREATE, "task-1", {"oss_url": "https://oss/video.mp4"})
+        api = MagicMock(return_value=True)
+
+        with patch("app.tasks.outbox._api_call", return_value=api):
+            assert OutboxDrainer(outbox, concurrency=2).drain_once() == 4
+
+        assert sorted(call.kwargs["task_id"] for call in api.call_args_list) == [
+            "task-1", "task-1", "task-2", "task-3",
+        ]
+        assert outbox.pending() == 0
+
+    def test_updates_known_to_the_status_filter_are_not_replayed(self, outbox):
+        """Test a spooled update older than what was since sent is dropped without a call"""
+        outbox.append(STATUS, "task-1", status("PROCESSING", 50.0))
+        outbox.append(STATUS, "task-2", status("PROCESSING", 50.0))
+        status_filter = StatusFilter(MemoryStatusStore(ttl=60))
+        status_filter.record("task-1", "COMPLETED", 100.0)
+        api = MagicMock(return_value=True)
+
+        with patch("app.tasks.outbox._api_call", return_value=api), \
+                patch("app.tasks.outbox.get_status_filter", return_value=status_filter):
+            assert OutboxDrainer(outbox).drain_once() == 1
+
+        assert [call.kwargs["task_id"] for call in api.call_args_list] == ["task-2"]
+        assert outbox.pending() == 0
+
+
+class TestCallOrSpool:
+    """Test cases for spooling failed calls"""
+
+    def test_disabled_outbox_returns_the_call_result(self):
+        """Test without an outbox failures are reported to the task as before"""
+        call = MagicMock(return_value=False)
+
+        assert call_or_spool(STATUS, call, "task-1", status="failed") is False
+        call.assert_called_once_with(task_id="task-1", status="failed")
+
+    def test_failed_call_is_spooled(self, enabled_outbox):
+        """Test an error response is journaled and counts as handled"""
+        call = MagicMock(return_value=False)
+
+        assert call_or_spool(STATUS, call, "task-1", **status("FAILED", None)) is True
+
+        assert [(entry.task_id, entry.payload["render_status"]) for entry in enabled_outbox.claim(10)] == [
+            ("task-1", "FAILED"),
+        ]
+
+    def test_open_circuit_is_spooled(self, enabled_outbox):
+        """Test calls rejected by an open circuit are journaled instead of retried"""
+        call = MagicMock(side_effect=CircuitOpenError("video-api", 30.0))
+
+        assert call_or_spool(VIDEO_CREATE, call, "task-1", oss_url="https://oss/video.mp4") is True
+        assert enabled_outbox.pending() == 1
+
+    def test_successful_send_removes_spooled_statuses(self, enabled_outbox):
+        """Test a completion sent directly is not followed by the replay of older progress"""
+        call_or_spool(STATUS, MagicMock(return_value=False), "task-1", **status("PROCESSING", 50.0))
+
+        assert call_or_spool(STATUS, MagicMock(return_value=True), "task-1", **status("COMPLETED", 100.0)) is True
+        assert enabled_outbox.pending() == 0
+
+
+class TestCoalescedFlush:
+    """Test cases for coalesced status updates and the outbox"""
+
+    @patch("app.api.status_coalescer.call_video_task_status_api", return_value=False)
+    def test_rejected_update_is_spooled(self, mock_call, enabled_outbox):
+        """Test a flushed update the API did not accept is journaled, not kept in memory"""
+        coalescer = StatusCoalescer(window_seconds=60)
+        coalescer.submit("task-1", status("PROCESSING", 10.0))
+
+        coalescer.flush()
+
+        assert coalescer.flush() == 0
+        assert [entry.payload["progress"] for entry in enabled_outbox.claim(10)] == [10.0]
+
+    @patch("app.api.status_coalescer.call_video_task_status_bulk_api")
+    def test_open_circuit_is_spooled(self, mock_bulk, enabled_outbox):
+        """Test a flush that finds the circuit open journals its updates"""
+        mock_bulk.side_effect = CircuitOpenError("video-api", 30.0)
+        coalescer = StatusCoalescer(window_seconds=60, bulk_enabled=True)
+        coalescer.submit("task-1", status("PROCESSING", 10.0))
+        coalescer.submit("task-2", status("PROCESSING", 20.0))
+
+        coalescer.flush()
+
+        assert enabled_outbox.pending() == 2
+
+    @patch("app.api.status_coalescer.call_video_task_status_api", return_value=True)
+    def test_flushed_update_supersedes_spooled_ones(self, mock_call, enabled_outbox):
+        """Test a later successful flush removes the task's spooled progress"""
+        enabled_outbox.append(STATUS, "task-1", status("PROCESSING", 10.0))
+        coalescer = StatusCoalescer(window_seconds=60)
+        coalescer.submit("task-1", status("PROCESSING", 20.0))
+
+        coalescer.flush()
+
+        assert enabled_outbox.pending() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,140 @@
+"""
+Tests for the batched render-node publisher.
+Run with: pytest tests/test_publisher.py -v
+"""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.celery_app import celery_app
+from app.publisher import NotificationPublisher, _publish_pipelined
+from app.routing import COMPLETION_TASK, STATUS_TASK
+
+
+@pytest.fixture
+def sent():
+    """Calls published by the publisher, as (task name, kwargs)."""
+    calls = []
+    with patch.object(NotificationPublisher, "_publish", lambda self, batch: calls.extend(
+        (pending.name, pending.kwargs) for pending in batch
+    )):
+        yield calls
+
+
+class TestNotificationPublisher:
+    """Test cases for buffering and coalescing"""
+
+    def test_latest_progress_per_task_is_published(self, sent):
+        """Test intermediate progress of a task is coalesced, other tasks are kept"""
+        with NotificationPublisher(flush_interval=60) as publisher:
+            for progress in (10.0, 20.0, 30.0):
+                publisher.update_status("processing", task_id="task-1", progress=progress)
+            publisher.update_status("processing", task_id="task-2", progress=5.0)
+
+        assert [(kwargs["task_id"], kwargs["progress"]) for _, kwargs in sent] == [
+            ("task-1", 30.0), ("task-2", 5.0),
+        ]
+
+    def test_status_changes_are_kept(self, sent):
+        """Test a new status is not merged into the previous one"""
+        with NotificationPublisher(flush_interval=60) as publisher:
+            publisher.update_status("pending", task_id="task-1")
+            publisher.update_status("processing", task_id="task-1", progress=1.0)
+
+        assert [kwargs["status"] for _, kwargs in sent] == ["pending", "processing"]
+
+    def test_terminal_update_discards_buffered_progress(self, sent):
+        """Test progress is not published after the completion it preceded"""
+        with NotificationPublisher(flush_interval=60) as publisher:
+            publisher.update_status("processing", task_id="task-1", progress=90.0)
+            publisher.complete("video-1", "https://oss/video-1.mp4", task_id="task-1", duration=12.5)
+
+        assert sent == [(COMPLETION_TASK, {
+            "video_id": "video-1", "oss_url": "https://oss/video-1.mp4", "task_id": "task-1", "duration": 12.5,
+        })]
+
+    def test_flushes_when_the_batch_is_full(self, sent):
+        """Test callers publish a full batch without waiting for the interval"""
+        publisher = NotificationPublisher(max_batch=2, flush_interval=60)
+        publisher.update_status("processing", task_id="task-1", progress=1.0)
+        assert sent == []
+
+        publisher.update_status("processing", task_id="task-2", progress=1.0)
+        assert len(sent) == 2
+        publisher.close()
+
+    def test_flushes_after_the_interval(self, sent):
+        """Test the background thread publishes a partial batch"""
+        publisher = NotificationPublisher(flush_interval=0.01)
+        publisher.update_status("processing", task_id="task-1", progress=1.0)
+
+        publisher._stopped.wait(0.5)
+        assert len(sent) == 1
+        publisher.close()
+
+    def test_failed_batch_stays_buffered(self):
+        """Test messages survive a broker outage and are not duplicated by newer progress"""
+        publisher = NotificationPublisher(flush_interval=60)
+        publisher.update_status("processing", task_id="task-1", progress=10.0)
+        publisher.update_status("failed", task_id="task-2", error_message="boom")
+
+        with patch.object(NotificationPublisher, "_publish", side_effect=ConnectionError("down")), \
+                pytest.raises(ConnectionError):
+            publisher.flush()
+        publisher.update_status("processing", task_id="task-1", progress=20.0)
+
+        calls = []
+        with patch.object(NotificationPublisher, "_publish", lambda self, batch: calls.extend(batch)):
+            publisher.close()
+        assert [(pending.task_id, pending.kwargs["status"], pending.kwargs["progress"]) for pending in calls] == [
+            ("task-2", "failed", None), ("task-1", "processing", 20.0),
+        ]
+
+    def test_publishes_through_celery_routing(self, monkeypatch):
+        """Test batches are sent as regular task messages on one producer"""
+        monkeypatch.setattr(celery_app.conf, "broker_url", "memory://")
+        publisher = NotificationPublisher(flush_interval=60)
+        publisher.update_status("processing", task_id="task-1", progress=1.0)
+        publisher.update_status("completed", task_id="task-2")
+
+        with patch.object(celery_app, "send_task") as mock_send_task:
+            publisher.close()
+
+        assert [call.args[0] for call in mock_send_task.call_args_list] == [STATUS_TASK, STATUS_TASK]
+        assert len({id(call.kwargs["producer"]) for call in mock_send_task.call_args_list}) == 1
+
+
+class TestPipelinedPublish:
+    """Test cases for the Redis pipeline"""
+
+    def test_messages_are_pushed_in_one_transaction(self):
+        """Test every message of a batch goes out in one pipeline, one LPUSH per queue"""
+        pipe = MagicMock()
+        client = MagicMock()
+        client.pipeline.return_value.__enter__.return_value = pipe
+        channel = MagicMock()
+        channel._get_message_priority.return_value = 0
+        channel._q_for_pri.side_effect = lambda queue, priority: queue
+
+        @contextmanager
+        def conn_or_acquire():
+            yield client
+
+        channel.conn_or_acquire = conn_or_acquire
+
+        def publish_all():
+            for queue, body in (("progress", 1), ("progress", 2), ("completions", 3)):
+                channel._put(queue, {"body": body})
+
+        _publish_pipelined(channel, publish_all)
+
+        assert [call.args for call in pipe.lpush.call_args_list] == [
+            ("progress", '{"body": 1}', '{"body": 2}'), ("completions", '{"body": 3}'),
+        ]
+        pipe.execute.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
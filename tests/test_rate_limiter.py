@@ -0,0 +1,77 @@
+"""
+Tests for the video API rate limiter.
+Run with: pytest tests/test_rate_limiter.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.api.rate_limiter import RateLimiter, RateLimitExceededError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("app.api.rate_limiter.time.monotonic", fake), \
+            patch("app.api.rate_limiter.time.sleep", fake.sleep):
+        yield fake
+
+
+class TestRateLimiter:
+    """Test cases for the per-process token buckets"""
+
+    def test_burst_then_refill(self, clock):
+        """Test the bucket allows a burst and then refills at the rate"""
+        limiter = RateLimiter({"task_status": 10}, burst_seconds=1)
+
+        assert [limiter.try_acquire("task_status") for _ in range(10)] == [0.0] * 10
+        assert limiter.try_acquire("task_status") == pytest.approx(0.1)
+
+        clock.now += 0.1
+        assert limiter.try_acquire("task_status") == 0.0
+
+    def test_acquire_waits_for_a_token(self, clock):
+        """Test acquire sleeps until the next token instead of failing"""
+        limiter = RateLimiter({"video_create": 2}, burst_seconds=1)
+        started = clock.now
+
+        for _ in range(4):
+            limiter.acquire("video_create", max_wait=5)
+
+        assert clock.now - started == pytest.approx(1.0)
+
+    def test_acquire_defers_when_wait_too_long(self, clock):
+        """Test callers get RateLimitExceededError instead of a long block"""
+        limiter = RateLimiter({"worker_status": 0.1}, burst_seconds=1)
+        limiter.acquire("worker_status", max_wait=0)
+
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            limiter.acquire("worker_status", max_wait=1)
+        assert exc_info.value.retry_after == pytest.approx(10.0)
+
+    def test_buckets_are_per_endpoint(self, clock):
+        """Test endpoints have separate budgets and bulk shares task_status"""
+        limiter = RateLimiter({"task_status": 1, "video_create": 1}, burst_seconds=1)
+
+        limiter.acquire("task_status_bulk", max_wait=0)
+        limiter.acquire("video_create", max_wait=0)
+        limiter.acquire("worker_status", max_wait=0)  # Unlimited
+
+        with pytest.raises(RateLimitExceededError):
+            limiter.acquire("task_status", max_wait=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
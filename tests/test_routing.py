@@ -0,0 +1,178 @@
+"""
+Tests for task routing and weighted queue consumption.
+Run with: pytest tests/test_routing.py -v
+"""
+
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+from kombu.utils.scheduling import cycle_by_name
+
+from app.routing import WeightedCycle, route_task, shard_for
+from app.worker_profiles import (
+    get_pool_profile,
+    get_worker_profile,
+    shard_worker_args,
+    shards_for_node,
+)
+
+
+@pytest.fixture
+def routing_enabled():
+    with patch("app.config.config.CELERY_ROUTING_ENABLED", True):
+        yield
+
+
+@pytest.fixture
+def sharding_enabled():
+    with patch("app.config.config.CELERY_SHARD_COUNT", 8):
+        yield
+
+
+class TestRouteTask:
+    """Test cases for the task router"""
+
+    def test_disabled_uses_default_queue(self):
+        """Test nothing is routed unless routing is enabled"""
+        assert route_task("jianying_notification.process_video_render_completion", (), {}, {}) is None
+
+    def test_terminal_events_go_to_completions(self, routing_enabled):
+        """Test completions and terminal status updates share the completions queue"""
+        completion = route_task("jianying_notification.process_video_render_completion", (), {}, {})
+        failed = route_task("jianying_notification.update_video_render_status", ("failed",), {}, {})
+        completed = route_task("jianying_notification.update_video_render_status", (), {"status": "COMPLETED"}, {})
+
+        assert completion == failed == completed == {"queue": "notifications.completions"}
+
+    def test_progress_and_worker_status_queues(self, routing_enabled):
+        """Test progress chatter and worker status are kept apart"""
+        progress = route_task("jianying_notification.update_video_render_status", (), {"status": "processing"}, {})
+        worker = route_task("jianying_notification.update_worker_status", (), {"worker_name": "w1"}, {})
+
+        assert progress == {"queue": "notifications.progress"}
+        assert worker == {"queue": "notifications.worker_status"}
+
+
+class TestSharding:
+    """Test cases for task_id sharding"""
+
+    def test_updates_of_a_task_share_one_shard(self, sharding_enabled, routing_enabled):
+        """Test progress, terminal status and completion of one task use the same queue"""
+        progress = route_task("jianying_notification.update_video_render_status", ("processing", "task-1"), {}, {})
+        failed = route_task("jianying_notification.update_video_render_status", (), {"status": "failed", "task_id": "task-1"}, {})
+        completion = route_task(
+            "jianying_notification.process_video_render_completion", ("v1", "https://oss/v.mp4", "task-1"), {}, {}
+        )
+
+        assert progress == failed == completion == {"queue": f"notifications.shard.{shard_for('task-1')}"}
+
+    def test_without_task_id_falls_back_to_routing(self, sharding_enabled, routing_enabled):
+        """Test tasks that cannot be sharded keep their routed queue"""
+        worker = route_task("jianying_notification.update_worker_status", (), {"worker_name": "w1"}, {})
+        completion = route_task("jianying_notification.process_video_render_completion", (), {"video_id": "v1"}, {})
+
+        assert worker == {"queue": "notifications.worker_status"}
+        assert completion == {"queue": "notifications.completions"}
+
+    def test_shards_are_stable_and_spread(self):
+        """Test the shard of a task id is deterministic and ids spread over all shards"""
+        shards = Counter(shard_for(f"task-{i}", 8) for i in range(4000))
+
+        assert shard_for("task-1", 8) == shard_for("task-1", 8)
+        assert set(shards) == set(range(8))
+        assert min(shards.values()) > 400
+
+    def test_adding_a_shard_moves_few_tasks(self):
+        """Test growing the shard count only remaps about 1/n of the tasks"""
+        moved = sum(shard_for(f"task-{i}", 8) != shard_for(f"task-{i}", 9) for i in range(4000))
+
+        assert moved < 4000 / 9 * 1.3
+
+    def test_nodes_split_shards_and_consume_serially(self, sharding_enabled):
+        """Test every shard is assigned to exactly one node and run by a solo worker"""
+        assigned = [shard for node in range(3) for shard in shards_for_node(node, 3)]
+        args = shard_worker_args(5)
+
+        assert sorted(assigned) == list(range(8))
+        assert args[args.index("-Q") + 1] == "notifications.shard.5"
+        assert args[args.index("--pool") + 1] == "solo"
+        assert args[args.index("--prefetch-multiplier") + 1] == "1"
+
+
+class TestWeightedCycle:
+    """Test cases for weighted queue consumption order"""
+
+    def test_backlogged_queues_are_consumed_by_weight(self):
+        """Test each queue gets its weighted share and none is starved"""
+        cycle = cycle_by_name("app.routing:WeightedCycle")()
+        cycle._weights = {"completions": 6, "status": 3, "progress": 1}
+        cycle.update(["progress", "status", "completions"])
+
+        taken = Counter()
+        for _ in range(100):
+            queue = cycle.consume(3)[0]  # Every queue has a backlog: BRPOP takes the first
+            cycle.rotate(queue)
+            taken[queue] += 1
+
+        assert taken == {"completions": 60, "status": 30, "progress": 10}
+
+    def test_empty_queue_passes_its_turn(self):
+        """Test messages from a lower weight queue are accounted for"""
+        cycle = WeightedCycle(["completions", "progress"])
+        cycle._weights = {"completions": 9, "progress": 1}
+
+        assert cycle.consume(2) == ["completions", "progress"]
+        cycle.rotate("progress")  # completions was empty
+        assert cycle.consume(2)[0] == "completions"
+
+
+class TestWorkerProfiles:
+    """Test cases for worker profiles"""
+
+    def test_profile_queues_in_weight_order(self, routing_enabled):
+        """Test the all profile consumes every queue, completions first"""
+        args = get_worker_profile("all").celery_args(["-c", "4"])
+
+        queues = args[args.index("-Q") + 1].split(",")
+        assert queues[0] == "notifications.completions"
+        assert set(queues) == {
+            "notifications.completions",
+            "notifications.progress",
+            "notifications.worker_status",
+            "notifications",
+        }
+        assert args[-2:] == ["-c", "4"]
+
+    def test_unknown_profile(self):
+        """Test unknown profile names are rejected"""
+        with pytest.raises(ValueError):
+            get_worker_profile("nope")
+
+    def test_pool_is_on_the_command_line(self):
+        """Test the pool is passed to celery so gevent is patched before imports"""
+        args = get_worker_profile("all").celery_args(pool_profile=get_pool_profile("gevent"))
+
+        assert args[args.index("--pool") + 1] == "gevent"
+        assert "--autoscale" not in args
+
+    @patch("app.config.config.CELERY_AUTOTUNE_ENABLED", True)
+    def test_prefork_autotune_uses_celery_autoscale(self):
+        """Test autotuned prefork workers get --autoscale max,min"""
+        with patch("app.worker_profiles.os.cpu_count", return_value=8):
+            args = get_pool_profile("prefork").celery_args()
+
+        assert args == ["--pool", "prefork", "--autoscale", "8,4"]
+
+    def test_in_process_pools_size_the_http_pool(self, monkeypatch):
+        """Test threads share an HTTP pool as large as their concurrency"""
+        monkeypatch.delenv("HTTP_POOL_MAXSIZE", raising=False)
+
+        assert get_pool_profile("threads").environment() == {
+            "CELERY_POOL_PROFILE": "threads", "HTTP_POOL_MAXSIZE": "64",
+        }
+        assert get_pool_profile("prefork").environment() == {"CELERY_POOL_PROFILE": "prefork"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""
+Tests for message serializers and threshold compression.
+Run with: pytest tests/test_serialization.py -v
+"""
+
+import datetime
+from unittest.mock import patch
+
+import pytest
+from kombu.utils import json as kombu_json
+
+from app.serialization import (
+    compress_above_threshold,
+    decompress_threshold,
+    serialization_config,
+)
+
+
+class TestOrjsonCodec:
+    """Test the orjson codec stays wire compatible with kombu's JSON"""
+
+    def test_round_trips_with_kombu_json(self):
+        """Test messages decode the same whichever side uses orjson"""
+        pytest.importorskip("orjson")
+        from app.serialization import orjson_dumps, orjson_loads
+
+        body = ((), {"task_id": "t1", "progress": 42.5, "at": datetime.datetime(2024, 6, 1, 12, 0)}, {})
+
+        assert orjson_loads(kombu_json.dumps(body)) == kombu_json.loads(kombu_json.dumps(body))
+        assert kombu_json.loads(orjson_dumps(body)) == orjson_loads(orjson_dumps(body))
+        assert orjson_loads(orjson_dumps(body))[1]["at"] == datetime.datetime(2024, 6, 1, 12, 0)
+
+    @pytest.mark.parametrize("kwargs", [
+        {"extra": {1: "a", 2.5: "b"}},
+        {"extra": {"frames": 2**70}},
+        {"extra": {"ratio": float("nan"), "limit": float("inf")}},
+    ])
+    def test_encodes_what_kombu_json_encodes(self, kwargs):
+        """Test non-str keys, big ints and non-finite floats encode as kombu's JSON would"""
+        pytest.importorskip("orjson")
+        from app.serialization import orjson_dumps, orjson_loads
+
+        body = ((), kwargs, {})
+
+        expected = repr(kombu_json.loads(kombu_json.dumps(body)))
+        assert repr(kombu_json.loads(orjson_dumps(body))) == expected
+        assert repr(orjson_loads(orjson_dumps(body))) == expected
+        assert repr(orjson_loads(kombu_json.dumps(body))) == expected
+
+
+class TestThresholdCompression:
+    """Test only large bodies are compressed"""
+
+    @patch("app.config.config.CELERY_COMPRESSION_THRESHOLD", 100)
+    def test_small_bodies_are_sent_as_is(self):
+        body = b'{"status": "processing"}'
+
+        assert compress_above_threshold(body) == b"\x00" + body
+        assert decompress_threshold(compress_above_threshold(body)) == body
+
+    @patch("app.config.config.CELERY_COMPRESSION_THRESHOLD", 100)
+    def test_large_bodies_are_compressed(self):
+        body = b'{"tracks": [' + b'{"type": "video", "volume": 1.0}, ' * 50 + b"]}"
+
+        compressed = compress_above_threshold(body)
+        assert len(compressed) < len(body) / 5
+        assert decompress_threshold(compressed) == body
+
+
+class TestSerializationConfig:
+    """Test serializer negotiation"""
+
+    @patch("app.config.config.CELERY_ACCEPT_CONTENT", ["json", "msgpack", "pickle"])
+    @patch("app.config.config.CELERY_SERIALIZER", "msgpack")
+    @patch("app.serialization.is_available", lambda name: name == "json")
+    def test_falls_back_to_json_without_msgpack(self):
+        """Test uninstalled or unsafe serializers are neither accepted nor used"""
+        settings = serialization_config()
+
+        assert settings["accept_content"] == ["json"]
+        assert settings["task_serializer"] == "json"
+        assert "task_compression" not in settings
+
+    @patch("app.config.config.CELERY_COMPRESSION_THRESHOLD", 1024)
+    def test_compression_enabled_by_threshold(self):
+        assert serialization_config()["task_compression"] == "application/x-zlib-threshold"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
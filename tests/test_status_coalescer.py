@@ -0,0 +1,118 @@
+"""
+Tests for worker-side status update coalescing.
+Run with: pytest tests/test_status_coalescer.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.api import status_coalescer
+from app.api.status_coalescer import StatusCoalescer
+from app.api.video_api_client import BulkStatusUnsupportedError
+
+
+def progress(value):
+    return {"status": "processing", "render_status": "PROCESSING", "progress": value}
+
+
+class TestStatusCoalescer:
+    """Test cases for StatusCoalescer"""
+
+    @patch("app.api.status_coalescer.call_video_task_status_api")
+    def test_only_latest_update_per_task_is_flushed(self, mock_call):
+        """Test repeated progress for one task collapses into one call"""
+        coalescer = StatusCoalescer(window_seconds=60)
+
+        for value in (10.0, 20.0, 30.0):
+            assert coalescer.submit("task-1", progress(value)) is True
+        assert coalescer.submit("task-2", progress(5.0)) is True
+
+        assert coalescer.flush() == 2
+        assert mock_call.call_count == 2
+        first_call = mock_call.call_args_list[0][1]
+        assert first_call["task_id"] == "task-1"
+        assert first_call["progress"] == 30.0
+
+    @patch("app.api.status_coalescer.call_video_task_status_api")
+    def test_terminal_update_wins(self, mock_call):
+        """Test terminal updates bypass the buffer and suppress stale progress"""
+        coalescer = StatusCoalescer(window_seconds=60)
+        coalescer.submit("task-1", progress(90.0))
+
+        completed = {"status": "completed", "render_status": "COMPLETED", "progress": 100.0}
+        assert coalescer.submit("task-1", completed) is False
+        # A late progress message must not overwrite the completed state
+        assert coalescer.submit("task-1", progress(95.0)) is True
+
+        assert coalescer.flush() == 0
+        mock_call.assert_not_called()
+
+    @patch("app.api.status_coalescer.call_video_task_status_api")
+    @patch("app.api.status_coalescer.call_video_task_status_bulk_api")
+    def test_flush_uses_bulk_endpoint(self, mock_bulk, mock_call):
+        """Test survivors are sent in bulk when the server supports it"""
+        coalescer = StatusCoalescer(window_seconds=60, max_batch=2, bulk_enabled=True)
+        for i in range(3):
+            coalescer.submit(f"task-{i}", progress(50.0))
+
+        coalescer.flush()
+
+        assert mock_bulk.call_count == 2
+        assert mock_bulk.call_args_list[0][0][0][0] == {"task_id": "task-0", **progress(50.0)}
+        mock_call.assert_not_called()
+
+    @patch("app.api.status_coalescer.call_video_task_status_api")
+    @patch("app.api.status_coalescer.call_video_task_status_bulk_api")
+    def test_falls_back_when_bulk_unsupported(self, mock_bulk, mock_call):
+        """Test per-task calls are used once the bulk endpoint is missing"""
+        mock_bulk.side_effect = BulkStatusUnsupportedError("HTTP 404")
+        coalescer = StatusCoalescer(window_seconds=60, bulk_enabled=True)
+        coalescer.submit("task-1", progress(10.0))
+        coalescer.submit("task-2", progress(20.0))
+
+        coalescer.flush()
+        coalescer.submit("task-3", progress(30.0))
+        coalescer.flush()
+
+        mock_bulk.assert_called_once()
+        assert mock_call.call_count == 3
+
+    @patch("app.api.status_coalescer.call_video_task_status_bulk_api", return_value=False)
+    def test_rejected_bulk_chunk_requeued(self, mock_bulk):
+        """Test a chunk the bulk endpoint did not accept is sent again at the next flush"""
+        coalescer = StatusCoalescer(window_seconds=60, bulk_enabled=True)
+        coalescer.submit("task-1", progress(10.0))
+        coalescer.submit("task-2", progress(20.0))
+
+        coalescer.flush()
+        mock_bulk.return_value = True
+        assert coalescer.flush() == 2
+        assert coalescer.flush() == 0
+
+    @patch("app.api.status_coalescer.call_video_task_status_api", return_value=False)
+    def test_rejected_update_requeued_unless_superseded(self, mock_call):
+        """Test a failed update is retried, but a newer one for the task replaces it"""
+        coalescer = StatusCoalescer(window_seconds=60)
+        coalescer.submit("task-1", progress(10.0))
+        coalescer.flush()
+        assert coalescer.flush() == 1
+
+        coalescer.submit("task-1", progress(20.0))
+        coalescer.flush()
+        assert mock_call.call_args[1]["progress"] == 20.0
+
+    @patch("app.api.status_coalescer.call_video_task_status_api", return_value=False)
+    def test_rejected_update_dropped_after_max_attempts(self, mock_call):
+        """Test an update the API keeps rejecting is eventually dropped"""
+        coalescer = StatusCoalescer(window_seconds=60)
+        coalescer.submit("task-1", progress(10.0))
+
+        while coalescer.flush():
+            pass
+
+        assert mock_call.call_count == status_coalescer._MAX_SEND_ATTEMPTS
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+"""
+Tests for the monotonic status update filter.
+Run with: pytest tests/test_status_filter.py -v
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.api.status_coalescer import StatusCoalescer
+from app.tasks.status_filter import (
+    DUPLICATE,
+    REGRESSION,
+    MemoryStatusStore,
+    StatusFilter,
+    classify,
+)
+from app.tasks.video_tasks import send_render_status
+
+
+@pytest.fixture
+def status_filter():
+    status_filter = StatusFilter(MemoryStatusStore(ttl=60))
+    with patch("app.tasks.video_tasks.get_status_filter", return_value=status_filter), \
+            patch("app.tasks.outbox.get_status_filter", return_value=status_filter):
+        yield status_filter
+
+
+class TestClassify:
+    """Test cases for duplicate/regression detection"""
+
+    def test_progress_must_advance(self):
+        """Test repeated or lower progress is skipped, higher progress is sent"""
+        last = ("PROCESSING", 50.0)
+
+        assert classify(last, "PROCESSING", 60.0) is None
+        assert classify(last, "PROCESSING", 50.0) == DUPLICATE
+        assert classify(last, "PROCESSING", None) == DUPLICATE
+        assert classify(last, "PROCESSING", 40.0) == REGRESSION
+
+    def test_status_order(self):
+        """Test earlier statuses are regressions and same-rank moves are allowed"""
+        assert classify(("COMPLETED", 100.0), "PROCESSING", 99.0) == REGRESSION
+        assert classify(("COMPLETED", 100.0), "COMPLETED", 100.0) == DUPLICATE
+        assert classify(("PROCESSING", 80.0), "COMPLETED", 100.0) is None
+        assert classify(("PROCESSING", 80.0), "RETRY", 0.0) is None
+        assert classify(("FAILED", None), "COMPLETED", 100.0) is None
+        assert classify(("COMPLETED", 100.0), "ARCHIVED", None) is None
+        assert classify(None, "PENDING", None) is None
+
+
+class TestStatusFilter:
+    """Test cases for the filter and its stores"""
+
+    def test_lru_evicts_oldest_task(self):
+        """Test the in-process cache is bounded"""
+        store = MemoryStatusStore(ttl=60, max_tasks=2)
+        for task_id in ("a", "b", "c"):
+            store.advance(task_id, "PENDING", None)
+
+        assert store.get("a") is None
+        assert store.get("c") == ("PENDING", None)
+
+    def test_record_never_moves_backwards(self):
+        """Test a late record of an older update keeps the newer state"""
+        status_filter = StatusFilter(MemoryStatusStore(ttl=60))
+        status_filter.record("task-1", "COMPLETED", 100.0)
+        status_filter.record("task-1", "PROCESSING", 70.0)
+
+        assert status_filter.check("task-1", "PROCESSING", 80.0) == REGRESSION
+
+    def test_shared_store_state_is_used_and_cached(self):
+        """Test a state sent by another worker is read from the store once"""
+        store = MagicMock()
+        store.get.return_value = ("COMPLETED", 100.0)
+        status_filter = StatusFilter(MemoryStatusStore(ttl=60), store)
+
+        assert status_filter.check("task-1", "PROCESSING", 10.0) == REGRESSION
+        assert status_filter.check("task-1", "PROCESSING", 20.0) == REGRESSION
+        store.get.assert_called_once()
+
+    def test_store_errors_fail_open(self):
+        """Test updates are sent when the shared store is unavailable"""
+        store = MagicMock()
+        store.get.side_effect = ConnectionError("down")
+        store.advance.side_effect = ConnectionError("down")
+        status_filter = StatusFilter(MemoryStatusStore(ttl=60), store)
+
+        assert status_filter.check("task-1", "PROCESSING", 10.0) is None
+        status_filter.record("task-1", "PROCESSING", 10.0)
+
+
+class TestSendRenderStatus:
+    """Test the filter is applied before calling the status API"""
+
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_duplicates_and_stale_updates_are_not_sent(self, mock_status, status_filter):
+        """Test only updates that move the task forward reach the API"""
+        assert send_render_status("task-1", "processing", 10.0)
+        assert send_render_status("task-1", "processing", 10.0)  # Redelivered
+        assert send_render_status("task-1", "completed", 100.0)
+        assert send_render_status("task-1", "processing", 90.0)  # Arrived late
+
+        sent = [(c.kwargs["render_status"], c.kwargs["progress"]) for c in mock_status.call_args_list]
+        assert sent == [("PROCESSING", 10.0), ("COMPLETED", 100.0)]
+
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=False)
+    def test_unsent_update_is_not_recorded(self, mock_status, status_filter):
+        """Test a failed send can be retried instead of being skipped as a duplicate"""
+        send_render_status("task-1", "processing", 10.0)
+        send_render_status("task-1", "processing", 10.0)
+
+        assert mock_status.call_count == 2
+
+    @patch("app.api.status_coalescer.call_video_task_status_api", return_value=True)
+    def test_coalesced_update_recorded_once_flushed(self, mock_flush, status_filter):
+        """Test a buffered update is only recorded after the flush sent it"""
+        coalescer = StatusCoalescer(window_seconds=60)
+        with patch("app.tasks.video_tasks.get_status_coalescer", return_value=coalescer):
+            assert send_render_status("task-1", "processing", 10.0)
+            assert status_filter.check("task-1", "PROCESSING", 10.0) is None
+
+            coalescer.flush()
+            assert status_filter.check("task-1", "PROCESSING", 10.0) == DUPLICATE
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
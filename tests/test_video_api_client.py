@@ -14,10 +14,11 @@ class TestVideoTaskStatusAPI:
     """Test cases for call_video_task_status_api function"""
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.put")
-    def test_call_video_task_status_api_success(self, mock_put, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_call_video_task_status_api_success(self, mock_get_session, mock_get_token):
         """Test successful video task status API call"""
         # Setup
+        mock_put = mock_get_session.return_value.put
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": True}
@@ -55,10 +56,11 @@ class TestVideoTaskStatusAPI:
         mock_get_token.assert_called_once()
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.put")
-    def test_call_video_task_status_api_failure(self, mock_put, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_call_video_task_status_api_failure(self, mock_get_session, mock_get_token):
         """Test API call when server returns success=False"""
         # Setup
+        mock_put = mock_get_session.return_value.put
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": False, "error": "Invalid task ID"}
@@ -71,10 +73,11 @@ class TestVideoTaskStatusAPI:
         assert result is False
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.put")
-    def test_call_video_task_status_api_request_error(self, mock_put, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_call_video_task_status_api_request_error(self, mock_get_session, mock_get_token):
         """Test API call when network request fails"""
         # Setup
+        mock_put = mock_get_session.return_value.put
         mock_get_token.return_value = "test-m2m-token"
         mock_put.side_effect = Exception("Connection timeout")
 
@@ -85,10 +88,11 @@ class TestVideoTaskStatusAPI:
         assert result is False
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.put")
-    def test_call_video_task_status_api_with_extra_metadata(self, mock_put, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_call_video_task_status_api_with_extra_metadata(self, mock_get_session, mock_get_token):
         """Test API call with extra metadata"""
         # Setup
+        mock_put = mock_get_session.return_value.put
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": True}
@@ -114,10 +118,11 @@ class TestCreateVideoRecord:
     """Test cases for create_video_record function"""
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.post")
-    def test_create_video_record_success(self, mock_post, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_create_video_record_success(self, mock_get_session, mock_get_token):
         """Test successful video record creation"""
         # Setup
+        mock_post = mock_get_session.return_value.post
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": True, "video_id": "vid-123"}
@@ -166,10 +171,11 @@ class TestCreateVideoRecord:
         assert result is False
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.post")
-    def test_create_video_record_failure(self, mock_post, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_create_video_record_failure(self, mock_get_session, mock_get_token):
         """Test video record creation when server returns success=False"""
         # Setup
+        mock_post = mock_get_session.return_value.post
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": False, "error": "Invalid OSS URL"}
@@ -185,10 +191,11 @@ class TestCreateVideoRecord:
         assert result is False
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.post")
-    def test_create_video_record_request_error(self, mock_post, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_create_video_record_request_error(self, mock_get_session, mock_get_token):
         """Test video record creation when network request fails"""
         # Setup
+        mock_post = mock_get_session.return_value.post
         mock_get_token.return_value = "test-m2m-token"
         mock_post.side_effect = Exception("Connection refused")
 
@@ -202,10 +209,11 @@ class TestCreateVideoRecord:
         assert result is False
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.post")
-    def test_create_video_record_minimal_fields(self, mock_post, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_create_video_record_minimal_fields(self, mock_get_session, mock_get_token):
         """Test video record creation with only required fields"""
         # Setup
+        mock_post = mock_get_session.return_value.post
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": True}
@@ -225,10 +233,11 @@ class TestCreateVideoRecord:
         assert "oss_url" in payload
 
     @patch("app.api.video_api_client.get_m2m_token")
-    @patch("app.api.video_api_client.requests.post")
-    def test_create_video_record_with_extra_metadata(self, mock_post, mock_get_token):
+    @patch("app.api.video_api_client.get_session")
+    def test_create_video_record_with_extra_metadata(self, mock_get_session, mock_get_token):
         """Test video record creation with extra metadata"""
         # Setup
+        mock_post = mock_get_session.return_value.post
         mock_get_token.return_value = "test-m2m-token"
         mock_response = MagicMock()
         mock_response.json.return_value = {"success": True}
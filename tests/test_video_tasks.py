@@ -0,0 +1,284 @@
+"""
+Tests for the render completion fan-out.
+Run with: pytest tests/test_video_tasks.py -v
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.api.rate_limiter import RateLimitExceededError
+from app.tasks.async_video_tasks import (
+    TaskRequest,
+    TaskRetryError,
+    async_process_video_render_completion,
+    current_request,
+)
+from app.tasks.backoff import retry_countdown
+from app.tasks.checkpoints import MemoryCheckpointStore
+from app.tasks.completion import CompletionStepError
+from app.tasks.pipeline import run_concurrently
+from app.tasks.status_filter import DUPLICATE, MemoryStatusStore, StatusFilter
+from app.tasks.video_tasks import process_video_render_completion
+
+
+class TestRunConcurrently:
+    """Test cases for the step runner"""
+
+    def test_steps_overlap(self):
+        """Test steps run at the same time rather than one after another"""
+        barrier = threading.Barrier(2, timeout=2)
+
+        def step():
+            barrier.wait()  # Deadlocks (times out) if steps run sequentially
+            return True
+
+        result = run_concurrently({"a": step, "b": step})
+
+        assert result.success is True
+        assert list(result.outcomes) == ["a", "b"]
+
+    def test_errors_are_captured_per_step(self):
+        """Test a raising step does not hide the other step's outcome"""
+        def boom():
+            raise ConnectionError("down")
+
+        result = run_concurrently({"a": boom, "b": lambda: True})
+
+        assert result.success is False
+        assert result.failed_steps == ["a"]
+        assert isinstance(result.errors["a"], ConnectionError)
+        assert result.outcomes["b"].success is True
+        assert result.to_dict()["partial"] is True
+
+
+class TestCheckpoints:
+    """Test cases for step checkpoints and per-step backoff"""
+
+    def test_memory_store_tracks_steps_and_failures(self):
+        """Test completed steps and failure counts are kept per task"""
+        store = MemoryCheckpointStore(ttl=60)
+
+        store.mark_completed("t1", "status_update")
+        assert store.record_failure("t1", "create_record") == 1
+        assert store.record_failure("t1", "create_record") == 2
+
+        assert store.completed_steps("t1") == {"status_update"}
+        assert store.completed_steps("t2") == set()
+        store.clear("t1")
+        assert store.completed_steps("t1") == set()
+
+    def test_memory_store_is_bounded(self):
+        """Test the oldest tasks are evicted once max_tasks is reached"""
+        store = MemoryCheckpointStore(ttl=60, max_tasks=2)
+
+        for task_id in ("t1", "t2", "t3"):
+            store.mark_completed(task_id, "step")
+
+        assert store.completed_steps("t1") == set()
+        assert store.completed_steps("t3") == {"step"}
+
+    @patch("app.tasks.backoff.config")
+    def test_backoff_doubles_up_to_max_with_jitter(self, mock_config):
+        """Test the retry delay grows with failures, is capped and jittered"""
+        mock_config.TASK_RETRY_BACKOFF_BASE = 5
+        mock_config.TASK_RETRY_BACKOFF_MAX = 30
+
+        for failures, ceiling in ((1, 5), (2, 10), (3, 20), (4, 30), (10, 30)):
+            delays = [retry_countdown(failures) for _ in range(50)]
+            assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+            assert len(set(delays)) > 1
+
+    @patch("app.tasks.backoff.config")
+    def test_backoff_waits_for_circuit(self, mock_config):
+        """Test retries are not scheduled before an open circuit is probed"""
+        mock_config.TASK_RETRY_BACKOFF_BASE = 5
+        mock_config.TASK_RETRY_BACKOFF_MAX = 30
+
+        assert all(retry_countdown(1, not_before=20) >= 20 for _ in range(50))
+
+
+def reject_completed(task_id, render_status, **kwargs):
+    """Status API stub failing the COMPLETED update and accepting the others."""
+    if render_status == "COMPLETED":
+        raise RuntimeError("status API down")
+    return True
+
+
+async def async_reject_completed(task_id, render_status, **kwargs):
+    return reject_completed(task_id, render_status, **kwargs)
+
+
+@patch("app.tasks.video_tasks.get_status_coalescer", return_value=None)
+class TestProcessVideoRenderCompletion:
+    """Test cases for process_video_render_completion"""
+
+    @patch("app.tasks.video_tasks.create_video_record", return_value=True)
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_both_steps_succeed(self, mock_status, mock_create, _):
+        """Test a full success reports per-step timings"""
+        result = process_video_render_completion(
+            video_id="v1", oss_url="https://oss/v1.mp4", task_id="task-123"
+        )
+
+        assert result["success"] is True
+        assert result["partial"] is False
+        assert set(result["steps"]) == {"status_update", "create_record"}
+        assert all(step["duration"] >= 0 for step in result["steps"].values())
+        mock_status.assert_called_once()
+        assert mock_status.call_args.kwargs["render_status"] == "COMPLETED"
+        mock_create.assert_called_once()
+
+    @patch("app.tasks.video_tasks.create_video_record", return_value=False)
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_reported_failure_is_partial_without_retry(self, mock_status, mock_create, _):
+        """Test success=False from one step is a partial failure, not a retry"""
+        result = process_video_render_completion(
+            video_id="v1", oss_url="https://oss/v1.mp4", task_id="task-123"
+        )
+
+        assert result["success"] is False
+        assert result["partial"] is True
+        assert result["steps"]["create_record"]["success"] is False
+        assert result["steps"]["status_update"]["success"] is True
+        assert mock_status.call_count == 1  # No FAILED status sent
+
+    @patch("app.tasks.video_tasks.create_video_record", side_effect=RuntimeError("boom"))
+    @patch("app.tasks.video_tasks.call_video_task_status_api", side_effect=reject_completed)
+    def test_raising_step_marks_failed_and_retries(self, mock_status, mock_create, _):
+        """Test an exception sends a FAILED status and retries the task"""
+        # Eager retries run inline until max_retries is exhausted
+        result = process_video_render_completion.apply(
+            kwargs={"video_id": "v1", "oss_url": "https://oss/v1.mp4", "task_id": "task-123"}
+        )
+
+        assert result.state == "FAILURE"
+        assert mock_create.call_count == 4  # First attempt + 3 retries
+        failed = mock_status.call_args_list[-1].kwargs
+        assert failed["render_status"] == "FAILED"
+        assert "status_update" in failed["message"]
+
+    @patch("app.tasks.video_tasks.create_video_record", side_effect=RuntimeError("boom"))
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_final_retry_after_completed_sends_no_failed(self, mock_status, mock_create, _):
+        """Test a video record failing to the last retry does not undo the delivered COMPLETED"""
+        result = process_video_render_completion.apply(
+            kwargs={"video_id": "v1", "oss_url": "https://oss/v1.mp4", "task_id": "task-123"}
+        )
+
+        assert result.state == "FAILURE"
+        assert mock_create.call_count == 4
+        mock_status.assert_called_once()
+        assert mock_status.call_args.kwargs["render_status"] == "COMPLETED"
+
+    @patch("app.tasks.video_tasks.create_video_record", side_effect=[RuntimeError("boom"), True])
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_retry_resumes_from_unfinished_step(self, mock_status, mock_create, _):
+        """Test a retry does not repeat the status update that already succeeded"""
+        result = process_video_render_completion.apply(
+            kwargs={"video_id": "v1", "oss_url": "https://oss/v1.mp4", "task_id": "task-123"}
+        )
+
+        assert result.state == "SUCCESS"
+        assert result.result["skipped"] == ["status_update"]
+        assert list(result.result["steps"]) == ["create_record"]
+        assert mock_create.call_count == 2
+        # Only COMPLETED was sent: no FAILED while a retry was still pending
+        mock_status.assert_called_once()
+        assert mock_status.call_args.kwargs["render_status"] == "COMPLETED"
+
+    @patch("app.tasks.video_tasks.create_video_record",
+           side_effect=[RateLimitExceededError("video_create", 1.0)] * 5 + [True])
+    @patch("app.tasks.video_tasks.call_video_task_status_api", return_value=True)
+    def test_deferral_is_not_a_failure(self, mock_status, mock_create, _):
+        """Test rate limited steps are deferred beyond the error retry budget without FAILED"""
+        result = process_video_render_completion.apply(
+            kwargs={"video_id": "v1", "oss_url": "https://oss/v1.mp4", "task_id": "task-123"}
+        )
+
+        assert result.state == "SUCCESS"
+        assert mock_create.call_count == 6
+        mock_status.assert_called_once()
+        assert mock_status.call_args.kwargs["render_status"] == "COMPLETED"
+
+    @patch("app.tasks.video_tasks.create_video_record")
+    @patch("app.tasks.video_tasks.call_video_task_status_api")
+    def test_without_task_id_nothing_is_sent(self, mock_status, mock_create, _):
+        """Test completions without a task_id make no API calls"""
+        result = process_video_render_completion(video_id="v1", oss_url="https://oss/v1.mp4")
+
+        assert result["success"] is True
+        mock_status.assert_not_called()
+        mock_create.assert_not_called()
+
+
+def run_async_completion(retries=0, **kwargs):
+    async def attempt():
+        current_request.set(TaskRequest("celery-task-1", retries))
+        return await async_process_video_render_completion(
+            video_id="v1", oss_url="https://oss/v1.mp4", task_id="task-123", **kwargs
+        )
+
+    return asyncio.run(attempt())
+
+
+@patch("app.tasks.video_tasks.get_status_coalescer", return_value=None)
+class TestAsyncProcessVideoRenderCompletion:
+    """Test the async worker's completion behaves like the Celery task"""
+
+    @pytest.fixture(autouse=True)
+    def checkpoints(self):
+        store = MemoryCheckpointStore(ttl=60)
+        with patch("app.tasks.checkpoints.get_checkpoint_store", return_value=store):
+            yield store
+
+    @patch("app.tasks.async_video_tasks.async_create_video_record", new_callable=AsyncMock, return_value=True)
+    @patch("app.tasks.async_video_tasks.async_call_video_task_status_api", new_callable=AsyncMock, return_value=True)
+    def test_completed_status_recorded_in_filter(self, mock_status, mock_create, _):
+        """Test the COMPLETED update goes through the status filter, so a redelivery is skipped"""
+        status_filter = StatusFilter(MemoryStatusStore(ttl=60))
+        with patch("app.tasks.video_tasks.get_status_filter", return_value=status_filter), \
+                patch("app.tasks.outbox.get_status_filter", return_value=status_filter):
+            result = run_async_completion()
+            run_async_completion()
+
+        assert result["success"] is True
+        assert result["skipped"] == []
+        mock_status.assert_called_once()
+        assert status_filter.check("task-123", "COMPLETED", 100.0) == DUPLICATE
+
+    @patch("app.tasks.async_video_tasks.async_create_video_record", new_callable=AsyncMock,
+           side_effect=[RuntimeError("boom"), True])
+    @patch("app.tasks.async_video_tasks.async_call_video_task_status_api", new_callable=AsyncMock, return_value=True)
+    def test_retry_resumes_from_unfinished_step(self, mock_status, mock_create, _):
+        """Test a failed step asks for a retry that only runs the unfinished step"""
+        with pytest.raises(TaskRetryError) as retry:
+            run_async_completion()
+        assert retry.value.countdown > 0
+
+        result = run_async_completion(retries=1)
+
+        assert result["skipped"] == ["status_update"]
+        assert mock_create.call_count == 2
+        mock_status.assert_called_once()
+
+    @patch("app.tasks.async_video_tasks.async_create_video_record", new_callable=AsyncMock,
+           side_effect=RuntimeError("boom"))
+    @patch("app.tasks.async_video_tasks.async_call_video_task_status_api", new_callable=AsyncMock,
+           side_effect=async_reject_completed)
+    def test_last_retry_raises_and_reports_failed(self, mock_status, mock_create, _):
+        """Test the task's max_retries ends the retries with a FAILED status"""
+        for retries in range(process_video_render_completion.max_retries):
+            with pytest.raises(TaskRetryError):
+                run_async_completion(retries=retries)
+
+        with pytest.raises(CompletionStepError):
+            run_async_completion(retries=process_video_render_completion.max_retries)
+
+        assert mock_status.call_args.kwargs["render_status"] == "FAILED"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
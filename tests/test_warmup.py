@@ -0,0 +1,213 @@
+"""
+Tests for the DNS cache and worker warm-up.
+Run with: pytest tests/test_warmup.py -v
+"""
+
+import socket
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import warmup
+from app.api import dns_cache
+from app.api.dns_cache import DnsCache, install_dns_cache, uninstall_dns_cache
+from app.warmup import warm_up
+from app.worker_signals import _forks_children
+
+
+class FakeResolver:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.calls += 1
+        if self.fail:
+            raise socket.gaierror("no such host")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    with patch("app.api.dns_cache.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+
+class TestDnsCache:
+    """Test cases for the TTL DNS cache"""
+
+    def test_answers_cached_until_ttl(self, clock):
+        """Test a lookup is answered from the cache until its TTL runs out"""
+        resolver = FakeResolver()
+        cache = DnsCache(60, resolver, hosts=["api.example.com"])
+
+        first = cache.getaddrinfo("api.example.com", 443)
+        clock[0] += 59
+        assert cache.getaddrinfo("api.example.com", 443) == first
+        assert resolver.calls == 1
+
+        clock[0] += 2
+        cache.getaddrinfo("api.example.com", 443)
+        assert resolver.calls == 2
+
+    def test_arguments_are_part_of_the_key(self, clock):
+        """Test lookups for another port or family are resolved separately"""
+        resolver = FakeResolver()
+        cache = DnsCache(60, resolver, hosts=["api.example.com"])
+
+        cache.getaddrinfo("api.example.com", 443)
+        cache.getaddrinfo("api.example.com", 80)
+        cache.getaddrinfo("api.example.com", 443, socket.AF_INET)
+        assert resolver.calls == 3
+
+    def test_failures_not_cached(self, clock):
+        """Test a failed lookup is retried on the next call"""
+        resolver = FakeResolver()
+        resolver.fail = True
+        cache = DnsCache(60, resolver, hosts=["api.example.com"])
+
+        with pytest.raises(socket.gaierror):
+            cache.getaddrinfo("api.example.com", 443)
+        resolver.fail = False
+        assert cache.getaddrinfo("api.example.com", 443)
+        assert resolver.calls == 2
+
+    def test_other_hosts_not_cached(self, clock):
+        """Test hosts other than the API and Cognito are resolved on every lookup"""
+        resolver = FakeResolver()
+        cache = DnsCache(60, resolver, hosts=["api.example.com"])
+
+        cache.getaddrinfo("redis.internal", 6379)
+        cache.getaddrinfo("redis.internal", 6379)
+        assert resolver.calls == 2
+        assert not cache._entries
+
+    def test_expired_answers_evicted(self, clock):
+        """Test an expired answer is dropped when another lookup is cached"""
+        resolver = FakeResolver()
+        cache = DnsCache(60, resolver, hosts=["api.example.com", "auth.example.com"])
+
+        cache.getaddrinfo("api.example.com", 443)
+        clock[0] += 61
+        cache.getaddrinfo("auth.example.com", 443)
+        assert [key[0] for key in cache._entries] == ["auth.example.com"]
+
+    def test_install_replaces_getaddrinfo_once(self):
+        """Test installing twice wraps socket.getaddrinfo only once, and uninstalling restores it"""
+        original = socket.getaddrinfo
+        try:
+            cache = install_dns_cache(["api.example.com"], ttl=30)
+            assert install_dns_cache(["auth.example.com"], ttl=30) is cache
+            assert cache.hosts == {"api.example.com", "auth.example.com"}
+            assert socket.getaddrinfo == cache.getaddrinfo
+            assert cache.resolve is original
+        finally:
+            uninstall_dns_cache()
+        assert socket.getaddrinfo is original
+        assert dns_cache._cache is None
+
+    def test_zero_ttl_disables_cache(self):
+        """Test a TTL of 0 (the default) leaves socket.getaddrinfo alone"""
+        original = socket.getaddrinfo
+        assert install_dns_cache(["api.example.com"]) is None
+        assert socket.getaddrinfo is original
+
+
+class TestWarmUp:
+    """Test cases for the warm-up steps"""
+
+    @pytest.fixture
+    def steps(self):
+        with patch("app.config.config.WORKER_WARMUP_ENABLED", True), \
+                patch("app.warmup.resolve_hosts") as resolve, \
+                patch("app.warmup.prefetch_token") as token, \
+                patch("app.warmup.open_connections") as connections:
+            yield resolve, token, connections
+
+    def test_runs_every_step(self, steps):
+        """Test warm-up runs every step and reports their durations"""
+        with patch("app.warmup.observe_warmup") as observe:
+            durations = warm_up()
+
+        assert set(durations) == {"dns", "token", "connections", "total"}
+        for step in steps:
+            step.assert_called_once()
+        assert {call.args[0] for call in observe.call_args_list} == set(durations)
+
+    def test_prefork_parent_skips_connections(self, steps):
+        """Test connections are not opened when asked not to"""
+        durations = warm_up(connections=False)
+
+        assert "connections" not in durations
+        steps[2].assert_not_called()
+
+    def test_gives_up_after_timeout(self, steps):
+        """Test warm-up returns after WORKER_WARMUP_TIMEOUT without the unfinished steps"""
+        release = threading.Event()
+        steps[1].side_effect = lambda: release.wait(5)
+        try:
+            with patch("app.config.config.WORKER_WARMUP_TIMEOUT", 0.1):
+                durations = warm_up()
+        finally:
+            release.set()
+
+        assert "token" not in durations
+        assert "dns" in durations
+        assert durations["total"] < 1
+
+    def test_failed_step_does_not_raise(self, steps):
+        """Test a failing step is logged and the others still finish"""
+        steps[0].side_effect = RuntimeError("resolver down")
+
+        durations = warm_up()
+
+        assert "token" in durations
+
+    def test_disabled_runs_nothing(self, steps):
+        """Test disabled warm-up neither installs the DNS cache nor runs any step"""
+        with patch("app.config.config.WORKER_WARMUP_ENABLED", False), \
+                patch("app.warmup.install_dns_cache") as install:
+            assert warm_up() is None
+
+        install.assert_not_called()
+        for step in steps:
+            step.assert_not_called()
+
+    def test_hosts_include_api_instances_and_cognito(self):
+        """Test the resolved hosts are every API instance plus the Cognito domain"""
+        with patch("app.config.config.VIDEO_API_BASE_URLS", ["https://a.example.com", "http://b.example.com:8080"]), \
+                patch("app.config.config.COGNITO_DOMAIN", "https://auth.example.com"):
+            assert warmup._hosts() == [
+                ("a.example.com", 443),
+                ("b.example.com", 8080),
+                ("auth.example.com", 443),
+            ]
+
+    def test_resolve_hosts_caches_only_its_hosts(self):
+        """Test the DNS cache is installed for the API and Cognito hosts it resolves"""
+        with patch("app.warmup._hosts", return_value=[("api.example.com", 443), ("auth.example.com", 443)]), \
+                patch("app.warmup.install_dns_cache") as install, \
+                patch("app.warmup.socket.getaddrinfo") as resolve:
+            warmup.resolve_hosts()
+
+        assert list(install.call_args.args[0]) == ["api.example.com", "auth.example.com"]
+        assert resolve.call_count == 2
+
+
+class TestForksChildren:
+    """Test cases for detecting a prefork parent"""
+
+    @pytest.mark.parametrize("pool_cls, expected", [
+        ("prefork", True),
+        ("threads", False),
+        ("solo", False),
+    ])
+    def test_pool_names(self, pool_cls, expected):
+        """Test only the prefork pool forks children"""
+        assert _forks_children(MagicMock(pool_cls=pool_cls)) is expected
+
+    def test_no_worker(self):
+        """Test a missing sender counts as not forking"""
+        assert _forks_children(None) is False
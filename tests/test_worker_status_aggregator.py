@@ -0,0 +1,175 @@
+"""
+Tests for worker-side aggregation of worker status reports.
+Run with: pytest tests/test_worker_status_aggregator.py -v
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.api.worker_status_aggregator import WorkerStatusAggregator, fingerprint
+from app.tasks.worker_status import update_worker_status
+
+
+def crash(line=42, address="0x7f3a2c"):
+    return (
+        "Traceback (most recent call last):\n"
+        f'  File "/srv/render/node.py", line {line}, in render\n'
+        "    encode(frame)\n"
+        f"RuntimeError: encoder crashed at {address}\n"
+    )
+
+
+@pytest.fixture
+def mock_report():
+    with patch("app.api.worker_status_aggregator.report_worker_status", return_value=True) as mock:
+        yield mock
+
+
+def sent_reports(mock_report):
+    return {call.kwargs["worker_name"]: call.kwargs for call in mock_report.call_args_list}
+
+
+class TestFingerprint:
+    """Test cases for error fingerprints"""
+
+    def test_same_frames_same_fingerprint(self):
+        """Test line numbers and addresses do not change the fingerprint"""
+        assert fingerprint("a", crash(42, "0x1")) == fingerprint("b", crash(57, "0x2"))
+
+    def test_other_exception_other_fingerprint(self):
+        """Test a different exception type gets its own fingerprint"""
+        assert fingerprint(None, crash()) != fingerprint(None, crash().replace("RuntimeError", "MemoryError"))
+
+    def test_message_without_traceback(self):
+        """Test messages differing only in numbers share a fingerprint"""
+        assert fingerprint("GPU 0 lost after 12s", None) == fingerprint("GPU 3 lost after 40s", None)
+        assert fingerprint("GPU 0 lost", None) != fingerprint("disk full", None)
+
+
+class TestWorkerStatusAggregator:
+    """Test cases for WorkerStatusAggregator"""
+
+    def test_events_merged_per_worker(self, mock_report):
+        """Test events for one worker collapse into one report with the latest state"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        aggregator.submit("node-1", hostname="host-a", extra={"gpu": "A10"})
+        aggregator.submit("node-1", task_id="task-1", extra={"version": "2"})
+        aggregator.submit("node-1", is_available=False, task_id="task-2")
+        aggregator.submit("node-2", hostname="host-b")
+
+        assert aggregator.flush() == 2
+        report = sent_reports(mock_report)["node-1"]
+        assert report["hostname"] == "host-a"
+        assert report["is_available"] is False
+        assert report["task_id"] == "task-2"
+        assert report["extra"]["gpu"] == "A10"
+        assert report["extra"]["version"] == "2"
+        assert report["extra"]["report"]["events"] == 3
+        assert "throughput" not in report["extra"]["report"]
+        assert aggregator.flush() == 0
+
+    def test_repeated_errors_deduplicated(self, mock_report):
+        """Test the same crash reported many times is sent once with a count"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        for index in range(5):
+            aggregator.submit(
+                "node-1", is_available=False, task_id=f"task-{index % 2}",
+                error_message="encoder crashed", traceback=crash(40 + index),
+            )
+
+        aggregator.flush()
+        report = mock_report.call_args.kwargs
+        errors = report["extra"]["report"]["errors"]
+        assert len(errors) == 1
+        assert errors[0]["count"] == 5
+        assert errors[0]["task_ids"] == ["task-0", "task-1"]
+        assert report["error_message"] == "encoder crashed"
+        # The traceback is only sent once, in the top-level field
+        assert report["traceback"] == crash(40)
+        assert errors[0]["traceback"] is None
+
+    def test_traceback_sent_once(self, mock_report):
+        """Test a later report refers to an already sent traceback by fingerprint only"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        aggregator.submit("node-1", is_available=False, error_message="boom", traceback=crash())
+        aggregator.flush()
+        aggregator.submit("node-1", is_available=False, error_message="boom", traceback=crash())
+        aggregator.flush()
+
+        first, second = (call.kwargs for call in mock_report.call_args_list)
+        assert first["traceback"] == crash()
+        assert second["traceback"] is None
+        assert second["extra"]["report"]["errors"][0]["fingerprint"] == fingerprint("boom", crash())
+
+    def test_traceback_resent_after_failed_report(self, mock_report):
+        """Test a traceback whose report failed is sent again"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        mock_report.return_value = False
+        aggregator.submit("node-1", is_available=False, error_message="boom", traceback=crash())
+        aggregator.flush()
+        mock_report.return_value = True
+        aggregator.submit("node-1", is_available=False, error_message="boom", traceback=crash())
+        aggregator.flush()
+
+        assert mock_report.call_args.kwargs["traceback"] == crash()
+
+    def test_availability_transitions_are_urgent(self, mock_report):
+        """Test only new workers and availability changes are flushed right away"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        assert aggregator.submit("node-1") is True
+        assert aggregator.submit("node-1") is False
+        assert aggregator.submit("node-2") is True
+
+        assert aggregator.flush(urgent_only=True) == 2
+        assert aggregator.submit("node-1", task_id="task-1") is False
+        assert aggregator.flush(urgent_only=True) == 0
+        assert aggregator.flush() == 1
+
+    def test_flapping_worker_waits_for_regular_flush(self, mock_report):
+        """Test a worker changing state again within the interval is not flushed right away"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        aggregator.submit("node-1")
+        aggregator.flush(urgent_only=True)
+
+        assert aggregator.submit("node-1", is_available=False, error_message="boom") is False
+        assert aggregator.flush(urgent_only=True) == 0
+
+    def test_transition_flushed_by_background_thread(self, mock_report):
+        """Test the report thread sends a transition without waiting for the interval"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        aggregator.start()
+        try:
+            aggregator.submit("node-1", is_available=False)
+            for _ in range(200):
+                if mock_report.called:
+                    break
+                aggregator._stopped.wait(0.01)
+        finally:
+            aggregator.stop()
+
+        assert mock_report.call_args.kwargs["is_available"] is False
+
+
+class TestUpdateWorkerStatusTask:
+    """Test cases for the update_worker_status task with aggregation"""
+
+    def test_event_aggregated_when_enabled(self):
+        """Test the task hands the event to the aggregator instead of calling the API"""
+        aggregator = WorkerStatusAggregator(interval_seconds=60)
+        with patch("app.tasks.worker_status.get_worker_status_aggregator", return_value=aggregator), \
+                patch("app.tasks.worker_status.report_worker_status") as mock_direct:
+            result = update_worker_status("node-1", is_available=False, error_message="boom")
+
+        assert result == {"success": True, "aggregated": True}
+        mock_direct.assert_not_called()
+        assert "node-1" in aggregator._pending
+
+    @patch("app.tasks.worker_status.report_worker_status", return_value=True)
+    def test_event_sent_directly_when_disabled(self, mock_direct):
+        """Test WORKER_STATUS_AGGREGATE_SECONDS=0 keeps one API call per event"""
+        with patch("app.config.config.WORKER_STATUS_AGGREGATE_SECONDS", 0):
+            result = update_worker_status("node-1")
+
+        assert result == {"success": True}
+        mock_direct.assert_called_once()